@@ -81,11 +81,17 @@ class Settings(BaseSettings):
     QUEUE_VISIBILITY_TIMEOUT: int = Field(default=300)  # 5分钟
     QUEUE_MAX_RETRIES: int = Field(default=3)
     WORKER_HEARTBEAT_INTERVAL: int = Field(default=30)  # 30秒
+    # 每个 Worker 同时处理的任务数（分析主要在等待 LLM I/O，可适当调大；仍受队列全局/用户并发限制）
+    WORKER_CONCURRENCY: int = Field(default=1)
+    # 在独立子进程中执行分析任务（隔离 CPU 密集步骤和单个任务的崩溃）
+    WORKER_PROCESS_POOL_ENABLED: bool = Field(default=False)
 
 
     # 队列轮询/清理间隔（秒）
     QUEUE_POLL_INTERVAL_SECONDS: float = Field(default=1.0)
     QUEUE_CLEANUP_INTERVAL_SECONDS: float = Field(default=60.0)
+    # Worker 阻塞出队等待时间（秒，BLMOVE），0 表示按轮询间隔轮询；需小于 Redis 套接字超时（10秒）
+    QUEUE_BLOCKING_TIMEOUT_SECONDS: float = Field(default=5.0)
 
     # 并发控制
     DEFAULT_USER_CONCURRENT_LIMIT: int = Field(default=3)
@@ -596,6 +596,13 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"UserService cleanup error: {e}")
 
+        # 关闭 SSE 进度扇出中心的 PubSub 连接
+        try:
+            from app.services.progress.pubsub_hub import get_progress_hub
+            await get_progress_hub().close()
+        except Exception as e:
+            logger.warning(f"SSE progress hub cleanup error: {e}")
+
         await close_db()
         logger.info("TradingAgents FastAPI backend stopped")
 
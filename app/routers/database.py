@@ -24,6 +24,11 @@ class BackupRequest(BaseModel):
     name: str
     collections: List[str] = []  # 空列表表示备份所有集合
 
+class RestoreRequest(BaseModel):
+    """恢复请求"""
+    collections: List[str] = []  # 空列表表示恢复备份中的所有集合
+    overwrite: bool = False
+
 class ImportRequest(BaseModel):
     """导入请求"""
     collection: str
@@ -255,6 +260,32 @@ async def delete_backup(
             detail=f"删除备份失败: {str(e)}"
         )
 
+@router.post("/backups/{backup_id}/restore")
+async def restore_backup(
+    backup_id: str,
+    request: RestoreRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """从备份恢复数据"""
+    try:
+        logger.info(f"♻️ 用户 {current_user['username']} 恢复备份: {backup_id}")
+        result = await database_service.restore_backup(
+            backup_id,
+            collections=request.collections if request.collections else None,
+            overwrite=request.overwrite
+        )
+        return {
+            "success": True,
+            "message": "备份恢复成功",
+            "data": result
+        }
+    except Exception as e:
+        logger.error(f"恢复备份失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"恢复备份失败: {str(e)}"
+        )
+
 @router.post("/cleanup")
 async def cleanup_old_data(
     days: int = 30,
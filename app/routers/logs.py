@@ -6,7 +6,7 @@
 import logging
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.routers.auth_db import get_current_user
@@ -142,22 +142,23 @@ async def export_logs(
         logger.info(f"📤 用户 {current_user['username']} 导出日志文件")
         
         service = get_log_export_service()
-        export_path = service.export_logs(
-            filenames=request.filenames,
-            level=request.level,
-            start_time=request.start_time,
-            end_time=request.end_time,
-            format=request.format
-        )
-        
-        # 返回文件下载
-        import os
-        filename = os.path.basename(export_path)
+        if request.format not in ("zip", "txt"):
+            raise ValueError(f"不支持的导出格式: {request.format}")
+        files_to_export = service.resolve_export_files(request.filenames)
+
+        # 流式返回导出内容，不在服务端生成完整文件
+        from datetime import datetime
+        filename = f"logs_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{request.format}"
         media_type = "application/zip" if request.format == "zip" else "text/plain"
         
-        return FileResponse(
-            path=export_path,
-            filename=filename,
+        return StreamingResponse(
+            service.iter_export(
+                files_to_export,
+                level=request.level,
+                start_time=request.start_time,
+                end_time=request.end_time,
+                format=request.format
+            ),
             media_type=media_type,
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
@@ -0,0 +1,169 @@
+"""Pool of reusable TradingAgentsGraph instances.
+
+Building a TradingAgentsGraph creates LLM clients, ChromaDB collections, tool
+nodes and compiles the LangGraph workflow, which costs several seconds per
+analysis. Instances are keyed by (selected analysts, research depth, full
+config) and checked out exclusively, so concurrent tasks never share one graph
+while idle graphs are reused across tasks.
+
+Graphs hold LLM clients built from the provider/model configuration. ConfigService
+calls invalidate_trading_graph_pool() after LLM/provider writes; other processes
+(workers) pick up changes through the ``llm_config_version`` entry that
+create_analysis_config puts into the config, which is part of the key digest.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[Tuple[str, ...], str, str]
+
+
+def _default_graph_factory(config: Dict[str, Any]):
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+    return TradingAgentsGraph(
+        selected_analysts=config.get("selected_analysts", ["market", "fundamentals"]),
+        debug=config.get("debug", False),
+        config=config,
+    )
+
+
+def _activate_graph_config(graph) -> None:
+    """Re-apply a pooled graph's config to the process-wide config holders.
+
+    TradingAgentsGraph.__init__ pushes its config into the dataflow interface and
+    the class-level Toolkit config; a reused instance must do the same so tools
+    see the settings of the task that checked it out.
+    """
+    config = getattr(graph, "config", None)
+    if not config:
+        return
+    try:
+        from tradingagents.dataflows.interface import set_config
+
+        set_config(config)
+    except Exception as e:
+        logger.warning(f"⚠️ [Graph池] 应用数据流配置失败: {e}")
+    toolkit = getattr(graph, "toolkit", None)
+    if toolkit is not None and hasattr(toolkit, "update_config"):
+        toolkit.update_config(config)
+
+
+class TradingGraphPool:
+    """Thread-safe pool of compiled TradingAgentsGraph instances."""
+
+    def __init__(
+        self,
+        max_idle_per_key: Optional[int] = None,
+        max_keys: Optional[int] = None,
+        graph_factory: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ):
+        self.max_idle_per_key = max_idle_per_key or int(os.getenv("TRADING_GRAPH_POOL_MAX_IDLE", "3"))
+        self.max_keys = max_keys or int(os.getenv("TRADING_GRAPH_POOL_MAX_KEYS", "8"))
+        self._graph_factory = graph_factory or _default_graph_factory
+        self._lock = threading.Lock()
+        # key -> idle graphs; OrderedDict keeps LRU order for eviction
+        self._idle: "OrderedDict[PoolKey, List[Any]]" = OrderedDict()
+        self._created = 0
+        self._reused = 0
+
+    @staticmethod
+    def make_key(config: Dict[str, Any]) -> PoolKey:
+        """Build the pool key: analysts, research depth and a digest of the whole config."""
+        analysts = tuple(config.get("selected_analysts") or ("market", "fundamentals"))
+        research_depth = str(config.get("research_depth", ""))
+        config_json = json.dumps(config, sort_keys=True, default=str)
+        digest = hashlib.sha256(config_json.encode("utf-8")).hexdigest()
+        return analysts, research_depth, digest
+
+    def acquire(self, config: Dict[str, Any]):
+        """Check out a graph for exclusive use, building one if none is idle."""
+        key = self.make_key(config)
+        graph = None
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                graph = idle.pop()
+                self._idle.move_to_end(key)
+                self._reused += 1
+
+        if graph is not None:
+            logger.info(f"♻️ [Graph池] 复用TradingAgents实例 (实例ID: {id(graph)}, 分析师: {list(key[0])})")
+            _activate_graph_config(graph)
+            return graph
+
+        # Build outside the lock: construction takes seconds and must not block other checkouts
+        logger.info(f"🔧 [Graph池] 创建新的TradingAgents实例 (分析师: {list(key[0])}, 研究深度: {key[1]})")
+        graph = self._graph_factory(config)
+        with self._lock:
+            self._created += 1
+        graph._pool_key = key
+        return graph
+
+    def release(self, graph) -> None:
+        """Return a graph to the pool; surplus instances are dropped."""
+        key = getattr(graph, "_pool_key", None)
+        if key is None:
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) < self.max_idle_per_key:
+                idle.append(graph)
+            while len(self._idle) > self.max_keys:
+                evicted_key, evicted = self._idle.popitem(last=False)
+                logger.info(f"🗑️ [Graph池] 淘汰最久未使用的配置: {list(evicted_key[0])} ({len(evicted)} 个实例)")
+
+    @contextmanager
+    def checkout(self, config: Dict[str, Any]) -> Iterator[Any]:
+        """Context manager around acquire/release."""
+        graph = self.acquire(config)
+        try:
+            yield graph
+        finally:
+            self.release(graph)
+
+    def clear(self) -> None:
+        """Drop all idle graphs (e.g. after LLM/provider configuration changes)."""
+        with self._lock:
+            self._idle.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "keys": len(self._idle),
+                "idle": sum(len(graphs) for graphs in self._idle.values()),
+                "created": self._created,
+                "reused": self._reused,
+            }
+
+
+_trading_graph_pool: Optional[TradingGraphPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_trading_graph_pool() -> TradingGraphPool:
+    """Return the process-wide TradingGraphPool."""
+    global _trading_graph_pool
+    if _trading_graph_pool is None:
+        with _pool_lock:
+            if _trading_graph_pool is None:
+                _trading_graph_pool = TradingGraphPool()
+    return _trading_graph_pool
+
+
+def invalidate_trading_graph_pool() -> None:
+    """Drop this process's idle graphs after LLM/provider configuration writes."""
+    pool = _trading_graph_pool
+    if pool is not None:
+        pool.clear()
+        logger.info("🔄 [Graph池] LLM配置已变更，清空空闲的TradingAgents实例")
@@ -21,6 +21,7 @@ from pymongo import UpdateOne
 
 from app.core.database import get_mongo_db
 from app.core.config import settings
+from app.services.stock_search_index import invalidate_stock_search_index
 
 from app.services.basics_sync import (
     fetch_stock_basic_df as _fetch_stock_basic_df_util,
@@ -354,6 +355,8 @@ class BasicsSyncService:
             logger.exception(f"Stock basics sync failed: {e}")
             return stats.__dict__
         finally:
+            # 基础信息已变化，下次搜索时重建内存索引
+            invalidate_stock_search_index("CN")
             async with self._lock:
                 self._running = False
 
@@ -12,6 +12,8 @@ from bson import ObjectId
 
 from app.core.database import get_mongo_db
 from app.core.unified_config import unified_config
+from tradingagents.config.datasource_snapshot import invalidate_datasource_config_snapshot
+from app.services.analysis.graph_pool import invalidate_trading_graph_pool
 from app.models.config import (
     SystemConfig, LLMConfig, DataSourceConfig, DatabaseConfig,
     ModelProvider, DataSourceType, DatabaseType, LLMProvider,
@@ -197,6 +199,7 @@ class ConfigService:
                 return False
 
             await groupings_collection.insert_one(grouping.model_dump())
+            invalidate_datasource_config_snapshot()
             return True
         except Exception as e:
             print(f"❌ 添加数据源到分类失败: {e}")
@@ -212,6 +215,7 @@ class ConfigService:
                 "data_source_name": data_source_name,
                 "market_category_id": category_id
             })
+            invalidate_datasource_config_snapshot()
             return result.deleted_count > 0
         except Exception as e:
             print(f"❌ 从分类中移除数据源失败: {e}")
@@ -280,6 +284,7 @@ class ConfigService:
                     else:
                         logger.warning(f"⚠️ [优先级同步] 未找到匹配的数据源配置: {data_source_name}")
 
+            invalidate_datasource_config_snapshot()
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"❌ 更新数据源分组关系失败: {e}")
@@ -352,6 +357,7 @@ class ConfigService:
             else:
                 print(f"⚠️ [优先级同步] 未找到激活的系统配置")
 
+            invalidate_datasource_config_snapshot()
             return True
         except Exception as e:
             print(f"❌ 更新分类数据源排序失败: {e}")
@@ -552,6 +558,10 @@ class ConfigService:
 
             insert_result = await config_collection.insert_one(config_dict)
             print(f"📝 新配置ID: {insert_result.inserted_id}")
+            # 数据源优先级/启用状态可能变化，使配置快照失效
+            invalidate_datasource_config_snapshot()
+            # LLM 配置可能变化，丢弃持有旧客户端的 TradingAgents 实例
+            invalidate_trading_graph_pool()
 
             # 验证保存结果
             saved_config = await config_collection.find_one({"_id": insert_result.inserted_id})
@@ -2891,6 +2901,7 @@ class ConfigService:
                 del provider_data["_id"]
 
             result = await providers_collection.insert_one(provider_data)
+            invalidate_trading_graph_pool()
             return str(result.inserted_id)
         except Exception as e:
             print(f"添加厂家失败: {e}")
@@ -2929,6 +2940,8 @@ class ConfigService:
             # 修复：matched_count > 0 表示找到了记录（即使没有修改）
             # modified_count > 0 只有在实际修改了字段时才为真
             # 如果记录存在但值相同，modified_count 为 0，但这不应该返回 404
+            if result.matched_count > 0:
+                invalidate_trading_graph_pool()
             return result.matched_count > 0
         except Exception as e:
             print(f"更新厂家失败: {e}")
@@ -2978,6 +2991,8 @@ class ConfigService:
                 result = await providers_collection.delete_one({"_id": provider_id})
 
             success = result.deleted_count > 0
+            if success:
+                invalidate_trading_graph_pool()
 
             print(f"🗑️ 删除结果: {success}, deleted_count: {result.deleted_count}")
             return success
@@ -3015,6 +3030,8 @@ class ConfigService:
                     {"$set": {"is_active": is_active, "updated_at": now_tz()}}
                 )
 
+            if result.matched_count > 0:
+                invalidate_trading_graph_pool()
             return result.matched_count > 0
         except Exception as e:
             print(f"切换厂家状态失败: {e}")
@@ -3107,6 +3124,8 @@ class ConfigService:
             if skipped_count > 0:
                 message_parts.append(f"跳过 {skipped_count} 个已存在的")
 
+            if added_count or updated_count:
+                invalidate_trading_graph_pool()
             return {
                 "success": True,
                 "added": added_count,
@@ -3229,6 +3248,7 @@ class ConfigService:
 
             if total_changes > 0:
                 message = "迁移完成：" + "，".join(message_parts)
+                invalidate_trading_graph_pool()
             else:
                 message = "所有厂家都已配置，无需迁移"
 
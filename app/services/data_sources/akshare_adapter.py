@@ -206,19 +206,17 @@ class AKShareAdapter(DataSourceAdapter):
             return None
 
         try:
-            import akshare as ak  # type: ignore
+            from tradingagents.dataflows.providers.china.spot_snapshot import get_spot_snapshot_service
 
-            # 根据 source 参数选择接口
-            if source == "sina":
-                df = ak.stock_zh_a_spot()  # 新浪财经接口
-                logger.info("使用 AKShare 新浪财经接口获取实时行情")
-            else:  # 默认使用东方财富
-                df = ak.stock_zh_a_spot_em()  # 东方财富接口
-                logger.info("使用 AKShare 东方财富接口获取实时行情")
+            # 根据 source 参数选择接口（新浪财经 / 东方财富），读取进程内共享的全市场快照
+            source = "sina" if source == "sina" else "eastmoney"
+            snapshot = get_spot_snapshot_service().get_snapshot(source)
+            logger.info(f"使用 AKShare {source} 全市场快照获取实时行情")
 
-            if df is None or getattr(df, "empty", True):
+            if snapshot is None:
                 logger.warning(f"AKShare {source} 返回空数据")
                 return None
+            df = snapshot.data
 
             # 列名兼容（两个接口的列名可能不同）
             code_col = next((c for c in ["代码", "code", "symbol", "股票代码"] if c in df.columns), None)
@@ -13,7 +13,8 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 import logging
 
-from bson import ObjectId
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
 
 from app.core.database import get_mongo_db
 from app.core.config import settings
@@ -21,6 +22,15 @@ from .serialization import serialize_document
 
 logger = logging.getLogger(__name__)
 
+# 流式备份：按批读取游标/插入，多个集合并发处理
+BACKUP_FORMAT = "ndjson"
+BACKUP_MANIFEST = "manifest.json"
+BACKUP_BATCH_SIZE = int(os.getenv("BACKUP_BATCH_SIZE", "1000"))
+BACKUP_CONCURRENCY = int(os.getenv("BACKUP_CONCURRENCY", "3"))
+RESTORE_BATCH_SIZE = int(os.getenv("RESTORE_BATCH_SIZE", "1000"))
+# MongoDB 重复键错误码（不覆盖恢复时跳过已存在的 _id）
+DUPLICATE_KEY_ERROR = 11000
+
 
 def _check_mongodump_available() -> bool:
     """检查 mongodump 命令是否可用"""
@@ -136,55 +146,72 @@ async def create_backup_native(name: str, backup_dir: str, collections: Optional
 
 async def create_backup(name: str, backup_dir: str, collections: Optional[List[str]] = None, user_id: str | None = None) -> Dict[str, Any]:
     """
-    创建数据库备份（Python 实现，兼容性好但速度较慢）
+    创建数据库备份（Python 实现，流式写入）
+
+    每个集合写为一个 gzip 压缩的 NDJSON 文件（MongoDB Extended JSON，保留 ObjectId/日期等类型），
+    边遍历游标边按批写入，多个集合并发备份；内存占用约为 并发数 x 批大小，与数据库大小无关。
 
-    对于大数据量（>100MB），建议使用 create_backup_native() 方法
+    对于大数据量，仍建议安装 MongoDB Database Tools 使用 create_backup_native()
     """
     db = get_mongo_db()
 
     backup_id = str(ObjectId())
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    backup_filename = f"backup_{name}_{timestamp}.json.gz"
-    backup_path = os.path.join(backup_dir, backup_filename)
+    backup_dirname = f"backup_{name}_{timestamp}"
+    backup_path = os.path.join(backup_dir, backup_dirname)
 
     if not collections:
         collections = await db.list_collection_names()
+        collections = [c for c in collections if not c.startswith("system.")]
+
+    os.makedirs(backup_path, exist_ok=True)
+    logger.info(f"🔄 开始流式备份: {name}，{len(collections)} 个集合")
+
+    semaphore = asyncio.Semaphore(BACKUP_CONCURRENCY)
+
+    async def _dump(collection_name: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await _dump_collection(db, collection_name, backup_path)
 
-    backup_data: Dict[str, Any] = {
+    try:
+        collection_files = await asyncio.gather(*[_dump(c) for c in collections])
+    except Exception as e:
+        logger.error(f"❌ 流式备份失败: {e}")
+        await asyncio.to_thread(shutil.rmtree, backup_path, True)
+        raise
+
+    created_at = datetime.utcnow()
+    manifest = {
+        "format": BACKUP_FORMAT,
+        "version": 1,
         "backup_id": backup_id,
         "name": name,
-        "created_at": datetime.utcnow().isoformat(),
+        "created_at": created_at.isoformat(),
         "created_by": user_id,
-        "collections": collections,
-        "data": {},
+        "collections": collection_files,
     }
 
-    for collection_name in collections:
-        collection = db[collection_name]
-        documents: List[dict] = []
-        async for doc in collection.find():
-            documents.append(serialize_document(doc))
-        backup_data["data"][collection_name] = documents
-
-    os.makedirs(backup_dir, exist_ok=True)
-
-    # 🔥 使用 asyncio.to_thread 将阻塞的文件 I/O 操作放到线程池执行
-    def _write_backup():
-        with gzip.open(backup_path, "wt", encoding="utf-8") as f:
-            json.dump(backup_data, f, ensure_ascii=False, indent=2)
-        return os.path.getsize(backup_path)
+    def _write_manifest():
+        with open(os.path.join(backup_path, BACKUP_MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return sum(
+            os.path.getsize(os.path.join(backup_path, filename))
+            for filename in os.listdir(backup_path)
+        )
 
-    file_size = await asyncio.to_thread(_write_backup)
+    file_size = await asyncio.to_thread(_write_manifest)
+    logger.info(f"✅ 流式备份完成: {name}，共 {sum(c['documents'] for c in collection_files)} 条文档")
 
     backup_meta = {
         "_id": ObjectId(backup_id),
         "name": name,
-        "filename": backup_filename,
+        "filename": backup_dirname,
         "file_path": backup_path,
         "size": file_size,
         "collections": collections,
-        "created_at": datetime.utcnow(),
+        "created_at": created_at,
         "created_by": user_id,
+        "backup_type": BACKUP_FORMAT,
     }
 
     await db.database_backups.insert_one(backup_meta)
@@ -192,14 +219,175 @@ async def create_backup(name: str, backup_dir: str, collections: Optional[List[s
     return {
         "id": backup_id,
         "name": name,
-        "filename": backup_filename,
+        "filename": backup_dirname,
         "file_path": backup_path,
         "size": file_size,
         "collections": collections,
         "created_at": backup_meta["created_at"].isoformat(),
+        "backup_type": BACKUP_FORMAT,
+    }
+
+
+async def _dump_collection(db, collection_name: str, backup_path: str) -> Dict[str, Any]:
+    """按批遍历游标，将集合写入 {collection}.ndjson.gz"""
+    filename = f"{collection_name}.ndjson.gz"
+    f = await asyncio.to_thread(gzip.open, os.path.join(backup_path, filename), "wt", encoding="utf-8")
+
+    def _write_batch(docs: List[dict]):
+        f.write("".join(json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS) + "\n" for doc in docs))
+
+    count = 0
+    try:
+        batch: List[dict] = []
+        async for doc in db[collection_name].find().batch_size(BACKUP_BATCH_SIZE):
+            batch.append(doc)
+            if len(batch) >= BACKUP_BATCH_SIZE:
+                await asyncio.to_thread(_write_batch, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(_write_batch, batch)
+            count += len(batch)
+    finally:
+        await asyncio.to_thread(f.close)
+
+    logger.info(f"💾 备份集合 {collection_name}：{count} 条文档")
+    return {"name": collection_name, "file": filename, "documents": count}
+
+
+async def restore_backup(backup_id: str, collections: Optional[List[str]] = None, overwrite: bool = False) -> Dict[str, Any]:
+    """
+    从 Python 备份恢复数据（按批 insert_many）
+
+    Args:
+        backup_id: 备份ID
+        collections: 只恢复指定集合（默认全部）
+        overwrite: 恢复前是否清空目标集合
+    """
+    db = get_mongo_db()
+    backup = await db.database_backups.find_one({"_id": ObjectId(backup_id)})
+    if not backup:
+        raise Exception("备份不存在")
+
+    backup_type = backup.get("backup_type", "python")
+    if backup_type == "mongodump":
+        raise Exception("mongodump 备份请使用 mongorestore 恢复")
+    if backup_type != BACKUP_FORMAT:
+        return await _restore_legacy_backup(db, backup["file_path"], collections, overwrite)
+
+    backup_path = backup["file_path"]
+
+    def _read_manifest():
+        with open(os.path.join(backup_path, BACKUP_MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    manifest = await asyncio.to_thread(_read_manifest)
+    entries = [c for c in manifest["collections"] if not collections or c["name"] in collections]
+    semaphore = asyncio.Semaphore(BACKUP_CONCURRENCY)
+
+    async def _restore(entry: Dict[str, Any]) -> int:
+        async with semaphore:
+            return await _restore_collection(db, entry["name"], os.path.join(backup_path, entry["file"]), overwrite)
+
+    counts = await asyncio.gather(*[_restore(entry) for entry in entries])
+    return {
+        "backup_id": backup_id,
+        "collections": [entry["name"] for entry in entries],
+        "total_inserted": sum(inserted for inserted, _ in counts),
+        "total_skipped": sum(skipped for _, skipped in counts),
+        "overwrite": overwrite,
     }
 
 
+async def _insert_batch(collection_obj, docs: List[dict]) -> tuple[int, int]:
+    """
+    无序批量插入；目标集合已有相同 _id 的文档时跳过
+
+    Returns:
+        (插入数量, 因 _id 重复跳过的数量)
+    """
+    try:
+        res = await collection_obj.insert_many(docs, ordered=False)
+        return len(res.inserted_ids), 0
+    except BulkWriteError as e:
+        details = e.details or {}
+        errors = details.get("writeErrors", [])
+        others = [err for err in errors if err.get("code") != DUPLICATE_KEY_ERROR]
+        if others:
+            raise
+        return details.get("nInserted", 0), len(errors)
+
+
+async def _restore_collection(db, collection_name: str, file_path: str, overwrite: bool) -> tuple[int, int]:
+    """流式读取 NDJSON 备份文件并按批插入（不覆盖时跳过已存在的 _id）"""
+    collection_obj = db[collection_name]
+    if overwrite:
+        deleted = await collection_obj.delete_many({})
+        logger.info(f"🗑️ 清空集合 {collection_name}：删除 {deleted.deleted_count} 条文档")
+
+    f = await asyncio.to_thread(gzip.open, file_path, "rt", encoding="utf-8")
+
+    def _read_batch() -> List[dict]:
+        docs = []
+        for line in f:
+            if line.strip():
+                docs.append(json_util.loads(line))
+                if len(docs) >= RESTORE_BATCH_SIZE:
+                    break
+        return docs
+
+    inserted = skipped = 0
+    try:
+        while True:
+            docs = await asyncio.to_thread(_read_batch)
+            if not docs:
+                break
+            batch_inserted, batch_skipped = await _insert_batch(collection_obj, docs)
+            inserted += batch_inserted
+            skipped += batch_skipped
+    finally:
+        await asyncio.to_thread(f.close)
+
+    if skipped:
+        logger.info(f"✅ 恢复集合 {collection_name}：{inserted} 条文档，跳过已存在的 {skipped} 条")
+    else:
+        logger.info(f"✅ 恢复集合 {collection_name}：{inserted} 条文档")
+    return inserted, skipped
+
+
+async def _restore_legacy_backup(db, file_path: str, collections: Optional[List[str]], overwrite: bool) -> Dict[str, Any]:
+    """恢复旧版整体 JSON 备份（需整体加载，仅用于兼容）"""
+    logger.warning(f"⚠️ 旧版 JSON 备份需整体加载到内存: {file_path}")
+
+    def _load():
+        with gzip.open(file_path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    data = (await asyncio.to_thread(_load)).get("data", {})
+    total_inserted = total_skipped = 0
+    restored = []
+    for coll_name, documents in data.items():
+        if collections and coll_name not in collections:
+            continue
+        collection_obj = db[coll_name]
+        if overwrite:
+            await collection_obj.delete_many({})
+        for doc in documents:
+            if "_id" in doc and isinstance(doc["_id"], str):
+                try:
+                    doc["_id"] = ObjectId(doc["_id"])
+                except Exception:
+                    del doc["_id"]
+            _convert_date_fields(doc)
+        for i in range(0, len(documents), RESTORE_BATCH_SIZE):
+            inserted, skipped = await _insert_batch(collection_obj, documents[i:i + RESTORE_BATCH_SIZE])
+            total_inserted += inserted
+            total_skipped += skipped
+        restored.append(coll_name)
+    return {"collections": restored, "total_inserted": total_inserted,
+            "total_skipped": total_skipped, "overwrite": overwrite}
+
+
 async def list_backups() -> List[Dict[str, Any]]:
     db = get_mongo_db()
     backups: List[Dict[str, Any]] = []
@@ -223,12 +411,11 @@ async def delete_backup(backup_id: str) -> None:
         raise Exception("备份不存在")
     if os.path.exists(backup["file_path"]):
         # 🔥 使用 asyncio.to_thread 将阻塞的文件删除操作放到线程池执行
-        backup_type = backup.get("backup_type", "python")
-        if backup_type == "mongodump":
-            # mongodump 备份是目录，需要递归删除
+        if os.path.isdir(backup["file_path"]):
+            # mongodump 和流式备份都是目录，需要递归删除
             await asyncio.to_thread(shutil.rmtree, backup["file_path"])
         else:
-            # Python 备份是单个文件
+            # 旧版 Python 备份是单个文件
             await asyncio.to_thread(os.remove, backup["file_path"])
     await db.database_backups.delete_one({"_id": ObjectId(backup_id)})
 
@@ -155,6 +155,11 @@ class DatabaseService:
         """删除备份（委托子模块）"""
         await _db_backups.delete_backup(backup_id)
 
+    async def restore_backup(self, backup_id: str, collections: List[str] = None,
+                             overwrite: bool = False) -> Dict[str, Any]:
+        """从备份恢复数据（委托子模块）"""
+        return await _db_backups.restore_backup(backup_id, collections=collections, overwrite=overwrite)
+
     async def cleanup_old_data(self, days: int) -> Dict[str, Any]:
         """清理旧数据（委托子模块）"""
         return await _db_cleanup.cleanup_old_data(days)
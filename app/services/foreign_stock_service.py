@@ -10,6 +10,7 @@ import logging
 import json
 import re
 import asyncio
+import functools
 from collections import defaultdict
 
 # 复用现有缓存系统
@@ -17,6 +18,8 @@ from tradingagents.dataflows.cache import get_cache
 
 # 复用现有数据源提供者
 from tradingagents.dataflows.providers.hk.hk_stock import HKStockProvider
+from tradingagents.dataflows.source_executor import get_source_executor
+from tradingagents.config.datasource_snapshot import get_datasource_config_snapshot_async
 
 logger = logging.getLogger(__name__)
 
@@ -205,22 +208,20 @@ class ForeignStockService:
 
             logger.info(f"📊 [HK有效数据源] {valid_priority} (股票: {code})")
 
+            # 🔥 经由执行层按优先级调用（记录耗时/错误，熔断跳过持续失败的数据源，可选对冲）
+            candidates = []
             for source_name in valid_priority:
-                source_key = source_name.lower()
-                handler_name, handler_func = source_handlers[source_key]
-                try:
-                    # 🔥 使用 asyncio.to_thread 避免阻塞事件循环
-                    quote_data = await asyncio.to_thread(handler_func, code)
-                    data_source = handler_name
+                handler_name, handler_func = source_handlers[source_name.lower()]
+                candidates.append((handler_name, functools.partial(handler_func, code)))
 
-                    if quote_data:
-                        logger.info(f"✅ {data_source}获取港股行情成功: {code}")
-                        break
-                except Exception as e:
-                    logger.warning(f"⚠️ {source_name}获取失败 ({code}): {e}")
-                    continue
+            # 🔥 使用 asyncio.to_thread 避免阻塞事件循环
+            quote_data, data_source = await asyncio.to_thread(
+                get_source_executor("hk_quote").run, candidates, bool
+            )
+            if data_source:
+                logger.info(f"✅ {data_source}获取港股行情成功: {code}")
 
-            if not quote_data:
+            if not data_source:
                 raise Exception(f"无法获取港股{code}的行情数据：所有数据源均失败")
 
             # 5. 格式化数据
@@ -250,14 +251,11 @@ class ForeignStockService:
         market_category_id = market_category_map.get(market)
 
         try:
-            # 从 datasource_groupings 集合查询
-            groupings = await self.db.datasource_groupings.find({
-                "market_category_id": market_category_id,
-                "enabled": True
-            }).sort("priority", -1).to_list(length=None)
-
-            if groupings:
-                priority_list = [g["data_source_name"] for g in groupings]
+            # 从进程内配置快照读取 datasource_groupings（已按优先级降序）
+            snapshot = await get_datasource_config_snapshot_async(self.db)
+            priority_list = snapshot.grouping_names(market_category_id)
+
+            if priority_list:
                 logger.info(f"📊 [{market}数据源优先级] 从数据库读取: {priority_list}")
                 return priority_list
         except Exception as e:
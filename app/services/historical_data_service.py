@@ -5,15 +5,38 @@
 """
 import asyncio
 import logging
+import os
 from datetime import datetime, date
 from typing import Dict, Any, List, Optional, Union
+import numpy as np
 import pandas as pd
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.core.database import get_database
+from tradingagents.dataflows.cache.bar_buckets import (
+    BUCKET_COLLECTION,
+    LAYOUT_DOCUMENT,
+    LAYOUT_DUAL,
+    bucket_filter,
+    bucket_range_query,
+    buckets_cover,
+    buckets_to_frame,
+    changed_docs as bucket_changed_docs,
+    get_bar_layout,
+    group_by_bucket,
+    merge_bucket,
+    writes_buckets,
+    writes_documents,
+)
 
 logger = logging.getLogger(__name__)
 
+# 批量写入：每批记录数与并发批数
+WRITE_BATCH_SIZE = int(os.getenv("HISTORICAL_WRITE_BATCH_SIZE", "200"))
+WRITE_CONCURRENCY = int(os.getenv("HISTORICAL_WRITE_CONCURRENCY", "4"))
+# 分桶乐观并发写入冲突时的最大重试次数
+BUCKET_WRITE_RETRIES = 5
+
 
 class HistoricalDataService:
     """统一历史数据管理服务"""
@@ -22,12 +45,15 @@ class HistoricalDataService:
         """初始化服务"""
         self.db = None
         self.collection = None
+        self.bucket_collection = None
+        self._bucket_index_ready = False
         
     async def initialize(self):
         """初始化数据库连接"""
         try:
             self.db = get_database()
             self.collection = self.db.stock_daily_quotes
+            self.bucket_collection = self.db[BUCKET_COLLECTION]
 
             # 🔥 确保索引存在（提升查询和 upsert 性能）
             await self._ensure_indexes()
@@ -62,11 +88,25 @@ class HistoricalDataService:
                 ("trade_date", -1)
             ], name="symbol_date_index", background=True)
 
+            # 5. 分桶布局：股票代码+数据源+周期+桶（用于 upsert 和区间读取）
+            if writes_buckets():
+                await self._ensure_bucket_index()
+
             logger.info("✅ 历史数据索引检查完成")
         except Exception as e:
             # 索引创建失败不应该阻止服务启动
             logger.warning(f"⚠️ 创建索引时出现警告（可能已存在）: {e}")
     
+    async def _ensure_bucket_index(self):
+        """分桶集合唯一索引（并发创建同一个桶时依赖它判定冲突）"""
+        await self.bucket_collection.create_index([
+            ("symbol", 1),
+            ("data_source", 1),
+            ("period", 1),
+            ("bucket", 1)
+        ], unique=True, name="symbol_source_period_bucket_unique", background=True)
+        self._bucket_index_ready = True
+
     async def save_historical_data(
         self,
         symbol: str,
@@ -125,64 +165,32 @@ class HistoricalDataService:
 
             convert_duration = (datetime.now() - convert_start).total_seconds()
 
-            # ⏱️ 性能监控：构建操作列表
+            # ⏱️ 性能监控：构建文档（按列向量化构建，不逐行迭代）
             prepare_start = datetime.now()
-            # 准备批量操作
-            operations = []
-            saved_count = 0
-            batch_size = 200  # 进一步减小批量大小，避免超时（从500改为200）
-
-            for date_index, row in data.iterrows():
-                try:
-                    # 标准化数据（传递日期索引）
-                    doc = self._standardize_record(symbol, row, data_source, market, period, date_index)
-
-                    # 创建upsert操作
-                    filter_doc = {
-                        "symbol": doc["symbol"],
-                        "trade_date": doc["trade_date"],
-                        "data_source": doc["data_source"],
-                        "period": doc["period"]
-                    }
-
-                    from pymongo import ReplaceOne
-                    operations.append(ReplaceOne(
-                        filter=filter_doc,
-                        replacement=doc,
-                        upsert=True
-                    ))
-
-                    # 批量执行（每200条）
-                    if len(operations) >= batch_size:
-                        batch_write_start = datetime.now()
-                        batch_saved = await self._execute_bulk_write_with_retry(symbol, operations)
-                        batch_write_duration = (datetime.now() - batch_write_start).total_seconds()
-                        logger.debug(f"   批量写入 {len(operations)} 条，耗时 {batch_write_duration:.2f}秒")
-                        saved_count += batch_saved
-                        operations = []
-
-                except Exception as e:
-                    # 获取日期信息用于错误日志
-                    date_str = str(date_index) if hasattr(date_index, '__str__') else 'unknown'
-                    logger.error(f"❌ 处理记录失败 {symbol} {date_str}: {e}")
-                    continue
+            docs = self._build_documents(symbol, data, data_source, market, period)
+            # 同一交易日出现多次时保留最后一条（并发写入时避免同键竞争）
+            docs = list({doc["trade_date"]: doc for doc in docs}.values())
 
             prepare_duration = (datetime.now() - prepare_start).total_seconds()
 
-            # ⏱️ 性能监控：最后一批写入
-            final_write_start = datetime.now()
-            # 执行剩余操作
-            if operations:
-                saved_count += await self._execute_bulk_write_with_retry(
-                    symbol, operations
-                )
-            final_write_duration = (datetime.now() - final_write_start).total_seconds()
+            # ⏱️ 性能监控：变更检测与写入
+            write_start = datetime.now()
+            layout = get_bar_layout()
+            saved_count = 0
+            if writes_documents(layout):
+                saved_count = await self._save_documents(symbol, docs, data_source, period)
+            if writes_buckets(layout):
+                bucket_saved = await self._save_buckets(symbol, docs, data_source, period)
+                if not writes_documents(layout):
+                    saved_count = bucket_saved
+            skipped_count = len(docs) - saved_count
+            write_duration = (datetime.now() - write_start).total_seconds()
 
             total_duration = (datetime.now() - total_start).total_seconds()
             logger.info(
-                f"✅ {symbol} 历史数据保存完成: {saved_count}条记录，"
+                f"✅ {symbol} 历史数据保存完成: {saved_count}条记录，未变化跳过 {skipped_count}条，"
                 f"总耗时 {total_duration:.2f}秒 "
-                f"(转换: {convert_duration:.3f}秒, 准备: {prepare_duration:.2f}秒, 最后写入: {final_write_duration:.2f}秒)"
+                f"(转换: {convert_duration:.3f}秒, 准备: {prepare_duration:.2f}秒, 写入: {write_duration:.2f}秒)"
             )
             return saved_count
             
@@ -190,11 +198,172 @@ class HistoricalDataService:
             logger.error(f"❌ 保存历史数据失败 {symbol}: {e}")
             return 0
 
+    async def _save_documents(self, symbol: str, docs: List[Dict[str, Any]], data_source: str, period: str) -> int:
+        """单日文档布局：与库中同区间记录的内容哈希比对，只写入新增或变化的K线"""
+        from pymongo import ReplaceOne
+
+        operations = [
+            ReplaceOne(
+                filter={
+                    "symbol": doc["symbol"],
+                    "trade_date": doc["trade_date"],
+                    "data_source": doc["data_source"],
+                    "period": doc["period"]
+                },
+                replacement=doc,
+                upsert=True
+            )
+            for doc in await self._filter_unchanged(symbol, docs, data_source, period)
+        ]
+        return await self._write_batches(symbol, operations)
+
+    async def _save_buckets(self, symbol: str, docs: List[Dict[str, Any]], data_source: str, period: str) -> int:
+        """
+        分桶布局：读取涉及的桶，合并变化的K线后整桶替换
+
+        Returns:
+            新增或变化的K线数量
+        """
+        groups = group_by_bucket(docs, period)
+        try:
+            cursor = self.bucket_collection.find(
+                {"symbol": symbol, "data_source": data_source, "period": period, "bucket": {"$in": list(groups)}},
+                {"_id": 0}
+            )
+            existing = {bucket["bucket"]: bucket async for bucket in cursor}
+        except Exception as e:
+            logger.error(f"❌ {symbol} 读取K线分桶失败: {e}")
+            return 0
+
+        semaphore = asyncio.Semaphore(WRITE_CONCURRENCY)
+
+        async def save(key: str, group: List[Dict[str, Any]]) -> int:
+            async with semaphore:
+                return await self._save_bucket(symbol, data_source, period, key, group, existing.get(key))
+
+        results = await asyncio.gather(*(save(key, group) for key, group in groups.items()))
+        return sum(results)
+
+    async def _save_bucket(
+        self,
+        symbol: str,
+        data_source: str,
+        period: str,
+        key: str,
+        group: List[Dict[str, Any]],
+        existing: Optional[Dict[str, Any]]
+    ) -> int:
+        """
+        合并并写入单个桶（按 version 条件替换；与并发写入冲突时重新读取后重试）
+
+        Returns:
+            新增或变化的K线数量（写入失败为 0）
+        """
+        from pymongo.errors import DuplicateKeyError
+
+        filter_ = bucket_filter(symbol, data_source, period, key)
+        for _ in range(BUCKET_WRITE_RETRIES):
+            changed = bucket_changed_docs(existing, group)
+            if not changed:
+                return 0
+            bucket_doc = merge_bucket(existing, changed, key)
+            bucket_doc["updated_at"] = datetime.utcnow()
+            try:
+                if existing is None:
+                    bucket_doc["version"] = 1
+                    # 唯一索引保证并发创建同一个桶时只有一个成功
+                    await self.bucket_collection.insert_one(bucket_doc)
+                    return len(changed)
+                version = existing.get("version")
+                bucket_doc["version"] = (version or 0) + 1
+                condition = {**filter_, "version": version if version is not None else {"$exists": False}}
+                result = await self.bucket_collection.replace_one(condition, bucket_doc)
+                if result.matched_count:
+                    return len(changed)
+            except DuplicateKeyError:
+                pass
+            except Exception as e:
+                logger.error(f"❌ {symbol} 写入K线分桶失败 {key}: {e}")
+                return 0
+            # 被其他写入抢先：重新读取最新的桶再合并
+            logger.debug(f"🔁 {symbol} K线分桶 {key} 并发写入冲突，重试")
+            existing = await self.bucket_collection.find_one(filter_, {"_id": 0})
+        logger.error(f"❌ {symbol} K线分桶 {key} 并发写入冲突重试 {BUCKET_WRITE_RETRIES} 次仍失败")
+        return 0
+
+    async def backfill_buckets(self, symbol: str, data_source: str, period: str = "daily") -> int:
+        """
+        从单日文档回填分桶（幂等：内容哈希未变化的K线不会重复写入）
+
+        Returns:
+            写入分桶的K线数量
+        """
+        if self.collection is None:
+            await self.initialize()
+        if not self._bucket_index_ready:
+            await self._ensure_bucket_index()
+        cursor = self.collection.find(
+            {"symbol": symbol, "data_source": data_source, "period": period},
+            {"_id": 0}
+        ).sort("trade_date", 1)
+        docs = [doc async for doc in cursor if doc.get("trade_date")]
+        if not docs:
+            return 0
+        return await self._save_buckets(symbol, docs, data_source, period)
+
+    async def _filter_unchanged(
+        self,
+        symbol: str,
+        docs: List[Dict[str, Any]],
+        data_source: str,
+        period: str
+    ) -> List[Dict[str, Any]]:
+        """过滤掉库中已存在且内容哈希相同的记录（查询失败时全部写入）"""
+        if not docs:
+            return docs
+        try:
+            dates = [doc["trade_date"] for doc in docs]
+            cursor = self.collection.find(
+                {
+                    "symbol": symbol,
+                    "data_source": data_source,
+                    "period": period,
+                    "trade_date": {"$gte": min(dates), "$lte": max(dates)}
+                },
+                {"_id": 0, "trade_date": 1, "content_hash": 1}
+            )
+            stored = {item["trade_date"]: item.get("content_hash") async for item in cursor}
+        except Exception as e:
+            logger.warning(f"⚠️ {symbol} 查询已有历史数据失败，全部写入: {e}")
+            return docs
+        return [doc for doc in docs if stored.get(doc["trade_date"]) != doc["content_hash"]]
+
+    async def _write_batches(self, symbol: str, operations: List, collection=None) -> int:
+        """按批并发执行批量写入"""
+        if not operations:
+            return 0
+        batch_size = WRITE_BATCH_SIZE
+        semaphore = asyncio.Semaphore(WRITE_CONCURRENCY)
+
+        async def write(batch: List) -> int:
+            async with semaphore:
+                batch_write_start = datetime.now()
+                batch_saved = await self._execute_bulk_write_with_retry(symbol, batch, collection=collection)
+                batch_write_duration = (datetime.now() - batch_write_start).total_seconds()
+                logger.debug(f"   批量写入 {len(batch)} 条，耗时 {batch_write_duration:.2f}秒")
+                return batch_saved
+
+        results = await asyncio.gather(*[
+            write(operations[i:i + batch_size]) for i in range(0, len(operations), batch_size)
+        ])
+        return sum(results)
+
     async def _execute_bulk_write_with_retry(
         self,
         symbol: str,
         operations: List,
-        max_retries: int = 5  # 增加重试次数：从3次改为5次
+        max_retries: int = 5,  # 增加重试次数：从3次改为5次
+        collection=None
     ) -> int:
         """
         执行批量写入，带重试机制
@@ -203,16 +372,18 @@ class HistoricalDataService:
             symbol: 股票代码
             operations: 批量操作列表
             max_retries: 最大重试次数
+            collection: 目标集合（默认 stock_daily_quotes）
 
         Returns:
             成功保存的记录数
         """
+        collection = collection if collection is not None else self.collection
         saved_count = 0
         retry_count = 0
 
         while retry_count < max_retries:
             try:
-                result = await self.collection.bulk_write(operations, ordered=False)
+                result = await collection.bulk_write(operations, ordered=False)
                 saved_count = result.upserted_count + result.modified_count
                 logger.debug(f"✅ {symbol} 批量保存 {len(operations)} 条记录成功 (新增: {result.upserted_count}, 更新: {result.modified_count})")
                 return saved_count
@@ -245,6 +416,108 @@ class HistoricalDataService:
 
         return saved_count
 
+    def _build_documents(
+        self,
+        symbol: str,
+        data: pd.DataFrame,
+        data_source: str,
+        market: str,
+        period: str = "daily"
+    ) -> List[Dict[str, Any]]:
+        """
+        按列构建标准化文档（字段口径与 _standardize_record 一致）
+
+        每个文档附带 content_hash（行情字段的哈希），用于跳过未变化的记录。
+        """
+        now = datetime.utcnow()
+        n = len(data)
+
+        def column(*names: str) -> pd.Series:
+            """取第一个存在的列；多个列时按 `a or b` 语义，a 为 0/空时取 b"""
+            if not any(name in data.columns for name in names):
+                return None
+            result = None
+            for name in names:
+                if name in data.columns:
+                    values = data[name].reset_index(drop=True)
+                else:
+                    values = pd.Series([None] * n, dtype=object)
+                if result is None:
+                    result = values
+                else:
+                    result = result.where(result.notna() & (result != 0) & (result != ''), values)
+            return result
+
+        def numeric(*names: str) -> pd.Series:
+            values = column(*names)
+            if values is None:
+                return pd.Series([np.nan] * n, dtype=float)
+            return pd.to_numeric(values, errors='coerce').astype(float)
+
+        # 交易日期：优先取列，其次取日期类型索引，否则当天
+        dates = column('date', 'trade_date')
+        if dates is None:
+            if isinstance(data.index, pd.DatetimeIndex):
+                dates = pd.Series(data.index)
+            else:
+                dates = pd.Series([None] * n)
+        if pd.api.types.is_datetime64_any_dtype(dates):
+            trade_dates = dates.dt.strftime('%Y-%m-%d')
+        else:
+            trade_dates = dates.map(self._format_date)
+
+        fields = pd.DataFrame({
+            "trade_date": trade_dates,
+            "open": numeric('open'),
+            "high": numeric('high'),
+            "low": numeric('low'),
+            "close": numeric('close'),
+            "pre_close": numeric('pre_close', 'preclose'),
+            "volume": numeric('volume', 'vol'),
+            "amount": numeric('amount', 'turnover'),
+        })
+
+        # 涨跌数据：收盘价和昨收都有效时计算，否则使用原始列
+        close, pre_close = fields["close"], fields["pre_close"]
+        computable = close.notna() & (close != 0) & pre_close.notna() & (pre_close != 0)
+        change = (close - pre_close).round(4)
+        fields["change"] = change.where(computable, numeric('change'))
+        fields["pct_chg"] = (change / pre_close * 100).round(4).where(computable, numeric('pct_chg', 'change_percent'))
+
+        # 可选字段（源数据存在该列时才写入）
+        optional_fields = {
+            "turnover_rate": ('turnover_rate', 'turn'),
+            "volume_ratio": ('volume_ratio',),
+            "pe": ('pe',),
+            "pb": ('pb',),
+            "ps": ('ps',),
+            "adjustflag": ('adjustflag', 'adj_factor'),
+            "tradestatus": ('tradestatus',),
+            "isST": ('isST',),
+        }
+        for key, names in optional_fields.items():
+            if any(name in data.columns for name in names):
+                fields[key] = numeric(*names)
+
+        content_hash = pd.util.hash_pandas_object(fields, index=False).map('{:016x}'.format)
+        records = fields.astype(object).where(fields.notna(), None).to_dict('records')
+
+        base = {
+            "symbol": symbol,
+            "code": symbol,  # 添加 code 字段，与 symbol 保持一致（向后兼容）
+            "full_symbol": self._get_full_symbol(symbol, market),
+            "market": market,
+            "period": period,
+            "data_source": data_source,
+            "created_at": now,
+            "updated_at": now,
+            "version": 1
+        }
+        return [
+            {**base, **record, "content_hash": digest}
+            for record, digest in zip(records, content_hash)
+        ]
+
     def _standardize_record(
         self,
         symbol: str,
@@ -397,6 +670,18 @@ class HistoricalDataService:
             await self.initialize()
         
         try:
+            layout = get_bar_layout()
+            if layout != LAYOUT_DOCUMENT:
+                df = await self.get_historical_frame(symbol, start_date, end_date, data_source, period or "daily")
+                # 双写迁移期分桶可能尚未回填：只有覆盖单日文档的首末交易日时才使用分桶
+                if layout != LAYOUT_DUAL or await self._buckets_cover_documents(
+                        df, symbol, start_date, end_date, data_source, period or "daily"):
+                    results = df.iloc[::-1].to_dict("records")
+                    if limit:
+                        results = results[:limit]
+                    logger.info(f"📊 查询历史数据(分桶): {symbol} 返回 {len(results)} 条记录")
+                    return results
+
             # 构建查询条件
             query = {"symbol": symbol}
             
@@ -429,12 +714,76 @@ class HistoricalDataService:
             logger.error(f"❌ 查询历史数据失败 {symbol}: {e}")
             return []
     
+    async def get_historical_frame(
+        self,
+        symbol: str,
+        start_date: str = None,
+        end_date: str = None,
+        data_source: str = None,
+        period: str = "daily"
+    ) -> pd.DataFrame:
+        """
+        从分桶集合读取历史数据，直接返回按日期升序的 DataFrame
+
+        读取的文档数为区间覆盖的桶数（日线每月一个），不再逐日读取文档。
+        """
+        if self.collection is None:
+            await self.initialize()
+
+        try:
+            cursor = self.bucket_collection.find(
+                bucket_range_query(symbol, period, data_source, start_date, end_date),
+                {"_id": 0}
+            ).sort("bucket", 1)
+            buckets = await cursor.to_list(length=None)
+            return buckets_to_frame(buckets, start_date, end_date)
+        except Exception as e:
+            logger.error(f"❌ 读取K线分桶失败 {symbol}: {e}")
+            return pd.DataFrame()
+
+    async def _buckets_cover_documents(
+        self,
+        frame: pd.DataFrame,
+        symbol: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        data_source: Optional[str],
+        period: str
+    ) -> bool:
+        """比较分桶结果与单日文档在同一区间内的首末交易日"""
+        query: Dict[str, Any] = {"symbol": symbol, "period": period}
+        if data_source:
+            query["data_source"] = data_source
+        date_filter = {}
+        if start_date:
+            date_filter["$gte"] = start_date
+        if end_date:
+            date_filter["$lte"] = end_date
+        if date_filter:
+            query["trade_date"] = date_filter
+        projection = {"_id": 0, "trade_date": 1}
+        first = await self.collection.find_one(query, projection, sort=[("trade_date", 1)])
+        if first is None:
+            return not frame.empty
+        last = await self.collection.find_one(query, projection, sort=[("trade_date", -1)])
+        covered = buckets_cover(frame, first["trade_date"], last["trade_date"])
+        if not covered:
+            logger.debug(f"📊 {symbol} 分桶未覆盖 {first['trade_date']}~{last['trade_date']}，使用单日文档")
+        return covered
+
     async def get_latest_date(self, symbol: str, data_source: str) -> Optional[str]:
         """获取最新数据日期"""
         if self.collection is None:
             await self.initialize()
         
         try:
+            if not writes_documents():
+                result = await self.bucket_collection.find_one(
+                    {"symbol": symbol, "data_source": data_source},
+                    sort=[("last_date", -1)]
+                )
+                return result["last_date"] if result else None
+
             result = await self.collection.find_one(
                 {"symbol": symbol, "data_source": data_source},
                 sort=[("trade_date", -1)]
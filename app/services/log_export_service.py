@@ -8,12 +8,41 @@ import os
 import zipfile
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 import re
 import json
 
+from app.services.log_reader import LineFilter, get_log_reader
+
 logger = logging.getLogger("webapi")
 
+# 导出原始日志文件时的读取块大小
+EXPORT_CHUNK_SIZE = 256 * 1024
+
+
+class _StreamBuffer:
+    """供 ZipFile 写入的不可回溯缓冲区，写入的数据由 drain() 取走"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
 
 class LogExportService:
     """日志导出服务"""
@@ -26,6 +55,7 @@ class LogExportService:
             log_dir: 日志文件目录
         """
         self.log_dir = Path(log_dir)
+        self.reader = get_log_reader()
         logger.info(f"🔍 [LogExportService] 初始化日志导出服务")
         logger.info(f"🔍 [LogExportService] 配置的日志目录: {log_dir}")
         logger.info(f"🔍 [LogExportService] 解析后的日志目录: {self.log_dir}")
@@ -139,7 +169,7 @@ class LogExportService:
         
         Args:
             filename: 日志文件名
-            lines: 读取的行数（从末尾开始）
+            lines: 返回的最大行数（从末尾开始的最后 N 条匹配行）
             level: 日志级别过滤（ERROR, WARNING, INFO, DEBUG）
             keyword: 关键词过滤
             start_time: 开始时间（ISO格式）
@@ -154,56 +184,24 @@ class LogExportService:
             raise FileNotFoundError(f"日志文件不存在: {filename}")
         
         try:
-            # 读取文件内容
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                all_lines = f.readlines()
-            
-            # 从末尾开始读取指定行数
-            recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-            
-            # 应用过滤器
-            filtered_lines = []
+            # 从文件末尾按块反向读取，取最后 lines 条匹配行；时间范围先通过索引定位偏移
+            level_counts: Dict[str, int] = {}
+            filtered_lines = self.reader.tail(
+                file_path,
+                lines,
+                LineFilter(level=level, keyword=keyword, start_time=start_time, end_time=end_time),
+                level_counts=level_counts
+            )
+
             stats = {
-                "total_lines": len(all_lines),
-                "filtered_lines": 0,
-                "error_count": 0,
-                "warning_count": 0,
-                "info_count": 0,
-                "debug_count": 0
+                "total_lines": self.reader.get_index(file_path).line_count,
+                "filtered_lines": len(filtered_lines),
+                "error_count": level_counts.get("ERROR", 0),
+                "warning_count": level_counts.get("WARNING", 0),
+                "info_count": level_counts.get("INFO", 0),
+                "debug_count": level_counts.get("DEBUG", 0)
             }
             
-            for line in recent_lines:
-                # 统计日志级别
-                if "ERROR" in line:
-                    stats["error_count"] += 1
-                elif "WARNING" in line:
-                    stats["warning_count"] += 1
-                elif "INFO" in line:
-                    stats["info_count"] += 1
-                elif "DEBUG" in line:
-                    stats["debug_count"] += 1
-                
-                # 应用过滤条件
-                if level and level.upper() not in line:
-                    continue
-                
-                if keyword and keyword.lower() not in line.lower():
-                    continue
-                
-                # 时间过滤（简单实现，假设日志格式为 YYYY-MM-DD HH:MM:SS）
-                if start_time or end_time:
-                    time_match = re.search(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', line)
-                    if time_match:
-                        log_time = time_match.group()
-                        if start_time and log_time < start_time:
-                            continue
-                        if end_time and log_time > end_time:
-                            continue
-                
-                filtered_lines.append(line.rstrip())
-            
-            stats["filtered_lines"] = len(filtered_lines)
-            
             return {
                 "filename": filename,
                 "lines": filtered_lines,
@@ -214,6 +212,83 @@ class LogExportService:
             logger.error(f"❌ 读取日志文件失败: {e}")
             raise
 
+    def resolve_export_files(self, filenames: Optional[List[str]] = None) -> List[Path]:
+        """确定要导出的文件（没有可导出的文件时抛出 ValueError）"""
+        if filenames:
+            files_to_export = [self.log_dir / f for f in filenames if (self.log_dir / f).exists()]
+        else:
+            files_to_export = sorted(self.log_dir.glob("*.log*"))
+
+        if not files_to_export:
+            raise ValueError("没有找到要导出的日志文件")
+        return files_to_export
+
+    def iter_export(
+        self,
+        files_to_export: List[Path],
+        level: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        format: str = "zip"
+    ) -> Iterator[bytes]:
+        """
+        以数据块流式生成导出内容（zip 或 txt），不在内存中缓存整个导出文件
+
+        Args:
+            files_to_export: resolve_export_files 返回的文件列表
+            level: 日志级别过滤
+            start_time: 开始时间
+            end_time: 结束时间
+            format: 导出格式（zip, txt）
+        """
+        if format not in ("zip", "txt"):
+            raise ValueError(f"不支持的导出格式: {format}")
+        line_filter = LineFilter(level=level, start_time=start_time, end_time=end_time)
+
+        def file_chunks(file_path: Path) -> Iterator[bytes]:
+            if line_filter.active:
+                # 过滤后的行按批编码输出
+                batch: List[str] = []
+                for line in self.reader.iter_matching(file_path, line_filter):
+                    batch.append(line)
+                    if len(batch) >= 1000:
+                        yield ('\n'.join(batch) + '\n').encode('utf-8')
+                        batch = []
+                if batch:
+                    yield ('\n'.join(batch) + '\n').encode('utf-8')
+            else:
+                with open(file_path, 'rb') as inf:
+                    while True:
+                        chunk = inf.read(EXPORT_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        yield chunk
+
+        if format == "txt":
+            # 合并所有日志到一个文本流
+            for file_path in files_to_export:
+                yield f"\n{'='*80}\n文件: {file_path.name}\n{'='*80}\n\n".encode('utf-8')
+                yield from file_chunks(file_path)
+                yield b'\n\n'
+            return
+
+        # ZIP：写入不可回溯的流缓冲，每写完一块就把已生成的字节交给调用方
+        buffer = _StreamBuffer()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for file_path in files_to_export:
+                with zipf.open(file_path.name, 'w', force_zip64=True) as entry:
+                    for chunk in file_chunks(file_path):
+                        entry.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+                data = buffer.drain()
+                if data:
+                    yield data
+        data = buffer.drain()
+        if data:
+            yield data
+
     def export_logs(
         self,
         filenames: Optional[List[str]] = None,
@@ -223,7 +298,7 @@ class LogExportService:
         format: str = "zip"
     ) -> str:
         """
-        导出日志文件
+        导出日志文件到 ./exports/logs（流式写入磁盘）
         
         Args:
             filenames: 要导出的日志文件名列表（None表示导出所有）
@@ -236,79 +311,24 @@ class LogExportService:
             导出文件的路径
         """
         try:
-            # 确定要导出的文件
-            if filenames:
-                files_to_export = [self.log_dir / f for f in filenames if (self.log_dir / f).exists()]
-            else:
-                files_to_export = list(self.log_dir.glob("*.log*"))
-            
-            if not files_to_export:
-                raise ValueError("没有找到要导出的日志文件")
-            
+            files_to_export = self.resolve_export_files(filenames)
+            if format not in ("zip", "txt"):
+                raise ValueError(f"不支持的导出格式: {format}")
+
             # 创建导出目录
             export_dir = Path("./exports/logs")
             export_dir.mkdir(parents=True, exist_ok=True)
             
             # 生成导出文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            if format == "zip":
-                export_path = export_dir / f"logs_export_{timestamp}.zip"
-                
-                # 创建ZIP文件
-                with zipfile.ZipFile(export_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for file_path in files_to_export:
-                        # 如果有过滤条件，先过滤再添加
-                        if level or start_time or end_time:
-                            filtered_data = self.read_log_file(
-                                file_path.name,
-                                lines=999999,  # 读取所有行
-                                level=level,
-                                start_time=start_time,
-                                end_time=end_time
-                            )
-                            # 将过滤后的内容写入临时文件
-                            temp_file = export_dir / f"temp_{file_path.name}"
-                            with open(temp_file, 'w', encoding='utf-8') as f:
-                                f.write('\n'.join(filtered_data['lines']))
-                            zipf.write(temp_file, file_path.name)
-                            temp_file.unlink()  # 删除临时文件
-                        else:
-                            zipf.write(file_path, file_path.name)
-                
-                logger.info(f"✅ 日志导出成功: {export_path}")
-                return str(export_path)
-            
-            elif format == "txt":
-                export_path = export_dir / f"logs_export_{timestamp}.txt"
-                
-                # 合并所有日志到一个文本文件
-                with open(export_path, 'w', encoding='utf-8') as outf:
-                    for file_path in files_to_export:
-                        outf.write(f"\n{'='*80}\n")
-                        outf.write(f"文件: {file_path.name}\n")
-                        outf.write(f"{'='*80}\n\n")
-                        
-                        if level or start_time or end_time:
-                            filtered_data = self.read_log_file(
-                                file_path.name,
-                                lines=999999,
-                                level=level,
-                                start_time=start_time,
-                                end_time=end_time
-                            )
-                            outf.write('\n'.join(filtered_data['lines']))
-                        else:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as inf:
-                                outf.write(inf.read())
-                        
-                        outf.write('\n\n')
-                
-                logger.info(f"✅ 日志导出成功: {export_path}")
-                return str(export_path)
-            
-            else:
-                raise ValueError(f"不支持的导出格式: {format}")
+            export_path = export_dir / f"logs_export_{timestamp}.{format}"
+
+            with open(export_path, 'wb') as outf:
+                for chunk in self.iter_export(files_to_export, level, start_time, end_time, format):
+                    outf.write(chunk)
+
+            logger.info(f"✅ 日志导出成功: {export_path}")
+            return str(export_path)
                 
         except Exception as e:
             logger.error(f"❌ 导出日志失败: {e}")
@@ -356,10 +376,10 @@ class LogExportService:
                     stats["error_files"] += 1
                     # 读取最近的错误
                     try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = f.readlines()
-                            error_lines = [line for line in lines[-100:] if "ERROR" in line]
-                            stats["recent_errors"].extend(error_lines[-10:])
+                        # 只反向读取最后100行
+                        recent_lines = self.reader.tail(file_path, 100)
+                        error_lines = [line for line in recent_lines if "ERROR" in line]
+                        stats["recent_errors"].extend(error_lines[-10:])
                     except Exception:
                         pass
             
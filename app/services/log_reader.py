@@ -0,0 +1,265 @@
+"""
+流式日志读取
+- 从文件末尾按块反向读取，取最后 N 条匹配行时无需读入整个文件
+- 级别/关键词/时间过滤以生成器方式逐行应用
+- 每个文件维护稀疏时间索引（时间戳 -> 字节偏移），时间范围查询直接定位到偏移；
+  文件追加写入时增量更新索引，轮转（inode 变化或文件变小）时重建
+"""
+
+import bisect
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BLOCK_SIZE = 64 * 1024
+# 时间索引采样间隔（字节）
+INDEX_STRIDE = int(os.getenv("LOG_INDEX_STRIDE_BYTES", str(1024 * 1024)))
+# 采样点之后查找时间戳的最大字节数
+_TIMESTAMP_PROBE = 4096
+
+TIMESTAMP_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}')
+_TIMESTAMP_BYTES = re.compile(rb'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}')
+
+LEVELS = ("ERROR", "WARNING", "INFO", "DEBUG")
+
+
+def normalize_time(value: Optional[str]) -> Optional[str]:
+    """ISO 时间（2024-01-01T10:00:00）转为日志中的格式（2024-01-01 10:00:00）"""
+    if not value:
+        return None
+    return value.replace('T', ' ')[:19]
+
+
+def line_level(line: str) -> Optional[str]:
+    """日志行的级别（与原有统计口径一致：按 ERROR > WARNING > INFO > DEBUG 顺序匹配）"""
+    for level in LEVELS:
+        if level in line:
+            return level
+    return None
+
+
+@dataclass
+class LineFilter:
+    """日志行过滤条件"""
+
+    level: Optional[str] = None
+    keyword: Optional[str] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+
+    def __post_init__(self):
+        self.level = self.level.upper() if self.level else None
+        self.keyword = self.keyword.lower() if self.keyword else None
+        self.start_time = normalize_time(self.start_time)
+        self.end_time = normalize_time(self.end_time)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.level or self.keyword or self.start_time or self.end_time)
+
+    def __call__(self, line: str) -> bool:
+        if self.level and self.level not in line:
+            return False
+        if self.keyword and self.keyword not in line.lower():
+            return False
+        # 没有时间戳的行（如异常堆栈）不做时间过滤
+        if self.start_time or self.end_time:
+            match = TIMESTAMP_PATTERN.search(line)
+            if match:
+                log_time = match.group()
+                if self.start_time and log_time < self.start_time:
+                    return False
+                if self.end_time and log_time > self.end_time:
+                    return False
+        return True
+
+
+def _decode(raw: bytes) -> str:
+    return raw.rstrip(b'\r').decode('utf-8', errors='ignore')
+
+
+def iter_lines_reverse(path: Path, start: int = 0, end: Optional[int] = None,
+                       block_size: int = BLOCK_SIZE) -> Iterator[str]:
+    """从 end 向 start 反向逐行读取（start 需位于行首）"""
+    with open(path, 'rb') as f:
+        if end is None:
+            end = f.seek(0, os.SEEK_END)
+        position = end
+        remainder = b''
+        first_block = True
+        while position > start:
+            size = min(block_size, position - start)
+            position -= size
+            f.seek(position)
+            parts = (f.read(size) + remainder).split(b'\n')
+            remainder = parts[0]
+            lines = parts[1:]
+            # 末尾换行符之后的空串不是一行
+            if first_block and lines and not lines[-1]:
+                lines.pop()
+            first_block = False
+            for raw in reversed(lines):
+                yield _decode(raw)
+        if remainder:
+            yield _decode(remainder)
+
+
+def iter_lines_forward(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """从 start 到 end 顺序逐行读取"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        position = start
+        for raw in f:
+            if end is not None and position >= end:
+                break
+            position += len(raw)
+            yield _decode(raw.rstrip(b'\n'))
+
+
+@dataclass
+class FileTimeIndex:
+    """单个日志文件的稀疏时间索引与行数统计"""
+
+    inode: int = 0
+    scanned_size: int = 0
+    line_count: int = 0
+    timestamps: List[str] = field(default_factory=list)
+    offsets: List[int] = field(default_factory=list)
+
+    def refresh(self, path: Path):
+        """增量扫描新追加的内容（只统计换行并在采样点探测时间戳）"""
+        stat = path.stat()
+        if stat.st_ino != self.inode or stat.st_size < self.scanned_size:
+            self.inode = stat.st_ino
+            self.scanned_size = 0
+            self.line_count = 0
+            self.timestamps, self.offsets = [], []
+        if stat.st_size == self.scanned_size:
+            return
+
+        next_sample = (self.offsets[-1] + INDEX_STRIDE) if self.offsets else 0
+        with open(path, 'rb') as f:
+            f.seek(self.scanned_size)
+            position = self.scanned_size
+            last_newline_end = position
+            while position < stat.st_size:
+                chunk = f.read(min(BLOCK_SIZE, stat.st_size - position))
+                if not chunk:
+                    break
+                newlines = chunk.count(b'\n')
+                self.line_count += newlines
+                if newlines:
+                    last_newline_end = position + chunk.rfind(b'\n') + 1
+                position += len(chunk)
+                while next_sample < last_newline_end:
+                    sample = self._probe(f, next_sample, last_newline_end)
+                    if sample is None:
+                        next_sample = last_newline_end
+                        break
+                    line_start, timestamp = sample
+                    if not self.timestamps or timestamp >= self.timestamps[-1]:
+                        self.timestamps.append(timestamp)
+                        self.offsets.append(line_start)
+                    next_sample = max(line_start, next_sample) + INDEX_STRIDE
+                f.seek(position)
+        # 末尾未写完的半行留到下次扫描
+        self.scanned_size = last_newline_end
+
+    @staticmethod
+    def _probe(f, offset: int, limit: int) -> Optional[Tuple[int, str]]:
+        """从 offset 起找到下一个以时间戳开头（或包含时间戳）的完整行"""
+        f.seek(offset)
+        data = f.read(min(_TIMESTAMP_PROBE, limit - offset))
+        if offset > 0:
+            # 跳到下一行行首（offset 恰为行首时该判断依赖上一字节）
+            f.seek(offset - 1)
+            if f.read(1) != b'\n':
+                newline = data.find(b'\n')
+                if newline < 0:
+                    return None
+                offset += newline + 1
+                data = data[newline + 1:]
+        scanned = 0
+        for raw in data.split(b'\n')[:-1]:
+            match = _TIMESTAMP_BYTES.search(raw)
+            if match:
+                return offset + scanned, match.group().decode()
+            scanned += len(raw) + 1
+        return None
+
+    def start_offset(self, start_time: Optional[str]) -> int:
+        """时间 >= start_time 的行不会早于返回的偏移"""
+        if not start_time:
+            return 0
+        i = bisect.bisect_left(self.timestamps, start_time)
+        return self.offsets[i - 1] if i > 0 else 0
+
+    def end_offset(self, end_time: Optional[str], size: int) -> int:
+        """时间 <= end_time 的行不会晚于返回的偏移"""
+        if not end_time:
+            return size
+        i = bisect.bisect_right(self.timestamps, end_time)
+        return self.offsets[i] if i < len(self.offsets) else size
+
+
+class LogReader:
+    """带时间索引缓存的日志读取器（线程安全）"""
+
+    def __init__(self):
+        self._indexes: Dict[str, FileTimeIndex] = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, path: Path) -> FileTimeIndex:
+        key = str(Path(path).resolve())
+        with self._lock:
+            index = self._indexes.setdefault(key, FileTimeIndex())
+            index.refresh(Path(path))
+            return index
+
+    def _bounds(self, path: Path, line_filter: LineFilter) -> Tuple[FileTimeIndex, int, int]:
+        index = self.get_index(path)
+        size = path.stat().st_size
+        start = index.start_offset(line_filter.start_time)
+        end = index.end_offset(line_filter.end_time, size)
+        return index, start, end
+
+    def tail(self, path: Path, limit: int, line_filter: Optional[LineFilter] = None,
+             level_counts: Optional[Dict[str, int]] = None) -> List[str]:
+        """
+        最后 limit 条匹配行（按时间正序返回）
+
+        Args:
+            level_counts: 传入时累计已扫描行的级别分布
+        """
+        line_filter = line_filter or LineFilter()
+        _, start, end = self._bounds(path, line_filter)
+        matched: List[str] = []
+        for line in iter_lines_reverse(path, start, end):
+            if level_counts is not None:
+                level = line_level(line)
+                if level:
+                    level_counts[level] = level_counts.get(level, 0) + 1
+            if line_filter(line):
+                matched.append(line)
+                if len(matched) >= limit:
+                    break
+        matched.reverse()
+        return matched
+
+    def iter_matching(self, path: Path, line_filter: Optional[LineFilter] = None) -> Iterator[str]:
+        """按时间正序逐行产出匹配行（时间范围通过索引定位偏移）"""
+        line_filter = line_filter or LineFilter()
+        _, start, end = self._bounds(path, line_filter)
+        for line in iter_lines_forward(path, start, end):
+            if line_filter(line):
+                yield line
+
+
+_log_reader = LogReader()
+
+
+def get_log_reader() -> LogReader:
+    return _log_reader
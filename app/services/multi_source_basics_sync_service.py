@@ -20,6 +20,7 @@ from pymongo import UpdateOne
 
 from app.core.database import get_mongo_db
 from app.services.basics_sync import add_financial_metrics as _add_financial_metrics_util
+from app.services.stock_search_index import invalidate_stock_search_index
 
 
 logger = logging.getLogger(__name__)
@@ -328,6 +329,8 @@ class MultiSourceBasicsSyncService:
             logger.exception(f"Multi-source sync failed: {e}")
             return stats.__dict__
         finally:
+            # 基础信息已变化，下次搜索时重建内存索引
+            invalidate_stock_search_index("CN")
             async with self._lock:
                 self._running = False
 
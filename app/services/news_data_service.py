@@ -2,15 +2,18 @@
 新闻数据服务
 提供统一的新闻数据存储、查询和管理功能
 """
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+import asyncio
 import logging
+import os
 from pymongo import ReplaceOne
 from pymongo.errors import BulkWriteError
 from bson import ObjectId
 
 from app.core.database import get_database
+from tradingagents.dataflows.news.near_duplicate import Entry, NearDuplicateIndex, get_news_dedup_index
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +40,10 @@ def convert_objectid_to_str(data: Union[Dict, List[Dict]]) -> Union[Dict, List[D
     return data
 
 
+# 入库前 SimHash 近似去重（跨批次、跨数据源的转载稿）；写库成功后才登记指纹
+NEAR_DEDUP_ENABLED = os.getenv("NEWS_NEAR_DEDUP_ENABLED", "true").lower() in ("true", "1", "yes")
+
+
 @dataclass
 class NewsQueryParams:
     """新闻查询参数"""
@@ -178,12 +185,19 @@ class NewsDataService:
             
             # 准备批量操作
             operations = []
+            dedup_entries = []
+            batch_index = NearDuplicateIndex() if NEAR_DEDUP_ENABLED else None
+            skipped_count = 0
 
             for i, news in enumerate(news_list):
                 # 标准化新闻数据
                 standardized_news = self._standardize_news_data(
                     news, data_source, market, now
                 )
+                is_duplicate, dedup_entry = self._check_near_duplicate(standardized_news, batch_index)
+                if is_duplicate:
+                    skipped_count += 1
+                    continue
 
                 # 🔍 记录前3条数据的详细信息
                 if i < 3:
@@ -207,11 +221,16 @@ class NewsDataService:
                         upsert=True
                     )
                 )
+                dedup_entries.append(dedup_entry)
             
+            if skipped_count:
+                self.logger.info(f"🧹 跳过近似重复新闻: {skipped_count}条 (数据源: {data_source})")
+
             # 执行批量操作
             if operations:
                 result = await collection.bulk_write(operations)
                 saved_count = result.upserted_count + result.modified_count
+                await asyncio.to_thread(self._register_near_duplicates, dedup_entries)
                 
                 self.logger.info(f"💾 新闻数据保存完成: {saved_count}条记录 (数据源: {data_source})")
                 return saved_count
@@ -230,6 +249,9 @@ class NewsDataService:
                 error_code = error.get('code', 'N/A')
                 self.logger.warning(f"   错误 {i}: [Code {error_code}] {error_msg}")
 
+            failed = {error.get('index') for error in write_errors}
+            await asyncio.to_thread(self._register_near_duplicates, dedup_entries, failed)
+
             # 计算成功保存的数量
             success_count = len(operations) - error_count
             if success_count > 0:
@@ -278,12 +300,19 @@ class NewsDataService:
 
             # 准备批量操作
             operations = []
+            dedup_entries = []
+            batch_index = NearDuplicateIndex() if NEAR_DEDUP_ENABLED else None
+            skipped_count = 0
 
             self.logger.info(f"📝 开始标准化 {len(news_list)} 条新闻数据...")
 
             for i, news in enumerate(news_list, 1):
                 # 标准化新闻数据
                 standardized_news = self._standardize_news_data(news, data_source, market, now)
+                is_duplicate, dedup_entry = self._check_near_duplicate(standardized_news, batch_index)
+                if is_duplicate:
+                    skipped_count += 1
+                    continue
 
                 # 记录前3条新闻的详细信息
                 if i <= 3:
@@ -308,11 +337,16 @@ class NewsDataService:
                         upsert=True
                     )
                 )
+                dedup_entries.append(dedup_entry)
+
+            if skipped_count:
+                self.logger.info(f"🧹 跳过近似重复新闻: {skipped_count}条 (数据源: {data_source})")
 
             # 执行批量操作（同步方式）
             if operations:
                 result = collection.bulk_write(operations)
                 saved_count = result.upserted_count + result.modified_count
+                self._register_near_duplicates(dedup_entries)
 
                 self.logger.info(f"💾 新闻数据保存完成: {saved_count}条记录 (数据源: {data_source})")
                 return saved_count
@@ -331,6 +365,9 @@ class NewsDataService:
                 error_code = error.get('code', 'N/A')
                 self.logger.warning(f"   错误 {i}: [Code {error_code}] {error_msg}")
 
+            failed = {error.get('index') for error in write_errors}
+            self._register_near_duplicates(dedup_entries, failed)
+
             # 计算成功保存的数量
             success_count = len(operations) - error_count
             if success_count > 0:
@@ -344,6 +381,42 @@ class NewsDataService:
             self.logger.error(traceback.format_exc())
             return 0
 
+    def _check_near_duplicate(
+        self,
+        news: Dict[str, Any],
+        batch_index: Optional[NearDuplicateIndex]
+    ) -> Tuple[bool, Optional[Entry]]:
+        """
+        是否与已入库或同批次新闻近似重复（同一股票范围内判重；同一URL视为更新，不算重复）
+
+        Returns:
+            (是否重复, 写库成功后需登记到持久化索引的索引项)
+        """
+        if batch_index is None:
+            return False, None
+        key = news.get("url") or f"{news.get('title', '')}|{news.get('publish_time')}"
+        entry = NearDuplicateIndex.prepare(
+            key,
+            news.get("title", ""),
+            news.get("content") or news.get("summary", ""),
+            namespace=news.get("symbol") or news.get("market"),
+        )
+        if get_news_dedup_index().find_entry(entry) is not None or batch_index.find_entry(entry) is not None:
+            return True, None
+        batch_index.add_entry(entry)
+        return False, entry
+
+    def _register_near_duplicates(self, entries: List[Optional[Entry]], failed: Optional[set] = None):
+        """写库成功后登记指纹（跳过写入失败的操作），并按间隔保存索引文件"""
+        if not NEAR_DEDUP_ENABLED:
+            return
+        failed = failed or set()
+        index = get_news_dedup_index()
+        for position, entry in enumerate(entries):
+            if entry is not None and position not in failed:
+                index.add_entry(entry)
+        index.save_if_due()
+
     def _standardize_news_data(
         self,
         news_data: Dict[str, Any],
@@ -9,4 +9,4 @@ from .log_handler import (
     register_analysis_tracker,
     unregister_analysis_tracker,
 )
-
+from .pubsub_hub import ProgressHub, ProgressSubscription, get_progress_hub
@@ -0,0 +1,149 @@
+"""
+进度消息的进程内扇出中心
+
+每个 API 进程只持有一个 Redis PubSub 连接（模式订阅 task_progress:*），由一个后台任务读取消息，
+再按频道分发到各个 SSE 客户端的有界 asyncio.Queue。客户端消费过慢时丢弃最旧的消息（进度以最新为准），
+不会阻塞其他客户端。没有订阅者时释放 PubSub 连接。
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, Optional, Set
+
+from app.core.database import get_redis_client
+
+logger = logging.getLogger("webapi.sse")
+
+TASK_PROGRESS_PREFIX = "task_progress:"
+TASK_PROGRESS_PATTERN = TASK_PROGRESS_PREFIX + "*"
+
+# 每个客户端缓冲的最大消息数
+CLIENT_QUEUE_SIZE = int(os.getenv("SSE_CLIENT_QUEUE_SIZE", "100"))
+# 读取循环的单次等待时间（秒）及连接异常后的重连间隔
+_READ_TIMEOUT = 1.0
+_RECONNECT_DELAY = 1.0
+
+
+class ProgressSubscription:
+    """单个客户端的订阅（有界队列）"""
+
+    def __init__(self, channel: str, maxsize: int = CLIENT_QUEUE_SIZE):
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, data: str):
+        """放入消息，队列满时丢弃最旧的一条"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(data)
+
+    async def get(self, timeout: float) -> Optional[str]:
+        """等待下一条消息，超时返回 None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ProgressHub:
+    """单连接模式订阅 + 按频道分发"""
+
+    def __init__(self, redis=None, pattern: str = TASK_PROGRESS_PATTERN):
+        self._redis = redis
+        self.pattern = pattern
+        self._subscribers: Dict[str, Set[ProgressSubscription]] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    async def subscribe(self, channel: str, maxsize: int = CLIENT_QUEUE_SIZE) -> ProgressSubscription:
+        subscription = ProgressSubscription(channel, maxsize)
+        async with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._run())
+        logger.debug(f"📡 [SSE-Hub] 新订阅: {channel}（共 {self.subscriber_count} 个）")
+        return subscription
+
+    def unsubscribe(self, subscription: ProgressSubscription):
+        subs = self._subscribers.get(subscription.channel)
+        if subs is not None:
+            subs.discard(subscription)
+            if not subs:
+                del self._subscribers[subscription.channel]
+        if subscription.dropped:
+            logger.info(f"⚠️ [SSE-Hub] 客户端消费过慢，丢弃 {subscription.dropped} 条消息: {subscription.channel}")
+
+    def dispatch(self, channel: str, data: str) -> int:
+        """分发消息到该频道的所有订阅者，返回送达的订阅数"""
+        subs = self._subscribers.get(channel)
+        if not subs:
+            return 0
+        for subscription in list(subs):
+            subscription.put(data)
+        return len(subs)
+
+    async def _run(self):
+        """后台读取循环：有订阅者时保持一个 PubSub 连接，连接异常时重连"""
+        while self._subscribers:
+            pubsub = None
+            try:
+                redis = self._redis or get_redis_client()
+                pubsub = redis.pubsub()
+                await pubsub.psubscribe(self.pattern)
+                logger.info(f"✅ [SSE-Hub] 已模式订阅: {self.pattern}")
+                while self._subscribers:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=_READ_TIMEOUT)
+                    if message and message.get("type") == "pmessage":
+                        channel = message["channel"]
+                        data = message["data"]
+                        if isinstance(channel, bytes):
+                            channel = channel.decode()
+                        if isinstance(data, bytes):
+                            data = data.decode("utf-8", errors="ignore")
+                        self.dispatch(channel, data)
+                    elif message is None:
+                        # 部分 redis 版本 get_message 不等待，避免空转
+                        await asyncio.sleep(0.01)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ [SSE-Hub] PubSub 连接异常，{_RECONNECT_DELAY}s 后重连: {e}")
+                await asyncio.sleep(_RECONNECT_DELAY)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.punsubscribe(self.pattern)
+                        await pubsub.close()
+                    except Exception as e:
+                        logger.debug(f"[SSE-Hub] 关闭 PubSub 连接失败: {e}")
+        logger.info("🧹 [SSE-Hub] 无订阅者，已释放 PubSub 连接")
+
+    async def close(self):
+        self._subscribers.clear()
+        if self._reader and not self._reader.done():
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._reader = None
+
+
+_progress_hub: Optional[ProgressHub] = None
+
+
+def get_progress_hub() -> ProgressHub:
+    global _progress_hub
+    if _progress_hub is None:
+        _progress_hub = ProgressHub()
+    return _progress_hub
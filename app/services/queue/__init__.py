@@ -26,5 +26,8 @@ from .helpers import (
     unmark_task_processing,
     set_visibility_timeout,
     clear_visibility_timeout,
+    DEQUEUE_TASK_LUA,
+    dequeue_task_atomic,
+    wait_for_ready_task,
 )
 
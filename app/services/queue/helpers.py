@@ -3,7 +3,7 @@
 """
 from __future__ import annotations
 import time
-from typing import Dict
+from typing import Dict, Optional, Tuple
 from redis.asyncio import Redis
 
 from .keys import (
@@ -59,3 +59,93 @@ async def clear_visibility_timeout(r: Redis, task_id: str) -> None:
     timeout_key = VISIBILITY_TIMEOUT_PREFIX + task_id
     await r.delete(timeout_key)
 
+
+# 原子出队脚本：检查全局并发、弹出任务、检查用户并发、标记处理中、登记可见性超时、更新任务状态，一次往返完成。
+# KEYS: [1] 就绪队列  [2] 全局处理中集合
+# ARGV: [1] worker_id  [2] 当前时间戳  [3] 可见性超时秒数  [4] 用户并发上限
+#       [5] 任务键前缀  [6] 用户处理中键前缀  [7] 可见性超时键前缀  [8] 全局并发上限（0 不限制）
+# 返回: nil（队列为空）| {"busy", ""}（全局并发已满，不出队）| {"missing", task_id}
+#       | {"limited", task_id, user} | {"ok", task_id, 任务哈希}
+# 注意：任务/用户/可见性超时键依赖弹出的 task_id 与任务中的 user，只能在脚本内由前缀拼接，
+# 无法事先通过 KEYS 声明。脚本因此要求单节点 Redis（或主从/哨兵）；Redis Cluster 会拒绝访问未声明的键，
+# 改用集群时需把所有 qa: 键放到同一个 hash tag 下（如 "qa:{queue}:..."）并迁移现有数据。
+DEQUEUE_TASK_LUA = """
+local global_limit = tonumber(ARGV[8]) or 0
+if global_limit > 0 and redis.call('SCARD', KEYS[2]) >= global_limit then
+    return {'busy', ''}
+end
+local task_id = redis.call('RPOP', KEYS[1])
+if not task_id then
+    return false
+end
+local task_key = ARGV[5] .. task_id
+local user_id = redis.call('HGET', task_key, 'user')
+if not user_id then
+    return {'missing', task_id}
+end
+local user_key = ARGV[6] .. user_id
+if redis.call('SCARD', user_key) >= tonumber(ARGV[4]) then
+    -- 超出用户并发时放回队尾（与原逻辑一致，让其他用户的任务先执行）
+    redis.call('LPUSH', KEYS[1], task_id)
+    return {'limited', task_id, user_id}
+end
+redis.call('SADD', user_key, task_id)
+redis.call('SADD', KEYS[2], task_id)
+local timeout_key = ARGV[7] .. task_id
+local timeout = tonumber(ARGV[3])
+redis.call('HSET', timeout_key, 'task_id', task_id, 'worker_id', ARGV[1],
+           'timeout_at', tostring(tonumber(ARGV[2]) + timeout))
+redis.call('EXPIRE', timeout_key, timeout)
+redis.call('HSET', task_key, 'status', 'processing', 'worker_id', ARGV[1], 'started_at', ARGV[2])
+return {'ok', task_id, redis.call('HGETALL', task_key)}
+"""
+
+
+async def dequeue_task_atomic(
+    r: Redis,
+    script,
+    worker_id: str,
+    user_limit: int,
+    visibility_timeout: int,
+    global_limit: int = 0,
+) -> Tuple[Optional[str], Optional[str], Optional[Dict[str, str]]]:
+    """
+    执行原子出队脚本
+
+    Returns:
+        (结果, task_id, 任务哈希)，结果为 None（队列为空）/ "busy" / "missing" / "limited" / "ok"；
+        "limited" 时任务哈希只含 user
+    """
+    reply = await script(
+        keys=[READY_LIST, SET_PROCESSING],
+        args=[
+            worker_id,
+            int(time.time()),
+            int(visibility_timeout),
+            int(user_limit),
+            TASK_PREFIX,
+            USER_PROCESSING_PREFIX,
+            VISIBILITY_TIMEOUT_PREFIX,
+            int(global_limit or 0),
+        ],
+    )
+    if not reply:
+        return None, None, None
+    outcome, task_id = reply[0], reply[1]
+    if outcome == "limited":
+        return outcome, task_id, {"user": reply[2]}
+    if outcome != "ok":
+        return outcome, task_id, None
+    flat = reply[2]
+    return outcome, task_id, dict(zip(flat[::2], flat[1::2]))
+
+
+async def wait_for_ready_task(r: Redis, timeout: float) -> bool:
+    """
+    阻塞等待就绪队列非空（BLMOVE 将队尾元素移回原位置，不改变队列顺序）
+
+    Returns:
+        队列中有任务时返回 True，超时返回 False
+    """
+    moved = await r.blmove(READY_LIST, READY_LIST, timeout, src="RIGHT", dest="RIGHT")
+    return moved is not None
@@ -12,6 +12,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 
 from redis.asyncio import Redis
+from redis.exceptions import ResponseError
 
 from app.core.database import get_redis_client
 
@@ -35,6 +36,9 @@ from app.services.queue import (
     unmark_task_processing,
     set_visibility_timeout,
     clear_visibility_timeout,
+    DEQUEUE_TASK_LUA,
+    dequeue_task_atomic,
+    wait_for_ready_task,
 )
 
 logger = logging.getLogger(__name__)
@@ -50,6 +54,8 @@ class QueueService:
         self.user_concurrent_limit = DEFAULT_USER_CONCURRENT_LIMIT
         self.global_concurrent_limit = GLOBAL_CONCURRENT_LIMIT
         self.visibility_timeout = VISIBILITY_TIMEOUT_SECONDS
+        self._dequeue_script = None
+        self._blocking_supported = True
 
     async def enqueue_task(
         self,
@@ -97,49 +103,60 @@ class QueueService:
         logger.info(f"任务已入队: {task_id}")
         return task_id
 
-    async def dequeue_task(self, worker_id: str) -> Optional[Dict[str, Any]]:
-        """从FIFO队列中取出任务"""
+    async def dequeue_task(self, worker_id: str, block_timeout: float = 0) -> Optional[Dict[str, Any]]:
+        """
+        从FIFO队列中取出任务
+
+        出队、全局/用户并发检查、处理中标记、可见性超时登记与状态更新由 Lua 脚本在 Redis 端原子完成，
+        多个 Worker 并发出队不会重复处理同一任务。
+
+        Args:
+            worker_id: Worker 标识
+            block_timeout: >0 时先以 BLMOVE 阻塞等待队列非空（秒），替代空闲时的轮询
+        """
         try:
-            # 从FIFO队列获取任务
-            task_id = await self.r.rpop(READY_LIST)
-            if not task_id:
+            if block_timeout and block_timeout > 0 and self._blocking_supported:
+                try:
+                    if not await wait_for_ready_task(self.r, block_timeout):
+                        return None
+                except ResponseError as e:
+                    # Redis < 6.2 不支持 BLMOVE，退回轮询
+                    self._blocking_supported = False
+                    logger.warning(f"Redis 不支持阻塞出队，退回轮询模式: {e}")
+
+            outcome, task_id, task_data = await dequeue_task_atomic(
+                self.r,
+                self._get_dequeue_script(),
+                worker_id,
+                self.user_concurrent_limit,
+                self.visibility_timeout,
+                self.global_concurrent_limit,
+            )
+            if outcome is None:
                 return None
-
-            # 获取任务详情
-            task_data = await self.get_task(task_id)
-            if not task_data:
+            if outcome == "busy":
+                logger.debug(f"全局并发已满 ({self.global_concurrent_limit})，暂不出队")
+                return None
+            if outcome == "missing":
                 logger.warning(f"任务数据不存在: {task_id}")
                 return None
-
-            user_id = task_data.get("user")
-
-            # 再次检查并发限制（防止竞态条件）
-            if not await self._check_user_concurrent_limit(user_id):
-                # 如果超过限制，将任务放回队列
-                await self.r.lpush(READY_LIST, task_id)
-                logger.warning(f"用户 {user_id} 并发限制，任务重新入队: {task_id}")
+            if outcome == "limited":
+                logger.warning(f"用户 {task_data.get('user')} 并发限制，任务重新入队: {task_id}")
                 return None
 
-            # 标记任务为处理中
-            await self._mark_task_processing(task_id, user_id, worker_id)
-
-            # 设置可见性超时
-            await self._set_visibility_timeout(task_id, worker_id)
-
-            # 更新任务状态
-            await self.r.hset(TASK_PREFIX + task_id, mapping={
-                "status": "processing",
-                "worker_id": worker_id,
-                "started_at": str(int(time.time()))
-            })
-
             logger.info(f"任务已出队: {task_id} -> Worker: {worker_id}")
-            return task_data
+            return self._parse_task(task_data)
 
         except Exception as e:
             logger.error(f"出队失败: {e}")
             return None
 
+    def _get_dequeue_script(self):
+        """注册原子出队脚本（EVALSHA，脚本缓存失效时自动重新加载）"""
+        if self._dequeue_script is None:
+            self._dequeue_script = self.r.register_script(DEQUEUE_TASK_LUA)
+        return self._dequeue_script
+
     async def ack_task(self, task_id: str, success: bool = True) -> bool:
         """确认任务完成"""
         try:
@@ -176,6 +193,21 @@ class QueueService:
             logger.error(f"确认任务失败: {e}")
             return False
 
+    async def extend_visibility_timeout(self, task_id: str, worker_id: str) -> bool:
+        """续期处理中任务的可见性超时（Worker 心跳时调用，避免长任务被当作过期重新入队）
+
+        任务已被重新入队或被其他 Worker 取走时不续期。
+        """
+        try:
+            status, owner = await self.r.hmget(TASK_PREFIX + task_id, ["status", "worker_id"])
+            if status != "processing" or owner != worker_id:
+                return False
+            await self._set_visibility_timeout(task_id, worker_id)
+            return True
+        except Exception as e:
+            logger.error(f"续期可见性超时失败: {task_id} - {e}")
+            return False
+
     async def create_batch(self, user_id: str, symbols: List[str], params: Dict[str, Any]) -> tuple[str, int]:
         batch_id = str(uuid.uuid4())
         now = int(time.time())
@@ -196,6 +228,10 @@ class QueueService:
         data = await self.r.hgetall(key)
         if not data:
             return None
+        return self._parse_task(data)
+
+    @staticmethod
+    def _parse_task(data: Dict[str, Any]) -> Dict[str, Any]:
         # parse fields
         if "params" in data:
             try:
@@ -222,6 +258,20 @@ class QueueService:
         data["tasks"] = list(await self.r.smembers(BATCH_TASKS_PREFIX + batch_id))
         return data
 
+    async def get_task_status_counts(self, task_ids: List[str]) -> Dict[str, int]:
+        """批量统计任务状态（一次 pipeline 往返，只读取 status 字段）"""
+        counts: Dict[str, int] = {}
+        if not task_ids:
+            return counts
+        async with self.r.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.hget(TASK_PREFIX + task_id, "status")
+            statuses = await pipe.execute()
+        for status in statuses:
+            if status is not None:
+                counts[status] = counts.get(status, 0) + 1
+        return counts
+
     async def stats(self) -> Dict[str, int]:
         queued = await self.r.llen(READY_LIST)
         processing = await self.r.scard(SET_PROCESSING)
@@ -60,11 +60,12 @@ class QuotesService:
         不同版本可能有差异，做多列名兼容。
         """
         try:
-            import akshare as ak  # 已在项目中使用，不额外安装
-            df = ak.stock_zh_a_spot_em()
-            if df is None or getattr(df, "empty", True):
+            from tradingagents.dataflows.providers.china.spot_snapshot import get_spot_snapshot_service
+            snapshot = get_spot_snapshot_service().get_snapshot("eastmoney")
+            if snapshot is None:
                 logger.warning("AKShare spot 返回空数据")
                 return {}
+            df = snapshot.data
             # 兼容常见列名
             code_col = next((c for c in ["代码", "代码code", "symbol", "股票代码"] if c in df.columns), None)
             price_col = next((c for c in ["最新价", "现价", "最新价(元)", "price", "最新"] if c in df.columns), None)
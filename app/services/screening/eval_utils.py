@@ -165,3 +165,101 @@ def safe_float(v: Any) -> Optional[float]:
     except Exception:
         return None
 
+
+def _compare_mask(left: pd.Series, op: str, right: Any) -> pd.Series:
+    """Vectorized counterpart of the scalar comparisons above."""
+    if op == "between":
+        lo_hi = right if isinstance(right, (list, tuple)) else (None, None)
+        lo, hi = lo_hi if isinstance(lo_hi, (list, tuple)) and len(lo_hi) == 2 else (None, None)
+        if lo is None or hi is None:
+            return pd.Series(False, index=left.index)
+        return (left >= float(lo)) & (left <= float(hi))
+    if not isinstance(right, pd.Series):
+        right = float(right)
+    if op == ">":
+        return left > right
+    if op == "<":
+        return left < right
+    if op == ">=":
+        return left >= right
+    if op == "<=":
+        return left <= right
+    if op == "==":
+        return left == right
+    if op == "!=":
+        return left != right
+    return pd.Series(False, index=left.index)
+
+
+def evaluate_conditions_mask(
+    panel: Dict[str, pd.DataFrame],
+    node: Dict[str, Any],
+    allowed_fields: Iterable[str],
+    allowed_ops: Iterable[str],
+    symbols: pd.Index,
+) -> pd.Series:
+    """
+    Evaluate the DSL over a panel (rows = bars, columns = symbols) as boolean column masks.
+
+    Semantics match evaluate_conditions applied to each symbol's frame: comparisons
+    use the last row, cross_up/cross_down use the last two rows, NaN never passes.
+    """
+    false_mask = pd.Series(False, index=symbols)
+    if not node:
+        return pd.Series(True, index=symbols)
+    # group 节点
+    if node.get("op") == "group" or "children" in node:
+        logic = (node.get("logic") or "AND").upper()
+        children = node.get("children", [])
+        if logic not in {"AND", "OR"}:
+            logic = "AND"
+        masks = [evaluate_conditions_mask(panel, c, allowed_fields, allowed_ops, symbols) for c in children]
+        if logic == "AND":
+            result = pd.Series(True, index=symbols)
+            for m in masks:
+                result &= m
+        else:
+            result = false_mask.copy()
+            for m in masks:
+                result |= m
+        return result
+
+    # 叶子：字段比较
+    field = node.get("field")
+    op = node.get("op")
+    if field not in allowed_fields or op not in set(allowed_ops) or field not in panel:
+        return false_mask
+
+    frame = panel[field]
+    if op in {"cross_up", "cross_down"}:
+        right_field = node.get("right_field")
+        if right_field not in allowed_fields or right_field not in panel:
+            return false_mask
+        if len(frame) < 2:
+            return false_mask
+        other = panel[right_field]
+        a0, a1 = frame.iloc[-1], frame.iloc[-2]
+        b0, b1 = other.iloc[-1], other.iloc[-2]
+        if op == "cross_up":
+            mask = (a1 <= b1) & (a0 > b0)
+        else:
+            mask = (a1 >= b1) & (a0 < b0)
+        return mask.reindex(symbols, fill_value=False).fillna(False).astype(bool)
+
+    if frame.empty:
+        return false_mask
+    left = frame.iloc[-1]
+    if node.get("right_field"):
+        rf = node.get("right_field")
+        if rf not in allowed_fields or rf not in panel:
+            return false_mask
+        right = panel[rf].iloc[-1]
+    else:
+        right = node.get("value")
+
+    try:
+        mask = _compare_mask(left, op, right)
+    except Exception:
+        return false_mask
+    mask = mask & left.notna()
+    return mask.reindex(symbols, fill_value=False).fillna(False).astype(bool)
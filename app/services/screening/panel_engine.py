@@ -0,0 +1,315 @@
+"""
+Full-universe screening engine.
+
+Loads daily bars for every A-share in one bulk query against the local
+``stock_daily_quotes`` collection, pivots them into a panel (rows = bars,
+columns = symbols) and computes indicators column-wise, so conditions are
+evaluated for ~5,000 symbols as vectorized masks instead of one frame per symbol.
+
+Each symbol's bars are aligned at the last row (row i holds the symbol's i-th bar
+counted from its latest one), so rolling/EWM indicators over a column equal the
+per-symbol computation on that symbol's own trading days, suspensions included.
+
+Every symbol's series comes from a single data source (the first one in the
+configured A-share priority that has bars for it), so bars with different
+adjustment bases are never mixed. With ``HISTORICAL_BAR_LAYOUT=bucket`` the bars
+are read from the bucket collection; in ``dual`` mode the per-day documents stay
+authoritative, since buckets may not be backfilled yet.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import pandas as pd
+
+from tradingagents.dataflows.cache.bar_buckets import (
+    BUCKET_COLLECTION,
+    LAYOUT_BUCKET,
+    bucket_key,
+    buckets_to_frame,
+    get_bar_layout,
+)
+from tradingagents.tools.analysis.indicators import IndicatorSpec, compute_panel
+
+from app.services.screening.eval_utils import evaluate_conditions_mask
+
+logger = logging.getLogger("agents")
+
+# 面板中的原始行情字段（stock_daily_quotes 字段 -> 筛选字段）
+BAR_FIELD_MAP = {
+    "open": "open",
+    "high": "high",
+    "low": "low",
+    "close": "close",
+    "volume": "vol",
+    "amount": "amount",
+}
+
+# 技术指标字段 -> 计算分组
+_TECH_GROUPS = {
+    "ma5": "ma", "ma10": "ma", "ma20": "ma", "ma60": "ma",
+    "ema12": "ema", "ema26": "ema",
+    "dif": "macd", "dea": "macd", "macd_hist": "macd",
+    "rsi14": "rsi",
+    "boll_mid": "boll", "boll_upper": "boll", "boll_lower": "boll",
+    "atr14": "atr",
+    "kdj_k": "kdj", "kdj_d": "kdj", "kdj_j": "kdj",
+}
+
+# 计算分组 -> 指标参数（与逐只筛选使用的参数一致）
+_TECH_SPECS = {
+    "ma": [IndicatorSpec("ma", {"n": n}) for n in (5, 10, 20, 60)],
+    "ema": [IndicatorSpec("ema", {"n": 12}), IndicatorSpec("ema", {"n": 26})],
+    "macd": [IndicatorSpec("macd")],
+    "rsi": [IndicatorSpec("rsi", {"n": 14})],
+    "boll": [IndicatorSpec("boll", {"n": 20, "k": 2})],
+    "atr": [IndicatorSpec("atr", {"n": 14})],
+    "kdj": [IndicatorSpec("kdj", {"n": 9, "m1": 3, "m2": 3})],
+}
+_TECH_GROUP_ORDER = ("ma", "ema", "macd", "rsi", "boll", "atr", "kdj")
+
+# 未配置数据源分组时的A股数据源优先级
+DEFAULT_SOURCE_PRIORITY = ["tushare", "akshare", "baostock"]
+# 从游标分块构建 DataFrame 的块大小
+_CHUNK_SIZE = 50000
+
+
+def build_panel(bars: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Pivot long bars (symbol, trade_date, open, high, low, close, vol, amount)
+    into end-aligned wide frames, one per field.
+    """
+    if bars is None or bars.empty:
+        return {}
+    bars = bars.sort_values(["symbol", "trade_date"], kind="mergesort")
+    bars = bars.drop_duplicates(["symbol", "trade_date"], keep="last")
+    # 按各自最后一根K线对齐：行号越大越新
+    from_end = bars.groupby("symbol", sort=False).cumcount(ascending=False)
+    bars = bars.assign(_row=int(from_end.max()) - from_end)
+
+    panel: Dict[str, pd.DataFrame] = {}
+    for field in ("open", "high", "low", "close", "vol", "amount", "trade_date"):
+        if field in bars.columns:
+            panel[field] = bars.pivot(index="_row", columns="symbol", values=field).sort_index()
+    for field in ("open", "high", "low", "close", "vol", "amount"):
+        if field in panel:
+            panel[field] = panel[field].astype(float)
+    return panel
+
+
+def compute_panel_indicators(panel: Dict[str, pd.DataFrame], fields: Iterable[str]) -> Dict[str, pd.DataFrame]:
+    """Add the requested derived/technical fields to the panel (in place) and return it."""
+    fields = set(fields)
+
+    if "pct_chg" in fields:
+        panel["pct_chg"] = panel["close"].pct_change(fill_method=None) * 100.0
+
+    groups = {_TECH_GROUPS[f] for f in fields if f in _TECH_GROUPS}
+    specs = [spec for group in _TECH_GROUP_ORDER if group in groups for spec in _TECH_SPECS[group]]
+    if specs:
+        panel.update(compute_panel(panel, specs))
+    return panel
+
+
+class PanelScreeningEngine:
+    """Screens the whole A-share universe from locally stored daily bars."""
+
+    def __init__(self, db=None, lookback_days: int = 220, collection_name: str = "stock_daily_quotes",
+                 source_priority: Optional[List[str]] = None, layout: Optional[str] = None):
+        self._db = db
+        self.lookback_days = lookback_days
+        self.collection_name = collection_name
+        self._source_priority = source_priority
+        self._layout = layout
+
+    def _get_db(self):
+        if self._db is None:
+            from app.core.database import get_mongo_db_sync
+            self._db = get_mongo_db_sync()
+        return self._db
+
+    def _get_collection(self):
+        return self._get_db()[self.collection_name]
+
+    def source_priority(self) -> List[str]:
+        """A股数据源优先级（来自数据源分组配置，未配置时使用默认顺序）"""
+        if self._source_priority is not None:
+            return list(self._source_priority)
+        try:
+            from tradingagents.config.datasource_snapshot import get_datasource_config_snapshot
+            names = get_datasource_config_snapshot().grouping_names("a_shares")
+            if names:
+                return names
+        except Exception as e:
+            logger.debug(f"[面板筛选] 读取数据源优先级失败，使用默认顺序: {e}")
+        return list(DEFAULT_SOURCE_PRIORITY)
+
+    def load_bars(self, end_date: str, start_date: str, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Load all symbols' daily bars in [start_date, end_date], one source per symbol.
+
+        Sources are queried in priority order; each query excludes the symbols an
+        earlier source already covered, so only the chosen source's bars are read.
+        """
+        layout = self._layout or get_bar_layout()
+        bars = pd.DataFrame()
+        if layout == LAYOUT_BUCKET:
+            bars = self._load_by_priority(self._load_bucket_bars, start_date, end_date, symbols)
+            if bars.empty:
+                logger.warning("⚠️ [面板筛选] 分桶集合中没有日线数据（HISTORICAL_BAR_LAYOUT=bucket）")
+        else:
+            bars = self._load_by_priority(self._load_document_bars, start_date, end_date, symbols)
+        if bars.empty:
+            return bars
+        return bars.rename(columns=BAR_FIELD_MAP)
+
+    def _load_by_priority(self, loader, start_date: str, end_date: str,
+                          symbols: Optional[List[str]]) -> pd.DataFrame:
+        priority = self.source_priority()
+        frames: List[pd.DataFrame] = []
+        covered: Set[str] = set()
+        # 最后一轮读取未列入优先级的数据源（含没有 data_source 字段的旧数据）
+        for source in priority + [None]:
+            source_filter: Any = source if source is not None else {"$nin": priority}
+            frame = loader(start_date, end_date, source_filter, symbols, covered)
+            if frame.empty:
+                continue
+            if source is None:
+                # 未列入优先级的数据源之间仍只保留一个（按出现顺序）
+                first = frame.drop_duplicates("symbol")[["symbol", "data_source"]] \
+                    if "data_source" in frame.columns else None
+                if first is not None:
+                    frame = frame.merge(first, on=["symbol", "data_source"], how="inner")
+            covered.update(frame["symbol"].unique())
+            frames.append(frame)
+            logger.debug(f"[面板筛选] 数据源 {source or '其他'}: {frame['symbol'].nunique()} 只股票")
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def _symbol_filter(symbols: Optional[List[str]], covered: Set[str]) -> Optional[Dict[str, Any]]:
+        if symbols:
+            remaining = [s for s in symbols if s not in covered]
+            return {"$in": remaining}
+        if covered:
+            return {"$nin": sorted(covered)}
+        return None
+
+    def _load_document_bars(self, start_date: str, end_date: str, source_filter: Any,
+                            symbols: Optional[List[str]], covered: Set[str]) -> pd.DataFrame:
+        query: Dict[str, Any] = {
+            "trade_date": {"$gte": start_date, "$lte": end_date},
+            "period": "daily",
+            "data_source": source_filter,
+        }
+        symbol_filter = self._symbol_filter(symbols, covered)
+        if symbol_filter is not None:
+            if "$in" in symbol_filter and not symbol_filter["$in"]:
+                return pd.DataFrame()
+            query["symbol"] = symbol_filter
+        projection = {"_id": 0, "symbol": 1, "trade_date": 1, "data_source": 1, **{f: 1 for f in BAR_FIELD_MAP}}
+
+        cursor = self._get_collection().find(query, projection).batch_size(20000)
+        return _frame_from_chunks(cursor, lambda chunk: pd.DataFrame(chunk))
+
+    def _load_bucket_bars(self, start_date: str, end_date: str, source_filter: Any,
+                          symbols: Optional[List[str]], covered: Set[str]) -> pd.DataFrame:
+        query: Dict[str, Any] = {
+            "period": "daily",
+            "bucket": {"$gte": bucket_key(start_date), "$lte": bucket_key(end_date)},
+            "data_source": source_filter,
+        }
+        symbol_filter = self._symbol_filter(symbols, covered)
+        if symbol_filter is not None:
+            if "$in" in symbol_filter and not symbol_filter["$in"]:
+                return pd.DataFrame()
+            query["symbol"] = symbol_filter
+        projection = {"_id": 0, "symbol": 1, "data_source": 1, "dates": 1,
+                      **{f"columns.{f}": 1 for f in BAR_FIELD_MAP}}
+
+        cursor = self._get_db()[BUCKET_COLLECTION].find(query, projection).batch_size(2000)
+        return _frame_from_chunks(
+            cursor, lambda chunk: buckets_to_frame(chunk, start_date, end_date), chunk_size=_CHUNK_SIZE // 20
+        )
+
+    def run(self, conditions: Dict[str, Any], fields: Set[str], end_date: Optional[str],
+            allowed_fields: Iterable[str], allowed_ops: Iterable[str],
+            tech_fields: Iterable[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Evaluate conditions over the full universe.
+
+        Returns:
+            Matching items (unsorted) or None when no local bars are available.
+        """
+        end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime.now()
+        start = end - timedelta(days=self.lookback_days)
+        started = datetime.now()
+
+        bars = self.load_bars(end.strftime("%Y-%m-%d"), start.strftime("%Y-%m-%d"))
+        panel = build_panel(bars.drop(columns=["data_source"], errors="ignore"))
+        if not panel or panel["close"].empty:
+            return None
+
+        tech_fields = set(tech_fields)
+        need_tech = bool(fields & tech_fields)
+        # 输出列与逐只筛选保持一致
+        output_fields = {"pct_chg"} | fields
+        if need_tech:
+            output_fields |= {"ma20", "rsi14", "kdj_k", "dif"}
+        compute_panel_indicators(panel, output_fields)
+
+        symbols = panel["close"].columns
+        mask = evaluate_conditions_mask(panel, conditions, allowed_fields, allowed_ops, symbols)
+        passed = mask[mask].index
+
+        last = pd.DataFrame({
+            name: frame.iloc[-1]
+            for name, frame in panel.items()
+            if name != "trade_date" and not frame.empty
+        }).reindex(passed)
+
+        items: List[Dict[str, Any]] = []
+        tech_columns = ["ma20", "rsi14", "kdj_k", "kdj_d", "kdj_j", "dif", "dea", "macd_hist"]
+        for code, row in last.iterrows():
+            item = {
+                "code": code,
+                "close": _to_float(row.get("close")),
+                "pct_chg": _to_float(row.get("pct_chg")),
+                "amount": _to_float(row.get("amount")),
+            }
+            for col in tech_columns:
+                item[col] = _to_float(row.get(col)) if need_tech else None
+            items.append(item)
+
+        elapsed = (datetime.now() - started).total_seconds()
+        logger.info(f"📊 [面板筛选] 全市场 {len(symbols)} 只股票, 命中 {len(items)} 只, 耗时 {elapsed:.2f}秒")
+        return items
+
+
+def _frame_from_chunks(cursor, to_frame, chunk_size: int = _CHUNK_SIZE) -> pd.DataFrame:
+    """分块消费游标构建 DataFrame，避免一次性持有全部原始文档"""
+    frames: List[pd.DataFrame] = []
+    chunk: List[Dict[str, Any]] = []
+    for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) >= chunk_size:
+            frames.append(to_frame(chunk))
+            chunk = []
+    if chunk:
+        frames.append(to_frame(chunk))
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def _to_float(v: Any) -> Optional[float]:
+    try:
+        if v is None or pd.isna(v):
+            return None
+        return float(v)
+    except Exception:
+        return None
@@ -14,6 +14,7 @@ from tradingagents.dataflows.data_source_manager import get_data_source_manager
 from tradingagents.dataflows.providers.china.fundamentals_snapshot import get_cn_fund_snapshot
 
 
+from app.services.screening.panel_engine import PanelScreeningEngine
 from app.services.screening.eval_utils import (
     collect_fields_from_conditions as _collect_fields_from_conditions_util,
     evaluate_conditions as _evaluate_conditions_util,
@@ -69,23 +70,17 @@ import logging
 logger = logging.getLogger("agents")
 
 class ScreeningService:
+    # 逐只筛选（基本面条件 / 本地无K线时的降级路径）的样本上限
+    PER_SYMBOL_LIMIT = 120
+
     def __init__(self):
         # 数据源通过统一DF接口获取，不直接绑定具体源
         self.provider = None
+        # 全市场面板筛选引擎（基于本地 stock_daily_quotes）
+        self.panel_engine = PanelScreeningEngine()
 
     # --- 公共入口 ---
     def run(self, conditions: Dict[str, Any], params: ScreeningParams) -> Dict[str, Any]:
-        symbols = self._get_universe()
-        # 为控制时长，先限制样本规模（后续用批量/缓存优化）
-        symbols = symbols[:120]
-
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=220)
-        end_s = end_date.strftime("%Y-%m-%d")
-        start_s = start_date.strftime("%Y-%m-%d")
-
-        results: List[Dict[str, Any]] = []
-
         # 解析条件中涉及的字段，决定是否需要技术指标/行情
         needed_fields = self._collect_fields_from_conditions(conditions)
         order_fields = {o.get("field") for o in (params.order_by or []) if o.get("field")}
@@ -94,6 +89,37 @@ class ScreeningService:
         need_base = any(f in BASE_FIELDS for f in all_needed) or need_tech
         need_fund = any(f in FUND_FIELDS for f in all_needed)
 
+        results: Optional[List[Dict[str, Any]]] = None
+        if need_base:
+            # 行情/技术条件：全市场面板一次性向量化评估
+            try:
+                results = self.panel_engine.run(
+                    conditions, all_needed, params.date,
+                    ALLOWED_FIELDS, ALLOWED_OPS, TECH_FIELDS,
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ 面板筛选失败，降级为逐只筛选: {e}")
+            else:
+                if results is None:
+                    logger.warning("⚠️ 本地日线数据不可用，降级为逐只筛选")
+
+        if results is None:
+            results = self._run_per_symbol(conditions, need_tech, need_base, need_fund)
+
+        return self._sort_and_paginate(results, params)
+
+    def _run_per_symbol(self, conditions: Dict[str, Any], need_tech: bool,
+                        need_base: bool, need_fund: bool) -> List[Dict[str, Any]]:
+        """逐只股票评估（基本面快照需逐只查询，为控制时长限制样本规模）"""
+        symbols = self._get_universe()[:self.PER_SYMBOL_LIMIT]
+
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=220)
+        end_s = end_date.strftime("%Y-%m-%d")
+        start_s = start_date.strftime("%Y-%m-%d")
+
+        results: List[Dict[str, Any]] = []
+
         for code in symbols:
             try:
                 dfc = None
@@ -166,6 +192,9 @@ class ScreeningService:
             except Exception:
                 continue
 
+        return results
+
+    def _sort_and_paginate(self, results: List[Dict[str, Any]], params: ScreeningParams) -> Dict[str, Any]:
         total = len(results)
         # 排序
         if params.order_by:
@@ -32,6 +32,7 @@ from app.services.config_service import ConfigService
 from app.services.memory_state_manager import get_memory_state_manager, TaskStatus
 from app.services.redis_progress_tracker import RedisProgressTracker, get_progress_by_id
 from app.services.progress_log_handler import register_analysis_tracker, unregister_analysis_tracker
+from app.services.analysis.graph_pool import get_trading_graph_pool
 
 # 股票基础信息获取（用于补充显示名称）
 try:
@@ -269,6 +270,33 @@ def get_provider_and_url_by_model_sync(model_name: str) -> dict:
         }
 
 
+def _get_llm_config_version_sync() -> Optional[str]:
+    """
+    LLM 配置版本（激活的系统配置版本 + 厂家配置的数量和最近更新时间）
+
+    写入分析配置后成为 TradingAgents 实例池键的一部分：其他进程修改模型/厂家配置后，
+    本进程不会再复用持有旧 API Key/地址的实例。
+    """
+    try:
+        from pymongo import MongoClient
+        from app.core.config import settings
+
+        client = MongoClient(settings.MONGO_URI)
+        try:
+            db = client[settings.MONGO_DB]
+            config_doc = db.system_configs.find_one({"is_active": True}, {"version": 1}, sort=[("version", -1)])
+            provider_doc = db.llm_providers.find_one({}, {"updated_at": 1}, sort=[("updated_at", -1)])
+            provider_count = db.llm_providers.count_documents({})
+        finally:
+            client.close()
+        config_version = config_doc.get("version") if config_doc else None
+        providers_updated_at = provider_doc.get("updated_at") if provider_doc else None
+        return f"{config_version}:{provider_count}:{providers_updated_at}"
+    except Exception as e:
+        logger.debug(f"⚠️ [同步查询] 无法获取LLM配置版本: {e}")
+        return None
+
+
 def _get_env_api_key_for_provider(provider: str) -> str:
     """
     从环境变量获取指定供应商的 API Key
@@ -552,6 +580,9 @@ def create_analysis_config(
 
         logger.info(f"⚠️  使用回退的 backend_url: {config['backend_url']}")
 
+    # 🔧 LLM 配置版本：模型/厂家配置变更后实例池不再复用旧实例
+    config["llm_config_version"] = _get_llm_config_version_sync()
+
     # 添加分析师配置
     config["selected_analysts"] = selected_analysts
     config["debug"] = False
@@ -592,7 +623,7 @@ class SimpleAnalysisService:
     """简化的股票分析服务类"""
 
     def __init__(self):
-        self._trading_graph_cache = {}
+        self._graph_pool = get_trading_graph_pool()
         self.memory_manager = get_memory_state_manager()
 
         # 进度跟踪器缓存
@@ -705,28 +736,27 @@ class SimpleAnalysisService:
             return PyObjectId(new_object_id)
 
     def _get_trading_graph(self, config: Dict[str, Any]) -> TradingAgentsGraph:
-        """获取或创建TradingAgents实例
-
-        ⚠️ 注意：为了避免并发执行时的数据混淆，每次都创建新实例
-        虽然这会增加一些初始化开销，但可以确保线程安全
+        """从实例池中签出TradingAgents实例
 
-        TradingAgentsGraph 实例包含可变状态（self.ticker, self.curr_state等），
-        如果多个线程共享同一个实例，会导致数据混淆。
+        TradingAgentsGraph 的运行状态（ticker、curr_state 等）按线程隔离，
+        实例池按 (分析师, 模型配置, 研究深度) 复用已编译的图；签出期间实例由当前任务独占，
+        使用完毕后必须调用 _release_trading_graph 归还。
         """
-        # 🔧 [并发安全] 每次都创建新实例，避免多线程共享状态
-        # 不再使用缓存，因为 TradingAgentsGraph 有可变的实例变量
-        logger.info(f"🔧 创建新的TradingAgents实例（并发安全模式）...")
-
-        trading_graph = TradingAgentsGraph(
-            selected_analysts=config.get("selected_analysts", ["market", "fundamentals"]),
-            debug=config.get("debug", False),
-            config=config
-        )
+        trading_graph = self._graph_pool.acquire(config)
 
-        logger.info(f"✅ TradingAgents实例创建成功（实例ID: {id(trading_graph)}）")
+        logger.info(f"✅ TradingAgents实例已就绪（实例ID: {id(trading_graph)}）")
 
         return trading_graph
 
+    def _release_trading_graph(self, trading_graph: Optional[TradingAgentsGraph]):
+        """归还TradingAgents实例到实例池"""
+        if trading_graph is None:
+            return
+        try:
+            self._graph_pool.release(trading_graph)
+        except Exception as e:
+            logger.warning(f"⚠️ 归还TradingAgents实例失败: {e}")
+
     async def create_analysis_task(
         self,
         user_id: str,
@@ -1091,6 +1121,7 @@ class SimpleAnalysisService:
         progress_tracker: Optional[RedisProgressTracker] = None
     ) -> Dict[str, Any]:
         """同步执行分析的具体实现"""
+        trading_graph = None
         try:
             # 在线程中重新初始化日志系统
             from tradingagents.utils.logging_init import init_logging, get_logger
@@ -1846,6 +1877,9 @@ class SimpleAnalysisService:
             # 抛出包含友好错误信息的异常
             raise Exception(user_friendly_error) from e
 
+        finally:
+            self._release_trading_graph(trading_graph)
+
     async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """获取任务状态"""
         logger.info(f"🔍 查询任务状态: {task_id}")
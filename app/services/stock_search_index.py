@@ -0,0 +1,173 @@
+"""
+股票搜索内存索引
+
+搜索框每次按键都会触发搜索，原实现对 stock_basic_info 做不锚定的 $regex 全表扫描。
+这里按市场把基础信息加载到内存，预先按数据源优先级去重，支持：
+- 代码前缀（及子串）
+- 中文名称子串
+- 拼音首字母（需要安装 pypinyin，例如 "payh" -> 平安银行）
+- 英文名称子串
+
+索引在同步基础信息后失效重建，并设置 TTL 兜底（其他进程写入的数据）。
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    from pypinyin import Style, lazy_pinyin
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+
+logger = logging.getLogger("webapi")
+
+SEARCH_INDEX_ENABLED = os.getenv("STOCK_SEARCH_INDEX_ENABLED", "true").lower() in ("true", "1", "yes")
+SEARCH_INDEX_TTL_SECONDS = int(os.getenv("STOCK_SEARCH_INDEX_TTL_SECONDS", "600"))
+
+# 匹配层级（越小越靠前）
+_TIER_CODE_EXACT = 0
+_TIER_CODE_PREFIX = 1
+_TIER_NAME_PREFIX = 2
+_TIER_PINYIN_PREFIX = 3
+_TIER_NAME_CONTAINS = 4
+_TIER_PINYIN_CONTAINS = 5
+_TIER_NAME_EN = 6
+_TIER_CODE_CONTAINS = 7
+
+
+def pinyin_initials(text: str) -> str:
+    """中文名称的拼音首字母（小写，仅保留字母数字）；未安装 pypinyin 时返回空串"""
+    if not text or not PYPINYIN_AVAILABLE:
+        return ""
+    letters = lazy_pinyin(text, style=Style.FIRST_LETTER, errors="default")
+    return "".join(ch for ch in "".join(letters).lower() if ch.isalnum())
+
+
+class _Entry:
+    __slots__ = ("code", "doc", "names", "names_en", "initials")
+
+    def __init__(self, code: str, doc: Dict):
+        self.code = code
+        self.doc = doc
+        self.names: List[str] = []
+        self.names_en: List[str] = []
+        self.initials: List[str] = []
+
+    def add_keys(self, doc: Dict):
+        """合并同一代码各数据源记录的名称（保证不低于按记录匹配的召回）"""
+        name = str(doc.get("name") or "")
+        if name and name.lower() not in self.names:
+            self.names.append(name.lower())
+            initials = pinyin_initials(name)
+            if initials and initials not in self.initials:
+                self.initials.append(initials)
+        name_en = str(doc.get("name_en") or "").lower()
+        if name_en and name_en not in self.names_en:
+            self.names_en.append(name_en)
+
+    def tier(self, query: str) -> Optional[int]:
+        if self.code == query:
+            return _TIER_CODE_EXACT
+        if self.code.startswith(query):
+            return _TIER_CODE_PREFIX
+        if any(name.startswith(query) for name in self.names):
+            return _TIER_NAME_PREFIX
+        if any(initials.startswith(query) for initials in self.initials):
+            return _TIER_PINYIN_PREFIX
+        if any(query in name for name in self.names):
+            return _TIER_NAME_CONTAINS
+        if any(query in initials for initials in self.initials):
+            return _TIER_PINYIN_CONTAINS
+        if any(query in name for name in self.names_en):
+            return _TIER_NAME_EN
+        if query in self.code:
+            return _TIER_CODE_CONTAINS
+        return None
+
+
+class StockSearchIndex:
+    """单个市场的股票搜索索引（构建后只读）"""
+
+    def __init__(self, docs: List[Dict], source_priority: List[str]):
+        rank = {source: i for i, source in enumerate(source_priority)}
+        entries: Dict[str, _Entry] = {}
+        for doc in docs:
+            code = doc.get("code")
+            if not code:
+                continue
+            code = str(code)
+            entry = entries.get(code)
+            if entry is None:
+                entry = entries[code] = _Entry(code.lower(), doc)
+            elif rank.get(doc.get("source"), len(rank)) < rank.get(entry.doc.get("source"), len(rank)):
+                # 每个代码只保留优先级最高的数据源
+                entry.doc = doc
+            entry.add_keys(doc)
+
+        self._entries: List[_Entry] = [entries[code] for code in sorted(entries)]
+        self._codes: List[str] = [entry.code for entry in self._entries]
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        query = (query or "").strip().lower()
+        if not query:
+            return []
+
+        # 纯代码前缀走二分查找，结果已按代码排序
+        if query.isdigit():
+            start = bisect.bisect_left(self._codes, query)
+            prefix_hits = []
+            for entry in self._entries[start:]:
+                if not entry.code.startswith(query) or len(prefix_hits) >= limit:
+                    break
+                prefix_hits.append(entry)
+            if len(prefix_hits) >= limit:
+                return [dict(entry.doc) for entry in prefix_hits]
+
+        matches: List[Tuple[int, int, _Entry]] = []
+        for position, entry in enumerate(self._entries):
+            tier = entry.tier(query)
+            if tier is not None:
+                matches.append((tier, position, entry))
+        matches.sort(key=lambda item: (item[0], item[1]))
+        return [dict(entry.doc) for _, _, entry in matches[:limit]]
+
+
+_indexes: Dict[str, StockSearchIndex] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def get_stock_search_index(
+    market: str,
+    loader: Callable[[str], Awaitable[StockSearchIndex]],
+) -> StockSearchIndex:
+    """获取市场的搜索索引，不存在或过期时调用 loader 重建（同一市场只重建一次）"""
+    index = _indexes.get(market)
+    if index is not None and time.monotonic() - index.built_at < SEARCH_INDEX_TTL_SECONDS:
+        return index
+
+    lock = _locks.setdefault(market, asyncio.Lock())
+    async with lock:
+        index = _indexes.get(market)
+        if index is not None and time.monotonic() - index.built_at < SEARCH_INDEX_TTL_SECONDS:
+            return index
+        index = await loader(market)
+        _indexes[market] = index
+        logger.info(f"🔎 {market} 股票搜索索引已构建: {len(index)} 只股票")
+        return index
+
+
+def invalidate_stock_search_index(market: Optional[str] = None):
+    """基础信息同步后调用，下次搜索时重建索引"""
+    if market is None:
+        _indexes.clear()
+    else:
+        _indexes.pop(market, None)
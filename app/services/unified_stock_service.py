@@ -19,6 +19,13 @@ import logging
 from typing import Dict, List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from tradingagents.config.datasource_snapshot import get_datasource_config_snapshot_async
+from app.services.stock_search_index import (
+    SEARCH_INDEX_ENABLED,
+    StockSearchIndex,
+    get_stock_search_index,
+)
+
 logger = logging.getLogger("webapi")
 
 
@@ -118,14 +125,11 @@ class UnifiedStockService:
         market_category_id = market_category_map.get(market)
         
         try:
-            # 从 datasource_groupings 集合查询
-            groupings = await self.db.datasource_groupings.find({
-                "market_category_id": market_category_id,
-                "enabled": True
-            }).sort("priority", -1).to_list(length=None)
-            
-            if groupings:
-                priority_list = [g["data_source_name"] for g in groupings]
+            # 从进程内配置快照读取 datasource_groupings（已按优先级降序）
+            snapshot = await get_datasource_config_snapshot_async(self.db)
+            priority_list = snapshot.grouping_names(market_category_id)
+
+            if priority_list:
                 logger.debug(f"📊 {market} 数据源优先级（从数据库）: {priority_list}")
                 return priority_list
         except Exception as e:
@@ -173,6 +177,15 @@ class UnifiedStockService:
         Returns:
             股票列表
         """
+        if SEARCH_INDEX_ENABLED:
+            try:
+                index = await get_stock_search_index(market, self._build_search_index)
+                result_list = index.search(query, limit)
+                logger.info(f"🔍 搜索 {market} 市场: '{query}' -> {len(result_list)} 条结果（内存索引）")
+                return result_list
+            except Exception as e:
+                logger.warning(f"⚠️ 股票搜索索引不可用，回退到数据库查询: {e}")
+
         collection_name = self.collection_map[market]["basic_info"]
         collection = self.db[collection_name]
 
@@ -218,6 +231,13 @@ class UnifiedStockService:
         logger.info(f"🔍 搜索 {market} 市场: '{query}' -> {len(result_list)} 条结果（已去重）")
         return result_list
 
+    async def _build_search_index(self, market: str) -> StockSearchIndex:
+        """加载市场全部基础信息并构建搜索索引（按数据源优先级预先去重）"""
+        collection = self.db[self.collection_map[market]["basic_info"]]
+        docs = await collection.find({}).to_list(length=None)
+        source_priority = await self._get_source_priority(market)
+        return StockSearchIndex(docs, source_priority)
+
     async def get_daily_quotes(
         self,
         market: str,
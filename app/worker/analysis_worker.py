@@ -1,14 +1,23 @@
 """
 分析任务Worker进程
 消费队列中的分析任务，调用TradingAgents进行股票分析
+
+- 每个 Worker 运行 WORKER_CONCURRENCY 个并发槽位，每个槽位独立出队、处理、确认任务；
+  队列的全局/用户并发限制在出队脚本中检查，达到上限时槽位不出队（背压）
+- 心跳按槽位上报当前任务，并为处理中的任务续期可见性超时
+- WORKER_PROCESS_POOL_ENABLED 时每个槽位使用独立的单进程执行器，单个任务崩溃只影响本槽位的任务
 """
 
 import asyncio
 import logging
+import multiprocessing
 import signal
 import sys
+import time
 import uuid
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any
@@ -29,6 +38,49 @@ from app.services.queue import DEFAULT_USER_CONCURRENT_LIMIT, GLOBAL_CONCURRENT_
 logger = logging.getLogger(__name__)
 
 
+def _build_analysis_task(task_data: Dict[str, Any]) -> AnalysisTask:
+    """由队列任务数据构建分析任务对象"""
+    parameters_dict = task_data.get("parameters", {})
+    if isinstance(parameters_dict, str):
+        import json
+        parameters_dict = json.loads(parameters_dict)
+
+    parameters = AnalysisParameters(**parameters_dict)
+
+    return AnalysisTask(
+        task_id=task_data.get("id"),
+        user_id=task_data.get("user"),
+        symbol=task_data.get("symbol"),
+        stock_code=task_data.get("symbol"),
+        batch_id=task_data.get("batch_id"),
+        parameters=parameters
+    )
+
+
+async def _execute_in_subprocess(task_data: Dict[str, Any]) -> float:
+    await init_database()
+    await init_redis()
+    try:
+        task_id = task_data.get("id")
+
+        def progress_callback(progress: int, message: str):
+            logger.debug(f"任务进度 {task_id}: {progress}% - {message}")
+
+        result = await get_analysis_service().execute_analysis_task(
+            _build_analysis_task(task_data),
+            progress_callback=progress_callback
+        )
+        return result.execution_time
+    finally:
+        await close_database()
+        await close_redis()
+
+
+def _run_task_in_subprocess(task_data: Dict[str, Any]) -> float:
+    """进程池入口：在子进程的独立事件循环中执行分析，返回耗时（秒）"""
+    return asyncio.run(_execute_in_subprocess(task_data))
+
+
 class AnalysisWorker:
     """分析任务Worker类"""
 
@@ -36,18 +88,32 @@ class AnalysisWorker:
         self.worker_id = worker_id or f"worker-{uuid.uuid4().hex[:8]}"
         self.queue_service = None
         self.running = False
-        self.current_task = None
+        # 槽位状态：{slot_id: {"task_id", "symbol", "started_at"}}
+        self.slots: Dict[int, Dict[str, Any]] = {}
+        # 进程池模式下每个槽位一个单进程执行器（子进程崩溃只会破坏本槽位的执行器）
+        self._slot_pools: Dict[int, ProcessPoolExecutor] = {}
 
         # 配置参数（可由系统设置覆盖）
         self.heartbeat_interval = int(getattr(settings, 'WORKER_HEARTBEAT_INTERVAL', 30))
         self.max_retries = int(getattr(settings, 'QUEUE_MAX_RETRIES', 3))
         self.poll_interval = float(getattr(settings, 'QUEUE_POLL_INTERVAL_SECONDS', 1))  # 队列轮询间隔（秒）
         self.cleanup_interval = float(getattr(settings, 'QUEUE_CLEANUP_INTERVAL_SECONDS', 60))
+        self.blocking_timeout = float(getattr(settings, 'QUEUE_BLOCKING_TIMEOUT_SECONDS', 5))  # 阻塞出队等待（秒），0为轮询
+        self.concurrency = max(1, int(getattr(settings, 'WORKER_CONCURRENCY', 1)))  # 并发槽位数
+        self.use_process_pool = bool(getattr(settings, 'WORKER_PROCESS_POOL_ENABLED', False))
 
         # 注册信号处理器
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
 
+    @property
+    def current_task(self) -> Optional[str]:
+        """任一槽位正在处理的任务（兼容单槽位时的字段）"""
+        for slot in self.slots.values():
+            if slot.get("task_id"):
+                return slot["task_id"]
+        return None
+
     def _signal_handler(self, signum, frame):
         """信号处理器，优雅关闭"""
         logger.info(f"收到信号 {signum}，准备关闭Worker...")
@@ -82,8 +148,11 @@ class AnalysisWorker:
                 self.heartbeat_interval = int(effective_settings.get("worker_heartbeat_interval_seconds", self.heartbeat_interval))
                 self.poll_interval = float(effective_settings.get("queue_poll_interval_seconds", self.poll_interval))
                 self.cleanup_interval = float(effective_settings.get("queue_cleanup_interval_seconds", self.cleanup_interval))
+                self.blocking_timeout = float(effective_settings.get("queue_blocking_timeout_seconds", self.blocking_timeout))
+                self.concurrency = max(1, int(effective_settings.get("worker_concurrency", self.concurrency)))
             except Exception:
                 pass
+
             # 启动心跳任务
             heartbeat_task = asyncio.create_task(self._heartbeat_loop())
 
@@ -110,62 +179,62 @@ class AnalysisWorker:
             await self._cleanup()
 
     async def _work_loop(self):
-        """主工作循环"""
-        logger.info(f"✅ Worker {self.worker_id} 开始工作")
+        """主工作循环：启动并等待所有槽位"""
+        mode = "进程池" if self.use_process_pool else "协程"
+        logger.info(f"✅ Worker {self.worker_id} 开始工作（{self.concurrency} 个槽位，{mode}模式）")
+        global_limit = getattr(self.queue_service, "global_concurrent_limit", 0)
+        if global_limit and self.concurrency > global_limit:
+            logger.warning(f"⚠️ 槽位数 {self.concurrency} 大于全局并发限制 {global_limit}，多余槽位将保持空闲")
 
-        while self.running:
-            try:
-                # 从队列获取任务
-                task_data = await self.queue_service.dequeue_task(self.worker_id)
-
-                if task_data:
-                    await self._process_task(task_data)
-                else:
-                    # 没有任务，短暂休眠
-                    await asyncio.sleep(self.poll_interval)
-
-            except Exception as e:
-                logger.error(f"工作循环异常: {e}")
-                await asyncio.sleep(5)  # 异常后等待5秒再继续
+        await asyncio.gather(*(self._slot_loop(slot_id) for slot_id in range(self.concurrency)))
 
         logger.info(f"🔄 Worker {self.worker_id} 工作循环结束")
 
-    async def _process_task(self, task_data: Dict[str, Any]):
+    async def _slot_loop(self, slot_id: int):
+        """单个槽位的工作循环：出队 → 处理 → 确认"""
+        self.slots[slot_id] = {"task_id": None}
+        try:
+            while self.running:
+                try:
+                    # 从队列获取任务（阻塞模式下队列为空时在 Redis 端等待，不再轮询；全局并发已满时不出队）
+                    started = asyncio.get_running_loop().time()
+                    task_data = await self.queue_service.dequeue_task(self.worker_id, block_timeout=self.blocking_timeout)
+
+                    if task_data:
+                        await self._process_task(task_data, slot_id)
+                    elif self.blocking_timeout <= 0 or asyncio.get_running_loop().time() - started < self.blocking_timeout:
+                        # 轮询模式没有任务，或阻塞等待提前返回（任务被其他Worker取走/因并发限制放回），短暂休眠
+                        await asyncio.sleep(self.poll_interval)
+
+                except Exception as e:
+                    logger.error(f"工作循环异常（槽位 {slot_id}）: {e}")
+                    await asyncio.sleep(5)  # 异常后等待5秒再继续
+        finally:
+            self.slots.pop(slot_id, None)
+
+    async def _process_task(self, task_data: Dict[str, Any], slot_id: int = 0):
         """处理单个任务"""
         task_id = task_data.get("id")
         stock_code = task_data.get("symbol")
-        user_id = task_data.get("user")
 
-        logger.info(f"📊 开始处理任务: {task_id} - {stock_code}")
+        logger.info(f"📊 开始处理任务: {task_id} - {stock_code}（槽位 {slot_id}）")
 
-        self.current_task = task_id
+        self.slots[slot_id] = {"task_id": task_id, "symbol": stock_code, "started_at": time.time()}
         success = False
 
         try:
-            # 构建分析任务对象
-            parameters_dict = task_data.get("parameters", {})
-            if isinstance(parameters_dict, str):
-                import json
-                parameters_dict = json.loads(parameters_dict)
-
-            parameters = AnalysisParameters(**parameters_dict)
-
-            task = AnalysisTask(
-                task_id=task_id,
-                user_id=user_id,
-                stock_code=stock_code,
-                batch_id=task_data.get("batch_id"),
-                parameters=parameters
-            )
-
             # 执行分析
-            result = await get_analysis_service().execute_analysis_task(
-                task,
-                progress_callback=self._progress_callback
-            )
+            if self.use_process_pool:
+                execution_time = await self._run_in_process_pool(task_data, slot_id)
+            else:
+                result = await get_analysis_service().execute_analysis_task(
+                    _build_analysis_task(task_data),
+                    progress_callback=lambda progress, message: self._progress_callback(task_id, progress, message)
+                )
+                execution_time = result.execution_time
 
             success = True
-            logger.info(f"✅ 任务完成: {task_id} - 耗时: {result.execution_time:.2f}秒")
+            logger.info(f"✅ 任务完成: {task_id} - 耗时: {execution_time:.2f}秒")
 
         except Exception as e:
             logger.error(f"❌ 任务执行失败: {task_id} - {e}")
@@ -178,11 +247,31 @@ class AnalysisWorker:
             except Exception as e:
                 logger.error(f"确认任务失败: {task_id} - {e}")
 
-            self.current_task = None
+            self.slots[slot_id] = {"task_id": None}
+
+    def _create_process_pool(self) -> ProcessPoolExecutor:
+        # spawn：子进程不继承父进程的事件循环和数据库/Redis 连接
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
 
-    def _progress_callback(self, progress: int, message: str):
+    async def _run_in_process_pool(self, task_data: Dict[str, Any], slot_id: int) -> float:
+        """在本槽位的子进程中执行分析；子进程崩溃时本任务按失败处理并重建本槽位的执行器"""
+        pool = self._slot_pools.get(slot_id)
+        if pool is None:
+            pool = self._slot_pools[slot_id] = self._create_process_pool()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, _run_task_in_subprocess, task_data)
+        except BrokenProcessPool:
+            logger.error(f"💥 分析子进程异常退出（槽位 {slot_id}），重建该槽位的执行器")
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._slot_pools.pop(slot_id, None)
+            raise
+
+    def _progress_callback(self, task_id: str, progress: int, message: str):
         """进度回调函数"""
-        logger.debug(f"任务进度 {self.current_task}: {progress}% - {message}")
+        logger.debug(f"任务进度 {task_id}: {progress}% - {message}")
 
     async def _heartbeat_loop(self):
         """心跳循环"""
@@ -197,15 +286,31 @@ class AnalysisWorker:
                 await asyncio.sleep(5)
 
     async def _send_heartbeat(self):
-        """发送心跳"""
+        """发送心跳（按槽位上报任务，并续期处理中任务的可见性超时）"""
         try:
             from app.core.redis_client import get_redis_service
             redis_service = get_redis_service()
 
+            slots = []
+            for slot_id, slot in sorted(self.slots.items()):
+                task_id = slot.get("task_id")
+                if task_id and self.queue_service:
+                    await self.queue_service.extend_visibility_timeout(task_id, self.worker_id)
+                slots.append({
+                    "slot": slot_id,
+                    "task_id": task_id,
+                    "symbol": slot.get("symbol"),
+                    "running_seconds": int(time.time() - slot["started_at"]) if task_id else 0,
+                })
+
             heartbeat_data = {
                 "worker_id": self.worker_id,
                 "timestamp": datetime.utcnow().isoformat(),
                 "current_task": self.current_task,
+                "concurrency": self.concurrency,
+                "busy_slots": sum(1 for slot in slots if slot["task_id"]),
+                "slots": slots,
+                "mode": "process" if self.use_process_pool else "async",
                 "status": "active" if self.running else "stopping"
             }
 
@@ -231,6 +336,10 @@ class AnalysisWorker:
         """清理资源"""
         logger.info(f"🧹 清理Worker资源: {self.worker_id}")
 
+        for pool in self._slot_pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._slot_pools.clear()
+
         try:
             # 清理心跳记录
             from app.core.redis_client import get_redis_service
@@ -12,6 +12,7 @@ from app.services.news_data_service import get_news_data_service
 from tradingagents.dataflows.providers.china.tushare import get_tushare_provider
 from tradingagents.dataflows.providers.china.akshare import get_akshare_provider
 from tradingagents.dataflows.news.realtime_news import RealtimeNewsAggregator
+from tradingagents.dataflows.news.near_duplicate import dedupe_news
 
 logger = logging.getLogger(__name__)
 
@@ -428,7 +429,12 @@ class NewsDataSyncService:
                 seen.add(key)
                 unique_news.append(news)
         
-        return unique_news
+        # 多数据源转载的同一条新闻（标题/来源后缀略有差异）
+        return dedupe_news(
+            unique_news,
+            text_of=lambda news: (news.get("title", ""), news.get("content") or news.get("summary", "")),
+            key_of=lambda news: news.get("url", ""),
+        )
     
     async def sync_market_news(
         self,
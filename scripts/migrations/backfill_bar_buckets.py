@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+迁移脚本：把 stock_daily_quotes 单日文档回填到 K 线分桶集合（HISTORICAL_BUCKET_COLLECTION，默认 stock_quote_buckets）
+
+背景：
+- HISTORICAL_BAR_LAYOUT=dual 时新同步的 K 线同时写入两种布局，但历史数据只存在单日文档中
+- dual 模式下读取只在分桶覆盖单日文档的首末交易日时才使用分桶，回填完成前会一直回退到单日文档
+- 切换到 HISTORICAL_BAR_LAYOUT=bucket（并设置 HISTORICAL_BUCKET_ONLY_CONFIRMED=true）之前必须先完成回填
+
+回填是幂等的：内容哈希未变化的 K 线不会重复写入，可以中断后重新运行。
+
+使用方法：
+    python scripts/migrations/backfill_bar_buckets.py
+    python scripts/migrations/backfill_bar_buckets.py --symbols 000001,600000 --period daily
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def backfill(symbols=None, period: str = "daily") -> bool:
+    """按 (股票代码, 数据源) 回填分桶"""
+    from app.core.database import init_database
+    from app.services.historical_data_service import get_historical_data_service
+
+    await init_database()
+    service = await get_historical_data_service()
+
+    query = {"period": period}
+    if symbols:
+        query["symbol"] = {"$in": symbols}
+
+    try:
+        pairs = await service.collection.aggregate([
+            {"$match": query},
+            {"$group": {"_id": {"symbol": "$symbol", "data_source": "$data_source"}}},
+            {"$sort": {"_id.symbol": 1}},
+        ]).to_list(None)
+    except Exception as e:
+        logger.error(f"❌ 读取待回填股票列表失败: {e}", exc_info=True)
+        return False
+
+    logger.info("=" * 80)
+    logger.info(f"开始回填K线分桶: {len(pairs)} 个 (股票, 数据源) 组合, period={period}")
+    logger.info("=" * 80)
+
+    total_written = 0
+    failed = 0
+    for i, pair in enumerate(pairs, 1):
+        symbol = pair["_id"].get("symbol")
+        data_source = pair["_id"].get("data_source")
+        if not symbol or not data_source:
+            continue
+        try:
+            written = await service.backfill_buckets(symbol, data_source, period)
+            total_written += written
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {symbol}/{data_source} 回填失败: {e}")
+            continue
+        if i % 100 == 0:
+            logger.info(f"📊 进度 {i}/{len(pairs)}，已写入 {total_written} 条K线")
+
+    logger.info("=" * 80)
+    logger.info(f"✅ 回填完成: 写入 {total_written} 条K线，失败 {failed} 个组合")
+    logger.info("=" * 80)
+    return failed == 0
+
+
+async def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="回填K线分桶集合")
+    parser.add_argument("--symbols", help="只回填指定股票，逗号分隔")
+    parser.add_argument("--period", default="daily", help="K线周期（daily/weekly/monthly）")
+    args = parser.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()] if args.symbols else None
+    success = await backfill(symbols, args.period)
+    exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
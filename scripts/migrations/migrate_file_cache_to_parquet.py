@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+数据迁移脚本：将文件缓存中的 csv 价格数据迁移为列式格式（Parquet/Feather）
+
+背景：
+- 原来的设计：DataFrame 缓存使用 to_csv 写入，读取时 read_csv 解析，dtype 和日期索引丢失
+- 新的设计：默认使用 Parquet（TA_CACHE_FRAME_FORMAT 可选 csv/parquet/feather），保留 dtype 并支持内存映射读取
+
+迁移会保留原缓存时间（不影响TTL），成功后删除原 csv 文件。
+
+运行方式：
+    python scripts/migrations/migrate_file_cache_to_parquet.py [--format parquet|feather] [--cache-dir DIR]
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from tradingagents.dataflows.cache.file_cache import StockDataCache
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s | %(levelname)-8s | %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="迁移文件缓存中的 csv 价格数据为列式格式")
+    parser.add_argument("--format", default="parquet", choices=["parquet", "feather"], help="目标格式")
+    parser.add_argument("--cache-dir", default=None, help="缓存目录，默认 tradingagents/dataflows/data_cache")
+    args = parser.parse_args()
+
+    cache = StockDataCache(args.cache_dir, frame_format=args.format)
+    if cache.frame_format != args.format:
+        logger.error("❌ pyarrow 未安装，无法迁移为列式格式")
+        return 1
+
+    migrated = cache.migrate_csv_frames(args.format)
+    logger.info(f"✅ 迁移完成: {migrated} 个缓存条目")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
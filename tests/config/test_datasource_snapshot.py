@@ -0,0 +1,91 @@
+import asyncio
+
+import tradingagents.config.datasource_snapshot as snapshot_module
+from tradingagents.config.datasource_snapshot import (
+    get_datasource_config_snapshot_async,
+    invalidate_datasource_config_snapshot,
+)
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+
+class _Configs:
+    def __init__(self, owner):
+        self.owner = owner
+
+    async def find_one(self, query, projection=None, sort=None):
+        self.owner.queries += 1
+        if self.owner.fail:
+            raise RuntimeError("mongo down")
+        return {"version": self.owner.version, "data_source_configs": [
+            {"name": "Tushare", "type": "tushare", "enabled": True, "api_key": "k"},
+            {"name": "BaoStock", "type": "baostock", "enabled": False},
+        ]}
+
+
+class _Groupings:
+    def find(self, query):
+        return _Cursor([
+            {"data_source_name": "akshare", "market_category_id": "a_shares", "priority": 1, "enabled": True},
+            {"data_source_name": "tushare", "market_category_id": "a_shares", "priority": 3, "enabled": True},
+            {"data_source_name": "yfinance", "market_category_id": "us_stocks", "priority": 2, "enabled": True},
+        ])
+
+
+class _FakeDB:
+    def __init__(self):
+        self.queries = 0
+        self.version = 1
+        self.fail = False
+        self.system_configs = _Configs(self)
+        self.datasource_groupings = _Groupings()
+
+
+def test_snapshot_is_shared_until_invalidated():
+    db = _FakeDB()
+
+    async def run():
+        invalidate_datasource_config_snapshot()
+        snap = await get_datasource_config_snapshot_async(db)
+        assert snap.grouping_names("a_shares") == ["tushare", "akshare"]
+        assert snap.enabled_types() == {"tushare"}
+        assert snap.configs_by_name()["tushare"]["api_key"] == "k"
+
+        for _ in range(50):
+            await get_datasource_config_snapshot_async(db)
+        assert db.queries == 1
+
+        db.version = 2
+        invalidate_datasource_config_snapshot()
+        assert (await get_datasource_config_snapshot_async(db)).version == 2
+        assert db.queries == 2
+        invalidate_datasource_config_snapshot()
+
+    asyncio.run(run())
+
+
+def test_load_failure_is_not_retried_within_ttl(monkeypatch):
+    db = _FakeDB()
+    db.fail = True
+
+    async def run():
+        invalidate_datasource_config_snapshot()
+        for _ in range(3):
+            try:
+                await get_datasource_config_snapshot_async(db)
+            except RuntimeError:
+                pass
+        assert db.queries == 1
+
+        monkeypatch.setattr(snapshot_module, "SNAPSHOT_TTL_SECONDS", 0)
+        db.fail = False
+        assert (await get_datasource_config_snapshot_async(db)).version == 1
+        invalidate_datasource_config_snapshot()
+
+    asyncio.run(run())
@@ -0,0 +1,94 @@
+import json
+from datetime import datetime, timedelta
+
+from tradingagents.config.usage_ledger import UsageLedger
+from tradingagents.config.usage_models import UsageRecord
+
+
+def make_record(cost, session="s1", provider="dashscope", when=None):
+    when = when or datetime.now().astimezone()
+    return UsageRecord(
+        timestamp=when.isoformat(), provider=provider, model_name="qwen-plus",
+        input_tokens=100, output_tokens=50, cost=cost, session_id=session,
+    )
+
+
+def test_append_updates_aggregates_and_appends_lines(tmp_path):
+    ledger = UsageLedger(tmp_path / "usage.jsonl")
+    ledger.append(make_record(1.0))
+    ledger.append(make_record(2.0, session="s2", provider="deepseek"))
+    ledger.append(make_record(0.5, when=datetime.now().astimezone() - timedelta(days=3)))
+
+    assert ledger.session_cost("s1") == 1.5
+    today = ledger.daily_totals(datetime.now().date().isoformat())
+    assert today["cost"] == 3.0 and today["requests"] == 2
+    assert today["providers"]["deepseek"]["cost"] == 2.0
+
+    stats = ledger.statistics(1)
+    assert stats["total_requests"] == 2 and stats["total_cost"] == 3.0
+    assert len((tmp_path / "usage.jsonl").read_text(encoding="utf-8").splitlines()) == 3
+
+    # 重新加载后汇总一致
+    reloaded = UsageLedger(tmp_path / "usage.jsonl")
+    assert reloaded.session_cost("s1") == 1.5
+    assert len(reloaded.records()) == 3
+
+
+def test_trims_to_max_records_and_compacts(tmp_path):
+    ledger = UsageLedger(tmp_path / "usage.jsonl", max_records=lambda: 10)
+    for i in range(13):
+        ledger.append(make_record(1.0, session=f"s{i}"))
+
+    assert len(ledger.records()) == 10
+    assert ledger.session_cost("s0") == 0.0 and ledger.session_cost("s12") == 1.0
+    # 超过上限 20% 时压缩一次
+    assert len((tmp_path / "usage.jsonl").read_text(encoding="utf-8").splitlines()) == 10
+
+
+def test_migrates_legacy_json(tmp_path):
+    legacy = tmp_path / "usage.json"
+    legacy.write_text(json.dumps([make_record(1.0).__dict__, make_record(2.0).__dict__]), encoding="utf-8")
+
+    ledger = UsageLedger(tmp_path / "usage.jsonl", legacy_file=legacy)
+    assert ledger.session_cost("s1") == 3.0
+    assert not legacy.exists() and (tmp_path / "usage.json.migrated").exists()
+
+
+def test_sees_and_keeps_records_from_other_processes(tmp_path):
+    path = tmp_path / "usage.jsonl"
+    api = UsageLedger(path, max_records=lambda: 10)
+    worker = UsageLedger(path, max_records=lambda: 10)
+
+    api.append(make_record(1.0, session="api"))
+    for i in range(5):
+        worker.append(make_record(2.0, session=f"w{i}"))
+
+    # 汇总包含其他进程追加的记录
+    assert api.daily_totals()["cost"] == 11.0
+    assert api.statistics(1)["total_requests"] == 6
+    assert worker.session_cost("api") == 1.0
+
+    # api 进程触发压缩时不会丢失 worker 刚追加的记录
+    for i in range(6):
+        worker.append(make_record(1.0, session=f"late{i}"))
+    api.append(make_record(1.0, session="api-last"))
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 10
+    assert json.loads(lines[-2])["session_id"] == "late5"
+
+    # worker 检测到文件被替换后重新加载
+    assert worker.session_cost("api-last") == 1.0
+    assert len(worker.records()) == 10
+
+
+def test_max_records_setting_is_cached(tmp_path):
+    calls = []
+
+    def max_records():
+        calls.append(1)
+        return 100
+
+    ledger = UsageLedger(tmp_path / "usage.jsonl", max_records=max_records)
+    for _ in range(20):
+        ledger.append(make_record(1.0))
+    assert len(calls) == 1
@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import app.worker.analysis_worker as analysis_worker
+
+
+class _FakeQueue:
+    def __init__(self, worker, task_ids):
+        self.worker = worker
+        self.total = len(task_ids)
+        self.pending = list(task_ids)
+        self.acked = {}
+        self.extended = []
+        self.global_concurrent_limit = 10
+
+    async def dequeue_task(self, worker_id, block_timeout=0):
+        if not self.pending:
+            return None
+        task_id = self.pending.pop(0)
+        return {"id": task_id, "user": "5f0c1a2b3c4d5e6f7a8b9c0d", "symbol": "000001", "parameters": {}}
+
+    async def ack_task(self, task_id, success=True):
+        self.acked[task_id] = success
+        if len(self.acked) == self.total:
+            self.worker.running = False
+        return True
+
+    async def extend_visibility_timeout(self, task_id, worker_id):
+        self.extended.append((task_id, worker_id))
+        return True
+
+
+class _FakeAnalysisService:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def execute_analysis_task(self, task, progress_callback=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        if task.task_id == "t-fail":
+            raise RuntimeError("boom")
+        return SimpleNamespace(execution_time=0.05)
+
+
+def _make_worker(monkeypatch, task_ids, concurrency):
+    worker = analysis_worker.AnalysisWorker(worker_id="wtest")
+    worker.concurrency = concurrency
+    worker.poll_interval = 0.01
+    worker.blocking_timeout = 0
+    worker.queue_service = _FakeQueue(worker, task_ids)
+    worker.running = True
+    service = _FakeAnalysisService()
+    monkeypatch.setattr(analysis_worker, "get_analysis_service", lambda: service)
+    return worker, service
+
+
+def test_slots_process_tasks_concurrently_and_ack_each(monkeypatch):
+    task_ids = ["t1", "t2", "t3", "t-fail", "t5", "t6"]
+    worker, service = _make_worker(monkeypatch, task_ids, concurrency=3)
+
+    asyncio.run(asyncio.wait_for(worker._work_loop(), timeout=5))
+
+    assert service.max_in_flight == 3
+    assert set(worker.queue_service.acked) == set(task_ids)
+    assert worker.queue_service.acked["t-fail"] is False
+    assert all(worker.queue_service.acked[t] for t in task_ids if t != "t-fail")
+    assert worker.slots == {}
+
+
+def test_heartbeat_reports_slots_and_extends_visibility(monkeypatch):
+    worker, _ = _make_worker(monkeypatch, [], concurrency=2)
+    worker.slots = {0: {"task_id": "t1", "symbol": "000001", "started_at": 0}, 1: {"task_id": None}}
+
+    saved = {}
+
+    class _Redis:
+        async def set_json(self, key, data, ttl=None):
+            saved[key] = data
+
+    import app.core.redis_client as redis_client
+    monkeypatch.setattr(redis_client, "get_redis_service", lambda: _Redis())
+
+    asyncio.run(worker._send_heartbeat())
+
+    assert worker.queue_service.extended == [("t1", "wtest")]
+    data = saved["worker:wtest:heartbeat"]
+    assert data["current_task"] == "t1"
+    assert data["busy_slots"] == 1 and data["concurrency"] == 2
+    assert [slot["slot"] for slot in data["slots"]] == [0, 1]
+
+
+def _crashing_subprocess_task(task_data):
+    import os
+    import time
+    if task_data["id"] == "t-crash":
+        os._exit(1)
+    time.sleep(1.0)
+    return 1.0
+
+
+def test_process_mode_crash_only_fails_its_own_task(monkeypatch):
+    worker, _ = _make_worker(monkeypatch, ["t-crash", "t-ok"], concurrency=2)
+    worker.use_process_pool = True
+    monkeypatch.setattr(analysis_worker, "_run_task_in_subprocess", _crashing_subprocess_task)
+
+    try:
+        asyncio.run(asyncio.wait_for(worker._work_loop(), timeout=60))
+    finally:
+        for pool in worker._slot_pools.values():
+            pool.shutdown(wait=True)
+
+    assert worker.queue_service.acked == {"t-crash": False, "t-ok": True}
+
+
+def test_extend_visibility_timeout_requires_ownership():
+    from app.services.queue_service import QueueService
+
+    class _Redis:
+        def __init__(self, owner):
+            self.owner = owner
+            self.hset_calls = []
+
+        async def hmget(self, key, fields):
+            return ["processing", self.owner]
+
+        async def hset(self, key, mapping=None):
+            self.hset_calls.append(mapping)
+
+        async def expire(self, key, seconds):
+            return True
+
+    r = _Redis("w-other")
+    assert asyncio.run(QueueService(r).extend_visibility_timeout("t1", "wtest")) is False
+    assert r.hset_calls == []
+
+    r = _Redis("wtest")
+    assert asyncio.run(QueueService(r).extend_visibility_timeout("t1", "wtest")) is True
+    assert r.hset_calls[0]["worker_id"] == "wtest"
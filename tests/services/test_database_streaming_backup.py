@@ -0,0 +1,119 @@
+import asyncio
+import gzip
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+import app.services.database.backups as backups
+
+
+class _FakeCursor:
+    def __init__(self, items):
+        self.items = items
+        self.batch = None
+
+    def batch_size(self, n):
+        self.batch = n
+        return self
+
+    def __aiter__(self):
+        self._it = iter(self.items)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _FakeColl:
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.insert_batches = []
+
+    def find(self, query=None):
+        return _FakeCursor(list(self.docs))
+
+    async def find_one(self, query):
+        return next((d for d in self.docs if d["_id"] == query["_id"]), None)
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+
+    async def insert_many(self, docs, ordered=True):
+        self.insert_batches.append(len(docs))
+        existing = {d.get("_id") for d in self.docs}
+        errors = []
+        for i, doc in enumerate(docs):
+            if doc.get("_id") in existing:
+                errors.append({"index": i, "code": 11000, "errmsg": "E11000 duplicate key error"})
+            else:
+                self.docs.append(doc)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(errors)})
+        return SimpleNamespace(inserted_ids=[d.get("_id") for d in docs])
+
+    async def delete_one(self, query):
+        self.docs = [d for d in self.docs if d["_id"] != query["_id"]]
+
+    async def delete_many(self, query):
+        count, self.docs = len(self.docs), []
+        return SimpleNamespace(deleted_count=count)
+
+
+class _FakeDB(dict):
+    def __getitem__(self, name):
+        return self.setdefault(name, _FakeColl())
+
+    def __getattr__(self, name):
+        return self[name]
+
+    async def list_collection_names(self):
+        return list(self.keys())
+
+
+def test_streaming_backup_and_chunked_restore(tmp_path, monkeypatch):
+    monkeypatch.setattr(backups, "BACKUP_BATCH_SIZE", 3)
+    monkeypatch.setattr(backups, "RESTORE_BATCH_SIZE", 4)
+    quotes = [{"_id": ObjectId(), "code": f"{i:06d}", "close": i + 0.5,
+               "trade_time": datetime(2024, 1, 2, 15, 0)} for i in range(10)]
+    db = _FakeDB()
+    db["stock_quotes"] = _FakeColl(quotes)
+    db["system.profile"] = _FakeColl([{"_id": 1}])
+    monkeypatch.setattr(backups, "get_mongo_db", lambda: db)
+
+    result = asyncio.run(backups.create_backup("daily", str(tmp_path), user_id="admin"))
+    assert result["backup_type"] == "ndjson" and result["collections"] == ["stock_quotes"]
+    with gzip.open(os.path.join(result["file_path"], "stock_quotes.ndjson.gz"), "rt", encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 10
+
+    # 覆盖恢复：类型保留，按批插入
+    db["stock_quotes"].docs = [{"_id": ObjectId(), "code": "stale"}]
+    restored = asyncio.run(backups.restore_backup(result["id"], overwrite=True))
+    assert restored["total_inserted"] == 10
+    assert db["stock_quotes"].insert_batches == [4, 4, 2]
+    assert db["stock_quotes"].docs == quotes
+
+    asyncio.run(backups.delete_backup(result["id"]))
+    assert not os.path.exists(result["file_path"])
+
+
+def test_restore_without_overwrite_skips_existing_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(backups, "RESTORE_BATCH_SIZE", 4)
+    quotes = [{"_id": ObjectId(), "code": f"{i:06d}"} for i in range(10)]
+    db = _FakeDB()
+    db["stock_quotes"] = _FakeColl(quotes)
+    monkeypatch.setattr(backups, "get_mongo_db", lambda: db)
+    result = asyncio.run(backups.create_backup("daily", str(tmp_path), user_id="admin"))
+
+    # 目标集合保留了一部分文档，并新增了一条备份中没有的文档
+    extra = {"_id": ObjectId(), "code": "extra"}
+    db["stock_quotes"].docs = quotes[:3] + [quotes[7], extra]
+    restored = asyncio.run(backups.restore_backup(result["id"]))
+    assert restored["total_inserted"] == 6
+    assert restored["total_skipped"] == 4
+    assert sorted(d["code"] for d in db["stock_quotes"].docs) == sorted([q["code"] for q in quotes] + ["extra"])
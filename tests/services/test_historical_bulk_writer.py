@@ -0,0 +1,236 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from app.services.historical_data_service import HistoricalDataService
+
+
+class _FakeResult:
+    def __init__(self, n):
+        self.upserted_count = n
+        self.modified_count = 0
+
+
+class _FakeCursor:
+    def __init__(self, items):
+        self.items = items
+
+    def __aiter__(self):
+        self._it = iter(self.items)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _FakeColl:
+    def __init__(self):
+        self.docs = {}
+        self.batches = []
+
+    def find(self, query, projection=None):
+        lo, hi = query["trade_date"]["$gte"], query["trade_date"]["$lte"]
+        return _FakeCursor([
+            {"trade_date": d, "content_hash": doc.get("content_hash")}
+            for d, doc in self.docs.items() if lo <= d <= hi
+        ])
+
+    async def bulk_write(self, ops, ordered=False):
+        self.batches.append(len(ops))
+        for op in ops:
+            self.docs[op._filter["trade_date"]] = op._doc
+        return _FakeResult(len(ops))
+
+
+def _bars(n=5):
+    return pd.DataFrame({
+        "trade_date": [f"202401{d:02d}" for d in range(1, n + 1)],
+        "open": np.arange(n) + 10.0,
+        "high": np.arange(n) + 11.0,
+        "low": np.arange(n) + 9.0,
+        "close": np.arange(n) + 10.5,
+        "pre_close": [0.0] + list(np.arange(n - 1) + 10.5),
+        "vol": [1000.0] * n,
+        "amount": [np.nan] + [2000.0] * (n - 1),
+        "turnover_rate": [1.5] * n,
+    })
+
+
+def test_build_documents_matches_row_standardization():
+    svc = HistoricalDataService()
+    data = _bars()
+    docs = svc._build_documents("600000", data, "tushare", "CN", "daily")
+    for (idx, row), doc in zip(data.iterrows(), docs):
+        expected = svc._standardize_record("600000", row, "tushare", "CN", "daily", idx)
+        for key in ("created_at", "updated_at"):
+            expected.pop(key), doc.pop(key)
+        assert doc.pop("content_hash")
+        assert doc == expected
+
+
+def test_save_writes_only_new_or_changed_bars(monkeypatch):
+    import app.services.historical_data_service as mod
+    monkeypatch.setattr(mod, "WRITE_BATCH_SIZE", 2)
+    svc = HistoricalDataService()
+    svc.collection = _FakeColl()
+
+    assert asyncio.run(svc.save_historical_data("600000", _bars(5), "akshare")) == 5
+    assert svc.collection.batches == [2, 2, 1]
+
+    # 重复同步：无变化，不写入
+    assert asyncio.run(svc.save_historical_data("600000", _bars(5), "akshare")) == 0
+
+    # 新增一根K线并修正一根历史K线
+    bars = _bars(6)
+    bars.loc[2, "close"] = 99.0
+    assert asyncio.run(svc.save_historical_data("600000", bars, "akshare")) == 2
+    assert svc.collection.docs["2024-01-03"]["close"] == 99.0
+
+
+class _FakeUpdateResult:
+    def __init__(self, matched):
+        self.matched_count = matched
+
+
+class _FakeBucketColl:
+    def __init__(self):
+        self.buckets = {}
+        self.writes = 0
+        self.before_replace = None
+
+    def find(self, query, projection=None):
+        if "$in" in query.get("bucket", {}):
+            keys = query["bucket"]["$in"]
+            items = [b for k, b in self.buckets.items() if k in keys]
+        else:
+            rng = query.get("bucket", {})
+            items = [b for k, b in sorted(self.buckets.items())
+                     if rng.get("$gte", "") <= k <= rng.get("$lte", "9999")]
+        cursor = _FakeCursor([dict(b) for b in items])
+        cursor.sort = lambda *a: cursor
+
+        async def to_list(length=None):
+            return cursor.items
+        cursor.to_list = to_list
+        return cursor
+
+    async def find_one(self, query, projection=None):
+        bucket = self.buckets.get(query["bucket"])
+        return dict(bucket) if bucket else None
+
+    async def insert_one(self, doc):
+        from pymongo.errors import DuplicateKeyError
+        if doc["bucket"] in self.buckets:
+            raise DuplicateKeyError("duplicate bucket")
+        self.writes += 1
+        self.buckets[doc["bucket"]] = doc
+
+    async def replace_one(self, query, doc):
+        if self.before_replace:
+            hook, self.before_replace = self.before_replace, None
+            await hook(self)
+        current = self.buckets.get(query["bucket"])
+        if current is None or current.get("version") != query["version"]:
+            return _FakeUpdateResult(0)
+        self.writes += 1
+        self.buckets[query["bucket"]] = doc
+        return _FakeUpdateResult(1)
+
+
+def test_bucket_layout_round_trip(monkeypatch):
+    monkeypatch.setenv("HISTORICAL_BAR_LAYOUT", "bucket")
+    monkeypatch.setenv("HISTORICAL_BUCKET_ONLY_CONFIRMED", "true")
+    svc = HistoricalDataService()
+    svc.collection = _FakeColl()
+    svc.bucket_collection = _FakeBucketColl()
+
+    bars = pd.DataFrame({
+        "trade_date": ["2024-01-30", "2024-01-31", "2024-02-01", "2024-02-02"],
+        "close": [10.0, 10.5, 11.0, 10.8],
+        "vol": [100.0, 200.0, 300.0, 400.0],
+    })
+    assert asyncio.run(svc.save_historical_data("600000", bars, "akshare")) == 4
+    assert sorted(svc.collection.docs) == []
+    assert sorted(svc.bucket_collection.buckets) == ["2024-01", "2024-02"]
+
+    # 追加一根K线：只改写最后一个桶
+    more = pd.concat([bars, pd.DataFrame({"trade_date": ["2024-02-05"], "close": [11.2], "vol": [50.0]})])
+    assert asyncio.run(svc.save_historical_data("600000", more, "akshare")) == 1
+    assert svc.bucket_collection.writes == 3
+
+    df = asyncio.run(svc.get_historical_frame("600000", "2024-01-31", "2024-02-02", "akshare"))
+    assert df["trade_date"].tolist() == ["2024-01-31", "2024-02-01", "2024-02-02"]
+    assert df["close"].tolist() == [10.5, 11.0, 10.8]
+    assert (df["symbol"] == "600000").all() and "content_hash" not in df.columns
+
+    records = asyncio.run(svc.get_historical_data("600000", data_source="akshare", limit=2))
+    assert [r["trade_date"] for r in records] == ["2024-02-05", "2024-02-02"]
+
+
+def test_bucket_only_layout_requires_confirmation(monkeypatch):
+    from tradingagents.dataflows.cache.bar_buckets import LAYOUT_DUAL, get_bar_layout
+    monkeypatch.setenv("HISTORICAL_BAR_LAYOUT", "bucket")
+    monkeypatch.delenv("HISTORICAL_BUCKET_ONLY_CONFIRMED", raising=False)
+    assert get_bar_layout() == LAYOUT_DUAL
+
+
+def test_bucket_write_retries_on_version_conflict(monkeypatch):
+    monkeypatch.setenv("HISTORICAL_BAR_LAYOUT", "bucket")
+    monkeypatch.setenv("HISTORICAL_BUCKET_ONLY_CONFIRMED", "true")
+    svc = HistoricalDataService()
+    svc.collection = _FakeColl()
+    svc.bucket_collection = _FakeBucketColl()
+
+    base = pd.DataFrame({"trade_date": ["2024-01-30"], "close": [10.0], "vol": [100.0]})
+    asyncio.run(svc.save_historical_data("600000", base, "akshare"))
+    assert svc.bucket_collection.buckets["2024-01"]["version"] == 1
+
+    # 另一个同步任务在本次读取之后、替换之前写入了同一个桶
+    other = HistoricalDataService()
+    other.collection = _FakeColl()
+    other.bucket_collection = svc.bucket_collection
+
+    async def concurrent_write(coll):
+        extra = pd.DataFrame({"trade_date": ["2024-01-31"], "close": [10.5], "vol": [200.0]})
+        await other.save_historical_data("600000", pd.concat([base, extra]), "akshare")
+
+    svc.bucket_collection.before_replace = concurrent_write
+    mine = pd.DataFrame({"trade_date": ["2024-01-30", "2024-01-29"], "close": [10.0, 9.5], "vol": [100.0, 50.0]})
+    assert asyncio.run(svc.save_historical_data("600000", mine, "akshare")) == 1
+
+    bucket = svc.bucket_collection.buckets["2024-01"]
+    assert bucket["version"] == 3
+    df = asyncio.run(svc.get_historical_frame("600000", "2024-01-01", "2024-01-31", "akshare"))
+    assert df["trade_date"].tolist() == ["2024-01-29", "2024-01-30", "2024-01-31"]
+
+
+class _FakeDateColl:
+    def __init__(self, dates):
+        self.dates = sorted(dates)
+
+    async def find_one(self, query, projection=None, sort=None):
+        rng = query.get("trade_date", {})
+        dates = [d for d in self.dates if rng.get("$gte", "") <= d <= rng.get("$lte", "9999")]
+        if not dates:
+            return None
+        return {"trade_date": dates[0] if sort[0][1] == 1 else dates[-1]}
+
+
+def test_dual_layout_uses_buckets_only_when_they_cover_documents():
+    svc = HistoricalDataService()
+    svc.collection = _FakeDateColl(["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"])
+    recent = pd.DataFrame({"trade_date": ["2024-01-04", "2024-01-05"]})
+    full = pd.DataFrame({"trade_date": ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"]})
+
+    def covers(frame, start=None, end=None):
+        return asyncio.run(svc._buckets_cover_documents(frame, "600000", start, end, "akshare", "daily"))
+
+    # 只有最近的桶（尚未回填）：回退到单日文档
+    assert not covers(recent)
+    assert covers(recent, start="2024-01-04")
+    assert covers(full)
+    assert not covers(pd.DataFrame({"trade_date": []}))
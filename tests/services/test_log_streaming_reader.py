@@ -0,0 +1,57 @@
+import io
+import zipfile
+
+import app.services.log_reader as log_reader
+from app.services.log_export_service import LogExportService
+from app.services.log_reader import LineFilter, LogReader, iter_lines_reverse
+
+
+def _write_log(path, n=2000):
+    lines = []
+    for i in range(n):
+        level = "ERROR" if i % 7 == 0 else "INFO"
+        lines.append(f"2024-01-01 {i // 3600:02d}:{(i // 60) % 60:02d}:{i % 60:02d} | {level} | 任务 {i}")
+        if i % 100 == 0:
+            lines.append("    Traceback (most recent call last):")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return lines
+
+
+def test_reverse_reader_and_time_index_match_full_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_reader, "INDEX_STRIDE", 512)
+    path = tmp_path / "webapi.log"
+    lines = _write_log(path)
+    assert list(iter_lines_reverse(path, block_size=97)) == lines[::-1]
+
+    reader = LogReader()
+    index = reader.get_index(path)
+    assert index.line_count == len(lines) and len(index.offsets) > 10
+
+    line_filter = LineFilter(level="error", start_time="2024-01-01T00:05:00", end_time="2024-01-01 00:10:00")
+    expected = [line for line in lines if line_filter(line)]
+    assert list(reader.iter_matching(path, line_filter)) == expected
+    assert reader.tail(path, 5, line_filter) == expected[-5:]
+
+    # 追加写入后增量更新
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("2024-01-01 01:00:00 | ERROR | 新错误\n")
+    assert reader.tail(path, 1, LineFilter(level="ERROR")) == ["2024-01-01 01:00:00 | ERROR | 新错误"]
+    assert reader.get_index(path).line_count == len(lines) + 1
+
+
+def test_read_and_streamed_export(tmp_path):
+    lines = _write_log(tmp_path / "worker.log", 300)
+    service = LogExportService(log_dir=str(tmp_path))
+
+    content = service.read_log_file("worker.log", lines=3, level="ERROR")
+    assert content["lines"] == [line for line in lines if "ERROR" in line][-3:]
+    assert content["stats"]["total_lines"] == len(lines)
+
+    files = service.resolve_export_files(["worker.log"])
+    data = b"".join(service.iter_export(files, level="ERROR", format="zip"))
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        exported = zf.read("worker.log").decode("utf-8").splitlines()
+    assert exported == [line for line in lines if "ERROR" in line]
+
+    text = b"".join(service.iter_export(files, format="txt")).decode("utf-8")
+    assert lines[-1] in text and "文件: worker.log" in text
@@ -0,0 +1,46 @@
+import asyncio
+from types import SimpleNamespace
+
+from pymongo.errors import BulkWriteError
+
+import app.services.news_data_service as news_mod
+from tradingagents.dataflows.news.near_duplicate import NearDuplicateIndex
+
+BODY = "平安银行今日发布2024年年度报告，全年实现营业收入1466亿元，归母净利润445亿元，同比增长2.6%，不良贷款率保持稳定。"
+
+
+def test_news_service_registers_fingerprints_only_after_successful_write(tmp_path, monkeypatch):
+    index = NearDuplicateIndex(persist_path=str(tmp_path / "index.json"))
+    monkeypatch.setattr(news_mod, "get_news_dedup_index", lambda: index)
+    monkeypatch.setattr(news_mod, "NEAR_DEDUP_ENABLED", True)
+
+    class _Coll:
+        fail = True
+
+        async def bulk_write(self, ops):
+            if self.fail:
+                raise BulkWriteError({"writeErrors": [{"index": 0, "code": 1, "errmsg": "boom"}], "nInserted": 0})
+            return SimpleNamespace(upserted_count=len(ops), modified_count=0)
+
+    service = news_mod.NewsDataService()
+    coll = _Coll()
+    monkeypatch.setattr(service, "_get_collection", lambda: coll)
+
+    async def _no_indexes():
+        return None
+    monkeypatch.setattr(service, "_ensure_indexes", _no_indexes)
+
+    news = [
+        {"symbol": "000001", "title": "平安银行发布年度报告营收增长", "content": BODY, "url": "u1",
+         "publish_time": "2024-03-15 08:00:00"},
+        {"symbol": "000001", "title": "平安银行发布年度报告营收增长 | 东方财富", "content": BODY, "url": "u2",
+         "publish_time": "2024-03-15 08:05:00"},
+    ]
+    # 写入失败：同批次的转载稿仍被跳过，但指纹不登记，重试时不会被误判为重复
+    assert asyncio.run(service.save_news_data(news, "test")) == 0
+    assert len(index) == 0
+
+    coll.fail = False
+    assert asyncio.run(service.save_news_data(news, "test")) == 1
+    assert len(index) == 1
+    assert asyncio.run(service.save_news_data(news[1:], "test")) == 0
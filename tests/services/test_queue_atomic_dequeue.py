@@ -0,0 +1,177 @@
+import asyncio
+
+from redis.exceptions import ResponseError
+
+from app.services.queue import READY_LIST, SET_PROCESSING
+from app.services.queue_service import QueueService
+
+
+class _FakeScript:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    async def __call__(self, keys=None, args=None):
+        self.calls.append((keys, args))
+        return self.replies.pop(0)
+
+
+class _FakeRedis:
+    def __init__(self, replies, blmove_result="t1", blmove_error=None):
+        self.script = _FakeScript(replies)
+        self.blmove_result = blmove_result
+        self.blmove_error = blmove_error
+        self.blmove_calls = 0
+        self.registered = 0
+
+    def register_script(self, lua):
+        self.registered += 1
+        return self.script
+
+    async def blmove(self, first_list, second_list, timeout, src="LEFT", dest="RIGHT"):
+        self.blmove_calls += 1
+        assert first_list == second_list == READY_LIST and src == dest == "RIGHT"
+        if self.blmove_error:
+            raise self.blmove_error
+        return self.blmove_result
+
+
+def test_dequeue_runs_single_atomic_script():
+    task_hash = ["id", "t1", "user", "u1", "symbol", "000001", "status", "processing",
+                 "params", '{"research_depth": "标准"}', "created_at", "100"]
+    r = _FakeRedis([["ok", "t1", task_hash], None])
+    svc = QueueService(r)
+    svc.user_concurrent_limit = 2
+
+    task = asyncio.run(svc.dequeue_task("w1"))
+    assert task["id"] == "t1" and task["status"] == "processing"
+    assert task["parameters"] == {"research_depth": "标准"}
+    assert task["created_at"] == 100
+
+    keys, args = r.script.calls[0]
+    assert keys == [READY_LIST, SET_PROCESSING]
+    assert args[0] == "w1" and args[3] == 2
+
+    # 队列为空；脚本只注册一次
+    assert asyncio.run(svc.dequeue_task("w1")) is None
+    assert r.registered == 1
+
+
+def test_dequeue_limited_and_missing_return_none():
+    r = _FakeRedis([["limited", "t1", "u1"], ["missing", "t2"]])
+    svc = QueueService(r)
+    assert asyncio.run(svc.dequeue_task("w1")) is None
+    assert asyncio.run(svc.dequeue_task("w1")) is None
+    assert len(r.script.calls) == 2
+
+
+def test_blocking_wait_and_fallback_to_polling():
+    r = _FakeRedis([], blmove_result=None)
+    svc = QueueService(r)
+    # 等待超时：不执行出队脚本
+    assert asyncio.run(svc.dequeue_task("w1", block_timeout=1)) is None
+    assert r.blmove_calls == 1 and r.script.calls == []
+
+    r = _FakeRedis([None, None], blmove_error=ResponseError("unknown command 'BLMOVE'"))
+    svc = QueueService(r)
+    assert asyncio.run(svc.dequeue_task("w1", block_timeout=1)) is None
+    assert asyncio.run(svc.dequeue_task("w1", block_timeout=1)) is None
+    # 不支持 BLMOVE 后不再尝试阻塞等待
+    assert r.blmove_calls == 1 and len(r.script.calls) == 2
+
+
+def test_dequeue_passes_global_limit_and_busy_returns_none():
+    r = _FakeRedis([["busy", ""]])
+    svc = QueueService(r)
+    svc.global_concurrent_limit = 4
+    # 全局并发已满：脚本不出队
+    assert asyncio.run(svc.dequeue_task("w1")) is None
+    keys, args = r.script.calls[0]
+    assert args[7] == 4
+
+
+def _script_redis():
+    """
+    执行真实 Lua 脚本的 Redis：设置 TEST_REDIS_URL 时使用真实 Redis，否则使用 fakeredis + lupa
+
+    真实 Redis 必须通过 URL 选择非默认库（如 redis://localhost:6379/15），避免清理测试数据时碰到正在使用的队列。
+    """
+    import os
+
+    import pytest
+
+    url = os.getenv("TEST_REDIS_URL")
+    if url:
+        from redis.asyncio import Redis
+        r = Redis.from_url(url, decode_responses=True)
+        if int(r.connection_pool.connection_kwargs.get("db") or 0) == 0:
+            pytest.skip("TEST_REDIS_URL 必须选择非默认库（例如 redis://localhost:6379/15）")
+        return r
+    pytest.importorskip("lupa")
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+async def _clear_queue_keys(r):
+    """只删除队列键（qa:*），不清空整个库"""
+    keys = [key async for key in r.scan_iter(match="qa:*")]
+    if keys:
+        await r.delete(*keys)
+
+
+def test_dequeue_script_runs_against_redis():
+    from app.services.queue import TASK_PREFIX, USER_PROCESSING_PREFIX, VISIBILITY_TIMEOUT_PREFIX
+
+    async def scenario():
+        r = _script_redis()
+        await _clear_queue_keys(r)
+        svc = QueueService(r)
+        svc.user_concurrent_limit = 1
+        svc.global_concurrent_limit = 2
+        svc.visibility_timeout = 300
+
+        t1 = await svc.enqueue_task("u1", "000001", {"research_depth": "标准"})
+        t2 = await svc.enqueue_task("u1", "000002", {})
+        t3 = await svc.enqueue_task("u2", "000003", {})
+        t4 = await svc.enqueue_task("u3", "000004", {})
+
+        # 出队：处理中集合、可见性超时与任务状态在同一脚本中写入
+        task = await svc.dequeue_task("w1")
+        assert task["id"] == t1 and task["status"] == "processing" and task["worker_id"] == "w1"
+        assert task["parameters"] == {"research_depth": "标准"}
+        assert await r.sismember(SET_PROCESSING, t1)
+        assert await r.sismember(USER_PROCESSING_PREFIX + "u1", t1)
+        visibility = await r.hgetall(VISIBILITY_TIMEOUT_PREFIX + t1)
+        assert visibility["worker_id"] == "w1" and visibility["task_id"] == t1
+        assert int(visibility["timeout_at"]) - int(task["started_at"]) == 300
+        assert 0 < await r.ttl(VISIBILITY_TIMEOUT_PREFIX + t1) <= 300
+        stored = await r.hgetall(TASK_PREFIX + t1)
+        assert stored["status"] == "processing" and stored["worker_id"] == "w1"
+
+        # 用户并发已满：任务放回队尾，不标记处理中
+        assert await svc.dequeue_task("w1") is None
+        assert await r.lrange(READY_LIST, 0, -1) == [t2, t4, t3]
+        assert (await r.hgetall(TASK_PREFIX + t2))["status"] == "queued"
+        assert not await r.sismember(SET_PROCESSING, t2)
+
+        assert (await svc.dequeue_task("w2"))["id"] == t3
+
+        # 全局并发已满：不出队
+        assert await svc.dequeue_task("w3") is None
+        assert await r.llen(READY_LIST) == 2
+        assert await r.scard(SET_PROCESSING) == 2
+
+        # 任务哈希缺失
+        await r.rpush(READY_LIST, "ghost")
+        svc.global_concurrent_limit = 0
+        assert await svc.dequeue_task("w3") is None
+        assert await r.lrange(READY_LIST, 0, -1) == [t2, t4]
+
+        # 不限全局并发后继续出队；队列排空后返回 None
+        assert (await svc.dequeue_task("w3"))["id"] == t4
+        assert await svc.dequeue_task("w3") is None
+        assert await r.lrange(READY_LIST, 0, -1) == [t2]
+        await _clear_queue_keys(r)
+        await r.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+from app.services.screening.panel_engine import PanelScreeningEngine, build_panel, compute_panel_indicators
+from app.services.screening_service import ALLOWED_FIELDS, ALLOWED_OPS, TECH_FIELDS
+from app.services.screening.eval_utils import evaluate_conditions
+from tradingagents.tools.analysis.indicators import IndicatorSpec, compute_many
+
+
+def make_bars():
+    rng = np.random.default_rng(7)
+    frames = []
+    for i, code in enumerate(["000001", "000002", "600519"]):
+        # 不同股票的交易日数量不同（模拟停牌/新股）
+        dates = pd.bdate_range("2024-01-01", periods=120 - 15 * i)
+        close = 10 + rng.normal(0, 0.3, len(dates)).cumsum()
+        frames.append(pd.DataFrame({
+            "symbol": code,
+            "trade_date": dates.strftime("%Y-%m-%d"),
+            "open": close + 0.1,
+            "high": close + 0.5,
+            "low": close - 0.5,
+            "close": close,
+            "volume": 1000.0,
+            "amount": 1e6,
+            "period": "daily",
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+class _FakeCursor(list):
+    def batch_size(self, _n):
+        return self
+
+
+def _matches(doc, query):
+    for field, cond in query.items():
+        value = doc.get(field)
+        if not isinstance(cond, dict):
+            if value != cond:
+                return False
+            continue
+        if "$in" in cond and value not in cond["$in"]:
+            return False
+        if "$nin" in cond and value in cond["$nin"]:
+            return False
+        if "$gte" in cond and not (value is not None and value >= cond["$gte"]):
+            return False
+        if "$lte" in cond and not (value is not None and value <= cond["$lte"]):
+            return False
+    return True
+
+
+def _project(doc, projection):
+    out = {}
+    for key, keep in projection.items():
+        if not keep:
+            continue
+        if key.startswith("columns."):
+            name = key.split(".", 1)[1]
+            if name in doc.get("columns", {}):
+                out.setdefault("columns", {})[name] = doc["columns"][name]
+        elif key in doc:
+            out[key] = doc[key]
+    return out
+
+
+class _FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append(query)
+        return _FakeCursor(_project(d, projection) for d in self.docs if _matches(d, query))
+
+
+def test_panel_indicators_match_per_symbol_computation():
+    bars = make_bars()
+    panel = compute_panel_indicators(
+        build_panel(bars.rename(columns={"volume": "vol"})),
+        ["pct_chg", "ma20", "dif", "rsi14", "boll_upper", "atr14", "kdj_j"],
+    )
+    specs = [
+        IndicatorSpec("ma", {"n": 20}), IndicatorSpec("macd"), IndicatorSpec("rsi", {"n": 14}),
+        IndicatorSpec("boll", {"n": 20, "k": 2}), IndicatorSpec("atr", {"n": 14}),
+        IndicatorSpec("kdj", {"n": 9, "m1": 3, "m2": 3}),
+    ]
+    for code, df in bars.groupby("symbol"):
+        expected = compute_many(df.reset_index(drop=True), specs).iloc[-1]
+        for field in ["ma20", "dif", "rsi14", "boll_upper", "atr14", "kdj_j"]:
+            assert np.isclose(panel[field][code].iloc[-1], expected[field])
+
+
+def test_engine_masks_agree_with_scalar_evaluation():
+    bars = make_bars()
+    conditions = {
+        "logic": "OR",
+        "children": [
+            {"field": "close", "op": "<", "right_field": "ma20"},
+            {"field": "kdj_k", "op": "cross_up", "right_field": "kdj_d"},
+        ],
+    }
+    engine = PanelScreeningEngine(db={"stock_daily_quotes": _FakeCollection(bars.to_dict("records"))})
+    # 回看窗口（220天）覆盖全部测试K线
+    items = engine.run(conditions, {"close", "ma20", "kdj_k", "kdj_d"}, "2024-06-30",
+                       ALLOWED_FIELDS, ALLOWED_OPS, TECH_FIELDS)
+
+    specs = [IndicatorSpec("ma", {"n": 20}), IndicatorSpec("kdj", {"n": 9, "m1": 3, "m2": 3})]
+    expected = {
+        code for code, df in bars.groupby("symbol")
+        if evaluate_conditions(compute_many(df.reset_index(drop=True), specs), conditions, ALLOWED_FIELDS, ALLOWED_OPS)
+    }
+    assert expected
+    assert {item["code"] for item in items} == expected
+
+
+def test_one_source_per_symbol_by_priority():
+    bars = make_bars()
+    tushare = bars[bars["symbol"] != "600519"].assign(data_source="tushare")
+    # akshare 的价格基准不同（不复权），且覆盖全部股票
+    akshare = bars.assign(data_source="akshare", close=bars["close"] * 3)
+    docs = pd.concat([tushare, akshare]).to_dict("records")
+
+    engine = PanelScreeningEngine(db={"stock_daily_quotes": _FakeCollection(docs)},
+                                  source_priority=["tushare", "akshare"], layout="document")
+    loaded = engine.load_bars("2024-12-31", "2023-12-01")
+
+    sources = loaded.groupby("symbol")["data_source"].unique().to_dict()
+    assert {k: list(v) for k, v in sources.items()} == {
+        "000001": ["tushare"], "000002": ["tushare"], "600519": ["akshare"],
+    }
+    expected = bars.loc[bars["symbol"] == "000001", "close"].to_numpy()
+    assert np.allclose(loaded.loc[loaded["symbol"] == "000001", "close"].to_numpy(), expected)
+
+
+def test_reads_bucket_layout():
+    bars = make_bars()
+    buckets = []
+    for (code, month), df in bars.assign(month=bars["trade_date"].str[:7]).groupby(["symbol", "month"]):
+        buckets.append({
+            "symbol": code, "data_source": "tushare", "period": "daily", "bucket": month,
+            "dates": df["trade_date"].tolist(),
+            "columns": {f: df[f].tolist() for f in ("open", "high", "low", "close", "volume", "amount")},
+        })
+    db = {"stock_daily_quotes": _FakeCollection([]), "stock_quote_buckets": _FakeCollection(buckets)}
+    engine = PanelScreeningEngine(db=db, source_priority=["tushare"], layout="bucket")
+
+    loaded = engine.load_bars("2024-12-31", "2023-12-01")
+    assert set(loaded["symbol"]) == {"000001", "000002", "600519"}
+    assert len(loaded) == len(bars)
+    assert db["stock_daily_quotes"].queries == []
@@ -0,0 +1,104 @@
+import asyncio
+
+from app.services.progress.pubsub_hub import ProgressHub
+from app.services.queue import TASK_PREFIX
+from app.services.queue_service import QueueService
+
+
+class _FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+        self.patterns = []
+        self.closed = False
+
+    async def psubscribe(self, pattern):
+        self.patterns.append(pattern)
+
+    async def punsubscribe(self, pattern):
+        self.patterns.remove(pattern)
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=1.0):
+        try:
+            return self.messages.get_nowait()
+        except asyncio.QueueEmpty:
+            await asyncio.sleep(0.01)
+            return None
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.messages = asyncio.Queue()
+        self.connections = []
+
+    def pubsub(self):
+        self.connections.append(_FakePubSub(self.messages))
+        return self.connections[-1]
+
+    def publish(self, channel, data):
+        self.messages.put_nowait({"type": "pmessage", "channel": channel, "data": data})
+
+
+def test_hub_fans_out_over_single_connection():
+    async def run():
+        redis = _FakeRedis()
+        hub = ProgressHub(redis)
+        a = await hub.subscribe("task_progress:t1")
+        b = await hub.subscribe("task_progress:t1")
+        slow = await hub.subscribe("task_progress:t2", maxsize=2)
+
+        redis.publish("task_progress:t1", '{"progress": 10}')
+        for i in range(4):
+            redis.publish("task_progress:t2", str(i))
+        assert await a.get(1) == await b.get(1) == '{"progress": 10}'
+        while slow.dropped < 2:
+            await asyncio.sleep(0.01)
+        # 慢客户端只保留最新的消息
+        assert [await slow.get(1), await slow.get(1)] == ["2", "3"]
+        assert len(redis.connections) == 1
+
+        for sub in (a, b, slow):
+            hub.unsubscribe(sub)
+        await asyncio.wait_for(hub._reader, 2)
+        assert redis.connections[0].closed and redis.connections[0].patterns == []
+
+    asyncio.run(run())
+
+
+class _FakePipeline:
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def hget(self, key, field):
+        self.commands.append(key)
+
+    async def execute(self):
+        return [self.hashes.get(key, {}).get("status") for key in self.commands]
+
+
+class _PipelineRedis:
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.pipelines = 0
+
+    def pipeline(self, transaction=True):
+        self.pipelines += 1
+        return _FakePipeline(self.hashes)
+
+
+def test_batch_status_counts_use_one_pipeline():
+    statuses = ["completed", "completed", "failed", "processing", "queued"]
+    redis = _PipelineRedis({TASK_PREFIX + f"t{i}": {"status": s} for i, s in enumerate(statuses)})
+    svc = QueueService(redis)
+    counts = asyncio.run(svc.get_task_status_counts([f"t{i}" for i in range(6)]))
+    assert counts == {"completed": 2, "failed": 1, "processing": 1, "queued": 1}
+    assert redis.pipelines == 1
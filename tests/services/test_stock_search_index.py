@@ -0,0 +1,53 @@
+import asyncio
+
+import app.services.stock_search_index as search_index
+from app.services.stock_search_index import StockSearchIndex, get_stock_search_index, invalidate_stock_search_index
+
+DOCS = [
+    {"code": "000001", "name": "平安银行", "source": "akshare"},
+    {"code": "000001", "name": "平安银行", "name_en": "Ping An Bank", "source": "tushare"},
+    {"code": "000002", "name": "万科A", "source": "baostock"},
+    {"code": "600000", "name": "浦发银行", "source": "tushare"},
+    {"code": "601318", "name": "中国平安", "name_en": "Ping An Insurance", "source": "akshare"},
+    {"code": "300001", "name": "特锐德", "source": "tushare"},
+]
+
+
+def _codes(results):
+    return [(d["code"], d["source"]) for d in results]
+
+
+def test_search_ranks_and_dedups_by_source_priority(monkeypatch):
+    monkeypatch.setattr(search_index, "pinyin_initials", lambda name: {"平安银行": "payh", "浦发银行": "pfyh"}.get(name, ""))
+    index = StockSearchIndex(DOCS, ["tushare", "akshare", "baostock"])
+    assert len(index) == 5
+
+    assert _codes(index.search("000001")) == [("000001", "tushare")]
+    assert [d["code"] for d in index.search("0000", limit=1)] == ["000001"]
+    # 代码前缀优先于代码子串
+    assert [d["code"] for d in index.search("00")] == ["000001", "000002", "300001", "600000"]
+    # 名称前缀优先于名称子串
+    assert [d["code"] for d in index.search("平安")] == ["000001", "601318"]
+    assert [d["code"] for d in index.search("银行")] == ["000001", "600000"]
+    assert [d["code"] for d in index.search("PFYH")] == ["600000"]
+    assert [d["code"] for d in index.search("ping an")] == ["000001", "601318"]
+    assert index.search("  ") == []
+
+
+def test_index_is_cached_until_invalidated():
+    builds = []
+
+    async def loader(market):
+        builds.append(market)
+        return StockSearchIndex(DOCS, [])
+
+    async def run():
+        invalidate_stock_search_index()
+        first, second = await asyncio.gather(get_stock_search_index("CN", loader), get_stock_search_index("CN", loader))
+        assert first is second and builds == ["CN"]
+        invalidate_stock_search_index("CN")
+        await get_stock_search_index("CN", loader)
+        assert builds == ["CN", "CN"]
+        invalidate_stock_search_index()
+
+    asyncio.run(run())
@@ -0,0 +1,81 @@
+import threading
+from types import SimpleNamespace
+
+from app.services.analysis.graph_pool import TradingGraphPool
+from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+
+def make_config(**overrides):
+    config = {
+        "selected_analysts": ["market", "fundamentals"],
+        "research_depth": "标准",
+        "llm_provider": "dashscope",
+        "quick_think_llm": "qwen-turbo",
+        "deep_think_llm": "qwen-plus",
+    }
+    config.update(overrides)
+    return config
+
+
+def test_pool_reuses_released_graph_and_separates_configs():
+    built = []
+
+    def factory(config):
+        graph = SimpleNamespace(config=None)
+        built.append(graph)
+        return graph
+
+    pool = TradingGraphPool(max_idle_per_key=2, graph_factory=factory)
+
+    first = pool.acquire(make_config())
+    # 签出期间并发任务拿到的是另一个实例
+    second = pool.acquire(make_config())
+    assert first is not second
+    pool.release(first)
+    pool.release(second)
+
+    assert pool.acquire(make_config()) in (first, second)
+    other = pool.acquire(make_config(research_depth="深度"))
+    assert other not in (first, second)
+    assert pool.stats()["created"] == 3
+    assert pool.stats()["reused"] == 1
+
+
+def test_run_state_is_isolated_per_thread():
+    graph = TradingAgentsGraph.__new__(TradingAgentsGraph)
+    graph._run_state = threading.local()
+    graph.ticker = "000001"
+    graph.curr_state = {"company_of_interest": "000001"}
+
+    seen = {}
+
+    def worker():
+        seen["ticker"] = graph.ticker
+        graph.ticker = "600519"
+        seen["curr_state"] = graph.curr_state
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert seen == {"ticker": None, "curr_state": None}
+    assert graph.ticker == "000001"
+    assert graph.curr_state == {"company_of_interest": "000001"}
+
+
+def test_llm_config_changes_invalidate_pooled_graphs(monkeypatch):
+    import app.services.analysis.graph_pool as graph_pool
+
+    pool = TradingGraphPool(graph_factory=lambda config: SimpleNamespace(config=None))
+    monkeypatch.setattr(graph_pool, "_trading_graph_pool", pool)
+
+    graph = pool.acquire(make_config(llm_config_version="3:2:2024-01-01"))
+    pool.release(graph)
+    # 其他进程修改了厂家配置：配置版本变化，不再复用旧实例
+    assert pool.acquire(make_config(llm_config_version="3:2:2024-01-02")) is not graph
+
+    # 本进程内的配置写入直接清空空闲实例
+    pool.release(graph)
+    graph_pool.invalidate_trading_graph_pool()
+    assert pool.stats()["idle"] == 0
+    assert pool.acquire(make_config(llm_config_version="3:2:2024-01-01")) is not graph
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from tradingagents.dataflows.cache.file_cache import StockDataCache
+
+
+def make_df():
+    return pd.DataFrame({'close': [1.0, 2.0, 3.0]},
+                        index=pd.Index(['2024-01-02', '2024-01-03', '2024-01-04'], name='date'))
+
+
+def test_partial_match_served_from_index(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    key = cache.save_stock_data('000001', make_df(), '2024-01-01', '2024-01-31', 'tushare')
+
+    # 日期不同 -> 精确键未命中，但应通过索引找到同一股票的缓存
+    found = cache.find_cached_stock_data('000001', '2023-01-01', '2023-12-31', 'tushare')
+    assert found == key
+
+    # 数据源不同 -> 不命中
+    assert cache.find_cached_stock_data('000001', '2023-01-01', '2023-12-31', 'akshare') is None
+
+
+def test_stats_and_clear_use_index(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    cache.save_stock_data('000001', make_df(), '2024-01-01', '2024-01-31', 'tushare')
+    cache.save_fundamentals_data('AAPL', 'fundamentals text', 'finnhub')
+
+    stats = cache.get_cache_stats()
+    assert stats['total_files'] == 2
+    assert stats['stock_data_count'] == 1
+    assert stats['fundamentals_count'] == 1
+    assert stats['total_size'] > 0
+
+    # 全部清理
+    cleared = cache.clear_old_cache(max_age_days=-1)
+    assert cleared == 2
+    assert cache.get_cache_stats()['total_files'] == 0
+    assert list(cache.metadata_dir.glob('*_meta.json')) == []
+
+
+def test_index_rebuilt_from_existing_metadata_files(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    key = cache.save_stock_data('000002', make_df(), '2024-01-01', '2024-01-31', 'akshare')
+
+    # 模拟升级前的旧缓存：只有 JSON 元数据，没有索引文件
+    cache.metadata_index._conn.close()
+    cache.metadata_index.index_path.unlink()
+    for suffix in ('-wal', '-shm'):
+        extra = cache.metadata_index.index_path.with_name(cache.metadata_index.index_path.name + suffix)
+        extra.unlink(missing_ok=True)
+
+    reopened = StockDataCache(str(tmp_path))
+    assert reopened.metadata_index.count() == 1
+    assert reopened.find_cached_stock_data('000002', '2020-01-01', '2020-02-01', 'akshare') == key
+    assert isinstance(reopened.load_stock_data(key), pd.DataFrame)
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows.cache import file_cache
+from tradingagents.dataflows.cache.file_cache import StockDataCache
+
+pytestmark = pytest.mark.skipif(not file_cache.PYARROW_AVAILABLE, reason="pyarrow 未安装")
+
+
+def make_frame():
+    index = pd.DatetimeIndex(pd.bdate_range('2024-01-01', periods=5), name='date')
+    return pd.DataFrame({'close': [1.5, 2.5, 3.5, 4.5, 5.5], 'vol': [1, 2, 3, 4, 5]}, index=index)
+
+
+@pytest.mark.parametrize('frame_format', ['parquet', 'feather'])
+def test_columnar_roundtrip_keeps_dtypes_and_index(tmp_path, frame_format):
+    cache = StockDataCache(str(tmp_path), frame_format=frame_format)
+    key = cache.save_stock_data('000001', make_frame(), '2024-01-01', '2024-01-05', 'tushare')
+
+    assert cache._load_metadata(key)['file_format'] == frame_format
+    loaded = cache.load_stock_data(key)
+    pd.testing.assert_frame_equal(loaded, make_frame(), check_freq=False)
+
+
+def test_migrate_csv_frames(tmp_path):
+    legacy = StockDataCache(str(tmp_path), frame_format='csv')
+    key = legacy.save_stock_data('000001', make_frame(), '2024-01-01', '2024-01-05', 'tushare')
+    csv_path = legacy._load_metadata(key)['file_path']
+    cached_at = legacy._load_metadata(key)['cached_at']
+
+    cache = StockDataCache(str(tmp_path), frame_format='parquet')
+    assert cache.migrate_csv_frames() == 1
+
+    metadata = cache._load_metadata(key)
+    assert metadata['file_format'] == 'parquet'
+    assert metadata['cached_at'] == cached_at
+    assert not pd.io.common.file_exists(csv_path)
+
+    loaded = cache.load_stock_data(key)
+    assert list(loaded['close']) == [1.5, 2.5, 3.5, 4.5, 5.5]
+    assert loaded['vol'].dtype.kind == 'i'
@@ -0,0 +1,113 @@
+import json
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from tradingagents.dataflows.cache.file_cache import StockDataCache
+from tradingagents.dataflows.data_source_manager import DataSourceManager
+
+
+def make_bars(start, end, factor=1.0):
+    dates = pd.bdate_range(start, end)
+    # 价格只与日期有关，不同批次获取的同一天K线一致
+    close = [float(d.dayofyear) * factor for d in dates]
+    return pd.DataFrame({
+        'date': dates,
+        'open': close,
+        'high': close,
+        'low': close,
+        'close': close,
+        'vol': 100,
+    })
+
+
+def test_covered_range_is_sliced(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    cache.merge_stock_data_range('000001', make_bars('2023-01-01', '2024-12-31'), '2023-01-01', '2024-12-31')
+
+    sliced, missing = cache.find_stock_data_range('000001', '2024-01-01', '2024-06-30')
+    assert missing == []
+    assert sliced['date'].min() >= pd.Timestamp('2024-01-01')
+    assert sliced['date'].max() <= pd.Timestamp('2024-06-30')
+    assert len(sliced) == len(pd.bdate_range('2024-01-01', '2024-06-30'))
+
+
+def test_partial_range_reports_head_and_tail(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    cache.merge_stock_data_range('000001', make_bars('2024-03-01', '2024-03-31'), '2024-03-01', '2024-03-31')
+
+    _, missing = cache.find_stock_data_range('000001', '2024-02-01', '2024-04-15')
+    # 缺失区间与已覆盖的首/末根K线重叠，用于校验复权基准
+    assert missing == [('2024-02-01', '2024-03-01'), ('2024-03-29', '2024-04-15')]
+
+    # 合并尾部后覆盖区间扩展
+    cache.merge_stock_data_range('000001', make_bars('2024-04-01', '2024-04-15'), '2024-04-01', '2024-04-15')
+    _, missing = cache.find_stock_data_range('000001', '2024-03-10', '2024-04-15')
+    assert missing == []
+
+
+def test_adjustment_or_source_change_rebuilds_series(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    cache.merge_stock_data_range('000001', make_bars('2024-01-01', '2024-03-29'), '2024-01-01', '2024-03-29', 'tushare')
+
+    # 除权后重叠K线价格变化：丢弃旧的复权历史
+    cache.merge_stock_data_range('000001', make_bars('2024-03-29', '2024-04-30', factor=0.9),
+                                 '2024-03-29', '2024-04-30', 'tushare')
+    _, missing = cache.find_stock_data_range('000001', '2024-01-01', '2024-04-30')
+    assert missing[0][0] == '2024-01-01'
+
+    # 数据源变化同样重建
+    cache.merge_stock_data_range('000001', make_bars('2024-03-01', '2024-03-29', factor=0.9),
+                                 '2024-03-01', '2024-03-29', 'akshare')
+    series = cache.load_daily_series('000001')
+    assert series['source'] == 'akshare' and series['start_date'] == '2024-03-01'
+    assert series['end_date'] == '2024-03-29'
+
+
+def test_merges_do_not_extend_ttl_and_empty_ranges_are_covered(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    cache.merge_stock_data_range('000001', make_bars('2024-03-01', '2024-03-29'), '2024-03-01', '2024-03-29', 'tushare')
+
+    # 周末没有K线：记为已覆盖
+    cache.merge_stock_data_range('000001', pd.DataFrame(), '2024-03-29', '2024-03-31', 'tushare')
+    _, missing = cache.find_stock_data_range('000001', '2024-03-01', '2024-03-31')
+    assert missing == []
+
+    # 合并不重置创建时间，TTL 从创建时起算
+    meta_path = cache._get_metadata_path(cache._get_daily_series_key('000001'))
+    meta = json.loads(meta_path.read_text(encoding='utf-8'))
+    created = (datetime.now() - timedelta(hours=100)).isoformat()
+    meta['series_created_at'] = created
+    meta_path.write_text(json.dumps(meta), encoding='utf-8')
+    cache.merge_stock_data_range('000001', make_bars('2024-03-29', '2024-04-05'), '2024-03-29', '2024-04-05', 'tushare')
+    assert cache.load_daily_series('000001')['created_at'] == created
+    assert cache.load_daily_series('000001', max_age_hours=99) is None
+
+
+class _FakeManager(DataSourceManager):
+    def __init__(self, cache):
+        self.cache_manager = cache
+        self.cache_enabled = True
+        self.calls = []
+
+    def _fetch_stock_dataframe_with_source(self, symbol, start_date=None, end_date=None, period="daily"):
+        self.calls.append((start_date, end_date))
+        return self._standardize_dataframe(make_bars(start_date, end_date)), "tushare"
+
+
+def test_get_stock_dataframe_fetches_only_missing_tail(tmp_path):
+    manager = _FakeManager(StockDataCache(str(tmp_path)))
+
+    first = manager.get_stock_dataframe('000001', '2024-01-01', '2024-03-31')
+    assert manager.calls == [('2024-01-01', '2024-03-31')]
+    assert not first.empty
+
+    manager.calls.clear()
+    covered = manager.get_stock_dataframe('000001', '2024-02-01', '2024-02-29')
+    assert manager.calls == []
+    assert len(covered) == len(pd.bdate_range('2024-02-01', '2024-02-29'))
+
+    extended = manager.get_stock_dataframe('000001', '2024-03-01', '2024-04-30')
+    assert manager.calls == [('2024-03-29', '2024-04-30')]
+    assert extended['date'].max() == pd.Timestamp('2024-04-30')
+    assert extended['date'].min() == pd.Timestamp('2024-03-01')
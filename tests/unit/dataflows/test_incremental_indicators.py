@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from tradingagents.dataflows.cache.file_cache import StockDataCache
+from tradingagents.dataflows.data_source_manager import DataSourceManager
+from tradingagents.dataflows.technical import incremental
+from tradingagents.dataflows.technical.incremental import (
+    INDICATOR_COLUMNS,
+    IndicatorState,
+    compute_indicator_frame,
+)
+
+
+def make_bars(n=150, seed=7):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2024-01-01', periods=n)
+    close = np.round(100 + np.cumsum(rng.normal(0, 1, n)), 2)
+    return pd.DataFrame({
+        'date': dates,
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'vol': 1000,
+    })
+
+
+def _dates(df):
+    return df['date'].dt.strftime('%Y-%m-%d').tolist()
+
+
+def test_incremental_updates_match_full_recompute():
+    bars = make_bars()
+    state = IndicatorState.from_frame(_dates(bars.iloc[:100]), bars['close'].iloc[:100])
+    for d, c in zip(_dates(bars.iloc[100:]), bars['close'].iloc[100:]):
+        state.update(d, c)
+
+    # 状态从同一锚点起算，续算结果与整段全量计算一致
+    expected = compute_indicator_frame(bars['close']).tail(5)
+    got = state.tail_frame()
+    assert list(got.index) == _dates(bars)[-5:]
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(got[col].to_numpy(), expected[col].to_numpy(), rtol=1e-9, equal_nan=True)
+
+
+def test_state_from_first_bar_matches_full_recompute():
+    bars = make_bars(30)
+    state = IndicatorState(anchor_date=_dates(bars)[0])
+    for d, c in zip(_dates(bars), bars['close']):
+        state.update(d, c)
+    expected = compute_indicator_frame(bars['close']).tail(5)
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(state.tail_frame()[col].to_numpy(), expected[col].to_numpy(), rtol=1e-9, equal_nan=True)
+
+
+def test_resume_rejects_adjusted_history():
+    bars = make_bars()
+    state = IndicatorState.from_frame(_dates(bars.iloc[:100]), bars['close'].iloc[:100])
+    adjusted = bars['close'] * 0.9
+    assert not state.resume(_dates(bars), adjusted.tolist())
+    assert state.resume(_dates(bars), bars['close'].tolist())
+    assert state.last_date == _dates(bars)[-1]
+
+
+class _FakeManager(DataSourceManager):
+    def __init__(self, cache):
+        self.cache_manager = cache
+        self.cache_enabled = True
+
+
+def test_report_persists_and_resumes_indicator_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental, "INCREMENTAL_ENABLED", True)
+    cache = StockDataCache(str(tmp_path))
+    manager = _FakeManager(cache)
+    bars = make_bars()
+
+    report = manager._format_stock_data_response(bars.iloc[:100].copy(), '000001', '平安银行', '2024-01-01', '2024-05-17')
+    assert 'MACD' in report and '❌' not in report
+    saved = cache.load_indicator_state('000001')
+    assert saved['last_date'] == _dates(bars)[99]
+
+    tail = manager._attach_technical_indicators(bars.copy(), '000001')
+    assert cache.load_indicator_state('000001')['last_date'] == _dates(bars)[-1]
+    expected = compute_indicator_frame(bars['close']).tail(5)
+    np.testing.assert_allclose(tail['macd_dif'].to_numpy(), expected['macd_dif'].to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(tail['ma60'].to_numpy(), expected['ma60'].to_numpy(), rtol=1e-9)
+
+    # 回看更早的区间不覆盖已保存状态
+    manager._attach_technical_indicators(bars.iloc[:80].copy(), '000001')
+    assert cache.load_indicator_state('000001')['last_date'] == _dates(bars)[-1]
+
+
+def test_report_recomputes_request_data_by_default(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental, "INCREMENTAL_ENABLED", False)
+    cache = StockDataCache(str(tmp_path))
+    manager = _FakeManager(cache)
+    bars = make_bars()
+
+    manager._attach_technical_indicators(bars.iloc[:100].copy(), '000001')
+    assert cache.load_indicator_state('000001') is None
+
+    # 指标只取决于本次请求的数据，与之前的请求无关
+    window = bars.iloc[40:].reset_index(drop=True)
+    tail = manager._attach_technical_indicators(window.copy(), '000001')
+    expected = compute_indicator_frame(window['close']).tail(5)
+    np.testing.assert_allclose(tail['macd_dif'].to_numpy(), expected['macd_dif'].to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(tail['rsi6'].to_numpy(), expected['rsi6'].to_numpy(), rtol=1e-12)
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from tradingagents.dataflows.news.near_duplicate import (
+    NearDuplicateIndex,
+    dedupe_news,
+    news_fingerprint,
+    hamming_distance,
+)
+from tradingagents.dataflows.news.realtime_news import NewsItem, RealtimeNewsAggregator
+
+BODY = "平安银行今日发布2024年年度报告，全年实现营业收入1466亿元，归母净利润445亿元，同比增长2.6%，不良贷款率保持稳定。"
+
+
+def test_syndicated_copies_are_near_duplicates():
+    a, _ = news_fingerprint("平安银行2024年净利润同比增长2.6% - 新浪财经", BODY)
+    b, _ = news_fingerprint("【证券时报】平安银行2024年净利润同比增长2.6%", BODY)
+    c, _ = news_fingerprint("宁德时代发布新一代钠离子电池，量产时间提前", "宁德时代在发布会上推出第二代钠离子电池产品。")
+    assert hamming_distance(a, b) <= 3
+    assert hamming_distance(a, c) > 3
+
+
+def test_dedupe_keeps_first_and_respects_keys_and_namespace():
+    items = [
+        {"title": "平安银行2024年净利润同比增长2.6%", "content": BODY, "url": "u1"},
+        {"title": "平安银行2024年净利润同比增长2.6% | 东方财富", "content": BODY, "url": "u2"},
+        {"title": "宁德时代发布新一代钠离子电池", "content": "第二代钠离子电池产品亮相。", "url": "u3"},
+    ]
+    unique = dedupe_news(items, text_of=lambda n: (n["title"], n["content"]), key_of=lambda n: n["url"])
+    assert [n["url"] for n in unique] == ["u1", "u3"]
+
+    index = NearDuplicateIndex()
+    assert index.check_and_add("u1", items[0]["title"], BODY, namespace="000001") is None
+    # 同一URL再次入库视为更新
+    assert index.check_and_add("u1", items[0]["title"], BODY, namespace="000001") is None
+    # 其他股票的同一条新闻不受影响
+    assert index.check_and_add("u2", items[1]["title"], BODY, namespace="600036") is None
+    assert index.check_and_add("u2", items[1]["title"], BODY, namespace="000001") == "000001|u1"
+
+
+def test_index_is_bounded_and_persistent(tmp_path):
+    path = tmp_path / "index.json"
+    index = NearDuplicateIndex(capacity=2, persist_path=str(path))
+    titles = ["平安银行发布年度报告营收增长", "宁德时代发布钠离子电池新品", "贵州茅台上调出厂价格公告发布"]
+    for i, title in enumerate(titles):
+        assert index.check_and_add(f"k{i}", title, BODY[:20] if i == 0 else "") is None
+    assert len(index) == 2
+    index.save()
+
+    reloaded = NearDuplicateIndex(capacity=2, persist_path=str(path))
+    assert len(reloaded) == 2
+    assert reloaded.check_and_add("new", titles[2], "") == "k2"
+    # 最旧条目已被淘汰
+    assert reloaded.check_and_add("again", titles[0], BODY[:20]) is None
+
+
+def test_realtime_aggregator_drops_near_duplicates():
+    now = datetime.now()
+    news = [
+        NewsItem("平安银行2024年净利润同比增长2.6%", BODY, "东方财富", now, "u1", "medium", 0.9),
+        NewsItem("平安银行2024年净利润同比增长2.6% - 新浪财经", BODY, "新浪财经", now, "u2", "medium", 0.9),
+        NewsItem("宁德时代发布新一代钠离子电池产品", "第二代钠离子电池产品亮相。", "财联社", now, "u3", "medium", 0.9),
+    ]
+    unique = RealtimeNewsAggregator()._deduplicate_news(news)
+    assert [item.url for item in unique] == ["u1", "u3"]
+
+
+def test_saves_from_several_processes_are_merged(tmp_path):
+    path = tmp_path / "index.json"
+    api = NearDuplicateIndex(persist_path=str(path))
+    worker = NearDuplicateIndex(persist_path=str(path))
+    assert api.check_and_add("a", "平安银行发布年度报告营收增长", BODY) is None
+    assert worker.check_and_add("b", "宁德时代发布钠离子电池新品", "第二代钠离子电池产品亮相。") is None
+    api.save()
+    worker.save()
+
+    # 后保存的进程并入了先保存进程的条目，不会覆盖
+    reloaded = NearDuplicateIndex(persist_path=str(path))
+    assert len(reloaded) == 2
+    assert worker.check_and_add("c", "平安银行发布年度报告营收增长 - 新浪财经", BODY) == "a"
+
+
+def test_save_if_due_debounces_writes(tmp_path):
+    path = tmp_path / "index.json"
+    index = NearDuplicateIndex(persist_path=str(path))
+    index.check_and_add("a", "平安银行发布年度报告营收增长", BODY)
+    index.save_if_due(interval=3600)
+    assert not path.exists()
+    index.save_if_due(interval=0)
+    assert path.exists()
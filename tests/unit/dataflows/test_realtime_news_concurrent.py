@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timezone
+
+from tradingagents.dataflows.news.realtime_news import NewsItem, RealtimeNewsAggregator
+
+
+def make_item(title):
+    return NewsItem(title=f'{title} headline for testing', content='', source='test', publish_time=datetime.now(timezone.utc),
+                    url='', urgency='low', relevance_score=0.5)
+
+
+class _Aggregator(RealtimeNewsAggregator):
+    def __init__(self, sources):
+        super().__init__()
+        self._sources = sources
+
+    def _news_sources(self, ticker, hours_back):
+        return self._sources
+
+
+def slow_source(delay, title):
+    def fetch():
+        time.sleep(delay)
+        return [make_item(title)]
+    return fetch
+
+
+def test_concurrent_mode_returns_what_arrived_by_deadline():
+    agg = _Aggregator([
+        ('fast-a', slow_source(0.05, 'A')),
+        ('fast-b', slow_source(0.1, 'B')),
+        ('slow', slow_source(2.0, 'C')),
+        ('empty', lambda: []),
+        ('broken', lambda: 1 / 0),
+    ])
+    agg.concurrent = True
+    agg.total_timeout = 0.6
+
+    started = time.monotonic()
+    news = agg.get_realtime_stock_news('AAPL', max_news=10)
+    elapsed = time.monotonic() - started
+
+    assert sorted(item.title[0] for item in news) == ['A', 'B']
+    assert elapsed < 1.5
+    stats = agg.last_source_stats
+    assert stats['fast-a']['status'] == 'hit' and stats['fast-a']['count'] == 1
+    assert stats['slow']['status'] == 'timeout'
+    assert stats['empty']['status'] == 'empty'
+    assert stats['broken']['status'] == 'error'
+    assert agg.get_source_stats()['fast-b']['hit_rate'] == 1.0
+
+
+def test_per_source_deadline_is_shorter_than_total():
+    agg = _Aggregator([('fast', slow_source(0.01, 'A')), ('capped', slow_source(0.5, 'B'))])
+    agg.concurrent = True
+    agg.total_timeout = 2.0
+    agg.source_timeouts = {'capped': 0.1}
+
+    started = time.monotonic()
+    news = agg.get_realtime_stock_news('AAPL')
+    assert [item.title[0] for item in news] == ['A']
+    assert time.monotonic() - started < 0.45
+    assert agg.last_source_stats['capped']['status'] == 'timeout'
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import tradingagents.dataflows.source_executor as source_executor
+from tradingagents.dataflows.source_executor import CIRCUIT_OPEN, SourceExecutor
+
+
+def _fail():
+    raise RuntimeError("timeout")
+
+
+def test_circuit_breaker_skips_failing_source_and_recovers(monkeypatch):
+    monkeypatch.setattr(source_executor, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(source_executor, "CIRCUIT_COOLDOWN_SECONDS", 0.05)
+    executor = SourceExecutor("test")
+    calls = []
+    healthy = {"tushare": False}
+
+    def tushare():
+        calls.append("tushare")
+        return "ok-tushare" if healthy["tushare"] else _fail()
+
+    candidates = [("tushare", tushare), ("akshare", lambda: "ok-akshare")]
+    assert executor.run(candidates, bool) == ("ok-akshare", "akshare")
+    assert executor.run(candidates, bool) == ("ok-akshare", "akshare")
+    assert executor.snapshot()["tushare"]["state"] == CIRCUIT_OPEN
+
+    # 熔断期间直接跳过
+    assert executor.run(candidates, bool) == ("ok-akshare", "akshare")
+    assert calls == ["tushare", "tushare"]
+
+    # 冷却后放行一次试探，成功后恢复
+    time.sleep(0.06)
+    healthy["tushare"] = True
+    assert executor.run(candidates, bool) == ("ok-tushare", "tushare")
+    assert executor.snapshot()["tushare"]["state"] == "closed"
+
+    # 全部失败时返回最后一个无效结果
+    assert executor.run([("a", lambda: ""), ("b", _fail)], bool) == ("", None)
+
+
+def test_hedged_request_takes_first_good_answer(monkeypatch):
+    monkeypatch.setattr(source_executor, "HEDGE_MIN_DELAY", 0.01)
+    executor = SourceExecutor("test-hedge")
+    for _ in range(5):
+        executor.health("slow").record(True, 0.02, time.monotonic())
+    release = threading.Event()
+
+    def slow():
+        release.wait(2)
+        return "slow"
+
+    start = time.monotonic()
+    result = executor.run([("slow", slow), ("fast", lambda: "fast")], bool, hedge=True)
+    assert result == ("fast", "fast") and time.monotonic() - start < 1
+    release.set()
+
+    # 前一个数据源失败时立即发起下一个
+    assert executor.run([("bad", _fail), ("fast", lambda: "fast")], bool, hedge=True) == ("fast", "fast")
+
+
+def test_no_data_results_do_not_trip_the_breaker(monkeypatch):
+    from tradingagents.dataflows.data_source_manager import DataSourceManager
+
+    monkeypatch.setattr(source_executor, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    executor = SourceExecutor("test")
+    is_good, is_failure = DataSourceManager._is_valid_result, DataSourceManager._is_source_failure
+
+    # 停牌/新股：数据源正常返回"没有数据"，继续尝试下一个数据源，但不计入熔断
+    candidates = [("tushare", lambda: "❌ 未获取到688999的有效数据"), ("akshare", lambda: "❌ 未能获取688999的股票数据")]
+    for _ in range(3):
+        result, source = executor.run(candidates, is_good, is_failure=is_failure)
+        assert source is None and "未能获取" in result
+    snapshot = executor.snapshot()
+    assert snapshot["tushare"]["state"] == "closed" and snapshot["tushare"]["failures"] == 0
+
+    # 调用失败（异常或失败信息）才计入熔断
+    failing = [("tushare", _fail), ("akshare", lambda: "❌ AKShare获取000001数据失败: Connection reset")]
+    executor.run(failing, is_good, is_failure=is_failure)
+    executor.run(failing, is_good, is_failure=is_failure)
+    snapshot = executor.snapshot()
+    assert snapshot["tushare"]["state"] == CIRCUIT_OPEN
+    assert snapshot["akshare"]["state"] == CIRCUIT_OPEN
@@ -0,0 +1,48 @@
+import threading
+import time
+
+import pandas as pd
+
+from tradingagents.dataflows.providers.china.spot_snapshot import SpotSnapshotService
+
+
+def make_spot():
+    return pd.DataFrame({
+        "代码": ["sh600000", "sz000001", "bj430047"],
+        "名称": ["浦发银行", "平安银行", "诺思兰德"],
+        "最新价": [7.5, 11.2, 8.8],
+    })
+
+
+def test_concurrent_refreshes_collapse_into_one_request():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return make_spot()
+
+    service = SpotSnapshotService(ttl_seconds=60, fetchers={"sina": fetch})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get_snapshot("sina"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(snapshot is results[0] for snapshot in results)
+    # 未过期时直接复用
+    assert service.get_snapshot("sina") is results[0]
+    assert len(calls) == 1
+
+
+def test_snapshot_indexes_by_normalized_code():
+    service = SpotSnapshotService(ttl_seconds=0, fetchers={"sina": make_spot})
+    snapshot = service.get_snapshot("sina")
+
+    assert snapshot.get("600000")["名称"] == "浦发银行"
+    assert snapshot.get("sz000001")["最新价"] == 11.2
+    assert set(snapshot.get_many(["000001", "430047", "999999"])) == {"000001", "430047"}
+    # ttl=0 时每次都刷新，peek 不返回过期快照
+    assert service.peek("sina") is None
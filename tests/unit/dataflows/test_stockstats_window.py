@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from tradingagents.dataflows.technical import stockstats as stockstats_module
+from tradingagents.dataflows.technical.stockstats import StockstatsUtils
+
+
+def _write_prices(tmp_path, symbol="AAPL", n=120):
+    dates = pd.bdate_range("2024-01-01", periods=n)
+    close = 100 + np.sin(np.arange(n) / 5) * 5
+    pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d 00:00:00-05:00"),
+        "Open": close - 0.5, "High": close + 1, "Low": close - 1, "Close": close,
+        "Volume": np.arange(n) * 10 + 1000,
+    }).to_csv(tmp_path / f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv", index=False)
+
+
+def test_window_matches_daily_lookups_and_loads_once(tmp_path, monkeypatch):
+    _write_prices(tmp_path)
+    monkeypatch.setattr(stockstats_module, "_frame_cache", stockstats_module.OrderedDict())
+    reads = []
+    real_read_csv = pd.read_csv
+    monkeypatch.setattr(stockstats_module.pd, "read_csv", lambda *a, **k: reads.append(a) or real_read_csv(*a, **k))
+
+    window = StockstatsUtils.get_stock_stats_window("AAPL", "rsi", "2024-05-31", 30, str(tmp_path))
+    macd = StockstatsUtils.get_stock_stats_window("AAPL", "macd", "2024-05-31", 30, str(tmp_path))
+    assert len(reads) == 1
+    assert "2024-05-31" in window and "2024-05-25" not in window  # 周六不是交易日
+    assert min(window) >= "2024-05-01" and len(macd) == len(window)
+
+    for date, value in window.items():
+        assert StockstatsUtils.get_stock_stats("AAPL", "rsi", date, str(tmp_path)) == value
+    assert StockstatsUtils.get_stock_stats("AAPL", "rsi", "2024-05-25", str(tmp_path)).startswith("N/A")
+    assert len(reads) == 1
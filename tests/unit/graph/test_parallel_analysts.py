@@ -0,0 +1,67 @@
+import threading
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, StateGraph
+
+from tradingagents.agents.utils.agent_states import AgentState
+from tradingagents.graph.conditional_logic import ConditionalLogic
+from tradingagents.graph.setup import ANALYST_OUTPUT_KEYS, GraphSetup
+
+
+def make_analyst(analyst_type, barrier, spans):
+    report_key, count_key = ANALYST_OUTPUT_KEYS[analyst_type]
+
+    def node(state):
+        start = time.monotonic()
+        # 所有分析师同时在运行时才会一起通过屏障；串行执行时第一个分支就会等待超时
+        try:
+            barrier.wait()
+            met = True
+        except threading.BrokenBarrierError:
+            met = False
+        spans[analyst_type] = (start, time.monotonic(), met)
+        return {
+            "messages": [AIMessage(content=f"{analyst_type} done")],
+            report_key: f"{analyst_type} report",
+            count_key: 1,
+        }
+
+    return node
+
+
+def test_parallel_analysts_merge_reports_concurrently():
+    analysts = ["market", "social", "news", "fundamentals"]
+    setup = GraphSetup.__new__(GraphSetup)
+    setup.conditional_logic = ConditionalLogic()
+
+    barrier = threading.Barrier(len(analysts), timeout=10)
+    spans = {}
+
+    workflow = StateGraph(AgentState)
+    setup._add_parallel_analysts(
+        workflow,
+        analysts,
+        {a: make_analyst(a, barrier, spans) for a in analysts},
+        {a: (lambda state: {}) for a in analysts},
+    )
+    workflow.add_node("Bull Researcher", lambda state: {})
+    workflow.add_edge("Bull Researcher", END)
+    graph = workflow.compile()
+
+    result = graph.invoke({
+        "messages": [HumanMessage(content="000001")],
+        "company_of_interest": "000001",
+        "trade_date": "2024-01-02",
+    })
+
+    for analyst_type in analysts:
+        report_key, count_key = ANALYST_OUTPUT_KEYS[analyst_type]
+        assert result[report_key] == f"{analyst_type} report"
+        assert result[count_key] == 1
+    # 四个分支同时运行：都通过了屏障，且每个分支都在其他分支结束前开始
+    assert set(spans) == set(analysts)
+    assert all(met for _, _, met in spans.values())
+    assert max(start for start, _, _ in spans.values()) < min(end for _, end, _ in spans.values())
+    # 汇合节点清理了各分支的消息
+    assert all(not isinstance(m, AIMessage) for m in result["messages"])
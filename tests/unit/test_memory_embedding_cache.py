@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+from tradingagents.agents.utils import memory as memory_module
+from tradingagents.agents.utils.memory import EmbeddingCache, FinancialSituationMemory
+
+
+class _FakeEmbeddings:
+    def __init__(self, fail_batches=False):
+        self.inputs = []
+        self.fail_batches = fail_batches
+
+    def create(self, model, input):
+        self.inputs.append(input)
+        if isinstance(input, list) and self.fail_batches:
+            raise RuntimeError("batch input not supported")
+        texts = input if isinstance(input, list) else [input]
+        data = [SimpleNamespace(index=i, embedding=[float(len(t)), 1.0]) for i, t in enumerate(texts)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.added = []
+
+    def count(self):
+        return len(self.added)
+
+    def add(self, documents, metadatas, embeddings, ids):
+        self.added.extend(zip(documents, embeddings))
+
+
+def _make_memory(embeddings):
+    mem = FinancialSituationMemory.__new__(FinancialSituationMemory)
+    mem.llm_provider = "openai"
+    mem.embedding = "text-embedding-3-small"
+    mem.client = SimpleNamespace(embeddings=embeddings)
+    mem.max_embedding_length = 50000
+    mem.enable_embedding_length_check = True
+    mem.fallback_available = False
+    mem.situation_collection = _FakeCollection()
+    return mem
+
+
+def test_batch_add_and_shared_cache(monkeypatch):
+    monkeypatch.setattr(memory_module, "_embedding_cache", EmbeddingCache(16))
+    embeddings = _FakeEmbeddings()
+    bull, bear = _make_memory(embeddings), _make_memory(embeddings)
+
+    bull.add_situations([("aa", "r1"), ("bbb", "r2"), ("aa", "r3")])
+    # 一次批量请求，重复文本只请求一次，按 index 还原顺序
+    assert embeddings.inputs == [["aa", "bbb"]]
+    assert [e for _, e in bull.situation_collection.added] == [[2.0, 1.0], [3.0, 1.0], [2.0, 1.0]]
+
+    # 其他记忆实例查询同一情况时命中共享缓存
+    assert bear.get_embedding("bbb") == [3.0, 1.0]
+    bear.add_situations([("aa", "r4")])
+    assert embeddings.inputs == [["aa", "bbb"]]
+    assert memory_module._embedding_cache.stats()["size"] == 2
+
+
+def test_batch_failure_falls_back_and_skips_disabled(monkeypatch):
+    monkeypatch.setattr(memory_module, "_embedding_cache", EmbeddingCache(16))
+    embeddings = _FakeEmbeddings(fail_batches=True)
+    mem = _make_memory(embeddings)
+    assert mem.get_embeddings(["aa", "bbb", ""]) == [[2.0, 1.0], [3.0, 1.0], [0.0] * 1024]
+    assert embeddings.inputs == [["aa", "bbb"], "aa", "bbb"]
+
+    mem.client = "DISABLED"
+    assert mem.get_embeddings(["aa"]) == [[0.0] * 1024]
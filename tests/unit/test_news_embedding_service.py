@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from tradingagents.utils import enhanced_news_filter
+from tradingagents.utils.embedding_service import SentenceEmbeddingService
+from tradingagents.utils.enhanced_news_filter import EnhancedNewsFilter
+
+
+class _CharModel:
+    """按字符计数的玩具模型，记录每次 encode 的批量大小"""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.batches.append(len(texts))
+        vocab = "招商银行股票公司业绩财报宁德时代电池600036"
+        return np.array([[text.count(ch) + 0.01 for ch in vocab] for text in texts], dtype=float)
+
+
+class _FakeService(SentenceEmbeddingService):
+    def __init__(self, cache_size=100):
+        super().__init__("fake-model", cache_size=cache_size)
+        self.loads = 0
+
+    def _load_model(self):
+        self.loads += 1
+        return _CharModel()
+
+
+def test_encode_batches_misses_and_evicts_lru():
+    service = _FakeService(cache_size=3)
+    vectors = service.encode(["甲", "乙", "甲"])
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+    assert service.model.batches == [2]
+
+    service.encode(["甲", "丙", "丁"])
+    assert service.model.batches == [2, 2]
+    assert service.cache_info()["size"] == 3
+    # "乙" 最久未使用，已被淘汰
+    service.encode(["乙"])
+    assert service.model.batches == [2, 2, 1]
+    assert service.loads == 1
+
+
+def test_filters_share_model_and_encode_feed_once(monkeypatch):
+    service = _FakeService()
+    monkeypatch.setattr(enhanced_news_filter, "get_embedding_service", lambda: service)
+
+    news = pd.DataFrame([
+        {"新闻标题": "招商银行发布三季度业绩报告", "新闻内容": "招商银行净利润同比增长"},
+        {"新闻标题": "宁德时代发布新电池", "新闻内容": "宁德时代电池量产"},
+    ] * 5)
+
+    first = EnhancedNewsFilter("600036", "招商银行", use_semantic=True)
+    result = first.filter_news_enhanced(news, min_score=0)
+    # 6 条锚点文本一批，10 条新闻（去重后 2 条）一批
+    assert service.model.batches == [6, 2]
+    assert result["semantic_score"].iloc[0] > result["semantic_score"].iloc[-1]
+
+    single = first.calculate_semantic_similarity("招商银行发布三季度业绩报告", "招商银行净利润同比增长")
+    assert abs(single - result["semantic_score"].iloc[0]) < 1e-3
+
+    EnhancedNewsFilter("300750", "宁德时代", use_semantic=True).filter_news_enhanced(news, min_score=0)
+    assert service.loads == 1
+    assert service.model.batches == [6, 2, 6]
@@ -5,6 +5,7 @@ import numpy as np
 from tradingagents.tools.analysis.indicators import (
     IndicatorSpec,
     compute_many,
+    compute_panel,
 )
 
 
@@ -48,3 +49,41 @@ def test_no_inplace_modification():
     out = compute_many(df, [IndicatorSpec('ma', {'n': 5})])
     assert 'ma5' in out.columns and 'ma5' not in df.columns
 
+
+def reference_kdj(df, n=9, m1=3, m2=3):
+    lowest_low = df['low'].rolling(window=n, min_periods=n).min()
+    highest_high = df['high'].rolling(window=n, min_periods=n).max()
+    rsv = ((df['close'] - lowest_low) / (highest_high - lowest_low) * 100).replace([np.inf, -np.inf], np.nan)
+    k, d = [], []
+    last_k = last_d = 50.0
+    for rv in rsv:
+        if np.isnan(rv):
+            k.append(np.nan)
+            d.append(np.nan)
+            continue
+        last_k = (1 - 1 / m1) * last_k + rv / m1
+        last_d = (1 - 1 / m2) * last_d + last_k / m2
+        k.append(last_k)
+        d.append(last_d)
+    return np.array(k), np.array(d)
+
+
+def test_vectorized_kdj_matches_recursive_definition():
+    df = make_df(120)
+    # 中间插入平盘段（除零 -> NaN），验证 NaN 不推进递推
+    df.loc[50:60, ['high', 'low', 'close']] = 100.0
+    out = compute_many(df, [IndicatorSpec('kdj', {'n': 9, 'm1': 3, 'm2': 3})])
+    k, d = reference_kdj(df)
+    np.testing.assert_allclose(out['kdj_k'].to_numpy(), k, equal_nan=True)
+    np.testing.assert_allclose(out['kdj_d'].to_numpy(), d, equal_nan=True)
+
+
+def test_compute_panel_matches_single_symbol():
+    frames = {code: make_df(80, seed=i) for i, code in enumerate(['000001', '600519', '300750'])}
+    panel = {col: pd.DataFrame({code: f[col] for code, f in frames.items()}) for col in ['high', 'low', 'close']}
+    specs = [IndicatorSpec('macd'), IndicatorSpec('atr', {'n': 14}), IndicatorSpec('kdj')]
+    out = compute_panel(panel, specs)
+    for code, f in frames.items():
+        single = compute_many(f, specs)
+        for col in ['dif', 'atr14', 'kdj_j']:
+            np.testing.assert_allclose(out[col][code].to_numpy(), single[col].to_numpy(), equal_nan=True)
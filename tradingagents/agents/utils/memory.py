@@ -6,7 +6,8 @@ from dashscope import TextEmbedding
 import os
 import threading
 import hashlib
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -96,6 +97,58 @@ class ChromaDBManager:
             return collection
 
 
+class EmbeddingCache:
+    """
+    进程内共享的向量缓存（LRU）
+
+    键为 提供商+模型+文本内容 的哈希。同一份分析情况会被多头/空头/交易员/投资裁判/风险经理
+    五个记忆实例分别查询和写入，命中缓存时不再请求嵌入接口。
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(provider: str, model: str, text: str) -> str:
+        return hashlib.sha256(f"{provider}|{model}|{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._items.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, key: str, embedding: List[float]):
+        with self._lock:
+            self._items[key] = embedding
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._items), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+_embedding_cache = EmbeddingCache(int(os.getenv('MEMORY_EMBEDDING_CACHE_SIZE', '1024')))
+
+# 单次批量嵌入请求的最大文本数（DashScope text-embedding-v3 每次最多10条）
+DASHSCOPE_EMBEDDING_BATCH_SIZE = 10
+OPENAI_EMBEDDING_BATCH_SIZE = int(os.getenv('MEMORY_EMBEDDING_BATCH_SIZE', '64'))
+
+
 class FinancialSituationMemory:
     def __init__(self, name, config):
         self.config = config
@@ -348,7 +401,109 @@ class FinancialSituationMemory:
         logger.warning(f"⚠️ 强制截断：保留首尾关键信息，{len(text)}字符截断为{len(truncated)}字符")
         return truncated, True
 
+    def _uses_dashscope_embedding(self):
+        return (self.llm_provider == "dashscope" or
+                self.llm_provider == "alibaba" or
+                self.llm_provider == "qianfan" or
+                (self.llm_provider == "google" and self.client is None) or
+                (self.llm_provider == "deepseek" and self.client is None) or
+                (self.llm_provider == "openrouter" and self.client is None))
+
+    def _embedding_cache_key(self, text):
+        """可缓存时返回缓存键；记忆功能禁用、文本无效或超长时返回 None"""
+        if self.client == "DISABLED" or not text or not isinstance(text, str):
+            return None
+        if self.enable_embedding_length_check and len(text) > self.max_embedding_length:
+            return None
+        return EmbeddingCache.make_key(self.llm_provider, self.embedding, text)
+
     def get_embedding(self, text):
+        """Get embedding for a text using the configured provider (with shared cache)"""
+        key = self._embedding_cache_key(text)
+        if key is not None:
+            cached = _embedding_cache.get(key)
+            if cached is not None:
+                logger.debug(f"✅ 向量缓存命中，维度: {len(cached)}")
+                return list(cached)
+
+        embedding = self._request_embedding(text)
+        # 零向量表示降级，不缓存
+        if key is not None and any(embedding):
+            _embedding_cache.put(key, list(embedding))
+        return embedding
+
+    def get_embeddings(self, texts):
+        """
+        批量获取向量：先查缓存，未命中的文本去重后按批请求嵌入接口。
+        批量请求失败时逐条降级到 get_embedding（保留原有的错误处理与降级逻辑）。
+        """
+        results = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}
+        pending_texts: Dict[str, str] = {}
+        for i, text in enumerate(texts):
+            key = self._embedding_cache_key(text)
+            if key is None:
+                results[i] = self.get_embedding(text)
+                continue
+            cached = _embedding_cache.get(key)
+            if cached is not None:
+                results[i] = list(cached)
+                continue
+            pending.setdefault(key, []).append(i)
+            pending_texts[key] = text
+
+        keys = list(pending.keys())
+        batch_size = DASHSCOPE_EMBEDDING_BATCH_SIZE if self._uses_dashscope_embedding() else OPENAI_EMBEDDING_BATCH_SIZE
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            chunk_texts = [pending_texts[key] for key in chunk]
+            embeddings = self._request_embeddings_batch(chunk_texts)
+            if embeddings is None:
+                embeddings = [self.get_embedding(text) for text in chunk_texts]
+            else:
+                for key, embedding in zip(chunk, embeddings):
+                    if any(embedding):
+                        _embedding_cache.put(key, list(embedding))
+            for key, embedding in zip(chunk, embeddings):
+                for i in pending[key]:
+                    results[i] = list(embedding)
+
+        if len(texts) > 1:
+            logger.debug(f"📦 批量向量化: {len(texts)}条，请求 {len(keys)}条，缓存 {_embedding_cache.stats()}")
+        return results
+
+    def _request_embeddings_batch(self, texts):
+        """一次请求多条文本的向量；接口不支持或出错时返回 None"""
+        if len(texts) == 1:
+            return [self._request_embedding(texts[0])]
+        try:
+            if self._uses_dashscope_embedding():
+                import dashscope
+                from dashscope import TextEmbedding
+
+                if not getattr(dashscope, 'api_key', None):
+                    return None
+                response = TextEmbedding.call(model=self.embedding, input=texts)
+                if response.status_code != 200:
+                    logger.warning(f"⚠️ DashScope批量embedding失败: {response.code} - {response.message}，逐条处理")
+                    return None
+                items = sorted(response.output['embeddings'], key=lambda item: item.get('text_index', 0))
+                embeddings = [item['embedding'] for item in items]
+            else:
+                if self.client is None or self.client == "DISABLED":
+                    return None
+                response = self.client.embeddings.create(model=self.embedding, input=texts)
+                embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+            if len(embeddings) != len(texts):
+                return None
+            logger.debug(f"✅ {self.llm_provider} 批量embedding成功: {len(texts)}条")
+            return embeddings
+        except Exception as e:
+            logger.warning(f"⚠️ {self.llm_provider} 批量embedding异常: {str(e)}，逐条处理")
+            return None
+
+    def _request_embedding(self, text):
         """Get embedding for a text using the configured provider"""
 
         # 检查记忆功能是否被禁用
@@ -396,12 +551,7 @@ class FinancialSituationMemory:
             'strategy': 'no_truncation_with_fallback'  # 标记策略
         }
 
-        if (self.llm_provider == "dashscope" or
-            self.llm_provider == "alibaba" or
-            self.llm_provider == "qianfan" or
-            (self.llm_provider == "google" and self.client is None) or
-            (self.llm_provider == "deepseek" and self.client is None) or
-            (self.llm_provider == "openrouter" and self.client is None)):
+        if self._uses_dashscope_embedding():
             # 使用阿里百炼的嵌入模型
             try:
                 # 导入DashScope模块
@@ -562,7 +712,6 @@ class FinancialSituationMemory:
         situations = []
         advice = []
         ids = []
-        embeddings = []
 
         offset = self.situation_collection.count()
 
@@ -570,7 +719,8 @@ class FinancialSituationMemory:
             situations.append(situation)
             advice.append(recommendation)
             ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
+
+        embeddings = self.get_embeddings(situations)
 
         self.situation_collection.add(
             documents=situations,
@@ -645,7 +795,8 @@ class FinancialSituationMemory:
             'collection_count': self.situation_collection.count(),
             'client_status': 'enabled' if self.client != "DISABLED" else 'disabled',
             'embedding_model': self.embedding,
-            'provider': self.llm_provider
+            'provider': self.llm_provider,
+            'embedding_cache': _embedding_cache.stats()
         }
         
         # 添加最后一次文本处理信息
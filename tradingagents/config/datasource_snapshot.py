@@ -0,0 +1,139 @@
+"""
+数据源配置快照（进程内缓存）
+
+数据源优先级与启用状态来自 system_configs（最新激活版本的 data_source_configs）和 datasource_groupings。
+原先每次取数都会同步查询一次数据库；这里在进程内缓存一份快照，所有调用点共享：
+- 配置写入（config_service）后调用 invalidate_datasource_config_snapshot() 立即失效
+- 其他进程的写入由短 TTL 兜底（DATASOURCE_CONFIG_TTL_SECONDS，默认 30 秒）
+- 数据库读取失败时在 TTL 内不再重试，避免每次取数都等待连接超时
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TTL_SECONDS = float(os.getenv("DATASOURCE_CONFIG_TTL_SECONDS", "30"))
+
+_CONFIG_PROJECTION = {"data_source_configs": 1, "version": 1}
+
+
+class DataSourceConfigSnapshot:
+    """某一时刻的数据源配置（只读）"""
+
+    def __init__(self, config_doc: Optional[Dict[str, Any]], groupings: List[Dict[str, Any]]):
+        config_doc = config_doc or {}
+        self.version = config_doc.get("version")
+        self.data_source_configs: List[Dict[str, Any]] = list(config_doc.get("data_source_configs") or [])
+        self.has_config = bool(config_doc)
+
+        # 按市场分类分组的已启用数据源（优先级降序）
+        self._groupings: Dict[str, List[Dict[str, Any]]] = {}
+        for grouping in sorted(groupings, key=lambda g: g.get("priority", 0), reverse=True):
+            if grouping.get("enabled", True):
+                self._groupings.setdefault(grouping.get("market_category_id"), []).append(grouping)
+
+    def enabled_types(self) -> Set[str]:
+        """已启用数据源的类型（小写）"""
+        return {
+            (ds.get("type") or "").lower()
+            for ds in self.data_source_configs
+            if ds.get("enabled", True)
+        }
+
+    def configs_by_name(self) -> Dict[str, Dict[str, Any]]:
+        """{数据源名称: {api_key, api_secret, config_params}}"""
+        result = {}
+        for ds_config in self.data_source_configs:
+            name = (ds_config.get("name") or "").lower()
+            result[name] = {
+                "api_key": ds_config.get("api_key", ""),
+                "api_secret": ds_config.get("api_secret", ""),
+                "config_params": ds_config.get("config_params", {}),
+            }
+        return result
+
+    def grouping_names(self, market_category_id: str) -> List[str]:
+        """某市场分类下已启用数据源的名称（优先级降序）"""
+        return [g["data_source_name"] for g in self._groupings.get(market_category_id, [])]
+
+
+class _SnapshotHolder:
+    def __init__(self):
+        self.snapshot: Optional[DataSourceConfigSnapshot] = None
+        self.loaded_at = 0.0
+        self.error: Optional[Exception] = None
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def fresh(self) -> bool:
+        return (self.snapshot is not None or self.error is not None) and \
+            time.monotonic() - self.loaded_at < SNAPSHOT_TTL_SECONDS
+
+    def current(self) -> DataSourceConfigSnapshot:
+        if self.error is not None:
+            raise self.error
+        return self.snapshot
+
+    def store(self, generation: int, snapshot: Optional[DataSourceConfigSnapshot],
+              error: Optional[Exception] = None):
+        # 加载期间发生了失效，则不缓存（下次重新加载）
+        if generation != self.generation:
+            return
+        self.snapshot, self.error = snapshot, error
+        self.loaded_at = time.monotonic()
+        if snapshot is not None:
+            logger.debug(f"📦 [数据源配置快照] 已加载，配置版本: {snapshot.version}")
+
+
+_holder = _SnapshotHolder()
+
+
+def get_datasource_config_snapshot() -> DataSourceConfigSnapshot:
+    """同步获取快照（过期时使用同步 MongoDB 客户端重新加载）"""
+    with _holder.lock:
+        if _holder.fresh():
+            return _holder.current()
+        generation = _holder.generation
+        try:
+            from app.core.database import get_mongo_db_sync
+            db = get_mongo_db_sync()
+            config_doc = db.system_configs.find_one(
+                {"is_active": True}, _CONFIG_PROJECTION, sort=[("version", -1)]
+            )
+            groupings = list(db.datasource_groupings.find({"enabled": True}))
+            snapshot = DataSourceConfigSnapshot(config_doc, groupings)
+        except Exception as e:
+            _holder.store(generation, None, e)
+            raise
+        _holder.store(generation, snapshot)
+        return snapshot
+
+
+async def get_datasource_config_snapshot_async(db) -> DataSourceConfigSnapshot:
+    """异步获取快照（过期时使用传入的 Motor 数据库重新加载）"""
+    if _holder.fresh():
+        return _holder.current()
+    generation = _holder.generation
+    try:
+        config_doc = await db.system_configs.find_one(
+            {"is_active": True}, _CONFIG_PROJECTION, sort=[("version", -1)]
+        )
+        groupings = await db.datasource_groupings.find({"enabled": True}).to_list(length=None)
+        snapshot = DataSourceConfigSnapshot(config_doc, groupings)
+    except Exception as e:
+        _holder.store(generation, None, e)
+        raise
+    _holder.store(generation, snapshot)
+    return snapshot
+
+
+def invalidate_datasource_config_snapshot():
+    """数据源配置写入后调用（不加锁，避免在事件循环中等待正在进行的同步加载）"""
+    _holder.generation += 1
+    _holder.snapshot = None
+    _holder.error = None
+    _holder.loaded_at = 0.0
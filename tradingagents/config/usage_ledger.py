@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Token 使用记录账本（JSON 文件存储后端）
+
+记录以 JSONL 追加写入，每次调用只写一行；同时在内存中维护按日、按供应商、按会话的滚动汇总，
+成本告警和会话成本查询无需重新读取/扫描全部记录。
+记录数超过上限的一定比例后才整体压缩一次，保留最近 max_records 条（摊还 O(1)）。
+
+多个进程（API、Worker、子进程）共用同一个账本文件：
+- 查询前按已读取的文件偏移增量读取其他进程追加的记录（文件被压缩/替换时整体重新加载）
+- 追加与压缩在文件锁内进行，压缩前先读入文件尾部，不会丢失其他进程的记录
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from tradingagents.utils.file_lock import file_lock
+from tradingagents.utils.logging_manager import get_logger
+
+from .usage_models import UsageRecord
+
+logger = get_logger('agents')
+
+# 超过上限的比例后才压缩文件
+COMPACT_SLACK = 0.2
+# 记录上限（来自 settings.json）的缓存时间（秒）
+LIMIT_CACHE_SECONDS = 60.0
+# 用于识别文件是否被替换的文件开头字节数
+_HEAD_BYTES = 256
+
+
+def _record_date(record: UsageRecord) -> Optional[str]:
+    """记录所属日期（按记录自身时区）"""
+    try:
+        return datetime.fromisoformat(record.timestamp).date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"cost": 0.0, "input_tokens": 0, "output_tokens": 0, "requests": 0}
+
+
+def _add_to(totals: Dict[str, Any], record: UsageRecord, sign: int = 1):
+    totals["cost"] += sign * record.cost
+    totals["input_tokens"] += sign * record.input_tokens
+    totals["output_tokens"] += sign * record.output_tokens
+    totals["requests"] += sign
+
+
+def _parse_lines(data: bytes) -> List[UsageRecord]:
+    records = []
+    for line in data.decode('utf-8', errors='ignore').splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(UsageRecord(**json.loads(line)))
+        except (ValueError, TypeError):
+            # 进程中断可能留下损坏的行，跳过
+            continue
+    return records
+
+
+class UsageLedger:
+    """追加写入的使用记录账本，带内存汇总"""
+
+    def __init__(self, ledger_file: Path, legacy_file: Optional[Path] = None,
+                 max_records: Callable[[], int] = lambda: 10000):
+        self.ledger_file = Path(ledger_file)
+        self.legacy_file = Path(legacy_file) if legacy_file else None
+        self._max_records = max_records
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._records: Deque[UsageRecord] = deque()
+        self._daily: Dict[str, Dict[str, Any]] = {}
+        self._sessions: Dict[str, float] = {}
+        self._lines_on_disk = 0
+        # 已读取到的文件位置与文件标识（inode），用于增量读取其他进程追加的记录
+        self._offset = 0
+        self._file_id: Optional[int] = None
+        self._head = b''
+        self._cached_limit: Optional[int] = None
+        self._limit_loaded_at = 0.0
+
+    # ------------------------------------------------------------------ 加载
+
+    def _ensure_loaded(self):
+        """首次使用时加载；之后同步其他进程的写入"""
+        with self._lock:
+            if not self._loaded:
+                self._migrate_legacy_file()
+                self._loaded = True
+            self._refresh()
+
+    def _refresh(self):
+        """按文件偏移读取新增记录；文件被替换或截断（其他进程压缩/清空）时整体重新加载"""
+        try:
+            stat = self.ledger_file.stat()
+        except FileNotFoundError:
+            if self._file_id is not None or self._records:
+                self._reset([])
+            return
+        if stat.st_size == self._offset and stat.st_ino == self._file_id:
+            return
+
+        with open(self.ledger_file, 'rb') as f:
+            head = f.read(_HEAD_BYTES)
+            # inode 可能被复用，同时比较文件开头判断是否已被替换
+            if stat.st_ino != self._file_id or stat.st_size < self._offset or \
+                    head[:len(self._head)] != self._head:
+                self._reset([])
+                self._file_id = stat.st_ino
+            if not self._head:
+                self._head = head
+            f.seek(self._offset)
+            data = f.read()
+        # 只消费完整的行（其他进程可能正在写入最后一行）
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return
+        records = _parse_lines(data[:end])
+        self._offset += end
+        self._lines_on_disk += len(records)
+        for record in records:
+            self._records.append(record)
+            self._observe(record)
+        self._trim()
+
+    def _reset(self, records: List[UsageRecord]):
+        self._offset = 0
+        self._file_id = None
+        self._head = b''
+        self._lines_on_disk = 0
+        self._rebuild(records)
+
+    def _trim(self):
+        limit = self._limit()
+        while len(self._records) > limit:
+            self._observe(self._records.popleft(), sign=-1)
+
+    def _file_lock(self):
+        """跨进程文件锁"""
+        return file_lock(self.ledger_file)
+
+    def _migrate_legacy_file(self):
+        """旧版 usage.json（整体 JSON 数组）一次性转换为 JSONL"""
+        if self.ledger_file.exists() or not self.legacy_file or not self.legacy_file.exists():
+            return
+        try:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            with self._file_lock():
+                if self.ledger_file.exists():
+                    return
+                self._write_all([UsageRecord(**item) for item in data])
+            # 记录由随后的 _refresh 读入
+            self._reset([])
+            self.legacy_file.rename(self.legacy_file.with_name(self.legacy_file.name + '.migrated'))
+            logger.info(f"📄 [Token记录] 已将 {self.legacy_file.name} 转换为追加写入账本: {self.ledger_file}")
+        except Exception as e:
+            logger.error(f"转换旧版使用记录失败: {e}")
+
+    def _limit(self) -> int:
+        """记录上限（缓存 LIMIT_CACHE_SECONDS 秒，避免每次追加都读取 settings.json）"""
+        now = time.monotonic()
+        if self._cached_limit is None or now - self._limit_loaded_at >= LIMIT_CACHE_SECONDS:
+            try:
+                self._cached_limit = max(1, int(self._max_records()))
+            except Exception:
+                self._cached_limit = self._cached_limit or 10000
+            self._limit_loaded_at = now
+        return self._cached_limit
+
+    def _rebuild(self, records: List[UsageRecord]):
+        self._records = deque(records)
+        self._daily = {}
+        self._sessions = {}
+        for record in records:
+            self._observe(record)
+
+    def _observe(self, record: UsageRecord, sign: int = 1):
+        day = _record_date(record)
+        if day is not None:
+            bucket = self._daily.setdefault(day, {**_empty_totals(), "providers": {}})
+            _add_to(bucket, record, sign)
+            _add_to(bucket["providers"].setdefault(record.provider, _empty_totals()), record, sign)
+        if record.session_id:
+            self._sessions[record.session_id] = self._sessions.get(record.session_id, 0.0) + sign * record.cost
+
+    # ------------------------------------------------------------------ 写入
+
+    def _write_all(self, records: List[UsageRecord]):
+        """整体重写文件（调用方持有文件锁）"""
+        self.ledger_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.ledger_file.with_name(f"{self.ledger_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(asdict(record), ensure_ascii=False) + '\n')
+        tmp_file.replace(self.ledger_file)
+        stat = self.ledger_file.stat()
+        self._file_id, self._offset = stat.st_ino, stat.st_size
+        with open(self.ledger_file, 'rb') as f:
+            self._head = f.read(_HEAD_BYTES)
+        self._lines_on_disk = len(records)
+
+    def append(self, record: UsageRecord):
+        """追加一条记录并更新内存汇总"""
+        with self._lock:
+            if not self._loaded:
+                self._ensure_loaded()
+            with self._file_lock():
+                # 先读入其他进程追加的记录，再在文件末尾写入本条
+                self._refresh()
+                line = (json.dumps(asdict(record), ensure_ascii=False) + '\n').encode('utf-8')
+                with open(self.ledger_file, 'ab') as f:
+                    f.write(line)
+                if self._file_id is None:
+                    self._file_id = self.ledger_file.stat().st_ino
+                self._offset += len(line)
+                self._lines_on_disk += 1
+                self._records.append(record)
+                self._observe(record)
+                self._trim()
+
+                if self._lines_on_disk > self._limit() * (1 + COMPACT_SLACK):
+                    self._write_all(list(self._records))
+                    logger.info(f"🗜️ [Token记录] 账本已压缩，保留最近 {len(self._records)} 条")
+
+    def replace_all(self, records: List[UsageRecord]):
+        """整体替换记录（如清空）"""
+        with self._lock:
+            records = list(records)[-self._limit():]
+            with self._file_lock():
+                self._write_all(records)
+            self._rebuild(records)
+            self._loaded = True
+
+    # ------------------------------------------------------------------ 查询
+
+    def records(self) -> List[UsageRecord]:
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._records)
+
+    def daily_totals(self, day: Optional[str] = None) -> Dict[str, Any]:
+        """某日汇总（默认今天），O(1)"""
+        self._ensure_loaded()
+        day = day or datetime.now().date().isoformat()
+        with self._lock:
+            bucket = self._daily.get(day)
+            if bucket is None:
+                return {**_empty_totals(), "providers": {}}
+            return {**bucket, "providers": {p: dict(t) for p, t in bucket["providers"].items()}}
+
+    def session_cost(self, session_id: str) -> float:
+        """会话累计成本，O(1)"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._sessions.get(session_id, 0.0)
+
+    def statistics(self, days: int = 30) -> Dict[str, Any]:
+        """最近N天的统计（基于内存记录，不读文件）"""
+        self._ensure_loaded()
+        now = datetime.now().astimezone()
+        cutoff = now - timedelta(days=days)
+
+        recent: List[UsageRecord] = []
+        with self._lock:
+            snapshot = list(self._records)
+        for record in snapshot:
+            try:
+                record_time = datetime.fromisoformat(record.timestamp)
+            except (TypeError, ValueError):
+                continue
+            if record_time.tzinfo is None:
+                record_time = record_time.astimezone()
+            if record_time >= cutoff:
+                recent.append(record)
+
+        totals = _empty_totals()
+        provider_stats: Dict[str, Dict[str, Any]] = {}
+        for record in recent:
+            _add_to(totals, record)
+            _add_to(provider_stats.setdefault(record.provider, _empty_totals()), record)
+
+        return {
+            "period_days": days,
+            "total_cost": round(totals["cost"], 4),
+            "total_input_tokens": totals["input_tokens"],
+            "total_output_tokens": totals["output_tokens"],
+            "total_requests": len(recent),
+            "provider_stats": provider_stats,
+            "records_count": len(recent)
+        }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+K线分桶存储布局
+
+stock_daily_quotes 为每只股票、每个交易日、每个数据源各存一条文档。分桶布局改为每只股票、每个数据源、
+每个时间桶（日线按月、周/月线按年、分钟线按日）一条文档，桶内按列存储数组：
+
+    {symbol, data_source, period, bucket: "2024-01", dates: [...], columns: {"close": [...], ...}}
+
+索引条目数和单次区间读取的文档数约降为原来的 1/20；读取端直接拼接列数组得到 DataFrame。
+写入端与 app 端 HistoricalDataService 共用本模块的纯函数（不依赖具体的 MongoDB 驱动）。
+
+通过环境变量 HISTORICAL_BAR_LAYOUT 选择布局：
+- document（默认）：仅使用 stock_daily_quotes
+- dual：同时写入两种布局；读取时分桶覆盖了单日文档的区间才使用分桶，否则回退到单日文档（迁移期使用）
+- bucket：仅使用分桶集合
+
+已支持分桶的读取端：HistoricalDataService、MongoDBCacheAdapter、全市场面板筛选。
+screening_service 逐只路径、unified_stock_service、routers/multi_market_stocks 及各同步服务仍只读取
+stock_daily_quotes，因此 bucket 模式需同时设置 HISTORICAL_BUCKET_ONLY_CONFIRMED=true，否则按 dual 运行。
+从 document 切换到 dual 后，先运行 scripts/migrations/backfill_bar_buckets.py 回填历史分桶。
+
+分桶文档带 version 字段，写入时按 version 条件替换（乐观并发），并发同步同一只股票不会丢失K线。
+"""
+
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BUCKET_COLLECTION = os.getenv("HISTORICAL_BUCKET_COLLECTION", "stock_quote_buckets")
+
+LAYOUT_DOCUMENT = "document"
+LAYOUT_BUCKET = "bucket"
+LAYOUT_DUAL = "dual"
+
+# 桶键长度：trade_date (YYYY-MM-DD) 的前缀
+_BUCKET_KEY_LENGTH = {
+    "daily": 7,     # 按月
+    "weekly": 4,    # 按年
+    "monthly": 4,   # 按年
+}
+# 分钟线等其他周期按日分桶
+_DEFAULT_BUCKET_KEY_LENGTH = 10
+
+# 文档中按桶级别存储（不进入列数组）的字段
+BUCKET_META_FIELDS = ("symbol", "code", "full_symbol", "market", "period", "data_source")
+# 每条记录独立、但不需要存储的字段
+_SKIPPED_FIELDS = ("trade_date", "created_at", "updated_at", "version", "_id")
+
+
+_bucket_only_warned = False
+
+
+def get_bar_layout() -> str:
+    global _bucket_only_warned
+    layout = os.getenv("HISTORICAL_BAR_LAYOUT", LAYOUT_DOCUMENT).strip().lower()
+    if layout not in (LAYOUT_DOCUMENT, LAYOUT_BUCKET, LAYOUT_DUAL):
+        return LAYOUT_DOCUMENT
+    if layout == LAYOUT_BUCKET and os.getenv("HISTORICAL_BUCKET_ONLY_CONFIRMED", "false").lower() not in ("true", "1", "yes"):
+        # 部分读取端仍只读 stock_daily_quotes，未确认时继续双写，避免这些读取端查不到数据
+        if not _bucket_only_warned:
+            logger.warning("⚠️ HISTORICAL_BAR_LAYOUT=bucket 未设置 HISTORICAL_BUCKET_ONLY_CONFIRMED=true，按 dual 模式运行")
+            _bucket_only_warned = True
+        return LAYOUT_DUAL
+    return layout
+
+
+def writes_documents(layout: Optional[str] = None) -> bool:
+    return (layout or get_bar_layout()) in (LAYOUT_DOCUMENT, LAYOUT_DUAL)
+
+
+def writes_buckets(layout: Optional[str] = None) -> bool:
+    return (layout or get_bar_layout()) in (LAYOUT_BUCKET, LAYOUT_DUAL)
+
+
+def bucket_key(trade_date: str, period: str = "daily") -> str:
+    return str(trade_date)[:_BUCKET_KEY_LENGTH.get(period, _DEFAULT_BUCKET_KEY_LENGTH)]
+
+
+def bucket_filter(symbol: str, data_source: str, period: str, bucket: str) -> Dict[str, Any]:
+    return {"symbol": symbol, "data_source": data_source, "period": period, "bucket": bucket}
+
+
+def bucket_range_query(symbol: str, period: str = "daily", data_source: Optional[str] = None,
+                       start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    """覆盖 [start_date, end_date] 的桶查询条件"""
+    query: Dict[str, Any] = {"symbol": symbol, "period": period}
+    if data_source:
+        query["data_source"] = data_source
+    bucket_range: Dict[str, str] = {}
+    if start_date:
+        bucket_range["$gte"] = bucket_key(start_date, period)
+    if end_date:
+        bucket_range["$lte"] = bucket_key(end_date, period)
+    if bucket_range:
+        query["bucket"] = bucket_range
+    return query
+
+
+def group_by_bucket(docs: Iterable[Dict[str, Any]], period: str = "daily") -> Dict[str, List[Dict[str, Any]]]:
+    """按桶分组标准化后的单日文档"""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for doc in docs:
+        groups.setdefault(bucket_key(doc["trade_date"], period), []).append(doc)
+    return groups
+
+
+def merge_bucket(existing: Optional[Dict[str, Any]], docs: List[Dict[str, Any]], bucket: str) -> Dict[str, Any]:
+    """
+    将单日文档合并进桶（同一交易日以新文档为准），返回新的桶文档
+
+    Args:
+        existing: 库中已有的桶文档（没有时为 None）
+        docs: 属于该桶的标准化单日文档
+        bucket: 桶键
+    """
+    rows: Dict[str, Dict[str, Any]] = {}
+    if existing:
+        columns = existing.get("columns", {})
+        for i, trade_date in enumerate(existing.get("dates", [])):
+            rows[trade_date] = {name: values[i] for name, values in columns.items() if i < len(values)}
+    for doc in docs:
+        rows[doc["trade_date"]] = {
+            key: value for key, value in doc.items()
+            if key not in BUCKET_META_FIELDS and key not in _SKIPPED_FIELDS
+        }
+
+    dates = sorted(rows)
+    names = sorted({name for row in rows.values() for name in row})
+    first = docs[0] if docs else existing
+    bucket_doc = {field: first.get(field) for field in BUCKET_META_FIELDS if first.get(field) is not None}
+    bucket_doc.update({
+        "bucket": bucket,
+        "dates": dates,
+        "columns": {name: [rows[d].get(name) for d in dates] for name in names},
+        "count": len(dates),
+        "first_date": dates[0] if dates else None,
+        "last_date": dates[-1] if dates else None,
+    })
+    return bucket_doc
+
+
+def buckets_cover(frame: pd.DataFrame, first_date: Optional[str], last_date: Optional[str]) -> bool:
+    """
+    分桶读取结果是否覆盖单日文档在同一区间内的首末交易日（dual 模式下决定是否使用分桶）
+
+    Args:
+        frame: 分桶读取的 DataFrame
+        first_date/last_date: 单日文档在该区间内最早/最晚的交易日（没有文档时为 None）
+    """
+    if first_date is None:
+        return not frame.empty
+    if frame.empty:
+        return False
+    dates = frame["trade_date"]
+    return dates.iloc[0] <= first_date and dates.iloc[-1] >= last_date
+
+
+def changed_docs(existing: Optional[Dict[str, Any]], docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """桶内内容哈希不同（或尚不存在）的单日文档"""
+    if not existing:
+        return list(docs)
+    hashes = existing.get("columns", {}).get("content_hash", [])
+    stored = dict(zip(existing.get("dates", []), hashes))
+    return [doc for doc in docs if doc.get("content_hash") is None or stored.get(doc["trade_date"]) != doc["content_hash"]]
+
+
+def buckets_to_frame(buckets: Iterable[Dict[str, Any]], start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> pd.DataFrame:
+    """将桶文档拼接为按日期升序的 DataFrame（列与单日文档布局一致）"""
+    frames = []
+    for bucket in buckets:
+        dates = bucket.get("dates", [])
+        if not dates:
+            continue
+        frame = pd.DataFrame(bucket.get("columns", {}))
+        frame.insert(0, "trade_date", dates)
+        for field in BUCKET_META_FIELDS:
+            if field in bucket:
+                frame[field] = bucket[field]
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True)
+    if start_date:
+        df = df[df["trade_date"] >= start_date]
+    if end_date:
+        df = df[df["trade_date"] <= end_date]
+    df = df.drop(columns=["content_hash"], errors="ignore")
+    return df.sort_values("trade_date").reset_index(drop=True)
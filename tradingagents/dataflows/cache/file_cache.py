@@ -7,26 +7,54 @@
 import os
 import json
 import pickle
+import threading
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any, Union, List
+from typing import Optional, Dict, Any, Union, List, Tuple
 import hashlib
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .metadata_index import CacheMetadataIndex
+
+# 列式存储依赖（可选）
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = feather = pq = None
+    PYARROW_AVAILABLE = False
+
+# DataFrame 缓存文件格式：csv（兼容旧缓存）、parquet、feather（列式，保留dtype和索引）
+FRAME_FORMATS = ('csv', 'parquet', 'feather')
+COLUMNAR_FRAME_FORMATS = ('parquet', 'feather')
+DEFAULT_FRAME_FORMAT = os.getenv('TA_CACHE_FRAME_FORMAT', 'parquet').lower()
+
+# 日线规范序列（区间缓存）的元数据标识与有效期
+DAILY_SERIES_DATA_TYPE = 'daily_series'
+DAILY_SERIES_SOURCE = 'daily_series'
+DAILY_SERIES_TTL_HOURS = int(os.getenv('TA_DAILY_SERIES_TTL_HOURS', '168'))
+# 空结果区间（周末、节假日、停牌）不超过该天数时记为已覆盖，避免每次请求都重新获取
+DAILY_EMPTY_RANGE_MAX_DAYS = int(os.getenv('TA_DAILY_EMPTY_RANGE_MAX_DAYS', '15'))
+# 重叠K线收盘价的相对误差超过该值时视为复权基准已变化（如除权除息）
+DAILY_ADJUST_TOLERANCE = 1e-4
+
 
 class StockDataCache:
     """股票数据缓存管理器 - 支持美股和A股数据缓存优化"""
 
-    def __init__(self, cache_dir: str = None):
+    def __init__(self, cache_dir: str = None, frame_format: str = None):
         """
         初始化缓存管理器
 
         Args:
             cache_dir: 缓存目录路径，默认为 tradingagents/dataflows/data_cache
+            frame_format: DataFrame 存储格式（csv/parquet/feather），默认读取 TA_CACHE_FRAME_FORMAT
         """
         if cache_dir is None:
             # 获取当前文件所在目录
@@ -44,13 +72,23 @@ class StockDataCache:
         self.us_fundamentals_dir = self.cache_dir / "us_fundamentals"
         self.china_fundamentals_dir = self.cache_dir / "china_fundamentals"
         self.metadata_dir = self.cache_dir / "metadata"
+        self.indicator_state_dir = self.cache_dir / "indicator_state"
 
         # 创建所有目录
         for dir_path in [self.us_stock_dir, self.china_stock_dir, self.us_news_dir,
                         self.china_news_dir, self.us_fundamentals_dir,
-                        self.china_fundamentals_dir, self.metadata_dir]:
+                        self.china_fundamentals_dir, self.metadata_dir,
+                        self.indicator_state_dir]:
             dir_path.mkdir(exist_ok=True)
 
+        # 元数据索引（SQLite），查找/统计/清理不再遍历 *_meta.json
+        self.metadata_index = CacheMetadataIndex(self.metadata_dir)
+        if self.metadata_index.count() == 0 and next(self.metadata_dir.glob("*_meta.json"), None):
+            self.metadata_index.rebuild_from_files(self.metadata_dir)
+
+        # DataFrame 存储格式（列式格式需要 pyarrow，不可用时降级为 csv）
+        self.frame_format = self._resolve_frame_format(frame_format or DEFAULT_FRAME_FORMAT)
+
         # 缓存配置 - 针对不同市场设置不同的TTL
         self.cache_config = {
             'us_stock_data': {
@@ -96,6 +134,57 @@ class StockDataCache:
         logger.info(f"🗄️ 数据库缓存管理器初始化完成")
         logger.info(f"   美股数据: ✅ 已配置")
         logger.info(f"   A股数据: ✅ 已配置")
+        logger.info(f"   DataFrame格式: {self.frame_format}")
+
+    @staticmethod
+    def _resolve_frame_format(frame_format: str) -> str:
+        """校验 DataFrame 存储格式"""
+        frame_format = (frame_format or 'csv').lower()
+        if frame_format not in FRAME_FORMATS:
+            logger.warning(f"⚠️ 不支持的缓存格式 {frame_format}，使用 csv")
+            return 'csv'
+        if frame_format in COLUMNAR_FRAME_FORMATS and not PYARROW_AVAILABLE:
+            logger.warning(f"⚠️ pyarrow 未安装，{frame_format} 缓存不可用，使用 csv")
+            return 'csv'
+        return frame_format
+
+    def _write_frame(self, data: pd.DataFrame, cache_key: str, symbol: str,
+                     frame_format: str = None) -> Tuple[Path, str]:
+        """
+        按配置格式写入 DataFrame，列式格式写入失败时降级为 csv
+
+        Returns:
+            (文件路径, 实际使用的格式)
+        """
+        frame_format = frame_format or self.frame_format
+        if frame_format in COLUMNAR_FRAME_FORMATS:
+            cache_path = self._get_cache_path("stock_data", cache_key, frame_format, symbol)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                table = pa.Table.from_pandas(data, preserve_index=True)
+                if frame_format == 'parquet':
+                    pq.write_table(table, cache_path)
+                else:
+                    feather.write_feather(table, cache_path)
+                return cache_path, frame_format
+            except Exception as e:
+                # 混合类型的 object 列等无法转换为 Arrow，回退到 csv
+                logger.warning(f"⚠️ {frame_format} 写入失败，回退到 csv: {e}")
+                cache_path.unlink(missing_ok=True)
+
+        cache_path = self._get_cache_path("stock_data", cache_key, "csv", symbol)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        data.to_csv(cache_path, index=True)
+        return cache_path, 'csv'
+
+    @staticmethod
+    def _read_frame(cache_path: Path, frame_format: str) -> pd.DataFrame:
+        """读取 DataFrame 缓存文件（列式格式使用内存映射）"""
+        if frame_format == 'parquet':
+            return pq.read_table(cache_path, memory_map=True).to_pandas()
+        if frame_format == 'feather':
+            return feather.read_table(cache_path, memory_map=True).to_pandas()
+        return pd.read_csv(cache_path, index_col=0)
 
     def _determine_market_type(self, symbol: str) -> str:
         """根据股票代码确定市场类型"""
@@ -213,12 +302,25 @@ class StockDataCache:
         metadata_path = self._get_metadata_path(cache_key)
         metadata_path.parent.mkdir(parents=True, exist_ok=True)  # 确保目录存在
         metadata['cached_at'] = datetime.now().isoformat()
+
+        data_file = Path(metadata.get('file_path', ''))
+        if data_file.is_file():
+            metadata['file_size'] = data_file.stat().st_size
         
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        self.metadata_index.upsert(cache_key, metadata)
     
     def _load_metadata(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """加载元数据"""
+        """加载元数据（优先读取索引，索引缺失时回退到 JSON 文件）"""
+        metadata = self.metadata_index.get(cache_key)
+        if metadata:
+            return metadata
+        return self._load_metadata_file(cache_key)
+
+    def _load_metadata_file(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """从 JSON 文件加载元数据"""
         metadata_path = self._get_metadata_path(cache_key)
         if not metadata_path.exists():
             return None
@@ -302,10 +404,9 @@ class StockDataCache:
 
         # 保存数据
         if isinstance(data, pd.DataFrame):
-            cache_path = self._get_cache_path("stock_data", cache_key, "csv", symbol)
-            cache_path.parent.mkdir(parents=True, exist_ok=True)  # 确保目录存在
-            data.to_csv(cache_path, index=True)
+            cache_path, file_format = self._write_frame(data, cache_key, symbol)
         else:
+            file_format = 'txt'
             cache_path = self._get_cache_path("stock_data", cache_key, "txt", symbol)
             cache_path.parent.mkdir(parents=True, exist_ok=True)  # 确保目录存在
             with open(cache_path, 'w', encoding='utf-8') as f:
@@ -320,7 +421,7 @@ class StockDataCache:
             'end_date': end_date,
             'data_source': data_source,
             'file_path': str(cache_path),
-            'file_format': 'csv' if isinstance(data, pd.DataFrame) else 'txt',
+            'file_format': file_format,
             'content_length': len(content_to_check)
         }
         self._save_metadata(cache_key, metadata)
@@ -342,8 +443,8 @@ class StockDataCache:
             return None
         
         try:
-            if metadata['file_format'] == 'csv':
-                return pd.read_csv(cache_path, index_col=0)
+            if metadata['file_format'] in FRAME_FORMATS:
+                return self._read_frame(cache_path, metadata['file_format'])
             else:
                 with open(cache_path, 'r', encoding='utf-8') as f:
                     return f.read()
@@ -387,29 +488,271 @@ class StockDataCache:
             logger.info(f"🎯 找到精确匹配的{desc}: {symbol} -> {search_key}")
             return search_key
 
-        # 如果没有精确匹配，查找部分匹配（相同股票代码的其他缓存）
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'stock_data' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'stock_data'):
-                        desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
-                        logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        # 如果没有精确匹配，通过索引查找部分匹配（相同股票代码的其他未过期缓存）
+        min_cached_at = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+        candidates = self.metadata_index.find(symbol, 'stock_data', market_type,
+                                              data_source, min_cached_at)
+        if candidates:
+            cache_key = candidates[0]['cache_key']
+            desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
+            logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
+            return cache_key
 
         desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol}")
         return None
-    
+
+    # ==================== 日线区间缓存 ====================
+    # 每只股票维护一条按日期排序的规范日线序列，元数据中的 start_date/end_date 记录已覆盖的区间。
+    # 请求区间被覆盖时直接切片返回；部分覆盖时只需补齐缺失的头部/尾部并合并回序列。
+    # 补齐的区间与已有序列重叠一根K线：数据源变化或重叠K线价格不一致（复权基准变化）时重建序列。
+    # TTL 从序列创建时起算（series_created_at），合并新数据不会延长序列寿命。
+
+    def _get_daily_series_key(self, symbol: str) -> str:
+        """生成日线规范序列的缓存键（与日期无关，每只股票一条）"""
+        market_type = self._determine_market_type(symbol)
+        return self._generate_cache_key("stock_data", symbol,
+                                        source=DAILY_SERIES_SOURCE,
+                                        market=market_type)
+
+    def load_daily_series(self, symbol: str, max_age_hours: int = None) -> Optional[Dict[str, Any]]:
+        """
+        加载日线规范序列
+
+        Args:
+            symbol: 股票代码
+            max_age_hours: 序列最大有效时间（小时），None时使用 daily_series_ttl_hours 配置
+
+        Returns:
+            {'data': DataFrame, 'start_date': str, 'end_date': str}，不存在或已过期返回None
+        """
+        if max_age_hours is None:
+            max_age_hours = DAILY_SERIES_TTL_HOURS
+
+        cache_key = self._get_daily_series_key(symbol)
+        # series_source/series_created_at 不在索引列中，读取 JSON 元数据文件
+        metadata = self._load_metadata_file(cache_key) or self._load_metadata(cache_key)
+        if not metadata:
+            return None
+        try:
+            created_at = datetime.fromisoformat(metadata.get('series_created_at') or metadata['cached_at'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if (datetime.now() - created_at).total_seconds() >= max_age_hours * 3600:
+            logger.info(f"⏰ 日线区间缓存已过期: {symbol} (创建于 {created_at:%Y-%m-%d %H:%M})")
+            return None
+
+        data = self.load_stock_data(cache_key)
+        if not isinstance(data, pd.DataFrame) or data.empty or 'date' not in data.columns:
+            return None
+
+        data['date'] = pd.to_datetime(data['date'])
+        return {
+            'data': data,
+            'start_date': metadata.get('start_date'),
+            'end_date': metadata.get('end_date'),
+            'source': metadata.get('series_source'),
+            'created_at': created_at.isoformat(),
+        }
+
+    def find_stock_data_range(self, symbol: str, start_date: str, end_date: str,
+                              max_age_hours: int = None) -> Tuple[Optional[pd.DataFrame], List[Tuple[str, str]]]:
+        """
+        按日期区间查找日线缓存
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            max_age_hours: 序列最大有效时间（小时）
+
+        Returns:
+            (缓存切片, 缺失区间列表)：
+            - 完全覆盖时缺失区间为空列表
+            - 部分覆盖时返回已有切片及需要补齐的 (start, end) 区间
+            - 无缓存时返回 (None, [(start_date, end_date)])
+        """
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize()
+
+        series = self.load_daily_series(symbol, max_age_hours)
+        if series is None or not series['start_date'] or not series['end_date']:
+            return None, [(start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))]
+
+        covered_start = pd.Timestamp(series['start_date'])
+        covered_end = pd.Timestamp(series['end_date'])
+        data = series['data']
+        covered_dates = data.loc[(data['date'] >= covered_start) & (data['date'] <= covered_end), 'date']
+
+        # 缺失的头部/尾部：从已覆盖区间的边界K线开始补齐（重叠一根K线，用于校验复权基准），保证序列连续
+        missing = []
+        if start < covered_start:
+            head_end = covered_dates.min() if not covered_dates.empty else covered_start - pd.Timedelta(days=1)
+            missing.append((start.strftime('%Y-%m-%d'), head_end.strftime('%Y-%m-%d')))
+        if end > covered_end:
+            tail_start = covered_dates.max() if not covered_dates.empty else covered_end + pd.Timedelta(days=1)
+            missing.append((tail_start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')))
+
+        sliced = data[(data['date'] >= start) & (data['date'] <= end)].reset_index(drop=True)
+
+        if missing:
+            logger.info(f"🧩 日线区间缓存部分命中: {symbol} 已覆盖 {series['start_date']}~{series['end_date']}, 缺失 {missing}")
+        else:
+            logger.info(f"🎯 日线区间缓存命中: {symbol} {start.date()}~{end.date()} ({len(sliced)}条)")
+        return sliced, missing
+
+    def merge_stock_data_range(self, symbol: str, data: pd.DataFrame,
+                               start_date: str, end_date: str,
+                               source: str = None) -> Optional[pd.DataFrame]:
+        """
+        将新获取的日线数据合并到规范序列，并扩展已覆盖区间
+
+        Args:
+            symbol: 股票代码
+            data: 新获取的日线数据（需包含 date 列）；空数据表示该区间没有K线
+            start_date: 本次获取的开始日期
+            end_date: 本次获取的结束日期
+            source: 数据来源；与序列的来源不同时重建序列（不同数据源的复权基准可能不同）
+
+        Returns:
+            合并后的完整序列，数据无效时返回None
+        """
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize()
+
+        # 当日数据可能仍在交易中，不计入已覆盖区间，下次请求时重新获取
+        today = pd.Timestamp.now().normalize()
+        if end >= today:
+            end = today - pd.Timedelta(days=1)
+
+        series = self.load_daily_series(symbol)
+        if data is None or data.empty:
+            return self._extend_empty_range(symbol, series, start, end)
+        if 'date' not in data.columns:
+            return None
+
+        incoming = data.copy()
+        incoming['date'] = pd.to_datetime(incoming['date'])
+        created_at = None
+
+        if series is not None:
+            covered_start = pd.Timestamp(series['start_date'])
+            covered_end = pd.Timestamp(series['end_date'])
+            # 只有与已覆盖区间相连、来源相同且重叠K线一致时才合并，否则以新数据重建序列，避免出现空洞或复权基准混杂
+            if not (start <= covered_end + pd.Timedelta(days=1) and end >= covered_start - pd.Timedelta(days=1)):
+                logger.debug(f"日线区间缓存: {symbol} 新区间与已覆盖区间不相连，重建序列")
+            elif (source or None) != (series.get('source') or None):
+                logger.info(f"🔄 日线区间缓存数据源变化: {symbol} {series.get('source')} -> {source}，重建序列")
+            elif not self._overlap_consistent(series['data'], incoming, covered_start, covered_end):
+                logger.info(f"🔄 日线区间缓存复权基准变化（重叠K线价格不一致）: {symbol}，重建序列")
+            else:
+                incoming = pd.concat([series['data'], incoming], ignore_index=True)
+                start = min(start, covered_start)
+                end = max(end, covered_end)
+                created_at = series['created_at']
+
+        merged = (incoming.drop_duplicates(subset='date', keep='last')
+                  .sort_values('date')
+                  .reset_index(drop=True))
+
+        if end < start:
+            return merged
+
+        self._write_daily_series(symbol, merged, start, end, source, created_at)
+        logger.info(f"💾 日线区间缓存已更新: {symbol} {start.date()}~{end.date()} ({len(merged)}条)")
+        return merged
+
+    @staticmethod
+    def _overlap_consistent(existing: pd.DataFrame, incoming: pd.DataFrame,
+                            covered_start: pd.Timestamp, covered_end: pd.Timestamp) -> bool:
+        """比较已覆盖区间内重叠K线的收盘价（当日未收盘的K线不参与比较）"""
+        if 'close' not in existing.columns or 'close' not in incoming.columns:
+            return True
+        old = existing[(existing['date'] >= covered_start) & (existing['date'] <= covered_end)]
+        both = old[['date', 'close']].merge(incoming[['date', 'close']], on='date', suffixes=('_old', '_new'))
+        if both.empty:
+            return True
+        old_close = pd.to_numeric(both['close_old'], errors='coerce')
+        new_close = pd.to_numeric(both['close_new'], errors='coerce')
+        diff = ((old_close - new_close).abs() / old_close.abs().clip(lower=1e-9)).fillna(0)
+        return bool((diff <= DAILY_ADJUST_TOLERANCE).all())
+
+    def _extend_empty_range(self, symbol: str, series: Optional[Dict[str, Any]],
+                            start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """没有K线的区间（周末、节假日、停牌）与已有序列相连时记为已覆盖"""
+        if series is None or end < start:
+            return None
+        if (end - start).days + 1 > DAILY_EMPTY_RANGE_MAX_DAYS:
+            # 较长的空区间也可能是数据源暂时不可用，不记为已覆盖
+            return None
+        covered_start = pd.Timestamp(series['start_date'])
+        covered_end = pd.Timestamp(series['end_date'])
+        if start > covered_end + pd.Timedelta(days=1) or end < covered_start - pd.Timedelta(days=1):
+            return None
+        new_start, new_end = min(start, covered_start), max(end, covered_end)
+        if (new_start, new_end) == (covered_start, covered_end):
+            return series['data']
+        self._write_daily_series(symbol, series['data'], new_start, new_end,
+                                 series.get('source'), series['created_at'])
+        logger.info(f"📭 日线区间无K线，记为已覆盖: {symbol} {start.date()}~{end.date()}")
+        return series['data']
+
+    def _write_daily_series(self, symbol: str, data: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp,
+                            source: Optional[str], created_at: Optional[str]):
+        cache_key = self._get_daily_series_key(symbol)
+        previous = self._load_metadata(cache_key)
+        cache_path, file_format = self._write_frame(data, cache_key, symbol)
+        if previous and previous.get('file_path') and Path(previous['file_path']) != cache_path:
+            # 存储格式变化时删除旧文件
+            Path(previous['file_path']).unlink(missing_ok=True)
+
+        self._save_metadata(cache_key, {
+            'symbol': symbol,
+            'data_type': DAILY_SERIES_DATA_TYPE,
+            'market_type': self._determine_market_type(symbol),
+            'start_date': start.strftime('%Y-%m-%d'),
+            'end_date': end.strftime('%Y-%m-%d'),
+            'data_source': DAILY_SERIES_SOURCE,
+            'series_source': source,
+            # cached_at 为最后一次合并时间；TTL 按创建时间计算
+            'series_created_at': created_at or datetime.now().isoformat(),
+            'file_path': str(cache_path),
+            'file_format': file_format,
+            'content_length': len(data),
+        })
+
+    # ==================== 增量技术指标状态 ====================
+    # 每只股票一个 JSON 文件，与日线缓存放在同一缓存目录下，
+    # 追加新K线时由 IndicatorState 续算，无需全量重算指标。
+
+    def _get_indicator_state_path(self, symbol: str) -> Path:
+        safe_symbol = "".join(c if c.isalnum() or c in "._-" else "_" for c in str(symbol))
+        return self.indicator_state_dir / f"{safe_symbol}.json"
+
+    def load_indicator_state(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """加载指标状态，不存在或损坏时返回None"""
+        path = self._get_indicator_state_path(symbol)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ 指标状态读取失败: {symbol} - {e}")
+            return None
+
+    def save_indicator_state(self, symbol: str, state: Dict[str, Any]):
+        """保存指标状态（先写临时文件再替换，避免并发读到半个文件）"""
+        path = self._get_indicator_state_path(symbol)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning(f"⚠️ 指标状态保存失败: {symbol} - {e}")
+
     def save_news_data(self, symbol: str, news_data: str, 
                       start_date: str = None, end_date: str = None,
                       data_source: str = "unknown") -> str:
@@ -528,24 +871,15 @@ class StockDataCache:
             cache_type = f"{market_type}_fundamentals"
             max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
         
-        # 查找匹配的缓存
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'fundamentals' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-                    
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'fundamentals'):
-                        desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
-                        logger.info(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        # 通过索引查找匹配且未过期的缓存
+        min_cached_at = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+        candidates = self.metadata_index.find(symbol, 'fundamentals', market_type,
+                                              data_source, min_cached_at)
+        if candidates:
+            cache_key = candidates[0]['cache_key']
+            desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
+            logger.info(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
+            return cache_key
         
         desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol} ({data_source})")
@@ -554,28 +888,27 @@ class StockDataCache:
     def clear_old_cache(self, max_age_days: int = 7):
         """清理过期缓存"""
         cutoff_time = datetime.now() - timedelta(days=max_age_days)
-        cleared_count = 0
+        cleared_keys = []
         
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
+        for metadata in self.metadata_index.find_older_than(cutoff_time):
             try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
+                # 删除数据文件
+                data_file = Path(metadata['file_path'] or '')
+                if data_file.is_file():
+                    data_file.unlink()
                 
-                cached_at = datetime.fromisoformat(metadata['cached_at'])
-                if cached_at < cutoff_time:
-                    # 删除数据文件
-                    data_file = Path(metadata['file_path'])
-                    if data_file.exists():
-                        data_file.unlink()
-                    
-                    # 删除元数据文件
-                    metadata_file.unlink()
-                    cleared_count += 1
+                # 删除元数据文件
+                self._get_metadata_path(metadata['cache_key']).unlink(missing_ok=True)
+                cleared_keys.append(metadata['cache_key'])
                     
             except Exception as e:
                 logger.warning(f"⚠️ 清理缓存时出错: {e}")
+
+        self.metadata_index.delete(cleared_keys)
+        cleared_count = len(cleared_keys)
         
         logger.info(f"🧹 已清理 {cleared_count} 个过期缓存文件")
+        return cleared_count
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
@@ -591,35 +924,22 @@ class StockDataCache:
 
         total_size_bytes = 0
 
-        # 统计有元数据的缓存文件
+        # 统计有元数据的缓存文件（从索引聚合，文件大小在写入时记录）
         metadata_files_count = 0
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                data_type = metadata.get('data_type', 'unknown')
-                if data_type == 'stock_data':
-                    stats['stock_data_count'] += 1
-                elif data_type == 'news':
-                    stats['news_count'] += 1
-                elif data_type == 'fundamentals':
-                    stats['fundamentals_count'] += 1
-
-                # 检查是否为跳过的缓存（没有实际文件）
-                data_file = Path(metadata.get('file_path', ''))
-                if not data_file.exists():
-                    stats['skipped_count'] += 1
-                else:
-                    # 计算文件大小（字节）
-                    file_size = data_file.stat().st_size
-                    total_size_bytes += file_size
+        for data_type, type_stats in self.metadata_index.stats().items():
+            if data_type in ('stock_data', DAILY_SERIES_DATA_TYPE):
+                stats['stock_data_count'] += type_stats['count']
+            elif data_type == 'news':
+                stats['news_count'] += type_stats['count']
+            elif data_type == 'fundamentals':
+                stats['fundamentals_count'] += type_stats['count']
 
-                stats['total_files'] += 1
-                metadata_files_count += 1
+            # 没有记录文件大小的条目视为跳过的缓存（没有实际文件）
+            stats['skipped_count'] += type_stats['missing']
+            total_size_bytes += type_stats['size']
 
-            except Exception:
-                continue
+            stats['total_files'] += type_stats['count']
+            metadata_files_count += type_stats['count']
 
         # 如果没有元数据文件，则直接统计缓存目录中的文件（兼容旧缓存）
         if metadata_files_count == 0:
@@ -656,6 +976,57 @@ class StockDataCache:
         stats['total_size_mb'] = round(total_size_bytes / (1024 * 1024), 2)  # MB
         return stats
 
+    def migrate_csv_frames(self, target_format: str = None) -> int:
+        """
+        将现有 csv 格式的 DataFrame 缓存一次性迁移为列式格式
+
+        迁移保留原缓存时间，不影响TTL判断；单条迁移失败时保留原 csv 文件。
+
+        Args:
+            target_format: 目标格式（parquet/feather），默认使用当前配置的格式
+
+        Returns:
+            成功迁移的条目数
+        """
+        target_format = self._resolve_frame_format(target_format or self.frame_format)
+        if target_format not in COLUMNAR_FRAME_FORMATS:
+            logger.warning(f"⚠️ 目标格式 {target_format} 不是列式格式，跳过迁移")
+            return 0
+
+        migrated = 0
+        for entry in self.metadata_index.find_by_format('csv'):
+            cache_key = entry['cache_key']
+            csv_path = Path(entry['file_path'] or '')
+            if not csv_path.is_file():
+                continue
+
+            try:
+                data = pd.read_csv(csv_path, index_col=0)
+                if 'date' in data.columns:
+                    data['date'] = pd.to_datetime(data['date'])
+                cache_path, file_format = self._write_frame(data, cache_key, entry['symbol'], target_format)
+                if file_format != target_format:
+                    continue
+
+                metadata = self._load_metadata_file(cache_key) or dict(entry)
+                metadata.pop('cache_key', None)
+                metadata.update({
+                    'file_path': str(cache_path),
+                    'file_format': file_format,
+                    'file_size': cache_path.stat().st_size,
+                })
+                with open(self._get_metadata_path(cache_key), 'w', encoding='utf-8') as f:
+                    json.dump(metadata, f, ensure_ascii=False, indent=2)
+                self.metadata_index.upsert(cache_key, metadata)
+
+                csv_path.unlink()
+                migrated += 1
+            except Exception as e:
+                logger.warning(f"⚠️ 迁移缓存失败 {cache_key}: {e}")
+
+        logger.info(f"📦 已将 {migrated} 个 csv 缓存迁移为 {target_format}")
+        return migrated
+
     def get_content_length_config_status(self) -> Dict[str, Any]:
         """获取内容长度配置状态"""
         available_providers = self._check_provider_availability()
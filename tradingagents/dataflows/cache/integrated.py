@@ -8,7 +8,7 @@
 import os
 import logging
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 import pandas as pd
 
 # 导入统一日志系统
@@ -30,11 +30,19 @@ except ImportError as e:
 class IntegratedCacheManager:
     """集成缓存管理器 - 智能选择缓存策略"""
     
-    def __init__(self, cache_dir: str = None):
+    def __init__(self, cache_dir: str = None, frame_format: str = None):
+        """
+        初始化集成缓存管理器
+
+        Args:
+            cache_dir: 缓存目录
+            frame_format: 文件缓存中 DataFrame 的存储格式（csv/parquet/feather），
+                          默认读取 TA_CACHE_FRAME_FORMAT 环境变量（parquet）
+        """
         self.logger = setup_dataflow_logging()
         
         # 初始化原有缓存系统（作为备用）
-        self.legacy_cache = StockDataCache(cache_dir)
+        self.legacy_cache = StockDataCache(cache_dir, frame_format=frame_format)
         
         # 尝试初始化自适应缓存系统
         self.adaptive_cache = None
@@ -154,6 +162,49 @@ class IntegratedCacheManager:
                 data_source=data_source
             )
     
+    def find_stock_data_range(self, symbol: str, start_date: str, end_date: str,
+                              max_age_hours: int = None) -> Tuple[Optional[pd.DataFrame], List[Tuple[str, str]]]:
+        """
+        按日期区间查找日线缓存（覆盖则切片，部分覆盖则返回缺失区间）
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            max_age_hours: 序列最大有效时间（小时）
+
+        Returns:
+            (缓存切片或None, 缺失的 (start, end) 区间列表)
+        """
+        # 自适应缓存按完整键存储，不支持区间查找，统一使用文件缓存中的规范序列
+        return self.legacy_cache.find_stock_data_range(symbol, start_date, end_date, max_age_hours)
+
+    def merge_stock_data_range(self, symbol: str, data: pd.DataFrame,
+                               start_date: str, end_date: str,
+                               source: str = None) -> Optional[pd.DataFrame]:
+        """
+        将新获取的日线数据合并到该股票的规范序列
+
+        Args:
+            symbol: 股票代码
+            data: 日线数据（需包含 date 列）
+            start_date: 本次获取的开始日期
+            end_date: 本次获取的结束日期
+            source: 数据来源（来源变化时重建序列）
+
+        Returns:
+            合并后的完整序列
+        """
+        return self.legacy_cache.merge_stock_data_range(symbol, data, start_date, end_date, source)
+
+    def load_indicator_state(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """加载该股票的增量技术指标状态"""
+        return self.legacy_cache.load_indicator_state(symbol)
+
+    def save_indicator_state(self, symbol: str, state: Dict[str, Any]):
+        """保存该股票的增量技术指标状态（与日线缓存同目录）"""
+        self.legacy_cache.save_indicator_state(symbol, state)
+
     def save_news_data(self, symbol: str, data: Any, data_source: str = "default") -> str:
         """保存新闻数据"""
         if self.use_adaptive:
@@ -336,6 +387,10 @@ class IntegratedCacheManager:
         self.logger.info(f"🧹 总共清理了 {cleared_count} 条缓存记录")
         return cleared_count
     
+    def migrate_csv_frames(self, target_format: str = None) -> int:
+        """将文件缓存中现有的 csv DataFrame 迁移为列式格式，返回迁移条目数"""
+        return self.legacy_cache.migrate_csv_frames(target_format)
+
     def get_cache_backend_info(self) -> Dict[str, Any]:
         """获取缓存后端信息"""
         if self.use_adaptive:
@@ -343,6 +398,7 @@ class IntegratedCacheManager:
                 "system": "adaptive",
                 "primary_backend": self.adaptive_cache.primary_backend,
                 "fallback_enabled": self.adaptive_cache.fallback_enabled,
+                "frame_format": self.legacy_cache.frame_format,
                 "mongodb_available": self.db_manager.is_mongodb_available(),
                 "redis_available": self.db_manager.is_redis_available()
             }
@@ -350,6 +406,7 @@ class IntegratedCacheManager:
             return {
                 "system": "legacy",
                 "primary_backend": "file",
+                "frame_format": self.legacy_cache.frame_format,
                 "fallback_enabled": False,
                 "mongodb_available": False,
                 "redis_available": False
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+缓存元数据索引
+使用单个 SQLite 文件保存文件缓存的元数据，避免每次未命中都遍历并解析全部 *_meta.json
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 索引表中保存的元数据字段（其余字段仍保留在 JSON 元数据文件中）
+_INDEX_COLUMNS = (
+    'cache_key', 'symbol', 'data_type', 'market_type', 'data_source',
+    'start_date', 'end_date', 'file_path', 'file_format',
+    'content_length', 'file_size', 'cached_at',
+)
+
+
+class CacheMetadataIndex:
+    """基于 SQLite 的缓存元数据索引
+
+    以 (symbol, data_type, market_type, data_source) 建立复合索引，
+    精确查找、部分匹配、统计与过期清理都通过索引完成，不再读取逐条 JSON 文件。
+    """
+
+    INDEX_FILENAME = "metadata_index.sqlite3"
+
+    def __init__(self, index_dir: Path):
+        self.index_path = Path(index_dir) / self.INDEX_FILENAME
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 同一进程内多个线程共享连接，由锁串行化访问
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_schema()
+
+    def _init_schema(self):
+        """创建表结构与索引"""
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_metadata (
+                    cache_key      TEXT PRIMARY KEY,
+                    symbol         TEXT,
+                    data_type      TEXT,
+                    market_type    TEXT,
+                    data_source    TEXT,
+                    start_date     TEXT,
+                    end_date       TEXT,
+                    file_path      TEXT,
+                    file_format    TEXT,
+                    content_length INTEGER,
+                    file_size      INTEGER,
+                    cached_at      TEXT
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_lookup "
+                "ON cache_metadata (symbol, data_type, market_type, data_source, cached_at)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_cached_at ON cache_metadata (cached_at)"
+            )
+
+    @staticmethod
+    def _to_row(cache_key: str, metadata: Dict[str, Any]) -> tuple:
+        """将元数据字典转换为表行"""
+        return (
+            cache_key,
+            metadata.get('symbol'),
+            metadata.get('data_type'),
+            metadata.get('market_type'),
+            metadata.get('data_source'),
+            metadata.get('start_date'),
+            metadata.get('end_date'),
+            metadata.get('file_path'),
+            metadata.get('file_format'),
+            metadata.get('content_length'),
+            metadata.get('file_size'),
+            metadata.get('cached_at'),
+        )
+
+    def upsert(self, cache_key: str, metadata: Dict[str, Any]):
+        """写入或更新一条元数据"""
+        placeholders = ", ".join("?" for _ in _INDEX_COLUMNS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO cache_metadata ({', '.join(_INDEX_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                self._to_row(cache_key, metadata),
+            )
+
+    def upsert_many(self, items: Iterable[tuple]):
+        """批量写入元数据，items 为 (cache_key, metadata) 序列"""
+        placeholders = ", ".join("?" for _ in _INDEX_COLUMNS)
+        rows = [self._to_row(cache_key, metadata) for cache_key, metadata in items]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO cache_metadata ({', '.join(_INDEX_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                rows,
+            )
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """按缓存键获取元数据"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM cache_metadata WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def delete(self, cache_keys: Iterable[str]):
+        """删除元数据"""
+        keys = [(key,) for key in cache_keys]
+        if not keys:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM cache_metadata WHERE cache_key = ?", keys)
+
+    def find(self, symbol: str, data_type: str, market_type: str = None,
+             data_source: str = None, min_cached_at: str = None) -> List[Dict[str, Any]]:
+        """
+        查找匹配的缓存元数据（按缓存时间倒序）
+
+        Args:
+            symbol: 股票代码
+            data_type: 数据类型（stock_data/news/fundamentals）
+            market_type: 市场类型，None 表示不限
+            data_source: 数据源，None 表示不限
+            min_cached_at: 最早缓存时间（ISO 格式），用于在索引层过滤过期条目
+
+        Returns:
+            元数据字典列表
+        """
+        sql = "SELECT * FROM cache_metadata WHERE symbol = ? AND data_type = ?"
+        params: List[Any] = [symbol, data_type]
+        if market_type is not None:
+            sql += " AND market_type = ?"
+            params.append(market_type)
+        if data_source is not None:
+            sql += " AND data_source = ?"
+            params.append(data_source)
+        if min_cached_at is not None:
+            sql += " AND cached_at >= ?"
+            params.append(min_cached_at)
+        sql += " ORDER BY cached_at DESC"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_older_than(self, cutoff: datetime) -> List[Dict[str, Any]]:
+        """查找缓存时间早于 cutoff 的条目"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cache_key, file_path FROM cache_metadata WHERE cached_at < ?",
+                (cutoff.isoformat(),),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_by_format(self, file_format: str) -> List[Dict[str, Any]]:
+        """查找指定文件格式的全部条目"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM cache_metadata WHERE file_format = ?", (file_format,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """按数据类型聚合条目数与文件大小"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data_type, COUNT(*) AS cnt, "
+                "COALESCE(SUM(file_size), 0) AS size, "
+                "SUM(CASE WHEN file_size IS NULL THEN 1 ELSE 0 END) AS missing "
+                "FROM cache_metadata GROUP BY data_type"
+            ).fetchall()
+        return {
+            row['data_type']: {
+                'count': row['cnt'],
+                'size': row['size'],
+                'missing': row['missing'],
+            }
+            for row in rows
+        }
+
+    def count(self) -> int:
+        """索引中的条目总数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_metadata").fetchone()[0]
+
+    def rebuild_from_files(self, metadata_dir: Path) -> int:
+        """
+        从现有的 *_meta.json 文件重建索引（一次性迁移旧缓存）
+
+        Returns:
+            导入的条目数
+        """
+        items = []
+        for metadata_file in Path(metadata_dir).glob("*_meta.json"):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except Exception:
+                continue
+
+            data_file = Path(metadata.get('file_path', ''))
+            if 'file_size' not in metadata and data_file.is_file():
+                metadata['file_size'] = data_file.stat().st_size
+
+            cache_key = metadata_file.stem.replace('_meta', '')
+            items.append((cache_key, metadata))
+
+        self.upsert_many(items)
+        if items:
+            logger.info(f"🗂️ 缓存元数据索引已重建: {len(items)} 条")
+        return len(items)
@@ -14,6 +14,15 @@ logger = get_logger('agents')
 
 # 导入配置
 from tradingagents.config.runtime_settings import use_app_cache_enabled
+from tradingagents.dataflows.cache.bar_buckets import (
+    BUCKET_COLLECTION,
+    LAYOUT_DOCUMENT,
+    bucket_range_query,
+    buckets_cover,
+    buckets_to_frame,
+    get_bar_layout,
+    writes_documents,
+)
 
 class MongoDBCacheAdapter:
     """MongoDB 缓存适配器（从 app 的 MongoDB 读取同步数据）"""
@@ -181,8 +190,22 @@ class MongoDBCacheAdapter:
             # 获取数据源优先级
             priority_order = self._get_data_source_priority(symbol)
 
+            layout = get_bar_layout()
+
             # 按优先级查询
             for data_source in priority_order:
+                # 分桶布局：按桶读取并直接拼接为 DataFrame
+                if layout != LAYOUT_DOCUMENT:
+                    df = self._get_bucketed_history(code6, data_source, start_date, end_date, period)
+                    # 双写迁移期分桶可能尚未回填：只有覆盖单日文档的首末交易日时才使用分桶
+                    if not df.empty and (not writes_documents(layout) or self._buckets_cover_documents(
+                            df, collection, code6, data_source, start_date, end_date, period)):
+                        logger.info(f"✅ [数据来源: MongoDB-{data_source}(分桶)] {symbol}, {len(df)}条记录 (period={period})")
+                        return df
+                    if not writes_documents(layout):
+                        logger.debug(f"⚠️ [MongoDB-{data_source}] 分桶中未找到{period}数据: {symbol}")
+                        continue
+
                 # 构建查询条件
                 query = {
                     "symbol": code6,
@@ -218,6 +241,33 @@ class MongoDBCacheAdapter:
             logger.warning(f"⚠️ 获取历史数据失败: {e}")
             return None
     
+    @staticmethod
+    def _buckets_cover_documents(frame: pd.DataFrame, collection, code6: str, data_source: str,
+                                 start_date: str = None, end_date: str = None, period: str = "daily") -> bool:
+        query = {"symbol": code6, "period": period, "data_source": data_source}
+        date_filter = {}
+        if start_date:
+            date_filter["$gte"] = start_date
+        if end_date:
+            date_filter["$lte"] = end_date
+        if date_filter:
+            query["trade_date"] = date_filter
+        projection = {"_id": 0, "trade_date": 1}
+        first = collection.find_one(query, projection, sort=[("trade_date", 1)])
+        if first is None:
+            return True
+        last = collection.find_one(query, projection, sort=[("trade_date", -1)])
+        return buckets_cover(frame, first["trade_date"], last["trade_date"])
+
+    def _get_bucketed_history(self, code6: str, data_source: str, start_date: str = None,
+                              end_date: str = None, period: str = "daily") -> pd.DataFrame:
+        """从K线分桶集合读取区间数据"""
+        cursor = self.db[BUCKET_COLLECTION].find(
+            bucket_range_query(code6, period, data_source, start_date, end_date),
+            {"_id": 0}
+        ).sort("bucket", 1)
+        return buckets_to_frame(cursor, start_date, end_date)
+
     def get_financial_data(self, symbol: str, report_period: str = None) -> Optional[Dict[str, Any]]:
         """获取财务数据，按数据源优先级查询"""
         if not self.use_app_cache or self.db is None:
@@ -6,7 +6,7 @@
 
 import os
 import time
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
 import warnings
 import pandas as pd
@@ -23,6 +23,11 @@ logger = setup_dataflow_logging()
 
 # 导入统一数据源编码
 from tradingagents.constants import DataSourceCode
+from tradingagents.dataflows.source_executor import get_source_executor
+from tradingagents.config.datasource_snapshot import get_datasource_config_snapshot
+
+# 数据源故障类结果的标记（计入熔断）；其余无效结果视为该股票没有数据
+_SOURCE_FAILURE_MARKERS = ("失败", "不可用", "超时", "异常", "timeout", "Timeout", "timed out", "Connection")
 
 
 class ChinaDataSource(Enum):
@@ -102,19 +107,11 @@ class DataSourceManager:
         market_category = self._identify_market_category(symbol)
 
         try:
-            # 🔥 从数据库读取数据源配置（使用同步客户端）
-            from app.core.database import get_mongo_db_sync
-            db = get_mongo_db_sync()
-            config_collection = db.system_configs
-
-            # 获取最新的激活配置
-            config_data = config_collection.find_one(
-                {"is_active": True},
-                sort=[("version", -1)]
-            )
+            # 🔥 从进程内配置快照读取（最新激活配置，配置变更后失效）
+            snapshot = get_datasource_config_snapshot()
 
-            if config_data and config_data.get('data_source_configs'):
-                data_source_configs = config_data.get('data_source_configs', [])
+            if snapshot.data_source_configs:
+                data_source_configs = snapshot.data_source_configs
 
                 # 🔥 过滤出启用的数据源，并按市场分类过滤
                 enabled_sources = []
@@ -415,24 +412,11 @@ class DataSourceManager:
         # 🔥 从数据库读取数据源配置，获取启用状态
         enabled_sources_in_db = set()
         try:
-            from app.core.database import get_mongo_db_sync
-            db = get_mongo_db_sync()
-            config_collection = db.system_configs
-
-            # 获取最新的激活配置
-            config_data = config_collection.find_one(
-                {"is_active": True},
-                sort=[("version", -1)]
-            )
-
-            if config_data and config_data.get('data_source_configs'):
-                data_source_configs = config_data.get('data_source_configs', [])
+            snapshot = get_datasource_config_snapshot()
 
+            if snapshot.data_source_configs:
                 # 提取已启用的数据源类型
-                for ds in data_source_configs:
-                    if ds.get('enabled', True):
-                        ds_type = ds.get('type', '').lower()
-                        enabled_sources_in_db.add(ds_type)
+                enabled_sources_in_db = snapshot.enabled_types()
 
                 logger.info(f"✅ [数据源配置] 从数据库读取到已启用的数据源: {enabled_sources_in_db}")
             else:
@@ -509,28 +493,8 @@ class DataSourceManager:
     def _get_datasource_configs_from_db(self) -> dict:
         """从数据库读取数据源配置（包括 API Key）"""
         try:
-            from app.core.database import get_mongo_db_sync
-            db = get_mongo_db_sync()
-
-            # 从 system_configs 集合读取激活的配置
-            config = db.system_configs.find_one({"is_active": True})
-            if not config:
-                return {}
-
-            # 提取数据源配置
-            datasource_configs = config.get('data_source_configs', [])
-
-            # 构建配置字典 {数据源名称: {api_key, api_secret, ...}}
-            result = {}
-            for ds_config in datasource_configs:
-                name = ds_config.get('name', '').lower()
-                result[name] = {
-                    'api_key': ds_config.get('api_key', ''),
-                    'api_secret': ds_config.get('api_secret', ''),
-                    'config_params': ds_config.get('config_params', {})
-                }
-
-            return result
+            # 从配置快照读取激活的配置，构建配置字典 {数据源名称: {api_key, api_secret, ...}}
+            return get_datasource_config_snapshot().configs_by_name()
         except Exception as e:
             logger.warning(f"⚠️ 从数据库读取数据源配置失败: {e}")
             return {}
@@ -679,6 +643,63 @@ class DataSourceManager:
         except Exception:
             return 0
 
+    def _indicator_state_available(self) -> bool:
+        """是否启用增量指标（TA_INCREMENTAL_INDICATORS）且当前缓存管理器支持持久化指标状态"""
+        from .technical import incremental
+
+        return (incremental.INCREMENTAL_ENABLED and self.cache_enabled and self.cache_manager is not None
+                and hasattr(self.cache_manager, 'load_indicator_state'))
+
+    def _attach_technical_indicators(self, data: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        """
+        为报告计算技术指标，返回带指标列的最近几行数据
+
+        默认对请求数据全量计算，相同请求总是得到相同数值。
+        启用 TA_INCREMENTAL_INDICATORS 时指标状态按股票持久化在缓存目录中：请求数据包含状态最后一根K线（且收盘价未因复权变化）时，
+        只对其后的新K线做 O(1) 增量更新；否则全量计算并以本次数据重新锚定状态。
+        请求区间早于已保存状态时（如历史回看）只做全量计算，不覆盖状态。
+        """
+        from .technical.incremental import IndicatorState, compute_indicator_frame, TAIL_ROWS
+
+        tail = data.tail(TAIL_ROWS).copy()
+        state = None
+        dates = None
+        if self._indicator_state_available() and 'date' in data.columns and len(data) > 0:
+            try:
+                parsed = pd.to_datetime(data['date'])
+                closes = data['close'].astype(float).to_numpy()
+                if parsed.notna().all() and parsed.is_monotonic_increasing and parsed.is_unique \
+                        and not np.isnan(closes).any():
+                    dates = parsed.dt.strftime('%Y-%m-%d').tolist()
+                    state = IndicatorState.from_dict(self.cache_manager.load_indicator_state(symbol))
+            except Exception as e:
+                logger.debug(f"🔍 [技术指标] 指标状态不可用: {symbol} - {e}")
+                dates = None
+
+        if dates is None:
+            # 未启用增量或无法持久化状态（缺少日期列/缓存不可用），全量计算
+            indicators = compute_indicator_frame(data['close']).tail(TAIL_ROWS)
+            return tail.assign(**{c: indicators[c] for c in indicators.columns})
+
+        if state is not None and dates[-1] < state.last_date:
+            logger.info(f"📊 [技术指标] {symbol} 请求区间早于已保存状态，全量计算")
+            indicators = compute_indicator_frame(data['close']).tail(TAIL_ROWS)
+            return tail.assign(**{c: indicators[c] for c in indicators.columns})
+
+        if state is not None and state.resume(dates, closes):
+            logger.info(f"⚡ [技术指标] {symbol} 增量续算至 {state.last_date} (锚点 {state.anchor_date}, 共{state.n_bars}根K线)")
+        else:
+            state = IndicatorState.from_frame(dates, data['close'])
+            logger.info(f"📊 [技术指标] {symbol} 全量计算并保存指标状态 ({state.n_bars}根K线)")
+
+        try:
+            self.cache_manager.save_indicator_state(symbol, state.to_dict())
+        except Exception as e:
+            logger.warning(f"⚠️ [技术指标] 指标状态保存失败: {e}")
+
+        rows = state.tail_frame().reindex(dates[-len(tail):])
+        return tail.assign(**{c: rows[c].to_numpy() for c in rows.columns})
+
     def _format_stock_data_response(self, data: pd.DataFrame, symbol: str, stock_name: str,
                                     start_date: str, end_date: str) -> str:
         """
@@ -698,60 +719,12 @@ class DataSourceManager:
             original_data_count = len(data)
             logger.info(f"📊 [技术指标] 开始计算技术指标，原始数据: {original_data_count}条")
 
-            # 🔧 计算技术指标（使用完整数据）
+            # 🔧 计算技术指标：有已保存的指标状态时只续算新增K线，否则全量计算
             # 确保数据按日期排序
             if 'date' in data.columns:
                 data = data.sort_values('date')
 
-            # 计算移动平均线
-            data['ma5'] = data['close'].rolling(window=5, min_periods=1).mean()
-            data['ma10'] = data['close'].rolling(window=10, min_periods=1).mean()
-            data['ma20'] = data['close'].rolling(window=20, min_periods=1).mean()
-            data['ma60'] = data['close'].rolling(window=60, min_periods=1).mean()
-
-            # 计算RSI（相对强弱指标）- 同花顺风格：使用中国式SMA（EMA with adjust=True）
-            # 参考：https://blog.csdn.net/u011218867/article/details/117427927
-            # 同花顺/通达信的RSI使用SMA函数，等价于pandas的ewm(com=N-1, adjust=True)
-            delta = data['close'].diff()
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-
-            # RSI6 - 使用中国式SMA
-            avg_gain6 = gain.ewm(com=5, adjust=True).mean()  # com = N - 1
-            avg_loss6 = loss.ewm(com=5, adjust=True).mean()
-            rs6 = avg_gain6 / avg_loss6.replace(0, np.nan)
-            data['rsi6'] = 100 - (100 / (1 + rs6))
-
-            # RSI12 - 使用中国式SMA
-            avg_gain12 = gain.ewm(com=11, adjust=True).mean()
-            avg_loss12 = loss.ewm(com=11, adjust=True).mean()
-            rs12 = avg_gain12 / avg_loss12.replace(0, np.nan)
-            data['rsi12'] = 100 - (100 / (1 + rs12))
-
-            # RSI24 - 使用中国式SMA
-            avg_gain24 = gain.ewm(com=23, adjust=True).mean()
-            avg_loss24 = loss.ewm(com=23, adjust=True).mean()
-            rs24 = avg_gain24 / avg_loss24.replace(0, np.nan)
-            data['rsi24'] = 100 - (100 / (1 + rs24))
-
-            # 保留RSI14作为国际标准参考（使用简单移动平均）
-            gain14 = gain.rolling(window=14, min_periods=1).mean()
-            loss14 = loss.rolling(window=14, min_periods=1).mean()
-            rs14 = gain14 / loss14.replace(0, np.nan)
-            data['rsi14'] = 100 - (100 / (1 + rs14))
-
-            # 计算MACD
-            ema12 = data['close'].ewm(span=12, adjust=False).mean()
-            ema26 = data['close'].ewm(span=26, adjust=False).mean()
-            data['macd_dif'] = ema12 - ema26
-            data['macd_dea'] = data['macd_dif'].ewm(span=9, adjust=False).mean()
-            data['macd'] = (data['macd_dif'] - data['macd_dea']) * 2
-
-            # 计算布林带
-            data['boll_mid'] = data['close'].rolling(window=20, min_periods=1).mean()
-            std = data['close'].rolling(window=20, min_periods=1).std()
-            data['boll_upper'] = data['boll_mid'] + 2 * std
-            data['boll_lower'] = data['boll_mid'] - 2 * std
+            data = self._attach_technical_indicators(data, symbol)
 
             logger.info(f"✅ [技术指标] 技术指标计算完成")
 
@@ -912,6 +885,9 @@ class DataSourceManager:
         """
         获取股票数据的 DataFrame 接口，支持多数据源和自动降级
 
+        日线数据优先使用区间缓存：请求区间已被覆盖时直接切片返回，
+        部分覆盖时只向数据源补齐缺失的头部/尾部并合并回规范序列。
+
         Args:
             symbol: 股票代码
             start_date: 开始日期
@@ -921,6 +897,85 @@ class DataSourceManager:
         Returns:
             pd.DataFrame: 股票数据 DataFrame，列标准：open, high, low, close, vol, amount, date
         """
+        if period != "daily" or not start_date or not end_date or not self._range_cache_available():
+            return self._fetch_stock_dataframe(symbol, start_date, end_date, period)
+
+        try:
+            cached, missing = self.cache_manager.find_stock_data_range(symbol, start_date, end_date)
+        except Exception as e:
+            logger.warning(f"⚠️ [DataFrame接口] 区间缓存读取失败: {e}")
+            return self._fetch_stock_dataframe(symbol, start_date, end_date, period)
+
+        if cached is not None and not missing:
+            logger.info(f"✅ [DataFrame接口] 区间缓存命中: {symbol} ({len(cached)}条)")
+            return self._standardize_dataframe(cached)
+
+        # 只获取缺失的区间（无缓存时即为完整请求区间）
+        fetched = []
+        for miss_start, miss_end in missing:
+            df, source = self._fetch_stock_dataframe_with_source(symbol, miss_start, miss_end, period)
+            if df is not None and not df.empty and 'date' not in df.columns:
+                # 没有日期列无法按区间合并，退回到完整请求
+                return df if cached is None else self._fetch_stock_dataframe(symbol, start_date, end_date, period)
+            try:
+                # 空结果也交给缓存：短的空区间（非交易日、停牌）记为已覆盖
+                self.cache_manager.merge_stock_data_range(symbol, df, miss_start, miss_end, source)
+            except Exception as e:
+                logger.warning(f"⚠️ [DataFrame接口] 区间缓存合并失败: {e}")
+            if df is not None and not df.empty:
+                fetched.append(df)
+
+        if fetched:
+            try:
+                merged, still_missing = self.cache_manager.find_stock_data_range(symbol, start_date, end_date)
+                if still_missing and cached is not None:
+                    # 数据源或复权基准变化导致序列重建，按完整区间重新获取一次，避免拼接不同基准的数据
+                    df, source = self._fetch_stock_dataframe_with_source(symbol, start_date, end_date, period)
+                    if df is not None and not df.empty and 'date' in df.columns:
+                        self.cache_manager.merge_stock_data_range(symbol, df, start_date, end_date, source)
+                        merged, still_missing = self.cache_manager.find_stock_data_range(symbol, start_date, end_date)
+                        fetched, cached = [df], None
+                if merged is not None and not merged.empty:
+                    return self._standardize_dataframe(merged)
+            except Exception as e:
+                logger.warning(f"⚠️ [DataFrame接口] 区间缓存读取失败: {e}")
+
+            # 缓存不可用时直接拼接已缓存部分与新获取的数据
+            parts = ([cached] if cached is not None else []) + fetched
+            combined = pd.concat(parts, ignore_index=True).drop_duplicates(subset='date', keep='last')
+            return self._standardize_dataframe(combined)
+
+        if cached is not None and not cached.empty:
+            # 缺失区间没有新数据（如非交易日或数据源暂不可用），返回已有部分
+            logger.info(f"📦 [DataFrame接口] 缺失区间无新数据，返回缓存部分: {symbol} ({len(cached)}条)")
+            return self._standardize_dataframe(cached)
+
+        return pd.DataFrame()
+
+    def _range_cache_available(self) -> bool:
+        """当前缓存管理器是否支持日线区间缓存"""
+        return (self.cache_enabled and self.cache_manager is not None
+                and hasattr(self.cache_manager, 'find_stock_data_range'))
+
+    def _fetch_stock_dataframe(self, symbol: str, start_date: str = None, end_date: str = None, period: str = "daily") -> pd.DataFrame:
+        """
+        直接从数据源获取股票数据 DataFrame（不经过区间缓存），支持自动降级
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            period: 数据周期（daily/weekly/monthly），默认为daily
+
+        Returns:
+            pd.DataFrame: 标准化后的股票数据 DataFrame
+        """
+        df, _ = self._fetch_stock_dataframe_with_source(symbol, start_date, end_date, period)
+        return df
+
+    def _fetch_stock_dataframe_with_source(self, symbol: str, start_date: str = None, end_date: str = None,
+                                           period: str = "daily") -> Tuple[pd.DataFrame, Optional[str]]:
+        """同 _fetch_stock_dataframe，同时返回实际提供数据的数据源名称（全部失败时为 None）"""
         logger.info(f"📊 [DataFrame接口] 获取股票数据: {symbol} ({start_date} 到 {end_date})")
 
         try:
@@ -945,7 +1000,7 @@ class DataSourceManager:
 
             if df is not None and not df.empty:
                 logger.info(f"✅ [DataFrame接口] 从 {self.current_source.value} 获取成功: {len(df)}条")
-                return self._standardize_dataframe(df)
+                return self._standardize_dataframe(df), self.current_source.value
 
             # 降级到其他数据源
             logger.warning(f"⚠️ [DataFrame接口] {self.current_source.value} 失败，尝试降级")
@@ -972,17 +1027,17 @@ class DataSourceManager:
 
                     if df is not None and not df.empty:
                         logger.info(f"✅ [DataFrame接口] 降级到 {source.value} 成功: {len(df)}条")
-                        return self._standardize_dataframe(df)
+                        return self._standardize_dataframe(df), source.value
                 except Exception as e:
                     logger.warning(f"⚠️ [DataFrame接口] {source.value} 失败: {e}")
                     continue
 
             logger.error(f"❌ [DataFrame接口] 所有数据源都失败: {symbol}")
-            return pd.DataFrame()
+            return pd.DataFrame(), None
 
         except Exception as e:
             logger.error(f"❌ [DataFrame接口] 获取失败: {e}", exc_info=True)
-            return pd.DataFrame()
+            return pd.DataFrame(), None
 
     def _standardize_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -1066,16 +1121,12 @@ class DataSourceManager:
 
             if self.current_source == ChinaDataSource.MONGODB:
                 result, actual_source = self._get_mongodb_data(symbol, start_date, end_date, period)
-            elif self.current_source == ChinaDataSource.TUSHARE:
-                logger.info(f"🔍 [股票代码追踪] 调用 Tushare 数据源，传入参数: symbol='{symbol}', period='{period}'")
-                result = self._get_tushare_data(symbol, start_date, end_date, period)
-                actual_source = "tushare"
-            elif self.current_source == ChinaDataSource.AKSHARE:
-                result = self._get_akshare_data(symbol, start_date, end_date, period)
-                actual_source = "akshare"
-            elif self.current_source == ChinaDataSource.BAOSTOCK:
-                result = self._get_baostock_data(symbol, start_date, end_date, period)
-                actual_source = "baostock"
+            elif self.current_source in self._source_fetchers():
+                # 当前数据源 + 备用数据源交给执行层（熔断跳过、可选对冲）
+                logger.info(f"🔍 [股票代码追踪] 调用 {self.current_source.value} 数据源，传入参数: symbol='{symbol}', period='{period}'")
+                result, actual_source = self._fetch_from_sources(
+                    symbol, start_date, end_date, period, include_current=True
+                )
             # TDX 已移除
             else:
                 result = f"❌ 不支持的数据源: {self.current_source.value}"
@@ -1117,9 +1168,13 @@ class DataSourceManager:
                                   'event_type': 'data_fetch_warning'
                               })
 
-                # 数据质量异常时也尝试降级到其他数据源
-                fallback_result = self._try_fallback_sources(symbol, start_date, end_date)
-                if fallback_result and "❌" not in fallback_result and "错误" not in fallback_result:
+                # API 数据源已在执行层中依次降级；MongoDB 数据异常时再尝试其他数据源
+                if self.current_source != ChinaDataSource.MONGODB:
+                    logger.error(f"❌ [数据来源: 所有数据源失败] 所有数据源都无法获取有效数据: {symbol}")
+                    return result
+
+                fallback_result, _ = self._try_fallback_sources(symbol, start_date, end_date, period)
+                if self._is_valid_result(fallback_result):
                     logger.info(f"✅ [数据来源: 备用数据源] 降级成功获取数据: {symbol}")
                     return fallback_result
                 else:
@@ -1138,7 +1193,8 @@ class DataSourceManager:
                             'error': str(e),
                             'event_type': 'data_fetch_exception'
                         }, exc_info=True)
-            return self._try_fallback_sources(symbol, start_date, end_date)
+            fallback_result, _ = self._try_fallback_sources(symbol, start_date, end_date, period)
+            return fallback_result
 
     def _get_mongodb_data(self, symbol: str, start_date: str, end_date: str, period: str = "daily") -> tuple[str, str | None]:
         """
@@ -1387,39 +1443,66 @@ class DataSourceManager:
             tuple[str, str | None]: (结果字符串, 实际使用的数据源名称)
         """
         logger.info(f"🔄 [{self.current_source.value}] 失败，尝试备用数据源获取{period}数据: {symbol}")
+        return self._fetch_from_sources(symbol, start_date, end_date, period, include_current=False)
+
+    def _source_fetchers(self) -> Dict[ChinaDataSource, Any]:
+        """API 数据源 -> 获取方法"""
+        return {
+            ChinaDataSource.TUSHARE: self._get_tushare_data,
+            ChinaDataSource.AKSHARE: self._get_akshare_data,
+            ChinaDataSource.BAOSTOCK: self._get_baostock_data,
+        }
 
-        # 🔥 从数据库获取数据源优先级顺序（根据股票代码识别市场）
-        # 注意：不包含MongoDB，因为MongoDB是最高优先级，如果失败了就不再尝试
-        fallback_order = self._get_data_source_priority_order(symbol)
+    @staticmethod
+    def _is_valid_result(result: Optional[str]) -> bool:
+        return bool(result) and "❌" not in result and "错误" not in result
 
-        for source in fallback_order:
-            if source != self.current_source and source in self.available_sources:
-                try:
-                    logger.info(f"🔄 [备用数据源] 尝试 {source.value} 获取{period}数据: {symbol}")
+    @staticmethod
+    def _is_source_failure(result: Optional[str]) -> bool:
+        """
+        无效结果是否属于数据源故障（提供器不可用、调用失败/超时），计入熔断
 
-                    # 直接调用具体的数据源方法，避免递归
-                    if source == ChinaDataSource.TUSHARE:
-                        result = self._get_tushare_data(symbol, start_date, end_date, period)
-                    elif source == ChinaDataSource.AKSHARE:
-                        result = self._get_akshare_data(symbol, start_date, end_date, period)
-                    elif source == ChinaDataSource.BAOSTOCK:
-                        result = self._get_baostock_data(symbol, start_date, end_date, period)
-                    # TDX 已移除
-                    else:
-                        logger.warning(f"⚠️ 未知数据源: {source.value}")
-                        continue
+        "未获取到/未能获取数据"是单只股票没有数据（停牌、新股、代码无效、周期不支持），不计入熔断
+        """
+        return bool(result) and any(marker in result for marker in _SOURCE_FAILURE_MARKERS)
 
-                    if "❌" not in result:
-                        logger.info(f"✅ [备用数据源-{source.value}] 成功获取{period}数据: {symbol}")
-                        return result, source.value  # 返回结果和实际使用的数据源
-                    else:
-                        logger.warning(f"⚠️ [备用数据源-{source.value}] 返回错误结果: {symbol}")
+    def _fetch_from_sources(self, symbol: str, start_date: str, end_date: str, period: str = "daily",
+                            include_current: bool = True) -> tuple[str, str | None]:
+        """
+        按优先级从 API 数据源获取数据（经由执行层：记录耗时/错误、熔断跳过、可选对冲）
 
-                except Exception as e:
-                    logger.error(f"❌ [备用数据源-{source.value}] 获取失败: {symbol}, 错误: {e}")
-                    continue
+        Args:
+            include_current: 是否把当前数据源放在首位
+
+        Returns:
+            tuple[str, str | None]: (结果字符串, 实际使用的数据源名称)
+        """
+        fetchers = self._source_fetchers()
+        # 🔥 从数据库获取数据源优先级顺序（根据股票代码识别市场）
+        # 注意：不包含MongoDB，因为MongoDB是最高优先级，如果失败了就不再尝试
+        order = [s for s in self._get_data_source_priority_order(symbol) if s != self.current_source]
+        if include_current:
+            order.insert(0, self.current_source)
+
+        candidates = []
+        for source in order:
+            if source in fetchers and source in self.available_sources:
+                fetch = fetchers[source]
+                candidates.append((
+                    source.value,
+                    lambda fetch=fetch: fetch(symbol, start_date, end_date, period),
+                ))
+
+        result, source_name = get_source_executor("china_stock_data").run(
+            candidates, self._is_valid_result, is_failure=self._is_source_failure
+        )
+        if source_name:
+            logger.info(f"✅ [数据来源-{source_name}] 成功获取{period}数据: {symbol}")
+            return result, source_name
 
         logger.error(f"❌ [所有数据源失败] 无法获取{period}数据: {symbol}")
+        if include_current and result:
+            return result, None
         return f"❌ 所有数据源都无法获取{symbol}的{period}数据", None
 
     def get_stock_info(self, symbol: str) -> Dict:
@@ -2258,18 +2341,10 @@ class USDataSourceManager:
             按优先级排序的数据源列表（不包含MongoDB）
         """
         try:
-            # 从数据库读取数据源配置
-            from app.core.database import get_mongo_db_sync
-            db = get_mongo_db_sync()
-
-            # 方法1: 从 datasource_groupings 集合读取（推荐）
-            groupings_collection = db.datasource_groupings
-            groupings = list(groupings_collection.find({
-                "market_category_id": "us_stocks",
-                "enabled": True
-            }).sort("priority", -1))  # 降序排序，优先级高的在前
-
-            if groupings:
+            # 从配置快照读取 datasource_groupings（已按优先级降序）
+            grouping_names = get_datasource_config_snapshot().grouping_names("us_stocks")
+
+            if grouping_names:
                 # 转换为 USDataSource 枚举
                 # 🔥 数据源名称映射（数据库名称 → USDataSource 枚举）
                 source_mapping = {
@@ -2280,8 +2355,8 @@ class USDataSourceManager:
                 }
 
                 result = []
-                for grouping in groupings:
-                    ds_name = grouping.get('data_source_name', '').lower()
+                for ds_name in grouping_names:
+                    ds_name = (ds_name or '').lower()
                     if ds_name in source_mapping:
                         source = source_mapping[ds_name]
                         # 排除 MongoDB（MongoDB 是最高优先级，不参与降级）
@@ -2389,14 +2464,8 @@ class USDataSourceManager:
     def _get_enabled_sources_from_db(self) -> List[str]:
         """从数据库读取启用的数据源列表"""
         try:
-            from app.core.database import get_mongo_db_sync
-            db = get_mongo_db_sync()
-
-            # 从 datasource_groupings 集合读取
-            groupings = list(db.datasource_groupings.find({
-                "market_category_id": "us_stocks",
-                "enabled": True
-            }))
+            # 从配置快照读取 datasource_groupings
+            grouping_names = get_datasource_config_snapshot().grouping_names("us_stocks")
 
             # 🔥 数据源名称映射（数据库名称 → 代码中使用的名称）
             name_mapping = {
@@ -2406,8 +2475,8 @@ class USDataSourceManager:
             }
 
             result = []
-            for g in groupings:
-                db_name = g.get('data_source_name', '').lower()
+            for name in grouping_names:
+                db_name = (name or '').lower()
                 # 使用映射表转换名称
                 code_name = name_mapping.get(db_name, db_name)
                 result.append(code_name)
@@ -2422,28 +2491,8 @@ class USDataSourceManager:
     def _get_datasource_configs_from_db(self) -> dict:
         """从数据库读取数据源配置（包括 API Key）"""
         try:
-            from app.core.database import get_mongo_db_sync
-            db = get_mongo_db_sync()
-
-            # 从 system_configs 集合读取激活的配置
-            config = db.system_configs.find_one({"is_active": True})
-            if not config:
-                return {}
-
-            # 提取数据源配置
-            datasource_configs = config.get('data_source_configs', [])
-
-            # 构建配置字典 {数据源名称: {api_key, api_secret, ...}}
-            result = {}
-            for ds_config in datasource_configs:
-                name = ds_config.get('name', '').lower()
-                result[name] = {
-                    'api_key': ds_config.get('api_key', ''),
-                    'api_secret': ds_config.get('api_secret', ''),
-                    'config_params': ds_config.get('config_params', {})
-                }
-
-            return result
+            # 从配置快照读取激活的配置，构建配置字典 {数据源名称: {api_key, api_secret, ...}}
+            return get_datasource_config_snapshot().configs_by_name()
         except Exception as e:
             logger.warning(f"⚠️ 从数据库读取数据源配置失败: {e}")
             return {}
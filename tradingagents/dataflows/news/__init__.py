@@ -33,6 +33,9 @@ except ImportError:
     search_news_by_keyword = None
     REALTIME_NEWS_AVAILABLE = False
 
+# 新闻近似去重（SimHash）
+from .near_duplicate import NearDuplicateIndex, dedupe_news, get_news_dedup_index
+
 # 导入中国财经数据聚合器
 try:
     from .chinese_finance import ChineseFinanceDataAggregator
@@ -56,6 +59,11 @@ __all__ = [
     'search_news_by_keyword',
     'REALTIME_NEWS_AVAILABLE',
 
+    # Near-duplicate detection
+    'NearDuplicateIndex',
+    'dedupe_news',
+    'get_news_dedup_index',
+
     # Chinese Finance
     'ChineseFinanceDataAggregator',
     'CHINESE_FINANCE_AVAILABLE',
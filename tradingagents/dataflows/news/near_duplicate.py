@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+新闻近似去重
+基于标题+正文字符 shingle 的 64 位 SimHash，识别转载稿、标题略有差异或带来源后缀的重复新闻。
+
+- 汉明距离 <= max_distance 视为重复；按 (max_distance + 1) 段分桶建立 LSH 索引（鸽巢原理保证不漏检），
+  查找只比较同桶候选，不做全量两两比较
+- 索引容量有界（按插入顺序淘汰最旧指纹），可选持久化到 JSON 文件，跨进程/跨批次去重
+- 入库场景先 prepare/find_entry 判重，写库成功后才 add_entry，写入失败的条目重试时不会被误判为重复
+- 持久化按间隔合并写入：在文件锁内先读入其他进程（API、Worker）保存的指纹再整体写回，互不覆盖
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from tradingagents.utils.file_lock import file_lock
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+T = TypeVar('T')
+
+FINGERPRINT_BITS = 64
+DEFAULT_MAX_DISTANCE = int(os.getenv('NEWS_DEDUP_MAX_DISTANCE', '3'))
+DEFAULT_INDEX_CAPACITY = int(os.getenv('NEWS_DEDUP_INDEX_CAPACITY', '50000'))
+# 参与指纹计算的正文长度（字符）
+BODY_CHARS = 500
+SHINGLE_SIZE = 3
+# 规范化后短于该长度的文本直接按全文精确匹配
+MIN_SHINGLE_TEXT = 12
+# 持久化索引的最小保存间隔（秒）
+SAVE_INTERVAL_SECONDS = float(os.getenv('NEWS_DEDUP_SAVE_INTERVAL', '30'))
+
+# 索引条目：(键, SimHash, 精确键)
+Entry = Tuple[str, int, Optional[str]]
+
+# 标题末尾的来源标记，如 " - Reuters"、"｜新浪财经"、"(来源:证券时报)"、"【财联社】"
+_SOURCE_TAG_PATTERNS = [
+    re.compile(r'\s*[-|｜—–_]\s*(?:[^\s\d\-|｜—–_]{1,20}\s?){1,3}$'),
+    re.compile(r'\s*[(（][^()（）]{0,6}(来源|source|via)[^()（）]{0,20}[)）]\s*$', re.IGNORECASE),
+    re.compile(r'^\s*【[^】]{1,12}】'),
+]
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize_news_text(title: str, body: str = '') -> str:
+    """规范化标题+正文：去除来源标记、标点与空白，转小写"""
+    title = (title or '').strip()
+    for pattern in _SOURCE_TAG_PATTERNS:
+        stripped = pattern.sub('', title)
+        # 不把整条标题都当成来源标记删掉
+        if len(stripped) >= 6:
+            title = stripped
+    text = f"{title} {(body or '')[:BODY_CHARS]}".lower()
+    return _NON_WORD.sub('', text)
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+
+
+def simhash(text: str) -> int:
+    """对已规范化文本计算 64 位 SimHash"""
+    hashes = _shingle_hashes(text)
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+    fingerprint = np.packbits(votes > 0, bitorder='little')
+    return int.from_bytes(fingerprint.tobytes(), 'little')
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def news_fingerprint(title: str, body: str = '') -> Tuple[int, Optional[str]]:
+    """
+    新闻指纹
+
+    Returns:
+        (SimHash, 精确键)：规范化文本过短时 SimHash 不可靠，返回精确键用于全文匹配
+    """
+    text = normalize_news_text(title, body)
+    if len(text) < MIN_SHINGLE_TEXT:
+        return 0, text
+    return simhash(text), None
+
+
+class NearDuplicateIndex:
+    """SimHash 近似重复索引（线程安全、容量有界、可持久化）"""
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE, capacity: int = DEFAULT_INDEX_CAPACITY,
+                 persist_path: Optional[str] = None):
+        self.max_distance = max_distance
+        self.capacity = capacity
+        self.persist_path = Path(persist_path) if persist_path else None
+        self._bands = max_distance + 1
+        self._band_bits = -(-FINGERPRINT_BITS // self._bands)
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._exact: Dict[str, str] = {}
+        self._buckets: List[Dict[int, set]] = [{} for _ in range(self._bands)]
+        self._dirty = False
+        self._last_saved = time.monotonic()
+        if self.persist_path is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._exact)
+
+    def _band_values(self, fingerprint: int) -> List[int]:
+        mask = (1 << self._band_bits) - 1
+        return [(fingerprint >> (i * self._band_bits)) & mask for i in range(self._bands)]
+
+    def find(self, fingerprint: int, exact_key: Optional[str] = None) -> Optional[str]:
+        """返回与指纹近似重复的已有条目键，没有时返回 None"""
+        with self._lock:
+            if exact_key is not None:
+                return self._exact.get(exact_key)
+            seen = set()
+            for bucket, value in zip(self._buckets, self._band_values(fingerprint)):
+                for key in bucket.get(value, ()):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    if hamming_distance(fingerprint, self._entries[key]) <= self.max_distance:
+                        return key
+            return None
+
+    def add(self, key: str, fingerprint: int, exact_key: Optional[str] = None):
+        with self._lock:
+            if exact_key is not None:
+                self._exact[exact_key] = key
+            else:
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = fingerprint
+                for bucket, value in zip(self._buckets, self._band_values(fingerprint)):
+                    bucket.setdefault(value, set()).add(key)
+            self._dirty = True
+            while len(self._entries) > self.capacity:
+                self._remove(next(iter(self._entries)))
+            while len(self._exact) > self.capacity:
+                self._exact.pop(next(iter(self._exact)))
+
+    def _remove(self, key: str):
+        fingerprint = self._entries.pop(key)
+        for bucket, value in zip(self._buckets, self._band_values(fingerprint)):
+            members = bucket.get(value)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del bucket[value]
+
+    @staticmethod
+    def prepare(key: str, title: str, body: str = '', namespace: Optional[str] = None) -> Entry:
+        """
+        计算条目的索引项（不修改索引）
+
+        Args:
+            namespace: 命名空间（如股票代码），只在同一命名空间内判重。
+                实现为指纹异或命名空间哈希：同一空间内汉明距离不变，不同空间间距离近似随机（约32位）
+        """
+        fingerprint, exact_key = news_fingerprint(title, body)
+        if namespace:
+            salt = int.from_bytes(hashlib.blake2b(namespace.encode('utf-8'), digest_size=8).digest(), 'little')
+            fingerprint ^= salt
+            key = f"{namespace}|{key}"
+            if exact_key is not None:
+                exact_key = f"{namespace}|{exact_key}"
+        return key, fingerprint, exact_key
+
+    def find_entry(self, entry: Entry) -> Optional[str]:
+        """返回与索引项近似重复的已有条目键（同一键视为同一条目，不算重复）"""
+        key, fingerprint, exact_key = entry
+        duplicate_of = self.find(fingerprint, exact_key)
+        return duplicate_of if duplicate_of != key else None
+
+    def add_entry(self, entry: Entry):
+        key, fingerprint, exact_key = entry
+        self.add(key, fingerprint, exact_key)
+
+    def check_and_add(self, key: str, title: str, body: str = '', namespace: Optional[str] = None) -> Optional[str]:
+        """
+        检查是否与已有条目近似重复；不重复时加入索引
+
+        Returns:
+            重复时返回已有条目的键（同一键视为同一条目，不算重复），否则 None
+        """
+        entry = self.prepare(key, title, body, namespace)
+        with self._lock:
+            duplicate_of = self.find_entry(entry)
+            if duplicate_of is not None:
+                return duplicate_of
+            self.add_entry(entry)
+            return None
+
+    # ---------------------------------------------------------------- 持久化
+
+    def _read_payload(self) -> Optional[dict]:
+        if not self.persist_path.exists():
+            return None
+        with open(self.persist_path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('max_distance') != self.max_distance:
+            logger.info(f"📰 [近似去重] 索引参数变化，忽略旧索引: {self.persist_path}")
+            return None
+        return payload
+
+    def _merge_payload(self, payload: dict):
+        """并入持久化文件中本进程尚未记录的条目（视为比本进程条目更旧，超出容量时先淘汰）"""
+        entries = [(key, int(fp)) for key, fp in payload.get('entries', []) if key not in self._entries]
+        exact = [(exact_key, key) for exact_key, key in payload.get('exact', []) if exact_key not in self._exact]
+        if not entries and not exact:
+            return
+        entries.extend(self._entries.items())
+        exact.extend(self._exact.items())
+        self._entries = OrderedDict()
+        self._exact = {}
+        self._buckets = [{} for _ in range(self._bands)]
+        for key, fingerprint in entries[-self.capacity:]:
+            self.add(key, fingerprint)
+        for exact_key, key in exact[-self.capacity:]:
+            self._exact[exact_key] = key
+
+    def _load(self):
+        try:
+            payload = self._read_payload()
+            if payload is None:
+                return
+            self._merge_payload(payload)
+            self._dirty = False
+            logger.info(f"📰 [近似去重] 已加载去重索引: {len(self)}条")
+        except Exception as e:
+            logger.warning(f"⚠️ [近似去重] 去重索引加载失败: {e}")
+
+    def save(self):
+        """
+        将索引写入持久化文件（无变化时跳过）
+
+        在文件锁内先并入其他进程保存的条目再写回，多个进程共用一个索引文件时不会互相覆盖。
+        """
+        if self.persist_path is None or not self._dirty:
+            return
+        try:
+            with file_lock(self.persist_path):
+                with self._lock:
+                    try:
+                        payload = self._read_payload()
+                    except Exception as e:
+                        logger.warning(f"⚠️ [近似去重] 读取已有去重索引失败，直接覆盖: {e}")
+                        payload = None
+                    if payload is not None:
+                        self._merge_payload(payload)
+                    payload = {
+                        'max_distance': self.max_distance,
+                        'entries': [[key, str(fp)] for key, fp in self._entries.items()],
+                        'exact': [[exact_key, key] for exact_key, key in self._exact.items()],
+                    }
+                    self._dirty = False
+                    self._last_saved = time.monotonic()
+                tmp_path = self.persist_path.with_name(f"{self.persist_path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, ensure_ascii=False)
+                os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            self._dirty = True
+            logger.warning(f"⚠️ [近似去重] 去重索引保存失败: {e}")
+
+    def save_if_due(self, interval: float = SAVE_INTERVAL_SECONDS):
+        """距上次保存超过 interval 秒时才保存（批量入库时合并多次写文件）"""
+        if self._dirty and time.monotonic() - self._last_saved >= interval:
+            self.save()
+
+
+def dedupe_news(items: Iterable[T], text_of: Callable[[T], Tuple[str, str]],
+                key_of: Optional[Callable[[T], str]] = None,
+                index: Optional[NearDuplicateIndex] = None,
+                namespace: Optional[str] = None) -> List[T]:
+    """
+    对一批新闻做近似去重，保留每组重复中的第一条
+
+    Args:
+        items: 新闻列表（任意类型）
+        text_of: 返回 (标题, 正文)
+        key_of: 返回条目唯一键（如URL）；同一键再次出现不视为近似重复，由调用方的精确去重处理
+        index: 共享索引（跨批次去重）；默认只在本批次内去重
+        namespace: 判重命名空间（如股票代码）
+    """
+    index = index if index is not None else NearDuplicateIndex()
+    unique: List[T] = []
+    for position, item in enumerate(items):
+        title, body = text_of(item)
+        key = key_of(item) if key_of else None
+        key = key or f"#{position}:{title}"
+        if index.check_and_add(key, title, body, namespace) is None:
+            unique.append(item)
+    return unique
+
+
+_news_index: Optional[NearDuplicateIndex] = None
+_news_index_lock = threading.Lock()
+
+
+def get_news_dedup_index() -> NearDuplicateIndex:
+    """进程内共享的持久化新闻去重索引（用于入库去重）"""
+    global _news_index
+    if _news_index is None:
+        with _news_index_lock:
+            if _news_index is None:
+                default_path = os.path.join(os.getenv('TRADINGAGENTS_DATA_DIR', './data'), 'cache', 'news_simhash_index.json')
+                _news_index = NearDuplicateIndex(persist_path=os.getenv('NEWS_DEDUP_INDEX_PATH', default_path))
+                # 防抖保存可能还有未落盘的条目，退出时补存
+                atexit.register(_news_index.save)
+    return _news_index
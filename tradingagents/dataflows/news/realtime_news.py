@@ -9,17 +9,30 @@ import json
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, Tuple
 import time
 import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 
 # 导入日志模块
 from tradingagents.config.runtime_settings import get_timezone_name
+from tradingagents.dataflows.news.near_duplicate import NearDuplicateIndex
 
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+# 并发聚合：所有新闻源并行请求，单源超时与整体截止时间（秒），到截止时间时返回已到达的结果
+NEWS_CONCURRENT_ENABLED = os.getenv('REALTIME_NEWS_CONCURRENT', 'true').lower() == 'true'
+NEWS_SOURCE_TIMEOUT = float(os.getenv('REALTIME_NEWS_SOURCE_TIMEOUT', '6'))
+NEWS_TOTAL_TIMEOUT = float(os.getenv('REALTIME_NEWS_TOTAL_TIMEOUT', '8'))
+
+# 新闻源请求共用的线程池：超时的请求在后台自然结束，不阻塞本次聚合
+_news_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('REALTIME_NEWS_MAX_WORKERS', '8')),
+    thread_name_prefix='realtime-news',
+)
 
 
 @dataclass
@@ -37,6 +50,11 @@ class NewsItem:
 class RealtimeNewsAggregator:
     """实时新闻聚合器"""
 
+    # 财联社等RSS源（可以添加更多RSS源）
+    RSS_SOURCES = [
+        "https://www.cls.cn/api/sw?app=CailianpressWeb&os=web&sv=7.7.5",
+    ]
+
     def __init__(self):
         self.headers = {
             'User-Agent': 'TradingAgents-CN/1.0'
@@ -47,6 +65,18 @@ class RealtimeNewsAggregator:
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY')
         self.newsapi_key = os.getenv('NEWSAPI_KEY')
 
+        # 并发聚合配置
+        self.concurrent = NEWS_CONCURRENT_ENABLED
+        self.source_timeout = NEWS_SOURCE_TIMEOUT
+        self.total_timeout = NEWS_TOTAL_TIMEOUT
+        # 单源超时覆盖，如 {'rss:...': 3}
+        self.source_timeouts: Dict[str, float] = {}
+
+        # 各新闻源统计：最近一次结果与累计命中/超时/耗时
+        self._stats_lock = threading.Lock()
+        self.last_source_stats: Dict[str, Dict[str, Any]] = {}
+        self.source_stats: Dict[str, Dict[str, Any]] = {}
+
     def get_realtime_stock_news(self, ticker: str, hours_back: int = 6, max_news: int = 10) -> List[NewsItem]:
         """
         获取实时股票新闻
@@ -59,6 +89,134 @@ class RealtimeNewsAggregator:
         """
         logger.info(f"[新闻聚合器] 开始获取 {ticker} 的实时新闻，回溯时间: {hours_back}小时")
         start_time = datetime.now(ZoneInfo(get_timezone_name()))
+
+        if self.concurrent:
+            all_news = self._collect_news_concurrently(ticker, hours_back)
+        else:
+            all_news = self._collect_news_sequentially(ticker, hours_back)
+
+        # 去重和排序
+        logger.info(f"[新闻聚合器] 开始对 {len(all_news)} 条新闻进行去重和排序")
+        dedup_start = datetime.now(ZoneInfo(get_timezone_name()))
+        unique_news = self._deduplicate_news(all_news)
+        sorted_news = sorted(unique_news, key=lambda x: x.publish_time, reverse=True)
+        dedup_time = (datetime.now(ZoneInfo(get_timezone_name())) - dedup_start).total_seconds()
+
+        # 记录去重结果
+        removed_count = len(all_news) - len(unique_news)
+        logger.info(f"[新闻聚合器] 新闻去重完成，移除了 {removed_count} 条重复新闻，剩余 {len(sorted_news)} 条，耗时: {dedup_time:.2f}秒")
+
+        # 记录总体情况
+        total_time = (datetime.now(ZoneInfo(get_timezone_name())) - start_time).total_seconds()
+        logger.info(f"[新闻聚合器] {ticker} 的新闻聚合完成，总共获取 {len(sorted_news)} 条新闻，总耗时: {total_time:.2f}秒")
+
+        # 限制新闻数量为最新的max_news条
+        if len(sorted_news) > max_news:
+            original_count = len(sorted_news)
+            sorted_news = sorted_news[:max_news]
+            logger.info(f"[新闻聚合器] 📰 新闻数量限制: 从{original_count}条限制为{max_news}条最新新闻")
+
+        # 记录一些新闻标题示例
+        if sorted_news:
+            sample_titles = [item.title for item in sorted_news[:3]]
+            logger.info(f"[新闻聚合器] 新闻标题示例: {', '.join(sample_titles)}")
+
+        return sorted_news
+
+    def _news_sources(self, ticker: str, hours_back: int) -> List[Tuple[str, Callable[[], List[NewsItem]]]]:
+        """并发模式下的新闻源列表（未配置密钥的源直接跳过）"""
+        sources: List[Tuple[str, Callable[[], List[NewsItem]]]] = []
+        if self.finnhub_key:
+            sources.append(('FinnHub', lambda: self._get_finnhub_realtime_news(ticker, hours_back)))
+        if self.alpha_vantage_key:
+            sources.append(('Alpha Vantage', lambda: self._get_alpha_vantage_news(ticker, hours_back)))
+        if self.newsapi_key:
+            sources.append(('NewsAPI', lambda: self._get_newsapi_news(ticker, hours_back)))
+        sources.append(('东方财富', lambda: self._get_eastmoney_news(ticker, hours_back)))
+        for rss_url in self.RSS_SOURCES:
+            sources.append((f'rss:{rss_url}', lambda url=rss_url: self._parse_rss_feed(url, ticker, hours_back)))
+        return sources
+
+    def _collect_news_concurrently(self, ticker: str, hours_back: int) -> List[NewsItem]:
+        """
+        并行查询所有新闻源
+
+        每个源有各自的截止时间（不超过整体截止时间）；到达整体截止时间时返回已完成源的结果，
+        未完成的源记为超时，其请求在后台线程中自然结束。
+        """
+        sources = self._news_sources(ticker, hours_back)
+        logger.info(f"[新闻聚合器] 并发查询 {len(sources)} 个新闻源，单源超时 {self.source_timeout}秒，整体截止 {self.total_timeout}秒")
+
+        started = time.monotonic()
+        futures = {}
+        deadlines = {}
+        for name, fetch in sources:
+            future = _news_executor.submit(self._timed_fetch, fetch)
+            futures[future] = name
+            deadlines[future] = started + min(self.source_timeouts.get(name, self.source_timeout), self.total_timeout)
+
+        all_news: List[NewsItem] = []
+        stats: Dict[str, Dict[str, Any]] = {}
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            # 超过各自截止时间的源不再等待
+            for future in [f for f in pending if deadlines[f] <= now]:
+                pending.discard(future)
+                stats[futures[future]] = {'status': 'timeout', 'count': 0, 'latency': now - started}
+            if not pending:
+                break
+            done, pending = wait(pending, timeout=min(deadlines[f] for f in pending) - now,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    items, latency = future.result()
+                    all_news.extend(items)
+                    stats[name] = {'status': 'hit' if items else 'empty', 'count': len(items), 'latency': latency}
+                except Exception as e:
+                    logger.error(f"[新闻聚合器] {name} 获取失败: {e}")
+                    stats[name] = {'status': 'error', 'count': 0, 'latency': time.monotonic() - started}
+
+        self._record_source_stats(stats)
+        summary = ', '.join(f"{name}={st['status']}({st['count']}条/{st['latency']:.2f}秒)" for name, st in stats.items())
+        logger.info(f"[新闻聚合器] 并发聚合完成，耗时 {time.monotonic() - started:.2f}秒，各源: {summary}")
+        return all_news
+
+    @staticmethod
+    def _timed_fetch(fetch: Callable[[], List[NewsItem]]) -> Tuple[List[NewsItem], float]:
+        started = time.monotonic()
+        items = fetch() or []
+        return items, time.monotonic() - started
+
+    def _record_source_stats(self, stats: Dict[str, Dict[str, Any]]):
+        with self._stats_lock:
+            self.last_source_stats = stats
+            for name, st in stats.items():
+                total = self.source_stats.setdefault(name, {
+                    'requests': 0, 'hits': 0, 'empty': 0, 'timeouts': 0, 'errors': 0,
+                    'items': 0, 'total_latency': 0.0,
+                })
+                total['requests'] += 1
+                total[{'hit': 'hits', 'empty': 'empty', 'timeout': 'timeouts', 'error': 'errors'}[st['status']]] += 1
+                total['items'] += st['count']
+                total['total_latency'] += st['latency']
+
+    def get_source_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各新闻源累计统计（命中率、平均耗时）"""
+        with self._stats_lock:
+            result = {}
+            for name, total in self.source_stats.items():
+                requests_count = total['requests'] or 1
+                result[name] = {
+                    **total,
+                    'hit_rate': total['hits'] / requests_count,
+                    'avg_latency': total['total_latency'] / requests_count,
+                }
+            return result
+
+    def _collect_news_sequentially(self, ticker: str, hours_back: int) -> List[NewsItem]:
+        """依次查询各新闻源（顺序模式）"""
         all_news = []
 
         # 1. FinnHub实时新闻 (最高优先级)
@@ -116,33 +274,7 @@ class RealtimeNewsAggregator:
 
         all_news.extend(chinese_news)
 
-        # 去重和排序
-        logger.info(f"[新闻聚合器] 开始对 {len(all_news)} 条新闻进行去重和排序")
-        dedup_start = datetime.now(ZoneInfo(get_timezone_name()))
-        unique_news = self._deduplicate_news(all_news)
-        sorted_news = sorted(unique_news, key=lambda x: x.publish_time, reverse=True)
-        dedup_time = (datetime.now(ZoneInfo(get_timezone_name())) - dedup_start).total_seconds()
-
-        # 记录去重结果
-        removed_count = len(all_news) - len(unique_news)
-        logger.info(f"[新闻聚合器] 新闻去重完成，移除了 {removed_count} 条重复新闻，剩余 {len(sorted_news)} 条，耗时: {dedup_time:.2f}秒")
-
-        # 记录总体情况
-        total_time = (datetime.now(ZoneInfo(get_timezone_name())) - start_time).total_seconds()
-        logger.info(f"[新闻聚合器] {ticker} 的新闻聚合完成，总共获取 {len(sorted_news)} 条新闻，总耗时: {total_time:.2f}秒")
-
-        # 限制新闻数量为最新的max_news条
-        if len(sorted_news) > max_news:
-            original_count = len(sorted_news)
-            sorted_news = sorted_news[:max_news]
-            logger.info(f"[新闻聚合器] 📰 新闻数量限制: 从{original_count}条限制为{max_news}条最新新闻")
-
-        # 记录一些新闻标题示例
-        if sorted_news:
-            sample_titles = [item.title for item in sorted_news[:3]]
-            logger.info(f"[新闻聚合器] 新闻标题示例: {', '.join(sample_titles)}")
-
-        return sorted_news
+        return all_news
 
     def _get_finnhub_realtime_news(self, ticker: str, hours_back: int) -> List[NewsItem]:
         """获取FinnHub实时新闻"""
@@ -163,7 +295,7 @@ class RealtimeNewsAggregator:
                 'token': self.finnhub_key
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = requests.get(url, params=params, headers=self.headers, timeout=self.source_timeout)
             response.raise_for_status()
 
             news_data = response.json()
@@ -208,7 +340,7 @@ class RealtimeNewsAggregator:
                 'limit': 50
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = requests.get(url, params=params, headers=self.headers, timeout=self.source_timeout)
             response.raise_for_status()
 
             data = response.json()
@@ -268,7 +400,7 @@ class RealtimeNewsAggregator:
                 'apiKey': self.newsapi_key
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = requests.get(url, params=params, headers=self.headers, timeout=self.source_timeout)
             response.raise_for_status()
 
             data = response.json()
@@ -309,90 +441,13 @@ class RealtimeNewsAggregator:
         try:
             news_items = []
 
-            # 1. 尝试使用AKShare获取东方财富个股新闻
-            try:
-                logger.info(f"[中文财经新闻] 尝试通过 AKShare Provider 获取新闻")
-                from tradingagents.dataflows.providers.china.akshare import AKShareProvider
-
-                provider = AKShareProvider()
-
-                # 处理股票代码格式
-                # 如果是美股代码，不使用东方财富新闻
-                if '.' in ticker and any(suffix in ticker for suffix in ['.US', '.N', '.O', '.NYSE', '.NASDAQ']):
-                    logger.info(f"[中文财经新闻] 检测到美股代码 {ticker}，跳过东方财富新闻获取")
-                else:
-                    # 处理A股和港股代码
-                    clean_ticker = ticker.replace('.SH', '').replace('.SZ', '').replace('.SS', '')\
-                                    .replace('.HK', '').replace('.XSHE', '').replace('.XSHG', '')
-
-                    # 获取东方财富新闻
-                    logger.info(f"[中文财经新闻] 开始获取 {clean_ticker} 的东方财富新闻")
-                    em_start_time = datetime.now(ZoneInfo(get_timezone_name()))
-                    news_df = provider.get_stock_news_sync(symbol=clean_ticker)
-
-                    if not news_df.empty:
-                        logger.info(f"[中文财经新闻] 东方财富返回 {len(news_df)} 条新闻数据，开始处理")
-                        processed_count = 0
-                        skipped_count = 0
-                        error_count = 0
-
-                        # 转换为NewsItem格式
-                        for _, row in news_df.iterrows():
-                            try:
-                                # 解析时间
-                                time_str = row.get('时间', '')
-                                if time_str:
-                                    # 尝试解析时间格式，可能是'2023-01-01 12:34:56'格式
-                                    try:
-                                        publish_time = datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S').replace(tzinfo=ZoneInfo(get_timezone_name()))
-                                    except:
-                                        # 尝试其他可能的格式
-                                        try:
-                                            publish_time = datetime.strptime(time_str, '%Y-%m-%d').replace(tzinfo=ZoneInfo(get_timezone_name()))
-                                        except:
-                                            logger.warning(f"[中文财经新闻] 无法解析时间格式: {time_str}，使用当前时间")
-                                            publish_time = datetime.now(ZoneInfo(get_timezone_name()))
-                                else:
-                                    logger.warning(f"[中文财经新闻] 新闻时间为空，使用当前时间")
-                                    publish_time = datetime.now(ZoneInfo(get_timezone_name()))
-
-                                # 检查时效性
-                                if publish_time < datetime.now(ZoneInfo(get_timezone_name())) - timedelta(hours=hours_back):
-                                    skipped_count += 1
-                                    continue
-
-                                # 评估紧急程度
-                                title = row.get('标题', '')
-                                content = row.get('内容', '')
-                                urgency = self._assess_news_urgency(title, content)
-
-                                news_items.append(NewsItem(
-                                    title=title,
-                                    content=content,
-                                    source='东方财富',
-                                    publish_time=publish_time,
-                                    url=row.get('链接', ''),
-                                    urgency=urgency,
-                                    relevance_score=self._calculate_relevance(title, ticker)
-                                ))
-                                processed_count += 1
-                            except Exception as item_e:
-                                logger.error(f"[中文财经新闻] 处理东方财富新闻项目失败: {item_e}")
-                                error_count += 1
-                                continue
-
-                        em_time = (datetime.now(ZoneInfo(get_timezone_name())) - em_start_time).total_seconds()
-                        logger.info(f"[中文财经新闻] 东方财富新闻处理完成，成功: {processed_count}条，跳过: {skipped_count}条，错误: {error_count}条，耗时: {em_time:.2f}秒")
-            except Exception as ak_e:
-                logger.error(f"[中文财经新闻] 获取东方财富新闻失败: {ak_e}")
+            # 1. 东方财富个股新闻（AKShare）
+            news_items.extend(self._get_eastmoney_news(ticker, hours_back))
 
             # 2. 财联社RSS (如果可用)
             logger.info(f"[中文财经新闻] 开始获取财联社RSS新闻")
             rss_start_time = datetime.now(ZoneInfo(get_timezone_name()))
-            rss_sources = [
-                "https://www.cls.cn/api/sw?app=CailianpressWeb&os=web&sv=7.7.5",
-                # 可以添加更多RSS源
-            ]
+            rss_sources = self.RSS_SOURCES
 
             rss_success_count = 0
             rss_error_count = 0
@@ -431,6 +486,87 @@ class RealtimeNewsAggregator:
             logger.error(f"[中文财经新闻] 中文财经新闻获取失败: {e}")
             return []
 
+    def _get_eastmoney_news(self, ticker: str, hours_back: int) -> List[NewsItem]:
+        """获取东方财富个股新闻（通过 AKShare Provider）"""
+        news_items = []
+        try:
+            logger.info(f"[中文财经新闻] 尝试通过 AKShare Provider 获取新闻")
+            from tradingagents.dataflows.providers.china.akshare import AKShareProvider
+
+            provider = AKShareProvider()
+
+            # 处理股票代码格式
+            # 如果是美股代码，不使用东方财富新闻
+            if '.' in ticker and any(suffix in ticker for suffix in ['.US', '.N', '.O', '.NYSE', '.NASDAQ']):
+                logger.info(f"[中文财经新闻] 检测到美股代码 {ticker}，跳过东方财富新闻获取")
+            else:
+                # 处理A股和港股代码
+                clean_ticker = ticker.replace('.SH', '').replace('.SZ', '').replace('.SS', '')\
+                                .replace('.HK', '').replace('.XSHE', '').replace('.XSHG', '')
+
+                # 获取东方财富新闻
+                logger.info(f"[中文财经新闻] 开始获取 {clean_ticker} 的东方财富新闻")
+                em_start_time = datetime.now(ZoneInfo(get_timezone_name()))
+                news_df = provider.get_stock_news_sync(symbol=clean_ticker)
+
+                if not news_df.empty:
+                    logger.info(f"[中文财经新闻] 东方财富返回 {len(news_df)} 条新闻数据，开始处理")
+                    processed_count = 0
+                    skipped_count = 0
+                    error_count = 0
+
+                    # 转换为NewsItem格式
+                    for _, row in news_df.iterrows():
+                        try:
+                            # 解析时间
+                            time_str = row.get('时间', '')
+                            if time_str:
+                                # 尝试解析时间格式，可能是'2023-01-01 12:34:56'格式
+                                try:
+                                    publish_time = datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S').replace(tzinfo=ZoneInfo(get_timezone_name()))
+                                except:
+                                    # 尝试其他可能的格式
+                                    try:
+                                        publish_time = datetime.strptime(time_str, '%Y-%m-%d').replace(tzinfo=ZoneInfo(get_timezone_name()))
+                                    except:
+                                        logger.warning(f"[中文财经新闻] 无法解析时间格式: {time_str}，使用当前时间")
+                                        publish_time = datetime.now(ZoneInfo(get_timezone_name()))
+                            else:
+                                logger.warning(f"[中文财经新闻] 新闻时间为空，使用当前时间")
+                                publish_time = datetime.now(ZoneInfo(get_timezone_name()))
+
+                            # 检查时效性
+                            if publish_time < datetime.now(ZoneInfo(get_timezone_name())) - timedelta(hours=hours_back):
+                                skipped_count += 1
+                                continue
+
+                            # 评估紧急程度
+                            title = row.get('标题', '')
+                            content = row.get('内容', '')
+                            urgency = self._assess_news_urgency(title, content)
+
+                            news_items.append(NewsItem(
+                                title=title,
+                                content=content,
+                                source='东方财富',
+                                publish_time=publish_time,
+                                url=row.get('链接', ''),
+                                urgency=urgency,
+                                relevance_score=self._calculate_relevance(title, ticker)
+                            ))
+                            processed_count += 1
+                        except Exception as item_e:
+                            logger.error(f"[中文财经新闻] 处理东方财富新闻项目失败: {item_e}")
+                            error_count += 1
+                            continue
+
+                    em_time = (datetime.now(ZoneInfo(get_timezone_name())) - em_start_time).total_seconds()
+                    logger.info(f"[中文财经新闻] 东方财富新闻处理完成，成功: {processed_count}条，跳过: {skipped_count}条，错误: {error_count}条，耗时: {em_time:.2f}秒")
+        except Exception as ak_e:
+            logger.error(f"[中文财经新闻] 获取东方财富新闻失败: {ak_e}")
+
+        return news_items
+
     def _parse_rss_feed(self, rss_url: str, ticker: str, hours_back: int) -> List[NewsItem]:
         """解析RSS源"""
         logger.info(f"[RSS解析] 开始解析RSS源: {rss_url}，股票: {ticker}，回溯时间: {hours_back}小时")
@@ -574,8 +710,10 @@ class RealtimeNewsAggregator:
         start_time = datetime.now(ZoneInfo(get_timezone_name()))
 
         seen_titles = set()
+        near_index = NearDuplicateIndex()
         unique_news = []
         duplicate_count = 0
+        near_duplicate_count = 0
         short_title_count = 0
 
         for item in news_items:
@@ -594,14 +732,22 @@ class RealtimeNewsAggregator:
                 duplicate_count += 1
                 continue
 
-            # 添加到结果集
             seen_titles.add(title_key)
+
+            # 近似重复（转载稿、来源后缀不同、措辞微调）
+            duplicate_of = near_index.check_and_add(str(len(seen_titles)), item.title, item.content)
+            if duplicate_of is not None:
+                logger.debug(f"[新闻去重] 检测到近似重复新闻: '{item.title[:50]}...'，来源: {item.source}")
+                near_duplicate_count += 1
+                continue
+
+            # 添加到结果集
             unique_news.append(item)
 
         # 记录去重结果
         time_taken = (datetime.now(ZoneInfo(get_timezone_name())) - start_time).total_seconds()
         logger.info(f"[新闻去重] 去重完成，原始新闻: {len(news_items)}条，去重后: {len(unique_news)}条，")
-        logger.info(f"[新闻去重] 去除重复: {duplicate_count}条，标题过短: {short_title_count}条，耗时: {time_taken:.2f}秒")
+        logger.info(f"[新闻去重] 去除重复: {duplicate_count}条，近似重复: {near_duplicate_count}条，标题过短: {short_title_count}条，耗时: {time_taken:.2f}秒")
 
         return unique_news
 
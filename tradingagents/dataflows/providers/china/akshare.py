@@ -9,6 +9,7 @@ from typing import Dict, Any, List, Optional, Union
 import pandas as pd
 
 from ..base_provider import BaseStockDataProvider
+from .spot_snapshot import get_spot_snapshot_service
 
 logger = logging.getLogger(__name__)
 
@@ -575,107 +576,58 @@ class AKShareProvider(BaseStockDataProvider):
             try:
                 logger.debug(f"📊 批量获取 {len(codes)} 只股票的实时行情... (尝试 {attempt + 1}/{max_retries})")
 
-                # 优先使用新浪财经接口（更稳定，不容易被封）
-                def fetch_spot_data_sina():
-                    import time
-                    time.sleep(0.3)  # 添加延迟避免频率限制
-                    return self.ak.stock_zh_a_spot()
-
+                # 从进程内共享的全市场快照读取（优先新浪财经，失败时回退到东方财富）
+                snapshot_service = get_spot_snapshot_service()
                 try:
-                    spot_df = await asyncio.to_thread(fetch_spot_data_sina)
-                    data_source = "sina"
-                    logger.debug("✅ 使用新浪财经接口获取数据")
+                    snapshot = await asyncio.to_thread(snapshot_service.get_snapshot, "sina")
+                    logger.debug("✅ 使用新浪财经快照")
                 except Exception as e:
                     logger.warning(f"⚠️ 新浪财经接口失败: {e}，尝试东方财富接口...")
-                    # 回退到东方财富接口
-                    def fetch_spot_data_em():
-                        import time
-                        time.sleep(0.5)
-                        return self.ak.stock_zh_a_spot_em()
-                    spot_df = await asyncio.to_thread(fetch_spot_data_em)
-                    data_source = "eastmoney"
-                    logger.debug("✅ 使用东方财富接口获取数据")
-
-                if spot_df is None or spot_df.empty:
+                    snapshot = await asyncio.to_thread(snapshot_service.get_snapshot, "eastmoney")
+                    logger.debug("✅ 使用东方财富快照")
+
+                if snapshot is None or len(snapshot) == 0:
                     logger.warning("⚠️ 全市场快照为空")
                     if attempt < max_retries - 1:
                         await asyncio.sleep(retry_delay)
                         continue
                     return {}
 
-                # 构建代码到行情的映射
+                # 按代码索引查表（支持带前缀和不带前缀的代码）
                 quotes_map = {}
                 codes_set = set(codes)
-
-                # 构建代码映射表（支持带前缀的代码匹配）
-                # 例如：sh600000 -> 600000, sz000001 -> 000001
-                code_mapping = {}
-                for code in codes:
-                    code_mapping[code] = code  # 原始代码
-                    # 添加可能的前缀变体
-                    for prefix in ['sh', 'sz', 'bj']:
-                        code_mapping[f"{prefix}{code}"] = code
-
-                for _, row in spot_df.iterrows():
-                    raw_code = str(row.get("代码", ""))
-
-                    # 尝试匹配代码（支持带前缀和不带前缀）
-                    matched_code = None
-                    if raw_code in code_mapping:
-                        matched_code = code_mapping[raw_code]
-                    elif raw_code in codes_set:
-                        matched_code = raw_code
-
-                    if matched_code:
-                        quotes_data = {
-                            "name": str(row.get("名称", f"股票{matched_code}")),
-                            "price": self._safe_float(row.get("最新价", 0)),
-                            "change": self._safe_float(row.get("涨跌额", 0)),
-                            "change_percent": self._safe_float(row.get("涨跌幅", 0)),
-                            "volume": self._safe_int(row.get("成交量", 0)),
-                            "amount": self._safe_float(row.get("成交额", 0)),
-                            "open": self._safe_float(row.get("今开", 0)),
-                            "high": self._safe_float(row.get("最高", 0)),
-                            "low": self._safe_float(row.get("最低", 0)),
-                            "pre_close": self._safe_float(row.get("昨收", 0)),
-                            # 🔥 新增：财务指标字段
-                            "turnover_rate": self._safe_float(row.get("换手率", None)),  # 换手率（%）
-                            "volume_ratio": self._safe_float(row.get("量比", None)),  # 量比
-                            "pe": self._safe_float(row.get("市盈率-动态", None)),  # 动态市盈率
-                            "pb": self._safe_float(row.get("市净率", None)),  # 市净率
-                            "total_mv": self._safe_float(row.get("总市值", None)),  # 总市值（元）
-                            "circ_mv": self._safe_float(row.get("流通市值", None)),  # 流通市值（元）
-                        }
-
-                        # 转换为标准化字典（使用匹配后的代码）
-                        quotes_map[matched_code] = {
-                            "code": matched_code,
-                            "symbol": matched_code,
-                            "name": quotes_data.get("name", f"股票{matched_code}"),
-                            "price": float(quotes_data.get("price", 0)),
-                            "change": float(quotes_data.get("change", 0)),
-                            "change_percent": float(quotes_data.get("change_percent", 0)),
-                            "volume": int(quotes_data.get("volume", 0)),
-                            "amount": float(quotes_data.get("amount", 0)),
-                            "open_price": float(quotes_data.get("open", 0)),
-                            "high_price": float(quotes_data.get("high", 0)),
-                            "low_price": float(quotes_data.get("low", 0)),
-                            "pre_close": float(quotes_data.get("pre_close", 0)),
-                            # 🔥 新增：财务指标字段
-                            "turnover_rate": quotes_data.get("turnover_rate"),  # 换手率（%）
-                            "volume_ratio": quotes_data.get("volume_ratio"),  # 量比
-                            "pe": quotes_data.get("pe"),  # 动态市盈率
-                            "pe_ttm": quotes_data.get("pe"),  # TTM市盈率（与动态市盈率相同）
-                            "pb": quotes_data.get("pb"),  # 市净率
-                            "total_mv": quotes_data.get("total_mv") / 1e8 if quotes_data.get("total_mv") else None,  # 总市值（转换为亿元）
-                            "circ_mv": quotes_data.get("circ_mv") / 1e8 if quotes_data.get("circ_mv") else None,  # 流通市值（转换为亿元）
-                            # 扩展字段
-                            "full_symbol": self._get_full_symbol(matched_code),
-                            "market_info": self._get_market_info(matched_code),
-                            "data_source": "akshare",
-                            "last_sync": datetime.now(timezone.utc),
-                            "sync_status": "success"
-                        }
+                for matched_code, row in snapshot.get_many(codes).items():
+                    quotes_data = self._parse_spot_row(row, matched_code)
+
+                    # 转换为标准化字典（使用匹配后的代码）
+                    quotes_map[matched_code] = {
+                        "code": matched_code,
+                        "symbol": matched_code,
+                        "name": quotes_data.get("name", f"股票{matched_code}"),
+                        "price": float(quotes_data.get("price", 0)),
+                        "change": float(quotes_data.get("change", 0)),
+                        "change_percent": float(quotes_data.get("change_percent", 0)),
+                        "volume": int(quotes_data.get("volume", 0)),
+                        "amount": float(quotes_data.get("amount", 0)),
+                        "open_price": float(quotes_data.get("open", 0)),
+                        "high_price": float(quotes_data.get("high", 0)),
+                        "low_price": float(quotes_data.get("low", 0)),
+                        "pre_close": float(quotes_data.get("pre_close", 0)),
+                        # 🔥 新增：财务指标字段
+                        "turnover_rate": quotes_data.get("turnover_rate"),  # 换手率（%）
+                        "volume_ratio": quotes_data.get("volume_ratio"),  # 量比
+                        "pe": quotes_data.get("pe"),  # 动态市盈率
+                        "pe_ttm": quotes_data.get("pe"),  # TTM市盈率（与动态市盈率相同）
+                        "pb": quotes_data.get("pb"),  # 市净率
+                        "total_mv": quotes_data.get("total_mv") / 1e8 if quotes_data.get("total_mv") else None,  # 总市值（转换为亿元）
+                        "circ_mv": quotes_data.get("circ_mv") / 1e8 if quotes_data.get("circ_mv") else None,  # 流通市值（转换为亿元）
+                        # 扩展字段
+                        "full_symbol": self._get_full_symbol(matched_code),
+                        "market_info": self._get_market_info(matched_code),
+                        "data_source": "akshare",
+                        "last_sync": datetime.now(timezone.utc),
+                        "sync_status": "success"
+                    }
 
                 found_count = len(quotes_map)
                 missing_count = len(codes) - found_count
@@ -703,7 +655,8 @@ class AKShareProvider(BaseStockDataProvider):
         """
         获取单个股票实时行情
 
-        🔥 策略：使用 stock_bid_ask_em 接口获取单个股票的实时行情报价
+        🔥 策略：优先查询进程内未过期的全市场快照；没有快照时
+        使用 stock_bid_ask_em 接口获取单个股票的实时行情报价
         - 优点：只获取单个股票数据，速度快，不浪费资源
         - 适用场景：手动同步单个股票
 
@@ -717,6 +670,14 @@ class AKShareProvider(BaseStockDataProvider):
             return None
 
         try:
+            # 已有未过期的全市场快照时直接查表，避免额外请求
+            snapshot = get_spot_snapshot_service().peek("eastmoney")
+            row = snapshot.get(code) if snapshot is not None else None
+            if row is not None:
+                quotes = self._build_quotes_from_spot_row(row, code)
+                logger.info(f"✅ {code} 实时行情命中全市场快照: 最新价={quotes['price']}, 涨跌幅={quotes['change_percent']}%")
+                return quotes
+
             logger.info(f"📈 使用 stock_bid_ask_em 接口获取 {code} 实时行情...")
 
             # 🔥 使用 stock_bid_ask_em 接口获取单个股票实时行情
@@ -799,40 +760,12 @@ class AKShareProvider(BaseStockDataProvider):
     async def _get_realtime_quotes_data(self, code: str) -> Dict[str, Any]:
         """获取实时行情数据"""
         try:
-            # 方法1: 获取A股实时行情
-            def fetch_spot_data():
-                return self.ak.stock_zh_a_spot_em()
-
+            # 方法1: 从共享的A股全市场快照中查表
             try:
-                spot_df = await asyncio.to_thread(fetch_spot_data)
-
-                if spot_df is not None and not spot_df.empty:
-                    # 查找对应股票
-                    stock_data = spot_df[spot_df['代码'] == code]
-
-                    if not stock_data.empty:
-                        row = stock_data.iloc[0]
-
-                        # 解析行情数据
-                        return {
-                            "name": str(row.get("名称", f"股票{code}")),
-                            "price": self._safe_float(row.get("最新价", 0)),
-                            "change": self._safe_float(row.get("涨跌额", 0)),
-                            "change_percent": self._safe_float(row.get("涨跌幅", 0)),
-                            "volume": self._safe_int(row.get("成交量", 0)),
-                            "amount": self._safe_float(row.get("成交额", 0)),
-                            "open": self._safe_float(row.get("今开", 0)),
-                            "high": self._safe_float(row.get("最高", 0)),
-                            "low": self._safe_float(row.get("最低", 0)),
-                            "pre_close": self._safe_float(row.get("昨收", 0)),
-                            # 🔥 新增：财务指标字段
-                            "turnover_rate": self._safe_float(row.get("换手率", None)),  # 换手率（%）
-                            "volume_ratio": self._safe_float(row.get("量比", None)),  # 量比
-                            "pe": self._safe_float(row.get("市盈率-动态", None)),  # 动态市盈率
-                            "pb": self._safe_float(row.get("市净率", None)),  # 市净率
-                            "total_mv": self._safe_float(row.get("总市值", None)),  # 总市值（元）
-                            "circ_mv": self._safe_float(row.get("流通市值", None)),  # 流通市值（元）
-                        }
+                snapshot = await asyncio.to_thread(get_spot_snapshot_service().get_snapshot, "eastmoney")
+                row = snapshot.get(code) if snapshot is not None else None
+                if row is not None:
+                    return self._parse_spot_row(row, code)
             except Exception as e:
                 logger.debug(f"获取{code}A股实时行情失败: {e}")
 
@@ -866,6 +799,69 @@ class AKShareProvider(BaseStockDataProvider):
             logger.debug(f"获取{code}实时行情数据失败: {e}")
             return {}
     
+    def _build_quotes_from_spot_row(self, row: Dict[str, Any], code: str) -> Dict[str, Any]:
+        """将东方财富快照行转换为 get_stock_quotes 的标准化格式"""
+        from datetime import datetime, timezone, timedelta
+        cn_tz = timezone(timedelta(hours=8))
+        now_cn = datetime.now(cn_tz)
+
+        data = self._parse_spot_row(row, code)
+        total_mv = data.get("total_mv")
+        circ_mv = data.get("circ_mv")
+        return {
+            "code": code,
+            "symbol": code,
+            "name": data["name"],
+            "price": data["price"],
+            "close": data["price"],
+            "current_price": data["price"],
+            "change": data["change"],
+            "change_percent": data["change_percent"],
+            "pct_chg": data["change_percent"],
+            "volume": data["volume"] * 100,  # 东方财富快照成交量单位为手，转换为股
+            "amount": data["amount"],
+            "open": data["open"],
+            "high": data["high"],
+            "low": data["low"],
+            "pre_close": data["pre_close"],
+            "turnover_rate": data["turnover_rate"],
+            "volume_ratio": data["volume_ratio"],
+            "pe": data["pe"],
+            "pe_ttm": data["pe"],
+            "pb": data["pb"],
+            "total_mv": total_mv / 1e8 if total_mv else None,  # 转换为亿元
+            "circ_mv": circ_mv / 1e8 if circ_mv else None,
+            "trade_date": now_cn.strftime("%Y-%m-%d"),
+            "updated_at": now_cn.isoformat(),
+            "full_symbol": self._get_full_symbol(code),
+            "market_info": self._get_market_info(code),
+            "data_source": "akshare",
+            "last_sync": datetime.now(timezone.utc),
+            "sync_status": "success"
+        }
+
+    def _parse_spot_row(self, row: Dict[str, Any], code: str) -> Dict[str, Any]:
+        """解析全市场快照中的一行行情数据"""
+        return {
+            "name": str(row.get("名称", f"股票{code}")),
+            "price": self._safe_float(row.get("最新价", 0)),
+            "change": self._safe_float(row.get("涨跌额", 0)),
+            "change_percent": self._safe_float(row.get("涨跌幅", 0)),
+            "volume": self._safe_int(row.get("成交量", 0)),
+            "amount": self._safe_float(row.get("成交额", 0)),
+            "open": self._safe_float(row.get("今开", 0)),
+            "high": self._safe_float(row.get("最高", 0)),
+            "low": self._safe_float(row.get("最低", 0)),
+            "pre_close": self._safe_float(row.get("昨收", 0)),
+            # 🔥 新增：财务指标字段
+            "turnover_rate": self._safe_float(row.get("换手率", None)),  # 换手率（%）
+            "volume_ratio": self._safe_float(row.get("量比", None)),  # 量比
+            "pe": self._safe_float(row.get("市盈率-动态", None)),  # 动态市盈率
+            "pb": self._safe_float(row.get("市净率", None)),  # 市净率
+            "total_mv": self._safe_float(row.get("总市值", None)),  # 总市值（元）
+            "circ_mv": self._safe_float(row.get("流通市值", None)),  # 流通市值（元）
+        }
+
     def _safe_float(self, value: Any) -> float:
         """安全转换为浮点数"""
         try:
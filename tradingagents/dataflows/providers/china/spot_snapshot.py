@@ -0,0 +1,186 @@
+"""
+A股全市场行情快照服务
+进程内共享 AKShare 全市场 spot 表：按间隔最多刷新一次，并发刷新合并为单个在途请求，
+并按6位代码建立索引，单只/批量查询都是 O(1) 查表。
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 快照刷新间隔（秒）
+DEFAULT_SPOT_SNAPSHOT_TTL = int(os.getenv("AKSHARE_SPOT_SNAPSHOT_TTL", "30"))
+
+# 两个接口返回的代码列名
+_CODE_COLUMNS = ("代码", "code", "symbol", "股票代码")
+
+
+def _fetch_eastmoney() -> pd.DataFrame:
+    import akshare as ak
+    return ak.stock_zh_a_spot_em()
+
+
+def _fetch_sina() -> pd.DataFrame:
+    import akshare as ak
+    return ak.stock_zh_a_spot()
+
+
+SPOT_FETCHERS: Dict[str, Callable[[], pd.DataFrame]] = {
+    "eastmoney": _fetch_eastmoney,
+    "sina": _fetch_sina,
+}
+
+
+def normalize_spot_codes(codes: pd.Series) -> pd.Series:
+    """标准化代码列：去掉交易所前缀（sh/sz/bj），补齐为6位"""
+    return codes.astype(str).str.strip().str.replace(r"\D", "", regex=True).str.zfill(6)
+
+
+@dataclass
+class SpotSnapshot:
+    """一次全市场快照及其代码索引"""
+
+    source: str
+    data: pd.DataFrame
+    fetched_at: float
+    rows: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, source: str, data: pd.DataFrame) -> "SpotSnapshot":
+        code_col = next((c for c in _CODE_COLUMNS if c in data.columns), None)
+        rows: Dict[str, Dict[str, Any]] = {}
+        if code_col is not None:
+            codes = normalize_spot_codes(data[code_col])
+            # 保留第一次出现的代码
+            for code, record in zip(codes, data.to_dict("records")):
+                if code and code != "000000" and code not in rows:
+                    rows[code] = record
+        else:
+            logger.error(f"AKShare {source} 快照缺少代码列: {list(data.columns)}")
+        return cls(source=source, data=data, fetched_at=time.time(), rows=rows)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """按代码获取一行原始数据（支持带交易所前缀的代码）"""
+        row = self.rows.get(code)
+        if row is None and code:
+            digits = "".join(filter(str.isdigit, str(code)))
+            row = self.rows.get(digits.zfill(6)) if digits else None
+        return row
+
+    def get_many(self, codes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取，返回 {请求代码: 原始行}，未找到的代码不出现在结果中"""
+        result = {}
+        for code in codes:
+            row = self.get(code)
+            if row is not None:
+                result[code] = row
+        return result
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class SpotSnapshotService:
+    """全市场快照服务（线程安全，单飞刷新）"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None,
+                 fetchers: Optional[Dict[str, Callable[[], pd.DataFrame]]] = None):
+        self.ttl_seconds = DEFAULT_SPOT_SNAPSHOT_TTL if ttl_seconds is None else ttl_seconds
+        self._fetchers = dict(fetchers or SPOT_FETCHERS)
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, SpotSnapshot] = {}
+        self._inflight: Dict[str, Future] = {}
+
+    def peek(self, source: str = "eastmoney", max_age: Optional[float] = None) -> Optional[SpotSnapshot]:
+        """返回未过期的快照，不触发刷新"""
+        max_age = self.ttl_seconds if max_age is None else max_age
+        with self._lock:
+            snapshot = self._snapshots.get(source)
+        if snapshot is not None and snapshot.age < max_age:
+            return snapshot
+        return None
+
+    def get_snapshot(self, source: str = "eastmoney", max_age: Optional[float] = None) -> Optional[SpotSnapshot]:
+        """
+        获取全市场快照；过期时刷新，同一时刻的并发刷新只会发出一次请求
+
+        Args:
+            source: "eastmoney" 或 "sina"
+            max_age: 可接受的最大快照年龄（秒），默认使用刷新间隔
+
+        Returns:
+            SpotSnapshot；接口返回空数据时为 None。接口异常会抛给所有等待者
+        """
+        if source not in self._fetchers:
+            raise ValueError(f"未知的快照数据源: {source}")
+        max_age = self.ttl_seconds if max_age is None else max_age
+
+        with self._lock:
+            snapshot = self._snapshots.get(source)
+            if snapshot is not None and snapshot.age < max_age:
+                return snapshot
+            future = self._inflight.get(source)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[source] = future
+
+        if not leader:
+            logger.debug(f"⏳ 等待在途的 AKShare {source} 快照刷新")
+            return future.result()
+
+        try:
+            started = time.time()
+            df = self._fetchers[source]()
+            if df is None or getattr(df, "empty", True):
+                logger.warning(f"⚠️ AKShare {source} 全市场快照为空")
+                snapshot = None
+            else:
+                snapshot = SpotSnapshot.build(source, df)
+                logger.info(f"📸 AKShare {source} 全市场快照已刷新: {len(snapshot)} 只, 耗时 {time.time() - started:.2f}秒")
+            with self._lock:
+                if snapshot is not None:
+                    self._snapshots[source] = snapshot
+                self._inflight.pop(source, None)
+            future.set_result(snapshot)
+            return snapshot
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(source, None)
+            future.set_exception(e)
+            raise
+
+    def invalidate(self, source: Optional[str] = None):
+        """丢弃缓存的快照"""
+        with self._lock:
+            if source is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(source, None)
+
+
+_spot_snapshot_service: Optional[SpotSnapshotService] = None
+_service_lock = threading.Lock()
+
+
+def get_spot_snapshot_service() -> SpotSnapshotService:
+    """获取进程内共享的全市场快照服务"""
+    global _spot_snapshot_service
+    if _spot_snapshot_service is None:
+        with _service_lock:
+            if _spot_snapshot_service is None:
+                _spot_snapshot_service = SpotSnapshotService()
+    return _spot_snapshot_service
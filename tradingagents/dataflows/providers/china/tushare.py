@@ -10,6 +10,7 @@ import logging
 
 from ..base_provider import BaseStockDataProvider
 from tradingagents.config.providers_config import get_provider_config
+from tradingagents.dataflows.news.near_duplicate import dedupe_news
 
 # 尝试导入tushare
 try:
@@ -949,7 +950,7 @@ class TushareProvider(BaseStockDataProvider):
         ])
 
     def _deduplicate_news(self, news_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """新闻去重"""
+        """新闻去重（标题精确去重 + SimHash 近似去重）"""
         seen_titles = set()
         unique_news = []
 
@@ -959,7 +960,11 @@ class TushareProvider(BaseStockDataProvider):
                 seen_titles.add(title)
                 unique_news.append(news)
 
-        return unique_news
+        return dedupe_news(
+            unique_news,
+            text_of=lambda news: (news.get('title', ''), news.get('content', '')),
+            key_of=lambda news: news.get('url', ''),
+        )
 
     def _analyze_news_sentiment(self, content: str, title: str) -> str:
         """分析新闻情绪"""
@@ -0,0 +1,277 @@
+"""
+多数据源执行层
+- 按优先级依次尝试数据源，记录每个数据源的耗时与成败
+- 熔断：连续失败达到阈值后在冷却期内跳过该数据源，冷却后放行一次试探请求（半开）
+  只有异常和调用方判定为数据源故障的结果计入失败；"该股票没有数据"（停牌、新股、代码无效）
+  不代表数据源不可用，记为成功但不采用，继续尝试下一个数据源
+- 对冲（可选）：当前数据源超过其 p95 耗时仍未返回时，并发发起下一个数据源，取最先返回的有效结果
+
+数据源调用均为同步函数；对冲模式在共享线程池中执行，被放弃的慢请求完成后仍会计入健康统计。
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 连续失败多少次后熔断
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("DATA_SOURCE_CIRCUIT_FAILURES", "3"))
+# 熔断冷却时间（秒），之后放行一次试探请求
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("DATA_SOURCE_CIRCUIT_COOLDOWN_SECONDS", "60"))
+# 是否默认启用对冲请求
+HEDGE_ENABLED = os.getenv("DATA_SOURCE_HEDGE_ENABLED", "false").lower() in ("true", "1", "yes")
+# 样本不足时的对冲延迟，以及对冲延迟下限（秒）
+HEDGE_DEFAULT_DELAY = float(os.getenv("DATA_SOURCE_HEDGE_DEFAULT_DELAY", "3.0"))
+HEDGE_MIN_DELAY = float(os.getenv("DATA_SOURCE_HEDGE_MIN_DELAY", "0.5"))
+HEDGE_WORKERS = int(os.getenv("DATA_SOURCE_HEDGE_WORKERS", "8"))
+
+# 每个数据源保留的耗时样本数，以及计算 p95 所需的最少样本数
+_LATENCY_WINDOW = 100
+_MIN_LATENCY_SAMPLES = 5
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+SourceCandidate = Tuple[str, Callable[[], Any]]
+
+
+class SourceHealth:
+    """单个数据源的耗时、错误统计与熔断状态"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = CIRCUIT_CLOSED
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def available(self, now: float) -> bool:
+        """是否可以调用（不改变状态）"""
+        if self.state == CIRCUIT_CLOSED:
+            return True
+        if self.state == CIRCUIT_OPEN:
+            return now - self.opened_at >= CIRCUIT_COOLDOWN_SECONDS
+        return not self._trial_in_flight
+
+    def acquire(self, now: float) -> bool:
+        """即将调用时获取许可：半开状态只放行一次试探请求"""
+        if not self.available(now):
+            return False
+        if self.state != CIRCUIT_CLOSED:
+            self.state = CIRCUIT_HALF_OPEN
+            self._trial_in_flight = True
+        return True
+
+    def record(self, ok: bool, latency: float, now: float):
+        self.latencies.append(latency)
+        if ok:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state != CIRCUIT_CLOSED:
+                logger.info(f"✅ [熔断恢复] 数据源 {self.name} 试探成功，恢复使用")
+            self.state = CIRCUIT_CLOSED
+            return
+
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == CIRCUIT_HALF_OPEN or self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+            if self.state != CIRCUIT_OPEN:
+                logger.warning(
+                    f"🔌 [熔断] 数据源 {self.name} 连续失败 {self.consecutive_failures} 次，"
+                    f"{CIRCUIT_COOLDOWN_SECONDS:.0f}秒内跳过"
+                )
+            self.state = CIRCUIT_OPEN
+            self.opened_at = now
+        self._trial_in_flight = False
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < _MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "p95_latency": self.p95(),
+            "samples": len(self.latencies),
+        }
+
+
+class SourceExecutor:
+    """按优先级（可对冲）执行多个数据源，返回第一个有效结果"""
+
+    _pool: Optional[ThreadPoolExecutor] = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, name: str):
+        self.name = name
+        self._health: Dict[str, SourceHealth] = {}
+        self._lock = threading.Lock()
+
+    def health(self, source: str) -> SourceHealth:
+        with self._lock:
+            health = self._health.get(source)
+            if health is None:
+                health = self._health[source] = SourceHealth(source)
+            return health
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: health.snapshot() for name, health in self._health.items()}
+
+    def hedge_delay(self, source: str) -> float:
+        """对冲延迟：该数据源的 p95 耗时（样本不足时使用默认值）"""
+        p95 = self.health(source).p95()
+        return max(HEDGE_MIN_DELAY, p95 if p95 is not None else HEDGE_DEFAULT_DELAY)
+
+    def run(
+        self,
+        candidates: Sequence[SourceCandidate],
+        is_good: Callable[[Any], bool],
+        hedge: Optional[bool] = None,
+        is_failure: Optional[Callable[[Any], bool]] = None,
+    ) -> Tuple[Any, Optional[str]]:
+        """
+        执行数据源候选列表
+
+        Args:
+            candidates: [(数据源名称, 无参调用)]，按优先级排序
+            is_good: 判断结果是否有效
+            hedge: 是否对冲（默认读取 DATA_SOURCE_HEDGE_ENABLED）
+            is_failure: 判断无效结果是否属于数据源故障（计入熔断）；默认所有无效结果都计入
+
+        Returns:
+            (结果, 数据源名称)；全部失败时返回 (最后一个无效结果或 None, None)
+        """
+        if not candidates:
+            return None, None
+        use_breakers = self._any_available(candidates)
+
+        def classify(result: Any) -> Tuple[bool, bool]:
+            if is_good(result):
+                return True, True
+            return False, is_failure is not None and not is_failure(result)
+
+        if hedge if hedge is not None else HEDGE_ENABLED:
+            return self._run_hedged(candidates, classify, use_breakers)
+        return self._run_sequential(candidates, classify, use_breakers)
+
+    def _any_available(self, candidates: Sequence[SourceCandidate]) -> bool:
+        now = time.monotonic()
+        if any(self.health(name).available(now) for name, _ in candidates):
+            return True
+        # 全部熔断时仍按原顺序尝试，避免直接失败
+        logger.warning(f"⚠️ [{self.name}] 所有数据源均已熔断，仍按优先级尝试")
+        return False
+
+    def _acquire(self, name: str, use_breakers: bool) -> bool:
+        health = self.health(name)
+        if not use_breakers:
+            return True
+        with self._lock:
+            acquired = health.acquire(time.monotonic())
+        if not acquired:
+            logger.info(f"⏭️ [{self.name}] 数据源 {name} 已熔断，跳过")
+        return acquired
+
+    def _call(self, name: str, fn: Callable[[], Any],
+              classify: Callable[[Any], Tuple[bool, bool]]) -> Tuple[bool, Any]:
+        """调用数据源；classify 返回 (结果是否采用, 数据源是否健康)"""
+        start = time.monotonic()
+        result = None
+        try:
+            result = fn()
+            ok, healthy = classify(result)
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.name}] 数据源 {name} 调用失败: {e}")
+            ok = healthy = False
+        now = time.monotonic()
+        with self._lock:
+            self._health[name].record(healthy, now - start, now)
+        return ok, result
+
+    def _run_sequential(self, candidates: Sequence[SourceCandidate], classify,
+                        use_breakers: bool) -> Tuple[Any, Optional[str]]:
+        last_result = None
+        for name, fn in candidates:
+            if not self._acquire(name, use_breakers):
+                continue
+            ok, result = self._call(name, fn, classify)
+            if ok:
+                return result, name
+            last_result = result if result is not None else last_result
+        return last_result, None
+
+    @classmethod
+    def _get_pool(cls) -> ThreadPoolExecutor:
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="source-hedge")
+            return cls._pool
+
+    def _run_hedged(self, candidates: Sequence[SourceCandidate], classify,
+                    use_breakers: bool) -> Tuple[Any, Optional[str]]:
+        pool = self._get_pool()
+        pending: Dict[Any, str] = {}
+        remaining = list(candidates)
+        last_result = None
+
+        def launch() -> Optional[str]:
+            while remaining:
+                name, fn = remaining.pop(0)
+                if self._acquire(name, use_breakers):
+                    pending[pool.submit(self._call, name, fn, classify)] = name
+                    return name
+            return None
+
+        latest = launch()
+        while pending:
+            timeout = self.hedge_delay(latest) if remaining else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = launch()
+                if hedged:
+                    logger.info(f"⏱️ [{self.name}] {latest} 超过 {timeout:.2f}秒未返回，对冲请求 {hedged}")
+                    latest = hedged
+                continue
+
+            failed = False
+            for future in done:
+                name = pending.pop(future)
+                ok, result = future.result()
+                if ok:
+                    if pending:
+                        logger.info(f"🏁 [{self.name}] 采用 {name} 的结果，放弃 {list(pending.values())}")
+                    return result, name
+                failed = True
+                last_result = result if result is not None else last_result
+            # 有数据源失败时立即尝试下一个，不再等待对冲延迟
+            if failed and remaining:
+                latest = launch() or latest
+        return last_result, None
+
+
+_executors: Dict[str, SourceExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_source_executor(name: str) -> SourceExecutor:
+    """按用途获取共享的执行器（同一用途的数据源共享健康统计）"""
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = SourceExecutor(name)
+        return executor
@@ -11,8 +11,13 @@ except ImportError:
     StockstatsUtils = None
     STOCKSTATS_AVAILABLE = False
 
+from .incremental import IndicatorState, compute_indicator_frame, INDICATOR_COLUMNS
+
 __all__ = [
     'StockstatsUtils',
     'STOCKSTATS_AVAILABLE',
+    'IndicatorState',
+    'compute_indicator_frame',
+    'INDICATOR_COLUMNS',
 ]
 
@@ -0,0 +1,241 @@
+"""
+增量技术指标计算
+为日线数据报告维护每只股票的指标状态（滚动窗口尾部、EMA/中国式SMA 累计量、最近几行指标），
+追加一根新K线只需 O(1) 更新，无需对整段历史重新计算。
+
+指标口径与 DataSourceManager._format_stock_data_response 原有的全量计算一致：
+- MA5/10/20/60、BOLL(20, 2)、RSI14：滚动窗口（min_periods=1）
+- RSI6/12/24：同花顺风格中国式SMA，等价于 ewm(com=N-1, adjust=True)
+- MACD(12, 26, 9)：ewm(span, adjust=False)，MACD 柱 = (DIF - DEA) * 2
+
+EMA/MACD/RSI6/12/24 依赖起算点：续算结果等于从状态锚点开始的全量计算，而不是对本次请求数据的全量计算，
+同一请求在不同进程或状态清除后可能得到不同数值。因此报告默认对请求数据全量计算，
+增量续算需通过 TA_INCREMENTAL_INDICATORS=true 显式开启。
+"""
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+MA_WINDOWS = (5, 10, 20, 60)
+RSI_CN_PERIODS = (6, 12, 24)
+RSI_WINDOW = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLL_WINDOW, BOLL_K = 20, 2
+# 报告只展示最近几行
+TAIL_ROWS = 5
+# 状态格式版本，口径变化时递增使旧状态失效
+STATE_VERSION = 1
+# 是否为报告启用持久化状态的增量续算（默认关闭，结果只取决于请求数据）
+INCREMENTAL_ENABLED = os.getenv('TA_INCREMENTAL_INDICATORS', 'false').lower() in ('true', '1', 'yes')
+
+INDICATOR_COLUMNS = [
+    'ma5', 'ma10', 'ma20', 'ma60',
+    'rsi6', 'rsi12', 'rsi24', 'rsi14',
+    'macd_dif', 'macd_dea', 'macd',
+    'boll_mid', 'boll_upper', 'boll_lower',
+]
+
+_CLOSE_BUFFER = max(max(MA_WINDOWS), BOLL_WINDOW)
+
+
+def _rsi(avg_gain: float, avg_loss: float) -> float:
+    if not avg_loss or math.isnan(avg_loss):
+        return float('nan')
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def _indicator_series(close: pd.Series) -> Dict[str, pd.Series]:
+    """全量计算指标及续算所需的中间序列"""
+    out: Dict[str, pd.Series] = {}
+    for n in MA_WINDOWS:
+        out[f'ma{n}'] = close.rolling(window=n, min_periods=1).mean()
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    out['gain'], out['loss'] = gain, loss
+
+    # 同花顺/通达信的RSI使用SMA函数，等价于pandas的ewm(com=N-1, adjust=True)
+    for n in RSI_CN_PERIODS:
+        avg_gain = gain.ewm(com=n - 1, adjust=True).mean()
+        avg_loss = loss.ewm(com=n - 1, adjust=True).mean()
+        out[f'avg_gain{n}'], out[f'avg_loss{n}'] = avg_gain, avg_loss
+        out[f'rsi{n}'] = 100 - (100 / (1 + avg_gain / avg_loss.replace(0, np.nan)))
+
+    gain14 = gain.rolling(window=RSI_WINDOW, min_periods=1).mean()
+    loss14 = loss.rolling(window=RSI_WINDOW, min_periods=1).mean()
+    out[f'rsi{RSI_WINDOW}'] = 100 - (100 / (1 + gain14 / loss14.replace(0, np.nan)))
+
+    ema_fast = close.ewm(span=MACD_FAST, adjust=False).mean()
+    ema_slow = close.ewm(span=MACD_SLOW, adjust=False).mean()
+    out['ema_fast'], out['ema_slow'] = ema_fast, ema_slow
+    out['macd_dif'] = ema_fast - ema_slow
+    out['macd_dea'] = out['macd_dif'].ewm(span=MACD_SIGNAL, adjust=False).mean()
+    out['macd'] = (out['macd_dif'] - out['macd_dea']) * 2
+
+    out['boll_mid'] = close.rolling(window=BOLL_WINDOW, min_periods=1).mean()
+    std = close.rolling(window=BOLL_WINDOW, min_periods=1).std()
+    out['boll_upper'] = out['boll_mid'] + BOLL_K * std
+    out['boll_lower'] = out['boll_mid'] - BOLL_K * std
+    return out
+
+
+def compute_indicator_frame(close: pd.Series) -> pd.DataFrame:
+    """全量计算报告使用的技术指标，返回与 close 同索引的 DataFrame"""
+    series = _indicator_series(close.astype(float))
+    return pd.DataFrame({col: series[col] for col in INDICATOR_COLUMNS}, index=close.index)
+
+
+@dataclass
+class IndicatorState:
+    """
+    单只股票的增量指标状态
+
+    anchor_date 为状态起算的第一根K线日期，last_date/last_close 为已计入的最后一根K线。
+    RSI6/12/24 的 adjust=True 加权平均以 (加权和, 权重和) 递推：S = x + (1-α)S, W = 1 + (1-α)W。
+    """
+
+    anchor_date: str
+    last_date: Optional[str] = None
+    last_close: Optional[float] = None
+    n_bars: int = 0
+    closes: List[float] = field(default_factory=list)
+    gains: List[float] = field(default_factory=list)
+    losses: List[float] = field(default_factory=list)
+    rsi_sums: Dict[str, List[float]] = field(default_factory=dict)
+    ema_fast: Optional[float] = None
+    ema_slow: Optional[float] = None
+    dea: Optional[float] = None
+    tail: List[Dict[str, Any]] = field(default_factory=list)
+    version: int = STATE_VERSION
+
+    @classmethod
+    def from_frame(cls, dates: Sequence[str], close: pd.Series) -> "IndicatorState":
+        """对完整序列做一次向量化计算并提取续算状态"""
+        close = pd.Series(np.asarray(close, dtype=float))
+        series = _indicator_series(close)
+        n = len(close)
+
+        rsi_sums = {}
+        for period in RSI_CN_PERIODS:
+            alpha = 1.0 / period
+            weight = (1 - (1 - alpha) ** n) / alpha
+            rsi_sums[str(period)] = [
+                float(series[f'avg_gain{period}'].iloc[-1]) * weight,
+                float(series[f'avg_loss{period}'].iloc[-1]) * weight,
+                weight,
+            ]
+
+        tail_start = max(0, n - TAIL_ROWS)
+        tail = [
+            {'date': dates[i], **{col: float(series[col].iloc[i]) for col in INDICATOR_COLUMNS}}
+            for i in range(tail_start, n)
+        ]
+        return cls(
+            anchor_date=dates[0],
+            last_date=dates[-1],
+            last_close=float(close.iloc[-1]),
+            n_bars=n,
+            closes=close.iloc[-_CLOSE_BUFFER:].tolist(),
+            gains=series['gain'].iloc[-RSI_WINDOW:].astype(float).tolist(),
+            losses=series['loss'].iloc[-RSI_WINDOW:].astype(float).tolist(),
+            rsi_sums=rsi_sums,
+            ema_fast=float(series['ema_fast'].iloc[-1]),
+            ema_slow=float(series['ema_slow'].iloc[-1]),
+            dea=float(series['macd_dea'].iloc[-1]),
+            tail=tail,
+        )
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> Optional["IndicatorState"]:
+        if not payload or payload.get('version') != STATE_VERSION:
+            return None
+        try:
+            return cls(**payload)
+        except TypeError:
+            return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def update(self, bar_date: str, close: float) -> Dict[str, Any]:
+        """追加一根K线，O(1) 更新全部指标并返回该行指标"""
+        close = float(close)
+        if self.n_bars == 0:
+            gain = loss = 0.0
+            self.ema_fast = self.ema_slow = close
+            self.dea = 0.0
+            self.rsi_sums = {str(p): [0.0, 0.0, 0.0] for p in RSI_CN_PERIODS}
+        else:
+            delta = close - self.last_close
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            fast = 2 / (MACD_FAST + 1)
+            slow = 2 / (MACD_SLOW + 1)
+            self.ema_fast = fast * close + (1 - fast) * self.ema_fast
+            self.ema_slow = slow * close + (1 - slow) * self.ema_slow
+            signal = 2 / (MACD_SIGNAL + 1)
+            self.dea = signal * (self.ema_fast - self.ema_slow) + (1 - signal) * self.dea
+
+        self.closes = (self.closes + [close])[-_CLOSE_BUFFER:]
+        self.gains = (self.gains + [gain])[-RSI_WINDOW:]
+        self.losses = (self.losses + [loss])[-RSI_WINDOW:]
+
+        row: Dict[str, Any] = {'date': bar_date}
+        for n in MA_WINDOWS:
+            row[f'ma{n}'] = float(np.mean(self.closes[-n:]))
+
+        for period in RSI_CN_PERIODS:
+            decay = 1 - 1.0 / period
+            gain_sum, loss_sum, weight = self.rsi_sums[str(period)]
+            gain_sum = gain + decay * gain_sum
+            loss_sum = loss + decay * loss_sum
+            weight = 1 + decay * weight
+            self.rsi_sums[str(period)] = [gain_sum, loss_sum, weight]
+            row[f'rsi{period}'] = _rsi(gain_sum / weight, loss_sum / weight)
+        row[f'rsi{RSI_WINDOW}'] = _rsi(float(np.mean(self.gains)), float(np.mean(self.losses)))
+
+        dif = self.ema_fast - self.ema_slow
+        row['macd_dif'] = dif
+        row['macd_dea'] = self.dea
+        row['macd'] = (dif - self.dea) * 2
+
+        window = self.closes[-BOLL_WINDOW:]
+        mid = float(np.mean(window))
+        std = float(np.std(window, ddof=1)) if len(window) > 1 else float('nan')
+        row['boll_mid'] = mid
+        row['boll_upper'] = mid + BOLL_K * std
+        row['boll_lower'] = mid - BOLL_K * std
+
+        self.last_date = bar_date
+        self.last_close = close
+        self.n_bars += 1
+        self.tail = (self.tail + [row])[-TAIL_ROWS:]
+        return row
+
+    def resume(self, dates: Sequence[str], closes: Sequence[float]) -> bool:
+        """
+        用请求数据续算状态
+
+        要求数据不早于锚点开始、包含 last_date 且该日收盘价未变（复权调整会改变历史价格）。
+        满足时只追加 last_date 之后的K线并返回 True；否则返回 False，由调用方全量重算并重新锚定。
+        """
+        if self.n_bars == 0 or not dates or dates[0] < self.anchor_date:
+            return False
+        pos = int(np.searchsorted(np.asarray(dates), self.last_date))
+        if pos >= len(dates) or dates[pos] != self.last_date:
+            return False
+        if not math.isclose(float(closes[pos]), self.last_close, rel_tol=1e-9, abs_tol=1e-9):
+            return False
+        for bar_date, close in zip(dates[pos + 1:], closes[pos + 1:]):
+            self.update(bar_date, close)
+        return True
+
+    def tail_frame(self) -> pd.DataFrame:
+        """最近几行指标，按日期索引"""
+        return pd.DataFrame(self.tail, columns=['date'] + INDICATOR_COLUMNS).set_index('date')
@@ -1,8 +1,10 @@
 import pandas as pd
 import yfinance as yf
 from stockstats import wrap
-from typing import Annotated
+from typing import Annotated, Any, Dict, Tuple
+from collections import OrderedDict
 import os
+import threading
 from tradingagents.config.config_manager import config_manager
 
 def get_config():
@@ -10,7 +12,95 @@ def get_config():
     return config_manager.load_settings()
 
 
+# 已加载并 wrap 的K线数据缓存：(symbol, 数据来源, 截止日期) -> (StockDataFrame, 日期键)
+# stockstats 会把计算过的指标列保存在 DataFrame 中，缓存 frame 也就缓存了指标列
+FRAME_CACHE_SIZE = int(os.getenv("STOCKSTATS_FRAME_CACHE_SIZE", "16"))
+_frame_cache: "OrderedDict[Tuple, Tuple[pd.DataFrame, pd.Series]]" = OrderedDict()
+# stockstats 计算指标时会原地添加列，同一 frame 的读写需要串行
+_frame_lock = threading.RLock()
+
+
 class StockstatsUtils:
+    @staticmethod
+    def _load_data(symbol: str, data_dir: str, online: bool, today_date: pd.Timestamp) -> pd.DataFrame:
+        if not online:
+            try:
+                return pd.read_csv(
+                    os.path.join(
+                        data_dir,
+                        f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
+                    )
+                )
+            except FileNotFoundError:
+                raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
+
+        end_date = today_date
+        start_date = today_date - pd.DateOffset(years=15)
+        start_date = start_date.strftime("%Y-%m-%d")
+        end_date = end_date.strftime("%Y-%m-%d")
+
+        # Get config and ensure cache directory exists
+        config = get_config()
+        os.makedirs(config["data_cache_dir"], exist_ok=True)
+
+        data_file = os.path.join(
+            config["data_cache_dir"],
+            f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
+        )
+
+        if os.path.exists(data_file):
+            data = pd.read_csv(data_file)
+            data["Date"] = pd.to_datetime(data["Date"])
+        else:
+            data = yf.download(
+                symbol,
+                start=start_date,
+                end=end_date,
+                multi_level_index=False,
+                progress=False,
+                auto_adjust=True,
+            )
+            data = data.reset_index()
+            data.to_csv(data_file, index=False)
+        data["Date"] = data["Date"].dt.strftime("%Y-%m-%d")
+        return data
+
+    @staticmethod
+    def get_stock_stats_frame(
+        symbol: Annotated[str, "ticker symbol for the company"],
+        data_dir: Annotated[str, "directory where the stock data is stored."],
+        online: Annotated[bool, "whether to fetch data online"] = False,
+    ) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        获取 wrap 后的K线数据及每行的日期键（YYYY-mm-dd），按 (symbol, 截止日期) 缓存
+
+        离线数据截止日期固定，在线数据截止到当天（与下载缓存文件的命名一致）。
+        """
+        today_date = pd.Timestamp.today()
+        as_of = today_date.strftime("%Y-%m-%d") if online else data_dir
+        key = (symbol, online, as_of)
+        with _frame_lock:
+            cached = _frame_cache.get(key)
+            if cached is not None:
+                _frame_cache.move_to_end(key)
+                return cached
+
+        data = StockstatsUtils._load_data(symbol, data_dir, online, today_date)
+        df = wrap(data)
+        date_keys = df["Date"].astype(str).str[:10]
+
+        with _frame_lock:
+            _frame_cache[key] = (df, date_keys)
+            _frame_cache.move_to_end(key)
+            while len(_frame_cache) > FRAME_CACHE_SIZE:
+                _frame_cache.popitem(last=False)
+        return df, date_keys
+
+    @staticmethod
+    def _indicator_column(df: pd.DataFrame, indicator: str) -> pd.Series:
+        with _frame_lock:
+            return df[indicator]  # trigger stockstats to calculate the indicator (once per frame)
+
     @staticmethod
     def get_stock_stats(
         symbol: Annotated[str, "ticker symbol for the company"],
@@ -29,63 +119,42 @@ class StockstatsUtils:
             "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
         ] = False,
     ):
-        df = None
-        data = None
+        df, date_keys = StockstatsUtils.get_stock_stats_frame(symbol, data_dir, online)
+        column = StockstatsUtils._indicator_column(df, indicator)
+        curr_date = pd.to_datetime(curr_date).strftime("%Y-%m-%d")
 
-        if not online:
-            try:
-                data = pd.read_csv(
-                    os.path.join(
-                        data_dir,
-                        f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-                    )
-                )
-                df = wrap(data)
-            except FileNotFoundError:
-                raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
+        matching = column[date_keys == curr_date]
+        if not matching.empty:
+            return matching.values[0]
         else:
-            # Get today's date as YYYY-mm-dd to add to cache
-            today_date = pd.Timestamp.today()
-            curr_date = pd.to_datetime(curr_date)
-
-            end_date = today_date
-            start_date = today_date - pd.DateOffset(years=15)
-            start_date = start_date.strftime("%Y-%m-%d")
-            end_date = end_date.strftime("%Y-%m-%d")
-
-            # Get config and ensure cache directory exists
-            config = get_config()
-            os.makedirs(config["data_cache_dir"], exist_ok=True)
-
-            data_file = os.path.join(
-                config["data_cache_dir"],
-                f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
-            )
+            return "N/A: Not a trading day (weekend or holiday)"
 
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                data["Date"] = pd.to_datetime(data["Date"])
-            else:
-                data = yf.download(
-                    symbol,
-                    start=start_date,
-                    end=end_date,
-                    multi_level_index=False,
-                    progress=False,
-                    auto_adjust=True,
-                )
-                data = data.reset_index()
-                data.to_csv(data_file, index=False)
+    @staticmethod
+    def get_stock_stats_window(
+        symbol: Annotated[str, "ticker symbol for the company"],
+        indicator: Annotated[
+            str, "quantitative indicators based off of the stock data for the company"
+        ],
+        curr_date: Annotated[str, "end date of the window, YYYY-mm-dd"],
+        look_back_days: Annotated[int, "how many calendar days to look back"],
+        data_dir: Annotated[str, "directory where the stock data is stored."],
+        online: Annotated[bool, "whether to fetch data online"] = False,
+    ) -> Dict[str, Any]:
+        """
+        一次性获取回看窗口内每个交易日的指标值：{YYYY-mm-dd: value}
 
-            df = wrap(data)
-            df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
-            curr_date = curr_date.strftime("%Y-%m-%d")
+        数据只加载一次，指标列只计算一次，再按日期切片（替代逐日调用 get_stock_stats）。
+        """
+        df, date_keys = StockstatsUtils.get_stock_stats_frame(symbol, data_dir, online)
+        column = StockstatsUtils._indicator_column(df, indicator)
 
-        df[indicator]  # trigger stockstats to calculate the indicator
-        matching_rows = df[df["Date"].str.startswith(curr_date)]
+        end = pd.to_datetime(curr_date)
+        start = (end - pd.DateOffset(days=look_back_days)).strftime("%Y-%m-%d")
+        end = end.strftime("%Y-%m-%d")
+        mask = (date_keys >= start) & (date_keys <= end)
 
-        if not matching_rows.empty:
-            indicator_value = matching_rows[indicator].values[0]
-            return indicator_value
-        else:
-            return "N/A: Not a trading day (weekend or holiday)"
+        values: Dict[str, Any] = {}
+        for date, value in zip(date_keys[mask], column[mask].values):
+            # 同一日期有多行时与 get_stock_stats 一致取第一行
+            values.setdefault(date, value)
+        return values
@@ -1,6 +1,6 @@
 # TradingAgents/graph/setup.py
 
-from typing import Dict, Any
+from typing import Dict, Any, List
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph, START
 from langgraph.prebuilt import ToolNode
@@ -16,6 +16,15 @@ from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
+# 每个分析师分支写回主图的状态字段（并行模式下分支之间互不覆盖）
+ANALYST_OUTPUT_KEYS = {
+    "market": ("market_report", "market_tool_call_count"),
+    "social": ("sentiment_report", "sentiment_tool_call_count"),
+    "news": ("news_report", "news_tool_call_count"),
+    "fundamentals": ("fundamentals_report", "fundamentals_tool_call_count"),
+}
+
+
 class GraphSetup:
     """Handles the setup and configuration of the agent graph."""
 
@@ -49,7 +58,8 @@ class GraphSetup:
         self.react_llm = react_llm
 
     def setup_graph(
-        self, selected_analysts=["market", "social", "news", "fundamentals"]
+        self, selected_analysts=["market", "social", "news", "fundamentals"],
+        parallel_analysts: bool = None,
     ):
         """Set up and compile the agent workflow graph.
 
@@ -59,10 +69,15 @@ class GraphSetup:
                 - "social": Social media analyst
                 - "news": News analyst
                 - "fundamentals": Fundamentals analyst
+            parallel_analysts (bool): Run the analysts as parallel branches joined
+                before the Bull Researcher. Defaults to config["parallel_analysts"].
         """
         if len(selected_analysts) == 0:
             raise ValueError("Trading Agents Graph Setup Error: no analysts selected!")
 
+        if parallel_analysts is None:
+            parallel_analysts = self.config.get("parallel_analysts", False)
+
         # Create analyst nodes
         analyst_nodes = {}
         delete_nodes = {}
@@ -160,12 +175,15 @@ class GraphSetup:
         workflow = StateGraph(AgentState)
 
         # Add analyst nodes to the graph
-        for analyst_type, node in analyst_nodes.items():
-            workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
-            workflow.add_node(
-                f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
+        if parallel_analysts:
+            logger.info(f"🔀 [并行分析师] 启用并行模式: {selected_analysts}")
+            self._add_parallel_analysts(
+                workflow, selected_analysts, analyst_nodes, tool_nodes
+            )
+        else:
+            self._add_sequential_analysts(
+                workflow, selected_analysts, analyst_nodes, delete_nodes, tool_nodes
             )
-            workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
 
         # Add other nodes
         workflow.add_node("Bull Researcher", bull_researcher_node)
@@ -177,32 +195,6 @@ class GraphSetup:
         workflow.add_node("Safe Analyst", safe_analyst)
         workflow.add_node("Risk Judge", risk_manager_node)
 
-        # Define edges
-        # Start with the first analyst
-        first_analyst = selected_analysts[0]
-        workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
-
-        # Connect analysts in sequence
-        for i, analyst_type in enumerate(selected_analysts):
-            current_analyst = f"{analyst_type.capitalize()} Analyst"
-            current_tools = f"tools_{analyst_type}"
-            current_clear = f"Msg Clear {analyst_type.capitalize()}"
-
-            # Add conditional edges for current analyst
-            workflow.add_conditional_edges(
-                current_analyst,
-                getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
-                [current_tools, current_clear],
-            )
-            workflow.add_edge(current_tools, current_analyst)
-
-            # Connect to next analyst or to Bull Researcher if this is the last analyst
-            if i < len(selected_analysts) - 1:
-                next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
-                workflow.add_edge(current_clear, next_analyst)
-            else:
-                workflow.add_edge(current_clear, "Bull Researcher")
-
         # Add remaining edges
         workflow.add_conditional_edges(
             "Bull Researcher",
@@ -251,3 +243,95 @@ class GraphSetup:
 
         # Compile and return
         return workflow.compile()
+
+    def _add_sequential_analysts(
+        self, workflow: StateGraph, selected_analysts: List[str],
+        analyst_nodes: Dict, delete_nodes: Dict, tool_nodes: Dict,
+    ):
+        """Chain the analysts one after another, ending at the Bull Researcher."""
+        for analyst_type, node in analyst_nodes.items():
+            workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
+            workflow.add_node(
+                f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
+            )
+            workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
+
+        # Start with the first analyst
+        first_analyst = selected_analysts[0]
+        workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
+
+        # Connect analysts in sequence
+        for i, analyst_type in enumerate(selected_analysts):
+            current_analyst = f"{analyst_type.capitalize()} Analyst"
+            current_tools = f"tools_{analyst_type}"
+            current_clear = f"Msg Clear {analyst_type.capitalize()}"
+
+            # Add conditional edges for current analyst
+            workflow.add_conditional_edges(
+                current_analyst,
+                getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
+                [current_tools, current_clear],
+            )
+            workflow.add_edge(current_tools, current_analyst)
+
+            # Connect to next analyst or to Bull Researcher if this is the last analyst
+            if i < len(selected_analysts) - 1:
+                next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
+                workflow.add_edge(current_clear, next_analyst)
+            else:
+                workflow.add_edge(current_clear, "Bull Researcher")
+
+    def _add_parallel_analysts(
+        self, workflow: StateGraph, selected_analysts: List[str],
+        analyst_nodes: Dict, tool_nodes: Dict,
+    ):
+        """Fan the analysts out as parallel branches and join them before the Bull Researcher.
+
+        Each branch runs its analyst/tool loop in its own subgraph, so tool-call
+        messages never interleave across analysts. Only the branch's report and
+        tool-call counter are written back, which keeps the parallel writes to
+        AgentState disjoint.
+        """
+        branch_names = []
+        for analyst_type in selected_analysts:
+            branch_name = f"{analyst_type.capitalize()} Analyst"
+            workflow.add_node(
+                branch_name,
+                self._create_analyst_branch(
+                    analyst_type, analyst_nodes[analyst_type], tool_nodes[analyst_type]
+                ),
+            )
+            workflow.add_edge(START, branch_name)
+            branch_names.append(branch_name)
+
+        # 所有分支完成后汇合：清理消息并进入研究员辩论
+        workflow.add_node("Msg Clear Analysts", create_msg_delete())
+        workflow.add_edge(branch_names, "Msg Clear Analysts")
+        workflow.add_edge("Msg Clear Analysts", "Bull Researcher")
+
+    def _create_analyst_branch(self, analyst_type: str, analyst_node, tool_node):
+        """Compile one analyst's tool loop as an isolated subgraph node."""
+        analyst_name = f"{analyst_type.capitalize()} Analyst"
+        tools_name = f"tools_{analyst_type}"
+        clear_name = f"Msg Clear {analyst_type.capitalize()}"
+
+        branch = StateGraph(AgentState)
+        branch.add_node(analyst_name, analyst_node)
+        branch.add_node(tools_name, tool_node)
+        branch.add_edge(START, analyst_name)
+        branch.add_conditional_edges(
+            analyst_name,
+            getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
+            {tools_name: tools_name, clear_name: END},
+        )
+        branch.add_edge(tools_name, analyst_name)
+        compiled_branch = branch.compile()
+
+        output_keys = ANALYST_OUTPUT_KEYS[analyst_type]
+
+        def run_analyst_branch(state: AgentState, config):
+            # 分支拥有独立的消息历史，只把报告与计数器写回主图
+            result = compiled_branch.invoke(dict(state), config)
+            return {key: result[key] for key in output_keys if key in result}
+
+        return run_analyst_branch
@@ -1,6 +1,7 @@
 # TradingAgents/graph/trading_graph.py
 
 import os
+import threading
 from pathlib import Path
 import json
 from datetime import date
@@ -803,14 +804,54 @@ class TradingAgentsGraph:
         self.reflector = Reflector(self.quick_thinking_llm)
         self.signal_processor = SignalProcessor(self.quick_thinking_llm)
 
-        # State tracking
-        self.curr_state = None
-        self.ticker = None
-        self.log_states_dict = {}  # date to full state dict
+        # State tracking（按线程隔离，同一实例可被多个分析任务复用）
+        self._run_state = threading.local()
 
         # Set up the graph
         self.graph = self.graph_setup.setup_graph(selected_analysts)
 
+    def _get_run_state(self):
+        """获取当前线程的运行状态（首次访问时初始化）"""
+        run_state = self._run_state
+        if not hasattr(run_state, "ticker"):
+            run_state.ticker = None
+            run_state.curr_state = None
+            run_state.task_id = None
+            run_state.log_states_dict = {}  # date to full state dict
+        return run_state
+
+    @property
+    def ticker(self):
+        return self._get_run_state().ticker
+
+    @ticker.setter
+    def ticker(self, value):
+        run_state = self._get_run_state()
+        if run_state.ticker != value:
+            # 切换股票时重新开始状态日志，避免不同股票的记录写入同一文件
+            run_state.log_states_dict = {}
+        run_state.ticker = value
+
+    @property
+    def curr_state(self):
+        return self._get_run_state().curr_state
+
+    @curr_state.setter
+    def curr_state(self, value):
+        self._get_run_state().curr_state = value
+
+    @property
+    def log_states_dict(self):
+        return self._get_run_state().log_states_dict
+
+    @property
+    def _current_task_id(self):
+        return self._get_run_state().task_id
+
+    @_current_task_id.setter
+    def _current_task_id(self, value):
+        self._get_run_state().task_id = value
+
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
         """Create tool nodes for different data sources.
 
@@ -1108,6 +1149,7 @@ class TradingAgentsGraph:
                 'Msg Clear Fundamentals': None,
                 'Msg Clear News': None,
                 'Msg Clear Social': None,
+                'Msg Clear Analysts': None,
                 # 研究员节点
                 'Bull Researcher': "🐂 看涨研究员",
                 'Bear Researcher': "🐻 看跌研究员",
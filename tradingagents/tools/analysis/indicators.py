@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
 
 import numpy as np
 import pandas as pd
 
+# 单只股票为 DataFrame（列为 open/high/low/close...）；
+# 面板为 {字段: DataFrame(行=日期, 列=股票代码)}，所有指标按列计算
+Frame = Union[pd.Series, pd.DataFrame]
+
 
 @dataclass(frozen=True)
 class IndicatorSpec:
@@ -16,10 +20,11 @@ class IndicatorSpec:
 SUPPORTED = {"ma", "ema", "macd", "rsi", "boll", "atr", "kdj"}
 
 
-def _require_cols(df: pd.DataFrame, cols: Iterable[str]):
-    missing = [c for c in cols if c not in df.columns]
+def _require_cols(df: Union[pd.DataFrame, Mapping[str, pd.DataFrame]], cols: Iterable[str]):
+    available = list(df.columns) if isinstance(df, pd.DataFrame) else list(df.keys())
+    missing = [c for c in cols if c not in available]
     if missing:
-        raise ValueError(f"DataFrame缺少必要列: {missing}, 现有列: {list(df.columns)[:10]}...")
+        raise ValueError(f"DataFrame缺少必要列: {missing}, 现有列: {available[:10]}...")
 
 
 def ma(close: pd.Series, n: int, min_periods: int = None) -> pd.Series:
@@ -69,10 +74,13 @@ def macd(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> p
         - dea: DIF的信号线（DEA）
         - macd_hist: MACD柱状图（DIF - DEA）
     """
+    return pd.DataFrame(_macd_parts(close, fast, slow, signal))
+
+
+def _macd_parts(close: Frame, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, Frame]:
     dif = ema(close, fast) - ema(close, slow)
     dea = dif.ewm(span=int(signal), adjust=False).mean()
-    hist = dif - dea
-    return pd.DataFrame({"dif": dif, "dea": dea, "macd_hist": hist})
+    return {"dif": dif, "dea": dea, "macd_hist": dif - dea}
 
 
 def rsi(close: pd.Series, n: int = 14, method: str = 'ema') -> pd.Series:
@@ -137,26 +145,40 @@ def boll(close: pd.Series, n: int = 20, k: float = 2.0, min_periods: int = None)
         - boll_upper: 上轨（中轨 + k倍标准差）
         - boll_lower: 下轨（中轨 - k倍标准差）
     """
+    return pd.DataFrame(_boll_parts(close, n=n, k=k, min_periods=min_periods))
+
+
+def _boll_parts(close: Frame, n: int = 20, k: float = 2.0, min_periods: int = None) -> Dict[str, Frame]:
     if min_periods is None:
         min_periods = 1  # 默认为1，与现有代码保持一致
-    mid = close.rolling(window=int(n), min_periods=min_periods).mean()
-    std = close.rolling(window=int(n), min_periods=min_periods).std()
-    upper = mid + k * std
-    lower = mid - k * std
-    return pd.DataFrame({"boll_mid": mid, "boll_upper": upper, "boll_lower": lower})
+    rolling = close.rolling(window=int(n), min_periods=min_periods)
+    mid = rolling.mean()
+    std = rolling.std()
+    return {"boll_mid": mid, "boll_upper": mid + k * std, "boll_lower": mid - k * std}
 
 
-def atr(high: pd.Series, low: pd.Series, close: pd.Series, n: int = 14) -> pd.Series:
+def atr(high: Frame, low: Frame, close: Frame, n: int = 14) -> Frame:
     prev_close = close.shift(1)
-    tr = pd.concat([
-        (high - low).abs(),
-        (high - prev_close).abs(),
-        (low - prev_close).abs(),
-    ], axis=1).max(axis=1)
+    # 逐元素取三者最大值（忽略NaN），Series 与面板 DataFrame 通用
+    tr = np.fmax(np.fmax((high - low).abs(), (high - prev_close).abs()), (low - prev_close).abs())
     return tr.rolling(window=int(n), min_periods=int(n)).mean()
 
 
-def kdj(high: pd.Series, low: pd.Series, close: pd.Series, n: int = 9, m1: int = 3, m2: int = 3) -> pd.DataFrame:
+def _seeded_sma(values: Frame, alpha: float, seed: float) -> Frame:
+    """
+    递推平滑 y_t = (1 - alpha) * y_{t-1} + alpha * x_t，初值为 seed
+
+    NaN 位置输出 NaN 且不推进状态，等价于在序列前补一个 seed 后做
+    ewm(adjust=False, ignore_na=True)，因此可以整列（或整个面板）向量化计算。
+    """
+    seed_row = values.iloc[:1].copy()
+    seed_row.iloc[:] = seed
+    smoothed = pd.concat([seed_row, values]).ewm(alpha=alpha, adjust=False, ignore_na=True).mean().iloc[1:]
+    smoothed.index = values.index
+    return smoothed.where(values.notna())
+
+
+def _kdj_parts(high: Frame, low: Frame, close: Frame, n: int = 9, m1: int = 3, m2: int = 3) -> Dict[str, Frame]:
     lowest_low = low.rolling(window=int(n), min_periods=int(n)).min()
     highest_high = high.rolling(window=int(n), min_periods=int(n)).max()
     rsv = (close - lowest_low) / (highest_high - lowest_low) * 100
@@ -164,91 +186,66 @@ def kdj(high: pd.Series, low: pd.Series, close: pd.Series, n: int = 9, m1: int =
     rsv = rsv.replace([np.inf, -np.inf], np.nan)
 
     # 按经典公式递推（初始化 50）
-    k = pd.Series(np.nan, index=close.index)
-    d = pd.Series(np.nan, index=close.index)
-    alpha_k = 1 / float(m1)
-    alpha_d = 1 / float(m2)
-    last_k = 50.0
-    last_d = 50.0
-    for i in range(len(close)):
-        rv = rsv.iloc[i]
-        if np.isnan(rv):
-            k.iloc[i] = np.nan
-            d.iloc[i] = np.nan
-            continue
-        curr_k = (1 - alpha_k) * last_k + alpha_k * rv
-        curr_d = (1 - alpha_d) * last_d + alpha_d * curr_k
-        k.iloc[i] = curr_k
-        d.iloc[i] = curr_d
-        last_k, last_d = curr_k, curr_d
+    k = _seeded_sma(rsv, 1 / float(m1), 50.0)
+    d = _seeded_sma(k, 1 / float(m2), 50.0)
     j = 3 * k - 2 * d
-    return pd.DataFrame({"kdj_k": k, "kdj_d": d, "kdj_j": j})
+    return {"kdj_k": k, "kdj_d": d, "kdj_j": j}
 
 
-def compute_indicator(df: pd.DataFrame, spec: IndicatorSpec) -> pd.DataFrame:
+def kdj(high: pd.Series, low: pd.Series, close: pd.Series, n: int = 9, m1: int = 3, m2: int = 3) -> pd.DataFrame:
+    return pd.DataFrame(_kdj_parts(high, low, close, n=n, m1=m1, m2=m2))
+
+
+def _indicator_columns(data: Union[pd.DataFrame, Mapping[str, pd.DataFrame]],
+                       spec: IndicatorSpec) -> Dict[str, Frame]:
+    """计算单个指标，返回 {输出列名: 数据}；data 可以是单只股票的 DataFrame 或面板"""
     name = spec.name.lower()
     params = spec.params or {}
-    out = df.copy()
 
     if name == "ma":
-        _require_cols(df, ["close"])
+        _require_cols(data, ["close"])
         n = int(params.get("n", params.get("period", 20)))
-        out[f"ma{n}"] = ma(df["close"], n)
-        return out
+        return {f"ma{n}": ma(data["close"], n)}
 
     if name == "ema":
-        _require_cols(df, ["close"])
+        _require_cols(data, ["close"])
         n = int(params.get("n", params.get("period", 20)))
-        out[f"ema{n}"] = ema(df["close"], n)
-        return out
+        return {f"ema{n}": ema(data["close"], n)}
 
     if name == "macd":
-        _require_cols(df, ["close"])
+        _require_cols(data, ["close"])
         fast = int(params.get("fast", 12))
         slow = int(params.get("slow", 26))
         signal = int(params.get("signal", 9))
-        macd_df = macd(df["close"], fast=fast, slow=slow, signal=signal)
-        for c in macd_df.columns:
-            out[c] = macd_df[c]
-        return out
+        return _macd_parts(data["close"], fast=fast, slow=slow, signal=signal)
 
     if name == "rsi":
-        _require_cols(df, ["close"])
+        _require_cols(data, ["close"])
         n = int(params.get("n", params.get("period", 14)))
-        out[f"rsi{n}"] = rsi(df["close"], n)
-        return out
+        return {f"rsi{n}": rsi(data["close"], n)}
 
     if name == "boll":
-        _require_cols(df, ["close"])
+        _require_cols(data, ["close"])
         n = int(params.get("n", 20))
         k = float(params.get("k", 2.0))
-        boll_df = boll(df["close"], n=n, k=k)
-        for c in boll_df.columns:
-            out[c] = boll_df[c]
-        return out
+        return _boll_parts(data["close"], n=n, k=k)
 
     if name == "atr":
-        _require_cols(df, ["high", "low", "close"])
+        _require_cols(data, ["high", "low", "close"])
         n = int(params.get("n", 14))
-        out[f"atr{n}"] = atr(df["high"], df["low"], df["close"], n=n)
-        return out
+        return {f"atr{n}": atr(data["high"], data["low"], data["close"], n=n)}
 
     if name == "kdj":
-        _require_cols(df, ["high", "low", "close"])
+        _require_cols(data, ["high", "low", "close"])
         n = int(params.get("n", 9))
         m1 = int(params.get("m1", 3))
         m2 = int(params.get("m2", 3))
-        kdj_df = kdj(df["high"], df["low"], df["close"], n=n, m1=m1, m2=m2)
-        for c in kdj_df.columns:
-            out[c] = kdj_df[c]
-        return out
+        return _kdj_parts(data["high"], data["low"], data["close"], n=n, m1=m1, m2=m2)
 
     raise ValueError(f"不支持的指标: {name}")
 
 
-def compute_many(df: pd.DataFrame, specs: List[IndicatorSpec]) -> pd.DataFrame:
-    if not specs:
-        return df.copy()
+def _unique_specs(specs: List[IndicatorSpec]) -> List[IndicatorSpec]:
     # 粗略去重（按 name+sorted(params)）
     def key(s: IndicatorSpec):
         p = s.params or {}
@@ -262,10 +259,34 @@ def compute_many(df: pd.DataFrame, specs: List[IndicatorSpec]) -> pd.DataFrame:
         if k not in seen:
             seen.add(k)
             unique_specs.append(s)
+    return unique_specs
+
+
+def compute_indicator(df: pd.DataFrame, spec: IndicatorSpec) -> pd.DataFrame:
+    return df.assign(**_indicator_columns(df, spec))
+
+
+def compute_many(df: pd.DataFrame, specs: List[IndicatorSpec]) -> pd.DataFrame:
+    """
+    一次计算多个指标，所有结果写入同一个输出 DataFrame（输入只复制一次，不修改原 df）
+    """
+    if not specs:
+        return df.copy()
+    columns: Dict[str, Frame] = {}
+    for s in _unique_specs(specs):
+        columns.update(_indicator_columns(df, s))
+    return df.assign(**columns)
 
-    out = df.copy()
-    for s in unique_specs:
-        out = compute_indicator(out, s)
+
+def compute_panel(panel: Mapping[str, pd.DataFrame], specs: List[IndicatorSpec]) -> Dict[str, pd.DataFrame]:
+    """
+    面板批量计算：panel 为 {字段: DataFrame(行=日期, 列=股票代码)}，至少包含所需的 high/low/close
+
+    所有股票按列同时计算，返回包含原字段与指标字段的新字典（不修改原面板）。
+    """
+    out: Dict[str, pd.DataFrame] = dict(panel)
+    for s in _unique_specs(specs):
+        out.update(_indicator_columns(panel, s))
     return out
 
 
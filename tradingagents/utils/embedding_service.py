@@ -0,0 +1,143 @@
+"""
+句向量服务 - 进程内共享的 SentenceTransformer 编码器
+- 每个模型在进程内只加载一次，所有新闻过滤器实例共用
+- 批量编码：一次前向计算处理一批文本
+- 按文本内容哈希缓存向量（LRU 淘汰），同一篇新闻被多个股票过滤时不重复编码
+- 向量统一做 L2 归一化，余弦相似度即矩阵乘积
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"  # 支持中文的轻量级模型
+DEFAULT_CACHE_SIZE = int(os.getenv("NEWS_EMBEDDING_CACHE_SIZE", "4096"))
+DEFAULT_BATCH_SIZE = int(os.getenv("NEWS_EMBEDDING_BATCH_SIZE", "64"))
+
+
+def _content_key(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SentenceEmbeddingService:
+    """线程安全的句向量编码服务（模型懒加载 + LRU 向量缓存）"""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, cache_size: int = DEFAULT_CACHE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._model = None
+        self._load_failed = False
+        self._load_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_model(self):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.model_name)
+
+    @property
+    def model(self):
+        """已加载的模型；加载失败或依赖缺失时为 None"""
+        if self._model is None and not self._load_failed:
+            with self._load_lock:
+                if self._model is None and not self._load_failed:
+                    try:
+                        logger.info(f"[句向量服务] 正在加载语义模型: {self.model_name}")
+                        self._model = self._load_model()
+                        logger.info(f"[句向量服务] ✅ 语义模型加载成功: {self.model_name}")
+                    except ImportError:
+                        logger.warning("[句向量服务] sentence-transformers未安装，跳过语义过滤")
+                        self._load_failed = True
+                    except Exception as e:
+                        logger.error(f"[句向量服务] 语义模型加载失败: {e}")
+                        self._load_failed = True
+        return self._model
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        批量编码文本，返回 L2 归一化后的向量矩阵 (len(texts), dim)
+
+        缓存未命中的文本（去重后）在一次 encode 调用中完成编码。
+        """
+        model = self.model
+        if model is None:
+            raise RuntimeError(f"语义模型不可用: {self.model_name}")
+
+        keys = [_content_key(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        with self._cache_lock:
+            for key in keys:
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    vectors[key] = vector
+
+        missing = OrderedDict((key, text) for key, text in zip(keys, texts) if key not in vectors)
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            encoded = np.asarray(
+                model.encode(list(missing.values()), batch_size=self.batch_size, show_progress_bar=False),
+                dtype=np.float32,
+            )
+            encoded = _normalize_rows(encoded.reshape(len(missing), -1))
+            with self._cache_lock:
+                for key, vector in zip(missing.keys(), encoded):
+                    vectors[key] = vector
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([vectors[key] for key in keys])
+
+    def max_similarity(self, texts: Sequence[str], anchors: np.ndarray) -> np.ndarray:
+        """每条文本与一组锚点向量（已归一化）的最大余弦相似度，一次矩阵乘积完成"""
+        if len(texts) == 0:
+            return np.empty(0, dtype=np.float32)
+        return (self.encode(texts) @ anchors.T).max(axis=1)
+
+    def cache_info(self) -> Dict[str, int]:
+        with self._cache_lock:
+            size = len(self._cache)
+        return {"size": size, "capacity": self.cache_size, "hits": self.hits, "misses": self.misses}
+
+
+_services: Dict[str, SentenceEmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: Optional[str] = None) -> SentenceEmbeddingService:
+    """获取进程内共享的句向量服务（每个模型一个实例）"""
+    model_name = model_name or DEFAULT_MODEL_NAME
+    service = _services.get(model_name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(model_name)
+            if service is None:
+                service = SentenceEmbeddingService(model_name)
+                _services[model_name] = service
+    return service
@@ -12,6 +12,7 @@ import numpy as np
 
 # 导入基础过滤器
 from .news_filter import NewsRelevanceFilter, create_news_filter, get_company_name
+from .embedding_service import get_embedding_service
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,7 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         self.use_local_model = use_local_model
         
         # 语义模型相关
+        self.embedding_service = None
         self.sentence_model = None
         self.company_embedding = None
         
@@ -47,35 +49,27 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             self._init_classification_model()
     
     def _init_semantic_model(self):
-        """初始化语义相似度模型"""
+        """初始化语义相似度模型（模型在进程内共享，只加载一次）"""
         try:
-            logger.info("[增强过滤器] 正在加载语义相似度模型...")
-            
-            # 尝试使用sentence-transformers
-            try:
-                from sentence_transformers import SentenceTransformer
-                
-                # 使用轻量级中文模型
-                model_name = "paraphrase-multilingual-MiniLM-L12-v2"  # 支持中文的轻量级模型
-                self.sentence_model = SentenceTransformer(model_name)
-                
-                # 预计算公司相关的embedding
-                company_texts = [
-                    self.company_name,
-                    f"{self.company_name}股票",
-                    f"{self.company_name}公司",
-                    f"{self.stock_code}",
-                    f"{self.company_name}业绩",
-                    f"{self.company_name}财报"
-                ]
-                
-                self.company_embedding = self.sentence_model.encode(company_texts)
-                logger.info(f"[增强过滤器] ✅ 语义模型加载成功: {model_name}")
-                
-            except ImportError:
-                logger.warning("[增强过滤器] sentence-transformers未安装，跳过语义过滤")
+            self.embedding_service = get_embedding_service()
+            self.sentence_model = self.embedding_service.model
+            if self.sentence_model is None:
                 self.use_semantic = False
-                
+                return
+
+            # 预计算公司相关的embedding
+            company_texts = [
+                self.company_name,
+                f"{self.company_name}股票",
+                f"{self.company_name}公司",
+                f"{self.stock_code}",
+                f"{self.company_name}业绩",
+                f"{self.company_name}财报"
+            ]
+
+            self.company_embedding = self.embedding_service.encode(company_texts)
+            logger.info(f"[增强过滤器] ✅ 语义模型就绪: {self.embedding_service.model_name}")
+
         except Exception as e:
             logger.error(f"[增强过滤器] 语义模型初始化失败: {e}")
             self.use_semantic = False
@@ -117,36 +111,34 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         Returns:
             float: 语义相似度评分 (0-100)
         """
+        return float(self.calculate_semantic_similarities([title], [content])[0])
+
+    def calculate_semantic_similarities(self, titles: List[str], contents: List[str]) -> np.ndarray:
+        """
+        批量计算语义相似度评分
+
+        一批新闻一次编码（命中缓存的不再编码），与公司锚点文本的相似度为一次矩阵乘积。
+
+        Returns:
+            np.ndarray: 每条新闻的语义相似度评分 (0-100)
+        """
         if not self.use_semantic or self.sentence_model is None:
-            return 0
-        
+            return np.zeros(len(titles))
+
         try:
             # 组合标题和内容的前200字符
-            text = f"{title} {content[:200]}"
-            
-            # 计算文本embedding
-            text_embedding = self.sentence_model.encode([text])
-            
-            # 计算与公司相关文本的相似度
-            similarities = []
-            for company_emb in self.company_embedding:
-                similarity = np.dot(text_embedding[0], company_emb) / (
-                    np.linalg.norm(text_embedding[0]) * np.linalg.norm(company_emb)
-                )
-                similarities.append(similarity)
-            
-            # 取最高相似度
-            max_similarity = max(similarities)
-            
-            # 转换为0-100评分
-            semantic_score = max(0, min(100, max_similarity * 100))
-            
-            logger.debug(f"[增强过滤器] 语义相似度评分: {semantic_score:.1f}")
-            return semantic_score
-            
+            texts = [f"{title} {str(content or '')[:200]}" for title, content in zip(titles, contents)]
+
+            # 取与公司相关文本的最高相似度，转换为0-100评分
+            max_similarity = self.embedding_service.max_similarity(texts, self.company_embedding)
+            semantic_scores = np.clip(max_similarity * 100, 0, 100)
+
+            logger.debug(f"[增强过滤器] 语义相似度评分: {len(texts)}条，缓存 {self.embedding_service.cache_info()}")
+            return semantic_scores
+
         except Exception as e:
             logger.error(f"[增强过滤器] 语义相似度计算失败: {e}")
-            return 0
+            return np.zeros(len(titles))
     
     def classify_news_relevance(self, title: str, content: str) -> float:
         """
@@ -202,13 +194,15 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             logger.error(f"[增强过滤器] 本地模型分类失败: {e}")
             return 0
     
-    def calculate_enhanced_relevance_score(self, title: str, content: str) -> Dict[str, float]:
+    def calculate_enhanced_relevance_score(self, title: str, content: str,
+                                           semantic_score: Optional[float] = None) -> Dict[str, float]:
         """
         计算增强相关性评分（综合多种方法）
         
         Args:
             title: 新闻标题
             content: 新闻内容
+            semantic_score: 已批量计算的语义相似度评分（为空时单独计算）
             
         Returns:
             Dict: 包含各种评分的字典
@@ -221,8 +215,9 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         
         # 2. 语义相似度评分
         if self.use_semantic:
-            semantic_score = self.calculate_semantic_similarity(title, content)
-            scores['semantic_score'] = semantic_score
+            if semantic_score is None:
+                semantic_score = self.calculate_semantic_similarity(title, content)
+            scores['semantic_score'] = float(semantic_score)
         else:
             scores['semantic_score'] = 0
         
@@ -271,13 +266,21 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         logger.info(f"[增强过滤器] 开始增强过滤，原始数量: {len(news_df)}条，最低评分阈值: {min_score}")
         
         filtered_news = []
+        rows = [row for _, row in news_df.iterrows()]
+        titles = [row.get('新闻标题', row.get('标题', '')) for row in rows]
+        contents = [row.get('新闻内容', row.get('内容', '')) for row in rows]
+
+        # 整批新闻一次计算语义相似度
+        semantic_scores = self.calculate_semantic_similarities(titles, contents) if self.use_semantic else None
         
-        for idx, row in news_df.iterrows():
-            title = row.get('新闻标题', row.get('标题', ''))
-            content = row.get('新闻内容', row.get('内容', ''))
+        for i, row in enumerate(rows):
+            title, content = titles[i], contents[i]
             
             # 计算增强评分
-            scores = self.calculate_enhanced_relevance_score(title, content)
+            scores = self.calculate_enhanced_relevance_score(
+                title, content,
+                semantic_score=semantic_scores[i] if semantic_scores is not None else None,
+            )
             
             if scores['final_score'] >= min_score:
                 row_dict = row.to_dict()